@@ -2,7 +2,7 @@ from logging.config import fileConfig
 import os
 from alembic import context
 from procure.db.models import Base
-from procure.db.engine import engine
+from procure.db.engine import get_engine, get_db_connection_string
 
 config = context.config
 
@@ -16,7 +16,7 @@ target_metadata = Base.metadata
 
 def run_migrations_offline() -> None:
     # Use DATABASE_URL from environment or fall back to engine URL
-    url = os.getenv("DATABASE_URL") or engine.url.render_as_string(hide_password=False)
+    url = os.getenv("DATABASE_URL") or get_db_connection_string()
     context.configure(
         url=url,
         target_metadata=target_metadata,
@@ -45,7 +45,7 @@ def run_migrations_online() -> None:
 
     # Use the existing engine instead of creating a new one from config
     # This avoids the need to set sqlalchemy.url in the config
-    connectable = engine.execution_options(isolation_level="AUTOCOMMIT")
+    connectable = get_engine().execution_options(isolation_level="AUTOCOMMIT")
 
     with connectable.connect() as connection:
         context.configure(
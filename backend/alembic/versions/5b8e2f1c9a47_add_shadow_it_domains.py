@@ -0,0 +1,36 @@
+"""add shadow_it_domains
+
+Revision ID: 5b8e2f1c9a47
+Revises: 0ad390f586f6
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2f1c9a47'
+down_revision: Union[str, None] = '0ad390f586f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('shadow_it_domains',
+    sa.Column('organization_id', sa.String(length=36), nullable=False),
+    sa.Column('period', sa.String(length=7), nullable=False, comment='Month of the visits (YYYY-MM)'),
+    sa.Column('domain', sa.String(length=255), nullable=False, comment='Base domain (e.g., example.com)'),
+    sa.Column('visits', sa.BigInteger(), nullable=False, comment='Estimated visits (heavy-hitter sketch)'),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.organization_id'], ),
+    sa.PrimaryKeyConstraint('organization_id', 'period', 'domain')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('shadow_it_domains')
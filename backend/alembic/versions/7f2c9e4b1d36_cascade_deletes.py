@@ -0,0 +1,74 @@
+"""cascade deletes
+
+Revision ID: 7f2c9e4b1d36
+Revises: e41b7d0c2a58
+Create Date: 2026-10-19 16:00:00.000000
+
+Each foreign key is replaced without a long lock on the tables:
+
+1. The new constraint is added under a temporary name as NOT VALID, which
+   only checks new rows and needs a brief lock.
+2. It is validated outside the migration transaction; VALIDATE CONSTRAINT
+   scans the table without blocking reads or writes.
+3. The old constraint is dropped and the new one takes its name.
+
+A rerun after an interruption drops the temporary constraints left behind
+and starts over.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f2c9e4b1d36'
+down_revision: Union[str, None] = 'e41b7d0c2a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, referenced table, referenced column), constraints use PostgreSQL's default names
+FOREIGN_KEYS = [
+    ('users', 'organization_id', 'organizations', 'organization_id'),
+    ('contracts', 'organization_id', 'organizations', 'organization_id'),
+    ('contracts', 'owner_id', 'users', 'id'),
+    ('user_device_tokens', 'user_id', 'users', 'id'),
+    ('user_activities', 'user_id', 'users', 'id'),
+    ('user_activities', 'contract_id', 'contracts', 'contract_id'),
+    ('user_activity_days', 'user_id', 'users', 'id'),
+    ('user_activity_days', 'contract_id', 'contracts', 'contract_id'),
+    ('user_activity_months', 'user_id', 'users', 'id'),
+    ('user_activity_months', 'contract_id', 'contracts', 'contract_id'),
+    ('activity_monthly_aggregates', 'contract_id', 'contracts', 'contract_id'),
+    ('activity_monthly_aggregates', 'organization_id', 'organizations', 'organization_id'),
+    ('shadow_it_domains', 'organization_id', 'organizations', 'organization_id'),
+]
+
+
+def _recreate_foreign_keys(ondelete: Union[str, None]) -> None:
+    for table, column, referred_table, referred_column in FOREIGN_KEYS:
+        temporary_name = f'{table}_{column}_fkey_new'
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {temporary_name}')
+        op.create_foreign_key(
+            temporary_name, table, referred_table, [column], [referred_column],
+            ondelete=ondelete, postgresql_not_valid=True
+        )
+
+    with op.get_context().autocommit_block():
+        for table, column, _, _ in FOREIGN_KEYS:
+            op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {table}_{column}_fkey_new')
+
+    for table, column, _, _ in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.execute(f'ALTER TABLE {table} RENAME CONSTRAINT {name}_new TO {name}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _recreate_foreign_keys('CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recreate_foreign_keys(None)
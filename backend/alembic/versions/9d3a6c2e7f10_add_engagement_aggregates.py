@@ -0,0 +1,46 @@
+"""add engagement aggregates
+
+Revision ID: 9d3a6c2e7f10
+Revises: 5b8e2f1c9a47
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3a6c2e7f10'
+down_revision: Union[str, None] = '5b8e2f1c9a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_activity_days',
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('contract_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('visits', sa.Integer(), nullable=False, comment='URL visit entries matched to the contract that day'),
+    sa.ForeignKeyConstraint(['contract_id'], ['contracts.contract_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'contract_id', 'day')
+    )
+    op.create_table('user_activity_months',
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('contract_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=7), nullable=False, comment='Month (YYYY-MM)'),
+    sa.Column('active_days', sa.Integer(), nullable=False, comment='Bitmask of active days, bit 0 is the 1st'),
+    sa.ForeignKeyConstraint(['contract_id'], ['contracts.contract_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'contract_id', 'period')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_activity_months')
+    op.drop_table('user_activity_days')
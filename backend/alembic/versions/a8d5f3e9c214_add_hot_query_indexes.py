@@ -0,0 +1,54 @@
+"""add hot query indexes
+
+Revision ID: a8d5f3e9c214
+Revises: 7f2c9e4b1d36
+Create Date: 2026-10-19 18:00:00.000000
+
+Indexes are built with CREATE INDEX CONCURRENTLY, outside the migration
+transaction, so writes to the tables are not blocked while they build.
+IF [NOT] EXISTS makes a rerun after an interrupted build safe; an invalid
+index left by a failed concurrent build has to be dropped by hand first.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d5f3e9c214'
+down_revision: Union[str, None] = '7f2c9e4b1d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, covering columns)
+INDEXES = [
+    ('ix_users_organization_id', 'users', ['organization_id'], None),
+    ('ix_contracts_organization_id_vendor_domain', 'contracts', ['organization_id', 'vendor_domain'], ['contract_id', 'product_url']),
+    ('ix_contracts_owner_id', 'contracts', ['owner_id'], None),
+    ('ix_user_activities_user_id_contract_id_date', 'user_activities', ['user_id', 'contract_id', 'date'], None),
+    ('ix_user_activities_contract_id_date', 'user_activities', ['contract_id', 'date'], ['user_id']),
+    ('ix_user_activities_date', 'user_activities', ['date'], None),
+    ('ix_user_device_tokens_user_id_device_id', 'user_device_tokens', ['user_id', 'device_id'], None),
+    ('ix_user_activity_days_contract_id_day', 'user_activity_days', ['contract_id', 'day'], ['visits']),
+    ('ix_user_activity_months_contract_id_period', 'user_activity_months', ['contract_id', 'period'], ['active_days']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns, include in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_include=include or [],
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
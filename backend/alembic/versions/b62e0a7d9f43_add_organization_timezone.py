@@ -0,0 +1,28 @@
+"""add organization timezone
+
+Revision ID: b62e0a7d9f43
+Revises: a8d5f3e9c214
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b62e0a7d9f43'
+down_revision: Union[str, None] = 'a8d5f3e9c214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('organizations', sa.Column('timezone', sa.String(length=64), server_default='UTC', nullable=False, comment='IANA time zone of activity months and days'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('organizations', 'timezone')
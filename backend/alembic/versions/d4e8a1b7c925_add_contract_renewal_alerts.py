@@ -0,0 +1,56 @@
+"""add contract renewal alerts
+
+Revision ID: d4e8a1b7c925
+Revises: b62e0a7d9f43
+Create Date: 2026-10-19 22:00:00.000000
+
+The contracts expiry index is built with CREATE INDEX CONCURRENTLY, outside
+the migration transaction, like the other indexes on existing tables.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e8a1b7c925'
+down_revision: Union[str, None] = 'b62e0a7d9f43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('contract_renewal_alerts',
+    sa.Column('alert_id', sa.Integer(), nullable=False),
+    sa.Column('contract_id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.String(length=36), nullable=True),
+    sa.Column('expire_at', sa.DateTime(timezone=True), nullable=False, comment='Contract expiry the alert is about'),
+    sa.Column('window_days', sa.Integer(), nullable=False, comment='Days-before-expiry window the contract entered'),
+    sa.Column('active_users', sa.Integer(), nullable=False, comment='Distinct users in the utilization window at the scan'),
+    sa.Column('num_seats', sa.Integer(), nullable=False, comment='Seats at the scan'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['contract_id'], ['contracts.contract_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.organization_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('alert_id'),
+    sa.UniqueConstraint('contract_id', 'expire_at', 'window_days', name='uq_contract_renewal_alert')
+    )
+    op.create_index('ix_contract_renewal_alerts_organization_id_expire_at', 'contract_renewal_alerts', ['organization_id', 'expire_at'], unique=False)
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_contracts_expire_at_contract_id', 'contracts', ['expire_at', 'contract_id'], unique=False,
+            postgresql_where=sa.text('expire_at IS NOT NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_contracts_expire_at_contract_id', table_name='contracts', postgresql_concurrently=True, if_exists=True)
+
+    op.drop_index('ix_contract_renewal_alerts_organization_id_expire_at', table_name='contract_renewal_alerts')
+    op.drop_table('contract_renewal_alerts')
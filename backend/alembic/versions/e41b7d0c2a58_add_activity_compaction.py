@@ -0,0 +1,49 @@
+"""add activity compaction
+
+Revision ID: e41b7d0c2a58
+Revises: 9d3a6c2e7f10
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41b7d0c2a58'
+down_revision: Union[str, None] = '9d3a6c2e7f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('activity_monthly_aggregates',
+    sa.Column('contract_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=7), nullable=False, comment='Month (YYYY-MM)'),
+    sa.Column('organization_id', sa.String(length=36), nullable=True),
+    sa.Column('active_users', sa.Integer(), nullable=False, comment='Distinct users with activity that month'),
+    sa.Column('activities', sa.Integer(), nullable=False, comment='Raw user_activities rows rolled up'),
+    sa.ForeignKeyConstraint(['contract_id'], ['contracts.contract_id'], ),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.organization_id'], ),
+    sa.PrimaryKeyConstraint('contract_id', 'period')
+    )
+    op.create_index(op.f('ix_activity_monthly_aggregates_organization_id'), 'activity_monthly_aggregates', ['organization_id'], unique=False)
+    op.create_table('activity_compaction_checkpoints',
+    sa.Column('period', sa.String(length=7), nullable=False, comment='Month (YYYY-MM)'),
+    sa.Column('status', sa.String(length=20), nullable=False, comment='deleting or done'),
+    sa.Column('max_activity_id', sa.Integer(), nullable=False, comment='Last activity_id of the current pass'),
+    sa.Column('aggregated_rows', sa.Integer(), nullable=False, comment='Rows rolled up by the current pass'),
+    sa.Column('deleted_rows', sa.Integer(), nullable=False, comment='Rows deleted by the current pass'),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('period')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('activity_compaction_checkpoints')
+    op.drop_index(op.f('ix_activity_monthly_aggregates_organization_id'), table_name='activity_monthly_aggregates')
+    op.drop_table('activity_monthly_aggregates')
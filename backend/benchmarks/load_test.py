@@ -0,0 +1,494 @@
+"""
+Fleet-scale load test for the proCure backend.
+
+Simulates N browser extensions running the chrome-extension sync cycle
+against the FastAPI app: each extension fires ``BackgroundSync.syncDomainEntries``
+on a 2-hour alarm after a random initial delay of 0-120 minutes, sending the
+hostnames visited since its last sync, and retries failed syncs. Dashboard
+(contract-usage + organization name) and contract upsert traffic from org
+admins is mixed in.
+
+The simulated timeline is replayed compressed by --time-scale, so e.g. a
+2-hour window at --time-scale 240 runs in 30 seconds of wall time. If the
+backend cannot keep up, requests start late; the report includes that
+schedule lag, which is the clearest saturation signal.
+
+By default the app runs in-process (httpx ASGI transport, i.e. one worker)
+against a temporary SQLite database. Pass --database-url to run against a
+local Postgres instead, and --base-url to drive an already-running server
+(seeded through --database-url).
+
+Usage (from the backend directory):
+    python -m benchmarks.load_test --users 2000 --orgs 20
+    python -m benchmarks.load_test --users 5000 --database-url postgresql://...
+    python -m benchmarks.load_test --users 2000 --compare benchmarks/results/<previous>.json
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import secrets
+import statistics
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.reporting import git_revision, load_results, percent_delta, save_results
+from procure.db.engine import Base
+from procure.db.models import Contract, Organization, User, UserDeviceToken
+
+SYNC_PERIOD_MINUTES = 120  # chrome.alarms periodInMinutes for syncDomainEntries
+RETRY_DELAY_MINUTES = 1
+
+# SaaS vendors contracted by the simulated orgs (product host, vendor domain)
+VENDORS = [
+    ("Google Workspace", "mail.google.com", "google.com"),
+    ("Slack", "app.slack.com", "slack.com"),
+    ("Zoom", "zoom.us", "zoom.us"),
+    ("Notion", "www.notion.so", "notion.so"),
+    ("Figma", "www.figma.com", "figma.com"),
+    ("GitHub", "github.com", "github.com"),
+    ("Atlassian", "id.atlassian.com", "atlassian.com"),
+    ("Salesforce", "login.salesforce.com", "salesforce.com"),
+    ("HubSpot", "app.hubspot.com", "hubspot.com"),
+    ("Dropbox", "www.dropbox.com", "dropbox.com"),
+    ("Asana", "app.asana.com", "asana.com"),
+    ("Miro", "miro.com", "miro.com"),
+    ("Linear", "linear.app", "linear.app"),
+    ("Airtable", "airtable.com", "airtable.com"),
+    ("DocuSign", "app.docusign.com", "docusign.com"),
+]
+
+# Hostnames that never match a contract (news, search, etc.)
+UNMATCHED_HOSTS = [f"www.site{i}.com" for i in range(500)] + [
+    "www.google.com", "news.ycombinator.com", "www.wikipedia.org", "www.youtube.com"
+]
+
+# Request counter for the request currently being served (in-process only)
+_current_query_count: ContextVar[Optional[List[int]]] = ContextVar("current_query_count", default=None)
+
+
+@dataclass
+class SimulatedUser:
+    user_id: str
+    organization_id: str
+    token: str
+    is_admin: bool
+    last_sync_ms: int = 0
+
+
+@dataclass
+class RequestResult:
+    kind: str
+    status: int
+    latency_ms: float
+    queries: Optional[int]
+    lag_ms: float
+
+
+@dataclass
+class LoadTestResults:
+    results: List[RequestResult] = field(default_factory=list)
+    failed_syncs: int = 0
+    wall_seconds: float = 0.0
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def seed_database(session_factory, num_orgs: int, num_users: int, contracts_per_org: int, rng: random.Random):
+    """
+    Create orgs, users (one admin per org), device tokens and contracts.
+
+    Returns:
+        The simulated users
+    """
+    organizations = []
+    users = []
+    tokens = []
+    contracts = []
+    simulated = []
+
+    for org_index in range(num_orgs):
+        organization_id = f"org_load{org_index:028d}"
+        organizations.append({
+            "organization_id": organization_id,
+            "domain_name": f"loadtest{org_index}.example.com",
+            "company_name": f"Load Test {org_index}",
+            "admins_remaining": 10,
+            "members_remaining": 100000
+        })
+        for vendor_name, host, vendor_domain in rng.sample(VENDORS, min(contracts_per_org, len(VENDORS))):
+            contracts.append({
+                "vendor_name": vendor_name,
+                "product_url": f"https://{host}",
+                "vendor_domain": vendor_domain,
+                "organization_id": organization_id,
+                "annual_spend": rng.randint(1, 500) * 100,
+                "num_seats": rng.randint(5, 500)
+            })
+
+    for user_index in range(num_users):
+        org_index = user_index % num_orgs
+        organization_id = organizations[org_index]["organization_id"]
+        is_admin = user_index < num_orgs  # First user of each org is its admin
+        user_id = str(uuid.UUID(int=user_index + 1))
+        token = secrets.token_urlsafe(32)
+        users.append({
+            "id": user_id,
+            "email": f"user{user_index}@loadtest{org_index}.example.com",
+            "hashed_password": None,
+            "is_active": True,
+            "is_superuser": is_admin,
+            "is_verified": True,
+            "organization_id": organization_id,
+            "role": "admin" if is_admin else "member"
+        })
+        tokens.append({"user_id": user_id, "device_id": f"device-{user_index}", "token": token})
+        simulated.append(SimulatedUser(user_id, organization_id, token, is_admin))
+
+    with session_factory() as session:
+        session.execute(insert(Organization), organizations)
+        session.execute(insert(User), users)
+        session.execute(insert(UserDeviceToken), tokens)
+        session.execute(insert(Contract), contracts)
+        session.commit()
+
+    return simulated
+
+
+def build_sync_payload(user: SimulatedUser, now_ms: int, rng: random.Random, vendor_hosts: List[str]) -> Dict:
+    """Build a syncDomainEntries payload: unique hostnames visited since the last sync."""
+    num_hosts = rng.randint(5, 60)
+    hosts = set()
+    while len(hosts) < num_hosts:
+        if rng.random() < 0.3:
+            hosts.add(rng.choice(vendor_hosts))
+        else:
+            hosts.add(rng.choice(UNMATCHED_HOSTS))
+    window_start = user.last_sync_ms or now_ms - SYNC_PERIOD_MINUTES * 60_000
+    return {
+        "entries": [
+            {
+                "url": f"https://{hostname}/",
+                "timestamp": rng.randint(window_start, now_ms),
+                "browser": "Chrome"
+            }
+            for hostname in hosts
+        ]
+    }
+
+
+def build_schedule(users: List[SimulatedUser], args, rng: random.Random):
+    """
+    Build the (virtual minute, kind, user) event schedule.
+
+    Kinds: "sync" for extension syncs, "dashboard" and "contract" for admin traffic.
+    """
+    schedule = []
+    for user in users:
+        minute = rng.uniform(0, SYNC_PERIOD_MINUTES)  # delayInMinutes: random 0-120
+        while minute < args.duration_minutes:
+            schedule.append((minute, "sync", user))
+            minute += args.sync_period_minutes
+
+    admins = [user for user in users if user.is_admin]
+    for admin in admins:
+        minute = rng.uniform(0, args.dashboard_interval_minutes)
+        while minute < args.duration_minutes:
+            schedule.append((minute, "dashboard", admin))
+            minute += rng.expovariate(1 / args.dashboard_interval_minutes)
+        minute = rng.expovariate(args.contracts_per_admin_hour / 60) if args.contracts_per_admin_hour else args.duration_minutes
+        while minute < args.duration_minutes:
+            schedule.append((minute, "contract", admin))
+            minute += rng.expovariate(args.contracts_per_admin_hour / 60)
+
+    schedule.sort(key=lambda event: event[0])
+    return schedule
+
+
+async def timed_request(client, results: LoadTestResults, kind: str, lag_ms: float, method: str, url: str, **kwargs):
+    """Send a request and record its latency and query count."""
+    counter = [0]
+    token = _current_query_count.set(counter)
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        status = response.status_code
+        headers = response.headers
+    except httpx.HTTPError:
+        status = 0
+        headers = {}
+    finally:
+        _current_query_count.reset(token)
+    latency_ms = (time.perf_counter() - start) * 1000
+    queries = counter[0] if results_track_queries(client) else None
+    results.results.append(RequestResult(kind, status, latency_ms, queries, lag_ms))
+    return status, headers
+
+
+def results_track_queries(client) -> bool:
+    return isinstance(client._transport, httpx.ASGITransport)
+
+
+async def run_sync(client, user: SimulatedUser, args, rng, results, vendor_hosts, virtual_now_ms, lag_ms):
+    """Run one extension sync, retrying failures like a flaky network would."""
+    payload = build_sync_payload(user, virtual_now_ms, rng, vendor_hosts)
+    headers = {"Authorization": f"Bearer {user.token}"}
+    for attempt in range(args.max_retries + 1):
+        status, response_headers = await timed_request(
+            client, results, "url-visits" if attempt == 0 else "url-visits-retry", lag_ms,
+            "POST", "/api/v1/url-visits", json=payload, headers=headers
+        )
+        if 200 <= status < 300:
+            user.last_sync_ms = virtual_now_ms
+            return
+        retry_after = response_headers.get("retry-after") if response_headers else None
+        delay_minutes = float(retry_after) / 60 if retry_after else RETRY_DELAY_MINUTES * (2 ** attempt)
+        await asyncio.sleep(delay_minutes * 60 / args.time_scale)
+    results.failed_syncs += 1
+
+
+async def run_dashboard(client, user: SimulatedUser, results, lag_ms):
+    headers = {"Authorization": f"Bearer {user.token}"}
+    await timed_request(
+        client, results, "contract-usage", lag_ms,
+        "GET", f"/api/v1/organizations/{user.organization_id}/contract-usage", headers=headers
+    )
+    await timed_request(
+        client, results, "organization-name", lag_ms,
+        "GET", f"/api/v1/organizations/{user.organization_id}/name", headers=headers
+    )
+
+
+async def run_contract(client, user: SimulatedUser, rng, results, lag_ms):
+    headers = {"Authorization": f"Bearer {user.token}"}
+    suffix = rng.randint(0, 10_000_000)
+    payload = {
+        "vendor_name": f"Vendor {suffix}",
+        "product_url": f"https://app.vendor{suffix}.com",
+        "organization_id": user.organization_id,
+        "annual_spend": rng.randint(1, 500) * 100,
+        "num_seats": rng.randint(1, 200)
+    }
+    await timed_request(client, results, "contract", lag_ms, "POST", "/api/v1/contract", json=payload, headers=headers)
+
+
+async def replay(client, schedule, args, rng, vendor_hosts) -> LoadTestResults:
+    """Replay the schedule, compressing virtual time by args.time_scale."""
+    results = LoadTestResults()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    start_wall = time.perf_counter()
+    start_virtual_ms = int(time.time() * 1000)
+    tasks = []
+
+    async def dispatch(minute, kind, user):
+        async with semaphore:
+            lag_ms = max(0.0, (time.perf_counter() - start_wall) - minute * 60 / args.time_scale) * 1000
+            virtual_now_ms = start_virtual_ms + int(minute * 60_000)
+            if kind == "sync":
+                await run_sync(client, user, args, rng, results, vendor_hosts, virtual_now_ms, lag_ms)
+            elif kind == "dashboard":
+                await run_dashboard(client, user, results, lag_ms)
+            else:
+                await run_contract(client, user, rng, results, lag_ms)
+
+    for minute, kind, user in schedule:
+        delay = minute * 60 / args.time_scale - (time.perf_counter() - start_wall)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(dispatch(minute, kind, user)))
+
+    await asyncio.gather(*tasks)
+    results.wall_seconds = time.perf_counter() - start_wall
+    return results
+
+
+def summarize(results: LoadTestResults, args) -> Dict:
+    """Aggregate per-endpoint throughput, latency percentiles and queries per request."""
+    by_kind = defaultdict(list)
+    for result in results.results:
+        by_kind[result.kind].append(result)
+
+    endpoints = {}
+    for kind, kind_results in sorted(by_kind.items()):
+        latencies = [r.latency_ms for r in kind_results]
+        queries = [r.queries for r in kind_results if r.queries is not None]
+        statuses = defaultdict(int)
+        for r in kind_results:
+            statuses[str(r.status)] += 1
+        endpoints[kind] = {
+            "requests": len(kind_results),
+            "throughput_rps": round(len(kind_results) / results.wall_seconds, 2) if results.wall_seconds else 0,
+            "errors": sum(1 for r in kind_results if not 200 <= r.status < 300),
+            "statuses": dict(statuses),
+            "latency_ms": {
+                "mean": round(statistics.fmean(latencies), 3),
+                "p50": round(percentile(latencies, 50), 3),
+                "p90": round(percentile(latencies, 90), 3),
+                "p95": round(percentile(latencies, 95), 3),
+                "p99": round(percentile(latencies, 99), 3),
+                "max": round(max(latencies), 3)
+            },
+            "queries_per_request": round(statistics.fmean(queries), 2) if queries else None
+        }
+
+    lags = [r.lag_ms for r in results.results]
+    sync_latency = endpoints.get("url-visits", {}).get("latency_ms", {}).get("mean")
+    return {
+        "total_requests": len(results.results),
+        "wall_seconds": round(results.wall_seconds, 3),
+        "throughput_rps": round(len(results.results) / results.wall_seconds, 2) if results.wall_seconds else 0,
+        "failed_syncs": results.failed_syncs,
+        "schedule_lag_ms": {"p50": round(percentile(lags, 50), 3), "p95": round(percentile(lags, 95), 3)},
+        # Rough single-worker ceiling: one 2-hour sync per extension at the mean sync latency
+        "estimated_extensions_per_worker": int(SYNC_PERIOD_MINUTES * 60_000 / sync_latency) if sync_latency else None,
+        "endpoints": endpoints
+    }
+
+
+def compare_results(report: Dict, previous_path: str):
+    """Print throughput and latency deltas against a previous run."""
+    previous = load_results(previous_path)
+
+    print(f"\nCompared with {previous_path} ({previous.get('git_revision')}):")
+    print(f"  throughput: {report['summary']['throughput_rps']} rps "
+          f"({percent_delta(report['summary']['throughput_rps'], previous['summary']['throughput_rps'])})")
+    for kind, stats in report["summary"]["endpoints"].items():
+        old = previous["summary"]["endpoints"].get(kind)
+        if not old:
+            continue
+        print(f"  {kind}: p95 {stats['latency_ms']['p95']} ms "
+              f"({percent_delta(stats['latency_ms']['p95'], old['latency_ms']['p95'])}), "
+              f"queries/request {stats['queries_per_request']} (was {old['queries_per_request']})")
+
+
+def print_report(summary: Dict):
+    print(f"\nRequests: {summary['total_requests']} in {summary['wall_seconds']} s "
+          f"({summary['throughput_rps']} rps), failed syncs: {summary['failed_syncs']}")
+    print(f"Schedule lag p50/p95: {summary['schedule_lag_ms']['p50']} / {summary['schedule_lag_ms']['p95']} ms")
+    print(f"Estimated extensions per worker: {summary['estimated_extensions_per_worker']}")
+    print(f"\n{'endpoint':<20}{'reqs':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}")
+    for kind, stats in summary["endpoints"].items():
+        latency = stats["latency_ms"]
+        print(f"{kind:<20}{stats['requests']:>8}{stats['errors']:>6}{stats['throughput_rps']:>9}"
+              f"{latency['p50']:>9}{latency['p95']:>9}{latency['p99']:>9}{str(stats['queries_per_request']):>9}")
+
+
+def make_engine(database_url: Optional[str]):
+    """Create the benchmark database engine (a temporary SQLite file by default)."""
+    if database_url:
+        return create_engine(database_url, pool_size=20, max_overflow=10), None
+    handle, path = tempfile.mkstemp(prefix="procure_load_test_", suffix=".db")
+    os.close(handle)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+    return engine, path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate a fleet of browser extensions syncing with the backend.")
+    parser.add_argument("--users", type=int, default=1000, help="Number of simulated extension users")
+    parser.add_argument("--orgs", type=int, default=10, help="Number of organizations")
+    parser.add_argument("--contracts-per-org", type=int, default=10, help="Contracts per organization")
+    parser.add_argument("--duration-minutes", type=float, default=SYNC_PERIOD_MINUTES, help="Simulated minutes")
+    parser.add_argument("--sync-period-minutes", type=float, default=SYNC_PERIOD_MINUTES, help="Sync alarm period")
+    parser.add_argument("--time-scale", type=float, default=240, help="Virtual seconds per wall second")
+    parser.add_argument("--concurrency", type=int, default=200, help="Maximum requests in flight")
+    parser.add_argument("--max-retries", type=int, default=2, help="Retries per failed sync")
+    parser.add_argument("--dashboard-interval-minutes", type=float, default=15, help="Mean minutes between dashboard loads per admin")
+    parser.add_argument("--contracts-per-admin-hour", type=float, default=0.5, help="Contract upserts per admin per hour")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--database-url", help="Run against this database (default: temporary SQLite)")
+    parser.add_argument("--create-schema", action="store_true", help="Create tables in --database-url before seeding")
+    parser.add_argument("--base-url", help="Drive a running server instead of the in-process app")
+    parser.add_argument("--output", help="Where to save the JSON results (default: benchmarks/results/)")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    return parser.parse_args(argv)
+
+
+async def main_async(args):
+    rng = random.Random(args.seed)
+    engine, sqlite_path = make_engine(args.database_url)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        counter = _current_query_count.get()
+        if counter is not None:
+            counter[0] += 1
+
+    if sqlite_path or args.create_schema:
+        Base.metadata.create_all(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    print(f"Seeding {args.orgs} orgs and {args.users} users...")
+    users = seed_database(session_factory, args.orgs, args.users, args.contracts_per_org, rng)
+    vendor_hosts = [host for _, host, _ in VENDORS]
+    schedule = build_schedule(users, args, rng)
+    print(f"Replaying {len(schedule)} scheduled events over {args.duration_minutes} simulated minutes "
+          f"(~{args.duration_minutes * 60 / args.time_scale:.0f} s wall)...")
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        from procure.server.main import create_app
+        from procure.utils.db_utils import get_db, get_read_db
+
+        def get_benchmark_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app = create_app()
+        app.dependency_overrides[get_db] = get_benchmark_db
+        app.dependency_overrides[get_read_db] = get_benchmark_db
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=60)
+
+    try:
+        async with client:
+            results = await replay(client, schedule, args, rng, vendor_hosts)
+    finally:
+        engine.dispose()
+        if sqlite_path:
+            os.remove(sqlite_path)
+
+    summary = summarize(results, args)
+    report = {
+        "benchmark": "load_test",
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "database": "postgresql" if args.database_url else "sqlite",
+        "summary": summary
+    }
+    print_report(summary)
+    path = save_results(report, "load_test", args.output)
+    print(f"\nResults saved to {path}")
+    if args.compare:
+        compare_results(report, args.compare)
+    return report
+
+
+def main(argv=None):
+    return asyncio.run(main_async(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
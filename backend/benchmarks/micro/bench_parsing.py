@@ -0,0 +1,32 @@
+"""
+Micro-benchmarks for URL helpers and url-visits request parsing.
+"""
+
+import orjson
+
+from procure.server.url_visits.batch import decode_url_visit_batch
+from procure.server.url_visits.schemas import UrlVisitLog
+from procure.server.utils import normalize_url, get_base_domain
+
+
+def test_normalize_url(benchmark, entries):
+    urls = [entry["url"] for entry in entries]
+    benchmark(lambda: [normalize_url(url) for url in urls])
+
+
+def test_get_base_domain(benchmark, entries):
+    urls = [entry["url"] for entry in entries]
+    benchmark(lambda: [get_base_domain(url) for url in urls])
+
+
+def test_url_visit_log_parsing(benchmark, entries):
+    payload = {"entries": entries}
+    result = benchmark(UrlVisitLog.model_validate, payload)
+    assert len(result.entries) == len(entries)
+
+
+def test_url_visit_batch_decoding(benchmark, entries):
+    """The ingest path: raw JSON bytes to a columnar batch."""
+    body = orjson.dumps({"entries": entries})
+    result = benchmark(decode_url_visit_batch, body, len(entries))
+    assert len(result) == len(entries)
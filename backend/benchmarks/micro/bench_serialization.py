@@ -0,0 +1,74 @@
+"""
+Micro-benchmarks for serializing a contract usage response.
+
+Compares FastAPI's default handling of a returned model (validation against
+``response_model``, dump to a dict, stdlib ``json`` encoding) with the fast
+path of FastResponseRoute and FastJSONResponse (pydantic-core straight to
+bytes). Building the model, which validates the data once, is common to
+both and measured on its own.
+"""
+
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from procure.server.analytics.schemas import ContractUsageResponse
+from procure.server.responses import FastJSONResponse
+
+
+def run_coroutine(coroutine):
+    """Run a coroutine that never suspends without the overhead of an event loop."""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("Coroutine suspended")
+
+
+@pytest.fixture(params=[10, 1000], ids=lambda count: f"contracts{count}")
+def usage_payload(request):
+    """A contract usage result as returned by get_contract_usage_by_org_id."""
+    return {
+        "organization_id": "org_benchmark",
+        "company_name": "Benchmark Corp",
+        "contracts": [
+            {
+                "contract_id": i,
+                "vendor_name": f"Vendor {i}",
+                "active_users": i % 250,
+                "total_seats": 250,
+                "annual_spend": 1200.0 + i
+            }
+            for i in range(request.param)
+        ]
+    }
+
+
+@pytest.fixture
+def response_field():
+    async def endpoint():
+        pass
+
+    return APIRoute("/usage", endpoint, response_model=ContractUsageResponse).response_field
+
+
+def test_build_usage_model(benchmark, usage_payload):
+    result = benchmark(ContractUsageResponse, **usage_payload)
+    assert len(result.contracts) == len(usage_payload["contracts"])
+
+
+def test_fastapi_default_serialization(benchmark, usage_payload, response_field):
+    model = ContractUsageResponse(**usage_payload)
+
+    def respond():
+        content = run_coroutine(serialize_response(field=response_field, response_content=model))
+        return JSONResponse(content)
+
+    response = benchmark(respond)
+    assert response.body.startswith(b'{"organization_id"')
+
+
+def test_fast_response_serialization(benchmark, usage_payload):
+    model = ContractUsageResponse(**usage_payload)
+    response = benchmark(FastJSONResponse, model)
+    assert response.body.startswith(b'{"organization_id"')
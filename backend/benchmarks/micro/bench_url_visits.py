@@ -0,0 +1,84 @@
+"""
+Micro-benchmarks for the CPU-side stages of process_url_visits.
+
+The database is mocked, so these measure only the Python work done per
+batch: building an organization's vendor matcher, matching entries against
+it, the contract metadata map, filtering and building the user_activities
+rows.
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from procure.db.core import (
+    match_entry_contracts,
+    build_contract_metadata,
+    select_new_activity_entries,
+    build_activity_rows,
+    process_url_visits
+)
+from procure.utils.url_visit_batch import UrlVisitBatch
+from procure.db.vendor_matcher import VendorMatcher, contract_host, get_vendor_matcher
+
+
+@pytest.fixture
+def batch(entries):
+    return UrlVisitBatch.from_entries(entries)
+
+
+@pytest.fixture
+def contract_hosts(contract_rows):
+    return [(contract_id, contract_host(product_url, vendor_domain)) for contract_id, product_url, vendor_domain in contract_rows]
+
+
+@pytest.fixture
+def matcher(contract_hosts):
+    return VendorMatcher(contract_hosts)
+
+
+def test_build_vendor_matcher(benchmark, contract_hosts):
+    result = benchmark(VendorMatcher, contract_hosts)
+    assert result
+
+
+def test_match_entry_contracts(benchmark, batch, matcher):
+    result = benchmark(match_entry_contracts, batch, matcher)
+    assert len(result) == len(batch)
+
+
+def test_build_contract_metadata(benchmark, batch, matcher):
+    entry_contracts = match_entry_contracts(batch, matcher)
+    result = benchmark(build_contract_metadata, batch, entry_contracts)
+    assert result
+
+
+def test_select_new_activity_entries(benchmark, batch, matcher, existing_contract_ids):
+    contract_to_index = build_contract_metadata(batch, match_entry_contracts(batch, matcher))
+    benchmark(select_new_activity_entries, contract_to_index, existing_contract_ids)
+
+
+def test_build_activity_rows(benchmark, batch, matcher):
+    contract_to_index = build_contract_metadata(batch, match_entry_contracts(batch, matcher))
+    matched = select_new_activity_entries(contract_to_index, set())
+    benchmark(build_activity_rows, "user-1", batch, matched)
+
+
+def test_process_url_visits(benchmark, batch, contract_rows, existing_contract_ids):
+    """The whole function with every query answered by a mock and the matcher cached."""
+    user = MagicMock(id="user-1", organization_id="org-1")
+    existing_rows = [(contract_id,) for contract_id in existing_contract_ids]
+
+    # Steady state: the organization's matcher is already cached
+    warm_db = MagicMock()
+    warm_db.execute.return_value.fetchall.return_value = contract_rows
+    get_vendor_matcher(warm_db, user.organization_id)
+
+    def run():
+        db = MagicMock()
+        db.scalars.return_value.one_or_none.return_value = user
+        db.execute.return_value.fetchall.return_value = existing_rows
+        return process_url_visits(db, "user@example.com", batch)
+
+    result = benchmark(run)
+    assert result["success"]
@@ -0,0 +1,56 @@
+"""
+Fixtures for the url-visits micro-benchmarks.
+
+Batches are generated from a fixed seed so that runs are comparable: each
+entry is a hostname payload as sent by the extension, a share of which hits
+one of the organization's contracted vendors.
+"""
+
+import random
+
+import pytest
+
+BATCH_SIZES = [10, 1000, 50000]
+
+VENDOR_DOMAINS = [f"vendor{i}.com" for i in range(200)]
+OTHER_DOMAINS = [f"site{i}.com" for i in range(5000)] + [f"site{i}.co.uk" for i in range(1000)]
+SUBDOMAINS = ["www", "app", "login", "mail", "docs", "eu.app"]
+
+
+def make_entries(batch_size: int, seed: int = 42, vendor_share: float = 0.2):
+    """Generate a batch of url-visit entries in the extension's payload shape."""
+    rng = random.Random(seed)
+    entries = []
+    for _ in range(batch_size):
+        domain = rng.choice(VENDOR_DOMAINS) if rng.random() < vendor_share else rng.choice(OTHER_DOMAINS)
+        entries.append({
+            "url": f"https://{rng.choice(SUBDOMAINS)}.{domain}/",
+            "timestamp": 1735689600000 + rng.randint(0, 7200000),
+            "browser": "Chrome"
+        })
+    return entries
+
+
+@pytest.fixture(params=BATCH_SIZES, ids=lambda size: f"batch{size}")
+def batch_size(request):
+    return request.param
+
+
+@pytest.fixture
+def entries(batch_size):
+    return make_entries(batch_size)
+
+
+@pytest.fixture
+def contract_rows():
+    """(contract_id, product_url, vendor_domain) rows for every contracted vendor."""
+    return [
+        (contract_id, f"https://{domain}", domain)
+        for contract_id, domain in enumerate(VENDOR_DOMAINS, start=1)
+    ]
+
+
+@pytest.fixture
+def existing_contract_ids():
+    """A quarter of the contracts already have an activity this month."""
+    return set(range(1, len(VENDOR_DOMAINS) + 1, 4))
@@ -0,0 +1,55 @@
+"""
+Shared helpers for saving and comparing benchmark results.
+
+Results are JSON files in benchmarks/results/, named after the benchmark and
+the UTC time of the run, and carry the git revision they were recorded at.
+"""
+
+import json
+import os
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def git_revision() -> Optional[str]:
+    """Get the short git revision of the working tree, if available."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(report: Dict, benchmark: str, output: Optional[str] = None) -> str:
+    """
+    Save a benchmark report as JSON.
+
+    Args:
+        report: The report to save
+        benchmark: Benchmark name, used as the file name prefix
+        output: Explicit output path (default: benchmarks/results/<benchmark>_<timestamp>.json)
+
+    Returns:
+        The path the report was written to
+    """
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = output or os.path.join(
+        RESULTS_DIR, f"{benchmark}_{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def load_results(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def percent_delta(new, old) -> str:
+    """Format the relative change from old to new, e.g. "+12.5%"."""
+    if not old or new is None:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
@@ -0,0 +1,175 @@
+"""
+Startup-time benchmark for the proCure backend.
+
+Imports ``procure.server.main`` in fresh interpreters under ``python -X importtime``
+and reports the wall time of the import and of create_app(), plus import time
+per module and per top-level package. This is the cold start a new worker pays
+before it can serve traffic.
+
+Usage (from the backend directory):
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --top 30
+    python -m benchmarks.startup --compare benchmarks/results/startup_<timestamp>.json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from benchmarks.reporting import git_revision, load_results, percent_delta, save_results
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Timed in the child interpreter; the import time of each module goes to stderr
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import procure.server.main as main
+imported = time.perf_counter()
+main.create_app()
+created = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "create_app_ms": (created - imported) * 1000}))
+"""
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, float]]:
+    """
+    Parse ``-X importtime`` output.
+
+    Returns:
+        Module name to {"self_ms", "cumulative_ms", "depth"}
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules[name] = {
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": (len(indent) - 1) // 2
+        }
+    return modules
+
+
+def run_once() -> Dict:
+    """Start a fresh interpreter, import the app and create it once."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    timings["modules"] = parse_importtime(completed.stderr)
+    return timings
+
+
+def summarize(runs: List[Dict], top: int) -> Dict:
+    """Take the median of every timing across runs."""
+    self_ms = defaultdict(list)
+    cumulative_ms = defaultdict(list)
+    for run in runs:
+        for name, timing in run["modules"].items():
+            self_ms[name].append(timing["self_ms"])
+            cumulative_ms[name].append(timing["cumulative_ms"])
+
+    median_self = {name: statistics.median(values) for name, values in self_ms.items()}
+    median_cumulative = {name: statistics.median(values) for name, values in cumulative_ms.items()}
+
+    packages = defaultdict(float)
+    for name, value in median_self.items():
+        packages[name.split(".", 1)[0]] += value
+
+    return {
+        "runs": len(runs),
+        "import_ms": round(statistics.median(run["import_ms"] for run in runs), 2),
+        "create_app_ms": round(statistics.median(run["create_app_ms"] for run in runs), 2),
+        "modules_imported": len(median_self),
+        "packages_ms": {
+            name: round(value, 2)
+            for name, value in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "slowest_modules_self_ms": {
+            name: round(value, 2)
+            for name, value in sorted(median_self.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "procure_modules_cumulative_ms": {
+            name: round(value, 2)
+            for name, value in sorted(median_cumulative.items(), key=lambda item: item[1], reverse=True)
+            if name.split(".", 1)[0] == "procure"
+        }
+    }
+
+
+def print_report(summary: Dict):
+    print(f"\nImport procure.server.main: {summary['import_ms']} ms, create_app(): {summary['create_app_ms']} ms "
+          f"(median of {summary['runs']} runs, {summary['modules_imported']} modules)")
+    print(f"\n{'package':<40}{'self ms':>10}")
+    for name, value in summary["packages_ms"].items():
+        print(f"{name:<40}{value:>10}")
+    print(f"\n{'module':<60}{'self ms':>10}")
+    for name, value in summary["slowest_modules_self_ms"].items():
+        print(f"{name:<60}{value:>10}")
+    print(f"\n{'procure module':<60}{'cumulative ms':>14}")
+    for name, value in summary["procure_modules_cumulative_ms"].items():
+        print(f"{name:<60}{value:>14}")
+
+
+def compare_results(report: Dict, previous_path: str):
+    """Print startup time deltas against a previous run."""
+    previous = load_results(previous_path)["summary"]
+    summary = report["summary"]
+
+    print(f"\nCompared with {previous_path}:")
+    for key in ("import_ms", "create_app_ms"):
+        print(f"  {key}: {summary[key]} ms (was {previous[key]}, {percent_delta(summary[key], previous[key])})")
+    for name, value in summary["packages_ms"].items():
+        old = previous["packages_ms"].get(name)
+        print(f"  {name}: {value} ms ({percent_delta(value, old) if old else 'new'})")
+    for name in previous["packages_ms"]:
+        if name not in summary["packages_ms"]:
+            print(f"  {name}: no longer in the top packages (was {previous['packages_ms'][name]} ms)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure backend import and app creation time.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start")
+    parser.add_argument("--top", type=int, default=20, help="Modules and packages to report")
+    parser.add_argument("--output", help="Where to save the JSON results (default: benchmarks/results/)")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    runs = [run_once() for _ in range(args.runs)]
+    summary = summarize(runs, args.top)
+    report = {
+        "benchmark": "startup",
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": sys.version.split()[0],
+        "summary": summary
+    }
+    print_report(summary)
+    path = save_results(report, "startup", args.output)
+    print(f"\nResults saved to {path}")
+    if args.compare:
+        compare_results(report, args.compare)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Deterministic synthetic data generator for proCure.
+
+Fills a database with production-shaped data: organizations (a few very
+large ones and a long tail of small ones), users with device tokens,
+contracts, and months of ``user_activities``. Vendor popularity follows a
+Zipf distribution, both when orgs pick the vendors they contract and when
+users visit them.
+
+The same --seed and --start-month always produce the same rows. On
+PostgreSQL, rows are streamed in chunks with COPY, which loads 100M activity
+rows in minutes. Other databases (e.g. a SQLite file for quick local runs)
+fall back to batched executemany.
+
+Usage (from the backend directory):
+    python -m benchmarks.synthetic_data --database-url postgresql://... --create-schema \\
+        --orgs 2000 --users 500000 --activities 100000000 --months 12 --start-month 2025-01
+"""
+
+import argparse
+import bisect
+import io
+import itertools
+import logging
+import random
+import time
+import uuid
+from calendar import monthrange
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import create_engine
+
+from procure.db.models import Base
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Browsers reported by the extension, with their share of activity rows
+BROWSERS = (("Chrome", 0.85), ("Edge", 0.10), ("Brave", 0.05))
+
+
+@dataclass
+class GeneratorConfig:
+    seed: int = 42
+    orgs: int = 100
+    users: int = 10000
+    large_orgs: int = 3
+    large_org_user_share: float = 0.4
+    vendors: int = 2000
+    zipf_exponent: float = 1.1
+    contracts_per_org: int = 25
+    large_org_contracts: int = 300
+    activities: int = 1000000
+    months: int = 12
+    start_month: str = "2025-01"
+    chunk_size: int = 200000
+
+
+class ZipfSampler:
+    """Samples ranks 0..n-1 with probability proportional to 1 / (rank + 1) ** exponent."""
+
+    def __init__(self, n: int, exponent: float):
+        self.cum_weights = list(itertools.accumulate(1.0 / (rank + 1) ** exponent for rank in range(n)))
+        self.total = self.cum_weights[-1]
+
+    def sample(self, rng: random.Random) -> int:
+        return bisect.bisect_left(self.cum_weights, rng.random() * self.total)
+
+    def cum_weights_for(self, ranks: Sequence[int]) -> List[float]:
+        """Get cumulative weights for a subset of ranks, for use with sample_distinct."""
+        return list(itertools.accumulate(
+            self.cum_weights[rank] - (self.cum_weights[rank - 1] if rank else 0.0) for rank in ranks
+        ))
+
+
+def sample_distinct(rng: random.Random, k: int, items: Sequence, cum_weights: List[float]) -> List:
+    """Sample up to k distinct items, weighted by cum_weights."""
+    if k >= len(items):
+        return list(items)
+    chosen = set()
+    attempts = 0
+    while len(chosen) < k and attempts < k * 10:
+        chosen.add(items[bisect.bisect_left(cum_weights, rng.random() * cum_weights[-1])])
+        attempts += 1
+    return list(chosen)
+
+
+def vendor_for_rank(rank: int) -> Tuple[str, str]:
+    """Get the (vendor name, vendor domain) of the vendor with the given popularity rank."""
+    return f"Vendor {rank + 1}", f"vendor{rank + 1}.com"
+
+
+def deterministic_uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def parse_month(value: str) -> date:
+    year, month = value.split("-")
+    return date(int(year), int(month), 1)
+
+
+def iter_months(start: date, count: int) -> Iterator[date]:
+    year, month = start.year, start.month
+    for _ in range(count):
+        yield date(year, month, 1)
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+
+
+def assign_org_sizes(config: GeneratorConfig, rng: random.Random) -> List[int]:
+    """Split config.users over the orgs: the large orgs share large_org_user_share, the rest is uniform."""
+    large_orgs = min(config.large_orgs, config.orgs)
+    large_users = int(config.users * config.large_org_user_share) if large_orgs else 0
+    small_orgs = config.orgs - large_orgs
+    if not small_orgs:
+        large_users = config.users
+
+    sizes = [large_users // large_orgs if large_orgs else 0] * large_orgs
+    remaining = config.users - sum(sizes)
+    sizes += [remaining // small_orgs] * small_orgs if small_orgs else []
+    # Hand out the remainder deterministically
+    for index in range(config.users - sum(sizes)):
+        sizes[index % len(sizes)] += 1
+    rng.shuffle(sizes)
+    return sizes
+
+
+def generate_entities(config: GeneratorConfig, rng: random.Random, vendor_sampler: ZipfSampler) -> Dict[str, list]:
+    """
+    Generate organizations, users, device tokens and contracts.
+
+    Returns:
+        Rows per table, plus "org_users" and "org_contracts" (per-org user ids
+        and (contract_id, vendor rank) pairs) used to generate activities
+    """
+    organizations, users, tokens, contracts = [], [], [], []
+    org_users, org_contracts = [], []
+    contract_id = 0
+    user_index = 0
+    sizes = assign_org_sizes(config, rng)
+    large_threshold = sorted(sizes, reverse=True)[min(config.large_orgs, config.orgs) - 1] if config.large_orgs else None
+
+    for org_index, size in enumerate(sizes):
+        organization_id = f"org_{uuid.UUID(int=rng.getrandbits(128)).hex}"[:36]
+        domain_name = f"company{org_index}.example.com"
+        organizations.append((organization_id, domain_name, f"Company {org_index}", 10, max(size, 1000)))
+
+        user_ids = []
+        for member in range(size):
+            user_id = deterministic_uuid(rng)
+            role = "admin" if member == 0 else "member"
+            users.append((user_id, f"user{user_index}@{domain_name}", True, role == "admin", True, organization_id, role))
+            tokens.append((user_id, f"device-{user_index}", uuid.UUID(int=rng.getrandbits(128)).hex))
+            user_ids.append(user_id)
+            user_index += 1
+        org_users.append(user_ids)
+
+        num_contracts = config.large_org_contracts if large_threshold and size >= large_threshold else config.contracts_per_org
+        ranks = set()
+        attempts = 0
+        while len(ranks) < min(num_contracts, config.vendors) and attempts < num_contracts * 20:
+            ranks.add(vendor_sampler.sample(rng))
+            attempts += 1
+
+        pairs = []
+        for rank in sorted(ranks):
+            contract_id += 1
+            vendor_name, vendor_domain = vendor_for_rank(rank)
+            contracts.append((
+                contract_id, vendor_name, f"https://app.{vendor_domain}", vendor_domain,
+                user_ids[0] if user_ids else None, organization_id,
+                rng.randint(1, 2000) * 50, rng.randint(1, max(size, 1)), "subscription", "active"
+            ))
+            pairs.append((contract_id, rank))
+        org_contracts.append(pairs)
+
+    return {
+        "organizations": organizations,
+        "users": users,
+        "user_device_tokens": tokens,
+        "contracts": contracts,
+        "org_users": org_users,
+        "org_contracts": org_contracts,
+    }
+
+
+def generate_activities(
+    config: GeneratorConfig,
+    rng: random.Random,
+    vendor_sampler: ZipfSampler,
+    org_users: List[List[str]],
+    org_contracts: List[List[Tuple[int, int]]]
+) -> Iterator[Tuple[str, int, str, str]]:
+    """
+    Yield (user_id, contract_id, browser, date) activity rows.
+
+    Like the ingest path, a user has at most one activity per contract per
+    month, so each user-month visits a set of distinct contracts of the
+    user's org, weighted by vendor popularity.
+    """
+    user_months = sum(len(users) for users, contracts in zip(org_users, org_contracts) if contracts) * config.months
+    if not user_months:
+        return
+    rate = config.activities / user_months
+    browser_names = [name for name, _ in BROWSERS]
+    browser_weights = list(itertools.accumulate(share for _, share in BROWSERS))
+
+    for month in iter_months(parse_month(config.start_month), config.months):
+        days = monthrange(month.year, month.month)[1]
+        hour_prefixes = [f"{month.isoformat()[:8]}{day + 1:02d} {hour:02d}" for day in range(days) for hour in range(24)]
+        for users, contracts in zip(org_users, org_contracts):
+            if not contracts:
+                continue
+            contract_ids = [contract_id for contract_id, _ in contracts]
+            cum_weights = vendor_sampler.cum_weights_for([rank for _, rank in contracts])
+            for user_id in users:
+                k = int(rate) + (rng.random() < rate - int(rate))
+                if not k:
+                    continue
+                for contract_id in sample_distinct(rng, k, contract_ids, cum_weights):
+                    seconds = int(rng.random() * 3600)
+                    browser = browser_names[bisect.bisect_left(browser_weights, rng.random())]
+                    yield (
+                        user_id,
+                        contract_id,
+                        browser,
+                        f"{rng.choice(hour_prefixes)}:{seconds // 60:02d}:{seconds % 60:02d}+00"
+                    )
+
+
+TABLE_COLUMNS = {
+    "organizations": ("organization_id", "domain_name", "company_name", "admins_remaining", "members_remaining"),
+    "users": ("id", "email", "is_active", "is_superuser", "is_verified", "organization_id", "role"),
+    "user_device_tokens": ("user_id", "device_id", "token"),
+    "contracts": (
+        "contract_id", "vendor_name", "product_url", "vendor_domain", "owner_id", "organization_id",
+        "annual_spend", "num_seats", "contract_type", "contract_status"
+    ),
+    "user_activities": ("user_id", "contract_id", "browser", "date"),
+}
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value)
+
+
+def copy_rows(connection, table: str, rows: Iterable[tuple], chunk_size: int) -> int:
+    """
+    Load rows into a table in chunks, with COPY on PostgreSQL.
+
+    Values must not contain tabs, newlines or backslashes, which holds for
+    everything this module generates.
+
+    Returns:
+        The number of rows loaded
+    """
+    columns = TABLE_COLUMNS[table]
+    is_postgres = connection.__class__.__module__.startswith("psycopg2")
+    cursor = connection.cursor()
+    total = 0
+    rows = iter(rows)
+    try:
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            if is_postgres:
+                buffer = io.StringIO("".join("\t".join(_copy_value(v) for v in row) + "\n" for row in chunk))
+                cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+            else:
+                placeholders = ", ".join("?" for _ in columns)
+                cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", chunk)
+            connection.commit()
+            total += len(chunk)
+            logger.info(f"{table}: {total} rows loaded")
+    finally:
+        cursor.close()
+    return total
+
+
+def reset_sequences(connection):
+    """Move the serial sequences past the explicitly generated ids (PostgreSQL only)."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence('contracts', 'contract_id'), "
+            "COALESCE((SELECT MAX(contract_id) FROM contracts), 1))"
+        )
+        connection.commit()
+    finally:
+        cursor.close()
+
+
+def generate(connection, config: GeneratorConfig) -> Dict[str, int]:
+    """
+    Generate and load the full data set.
+
+    Args:
+        connection: A raw DBAPI connection to an empty schema
+        config: Generator settings
+
+    Returns:
+        Rows loaded per table
+    """
+    rng = random.Random(config.seed)
+    vendor_sampler = ZipfSampler(config.vendors, config.zipf_exponent)
+    entities = generate_entities(config, rng, vendor_sampler)
+
+    counts = {}
+    for table in ("organizations", "users", "user_device_tokens", "contracts"):
+        counts[table] = copy_rows(connection, table, entities[table], config.chunk_size)
+    if connection.__class__.__module__.startswith("psycopg2"):
+        reset_sequences(connection)
+
+    activities = generate_activities(config, rng, vendor_sampler, entities["org_users"], entities["org_contracts"])
+    counts["user_activities"] = copy_rows(connection, "user_activities", activities, config.chunk_size)
+    return counts
+
+
+def parse_args(argv=None):
+    defaults = GeneratorConfig()
+    parser = argparse.ArgumentParser(description="Generate deterministic, production-shaped data for proCure.")
+    parser.add_argument("--database-url", required=True, help="Target database (should be empty)")
+    parser.add_argument("--create-schema", action="store_true", help="Create the tables before loading")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Random seed")
+    parser.add_argument("--orgs", type=int, default=defaults.orgs, help="Number of organizations")
+    parser.add_argument("--users", type=int, default=defaults.users, help="Number of users across all orgs")
+    parser.add_argument("--large-orgs", type=int, default=defaults.large_orgs, help="Number of very large orgs")
+    parser.add_argument("--large-org-user-share", type=float, default=defaults.large_org_user_share,
+                        help="Share of all users that belong to the large orgs")
+    parser.add_argument("--vendors", type=int, default=defaults.vendors, help="Number of distinct vendors")
+    parser.add_argument("--zipf-exponent", type=float, default=defaults.zipf_exponent,
+                        help="Skew of vendor popularity (higher is more skewed)")
+    parser.add_argument("--contracts-per-org", type=int, default=defaults.contracts_per_org, help="Contracts per regular org")
+    parser.add_argument("--large-org-contracts", type=int, default=defaults.large_org_contracts, help="Contracts per large org")
+    parser.add_argument("--activities", type=int, default=defaults.activities, help="Approximate total user_activities rows")
+    parser.add_argument("--months", type=int, default=defaults.months, help="Months of activity to generate")
+    parser.add_argument("--start-month", default=defaults.start_month, help="First month of activity (YYYY-MM)")
+    parser.add_argument("--chunk-size", type=int, default=defaults.chunk_size, help="Rows per COPY/insert batch")
+    args = parser.parse_args(argv)
+    config = GeneratorConfig(**{
+        name: value for name, value in vars(args).items() if name in GeneratorConfig.__dataclass_fields__
+    })
+    return args, config
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    args, config = parse_args(argv)
+    engine = create_engine(args.database_url)
+    if args.create_schema:
+        Base.metadata.create_all(engine)
+
+    start = time.perf_counter()
+    connection = engine.raw_connection()
+    try:
+        counts = generate(connection.dbapi_connection, config)
+    finally:
+        connection.close()
+        engine.dispose()
+
+    elapsed = time.perf_counter() - start
+    for table, count in counts.items():
+        logger.info(f"{table}: {count} rows")
+    logger.info(f"Loaded in {elapsed:.1f} s")
+    return counts
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,8 @@ from typing import Optional
 from procure.db.models import User
 from procure.db import auth as db_auth
 from procure.auth.users import authenticate_user_by_token
-from procure.utils.db_utils import get_db
+from procure.utils.db_utils import get_db, get_read_db
+from procure.utils.request_context import current_principal
 from procure.auth.schemas import (
     CreateUserRequest, CreateUserResponse,
     SignInRequest, SignInResponse,
@@ -47,6 +48,10 @@ async def create_user(
                 detail=f"User with email {user_data.email} already exists"
             )
 
+        # The writes below keep this user's reads on the primary for a while,
+        # so /auth/me right after sign-up does not hit a lagging replica
+        current_principal.set(user_data.email)
+
         # Create new employee and device token
         hashed_password = hash_password(user_data.password)
 
@@ -201,7 +206,8 @@ async def sign_in(
             )
 
         # If we authenticated with email/password, generate a new device token
-        if not device_token:
+        issue_token = not device_token
+        if issue_token:
             # Check if a token already exists for this device
             existing_token = db_auth.get_user_device_token(db, user.id, sign_in_data.device_id)
 
@@ -219,13 +225,23 @@ async def sign_in(
                     device_token
                 )
 
+        # Read the user before committing, which would expire it and cost a reload
+        sign_in_response = SignInResponse(
+            id=user.id,
+            email=user.email,
+            organization_id=user.organization_id,
+            role=user.role,
+            device_token=device_token
+        )
+
+        if issue_token:
             # Commit the transaction
             db.commit()
 
         # Set JWT cookie for browser-based authentication
         response.set_cookie(
             key=AUTH_COOKIE_NAME,
-            value=generate_jwt_token(user.id),
+            value=generate_jwt_token(sign_in_response.id),
             max_age=AUTH_COOKIE_MAX_AGE,
             path="/",
             domain=None,         # host‑only (localhost)
@@ -235,13 +251,7 @@ async def sign_in(
         )
 
 
-        return SignInResponse(
-            id=user.id,
-            email=user.email,
-            organization_id=user.organization_id,
-            role=user.role,
-            device_token=device_token
-        )
+        return sign_in_response
 
     except HTTPException:
         raise
@@ -276,7 +286,7 @@ async def logout(response: Response):
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(
     email: str = Depends(authenticate_user_by_token),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get the current authenticated user"""
     try:
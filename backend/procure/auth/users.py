@@ -1,6 +1,7 @@
 import uuid
+import hmac
 import logging
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from fastapi import Depends, Request, HTTPException, status
 from sqlalchemy.orm import Session
@@ -14,12 +15,15 @@ from fastapi_users.authentication import (
 )
 from fastapi_users.db import SQLAlchemyUserDatabase
 from fastapi_users.jwt import decode_jwt
+from starlette.concurrency import run_in_threadpool
 
 from procure.db.models import User, get_user_db
 from procure.db import auth as db_auth
 from procure.auth.utils import get_token_from_request
-from procure.configs.app_configs import AUTH_SECRET, AUTH_COOKIE_NAME, AUTH_COOKIE_MAX_AGE, AUTH_API_PREFIX
+from procure.auth.schemas import UserRole
+from procure.configs.app_configs import AUTH_SECRET, AUTH_COOKIE_NAME, AUTH_COOKIE_MAX_AGE, AUTH_API_PREFIX, OPS_API_TOKEN
 from procure.utils.db_utils import get_db
+from procure.utils.request_context import current_principal
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -104,9 +108,22 @@ current_superuser = fastapi_users.current_user(active=True, superuser=True)
 def get_current_user_email(user: User = Depends(current_active_user)) -> str:
     return user.email
 
+def _query_and_release(db: Session, query, *args):
+    """
+    Run an authentication lookup, then release the session's connection.
+
+    Routes often open a second session (e.g. on the read replica); holding
+    this connection while waiting for that one can exhaust the pool. The
+    session stays usable and checks out a connection again when needed.
+    """
+    try:
+        return query(db, *args)
+    finally:
+        db.close()
+
 # Authentication using device token or JWT cookie
-async def authenticate_user_by_token(request: Request, db: Session = Depends(get_db)) -> str:
-    """Get the current user's email from the device token in the request or JWT cookie."""
+async def authenticate_identity_by_token(request: Request, db: Session = Depends(get_db)) -> Dict[str, Any]:
+    """Get the current user's identity (see db_auth.get_identity_by_token) from the device token in the request or JWT cookie."""
 
     # First try to get token from Authorization header
     token = get_token_from_request(request)
@@ -124,9 +141,10 @@ async def authenticate_user_by_token(request: Request, db: Session = Depends(get
                 if payload and "sub" in payload:
                     # Get user by ID from JWT token
                     user_id = payload["sub"]
-                    user = db_auth.get_user_by_id(db, user_id)
+                    user = await run_in_threadpool(_query_and_release, db, db_auth.get_user_by_id, user_id)
                     if user:
-                        return user.email
+                        current_principal.set(user.email)
+                        return db_auth.get_user_identity(user)
             except Exception as e:
                 logger.error(f"Error validating JWT token: {str(e)}")
                 # Continue to try device token authentication
@@ -139,16 +157,20 @@ async def authenticate_user_by_token(request: Request, db: Session = Depends(get
             )
 
     try:
-        # Authenticate with device token using the database module
-        success, user = db_auth.authenticate_with_token(db, token)
+        # Authenticate with device token using the database module (cached).
+        # Run in the threadpool: waiting for a pool connection on the event
+        # loop would stall every other request, including health checks
+        identity = await run_in_threadpool(_query_and_release, db, db_auth.get_identity_by_token, token)
 
-        if not success or not user:
+        if not identity:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication token"
             )
 
-        return user.email
+        # Route this request's reads and writes for this user (see procure.db.routing)
+        current_principal.set(identity["email"])
+        return identity
 
     except SQLAlchemyError as e:
         logger.error(f"Database error during authentication: {str(e)}")
@@ -164,3 +186,49 @@ async def authenticate_user_by_token(request: Request, db: Session = Depends(get
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error during authentication: {str(e)}"
         )
+
+async def authenticate_user_by_token(identity: Dict[str, Any] = Depends(authenticate_identity_by_token)) -> str:
+    """Get the current user's email from the device token in the request or JWT cookie."""
+    return identity["email"]
+
+# Authentication for endpoints of one organization, named by the organization_id path parameter
+async def authenticate_organization_member(
+    organization_id: str,
+    identity: Dict[str, Any] = Depends(authenticate_identity_by_token)
+) -> str:
+    """Get the current user's email, requiring the user to belong to the organization."""
+    if identity["organization_id"] != organization_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this organization"
+        )
+    return identity["email"]
+
+# Authentication for admin-only endpoints
+async def authenticate_admin_by_token(
+    email: str = Depends(authenticate_user_by_token),
+    db: Session = Depends(get_db)
+) -> str:
+    """Get the current user's email, requiring the user to have the admin role."""
+    user = await run_in_threadpool(_query_and_release, db, db_auth.get_user_by_email, email)
+    if not user or user.role != UserRole.ADMIN.value:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin role required"
+        )
+    return email
+
+# Authentication for operator-only diagnostics, across organizations
+async def authenticate_operator(request: Request) -> None:
+    """Require the operator token (OPS_API_TOKEN) in the X-Ops-Token header."""
+    if not OPS_API_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Operator access is not configured"
+        )
+    token = request.headers.get("X-Ops-Token", "")
+    if not hmac.compare_digest(token.encode(), OPS_API_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Operator token required"
+        )
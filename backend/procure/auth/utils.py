@@ -1,4 +1,5 @@
 import secrets
+from functools import lru_cache
 from typing import Optional
 from fastapi import Request
 from fastapi_users.password import PasswordHelper
@@ -17,11 +18,15 @@ def generate_device_token():
     """Generate a secure random token for device authentication"""
     return secrets.token_urlsafe(32)  # 256 bits of entropy
 
+@lru_cache(maxsize=1)
+def get_password_helper() -> PasswordHelper:
+    """Get the shared FastAPI-Users password helper, created on first use"""
+    return PasswordHelper()
+
 def hash_password(password: str) -> str:
     """Hash a password for storing"""
     # Use FastAPI-Users password helper
-    password_helper = PasswordHelper()
-    return password_helper.hash(password)
+    return get_password_helper().hash(password)
 
 def generate_jwt_token(user_id: str) -> str:
     """Generate a JWT token for the user"""
@@ -31,6 +36,5 @@ def generate_jwt_token(user_id: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a stored password against a provided password"""
-    password_helper = PasswordHelper()
-    verified, _ = password_helper.verify_and_update(plain_password, hashed_password)
+    verified, _ = get_password_helper().verify_and_update(plain_password, hashed_password)
     return verified
@@ -1,12 +1,17 @@
 import uuid
 import secrets
-from sqlalchemy import select, and_
+from sqlalchemy import event, select, and_
 from sqlalchemy.orm import Session
-from typing import Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 from procure.db.models import Organization, User, UserDeviceToken
 from procure.configs.constants import BASE62
+from procure.configs.app_configs import AUTH_TOKEN_CACHE_TTL_SECONDS
 from procure.auth.schemas import UserRole
+from procure.utils.cache import get_cache, hash_key
+
+# Device token -> user identity, keyed by token hash; rotated tokens are evicted
+token_identity_cache = get_cache("auth_token", AUTH_TOKEN_CACHE_TTL_SECONDS)
 
 def generate_org_id():
     """Generate a unique organization ID with 'org_' prefix and 32 random characters."""
@@ -95,18 +100,47 @@ def create_device_token(db: Session, user_id: str, device_id: str, token: str) -
     return new_token
 
 def update_device_token(db: Session, token_record: UserDeviceToken, new_token: str) -> UserDeviceToken:
-    """Update an existing device token."""
+    """Update an existing device token, evicting the old token's identity once the change is committed."""
+    old_token_key = hash_key(token_record.token)
     token_record.token = new_token
+    # Evicting before the commit would let a concurrent request cache the old token again
+    event.listen(db, "after_commit", lambda session: token_identity_cache.delete(old_token_key), once=True)
     return token_record
 
 def authenticate_with_token(db: Session, token: str) -> Tuple[bool, Optional[User]]:
     """Authenticate a user with a device token."""
-    token_record = get_user_token_record(db, token)
-    if not token_record:
-        return False, None
-
-    user = get_user_by_id(db, token_record.user_id)
+    # One round trip: the token's user, joined through the token record
+    stmt = (
+        select(User)
+        .join(UserDeviceToken, UserDeviceToken.user_id == User.id)
+        .where(UserDeviceToken.token == token)
+    )
+    user = db.scalars(stmt).one_or_none()
     if not user:
         return False, None
 
-    return True, user
\ No newline at end of file
+    return True, user
+
+def get_identity_by_token(db: Session, token: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the identity of the user a device token belongs to, through the shared cache.
+
+    Returns:
+        Dict with user_id, email, role and organization_id, or None if the token is invalid
+    """
+    def load():
+        success, user = authenticate_with_token(db, token)
+        if not success or not user:
+            return None
+        return get_user_identity(user)
+
+    return token_identity_cache.get_or_load(hash_key(token), load)
+
+def get_user_identity(user: User) -> Dict[str, Any]:
+    """Get the identity of a user, as cached for their device tokens."""
+    return {
+        "user_id": user.id,
+        "email": user.email,
+        "role": user.role,
+        "organization_id": user.organization_id
+    }
@@ -1,10 +1,29 @@
-from sqlalchemy import select, func, extract
-from sqlalchemy.orm import Session
-from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from sqlalchemy import select, func, insert
+from sqlalchemy.orm import Session, joinedload
+from datetime import date, datetime, timezone, tzinfo
+from typing import List, Dict, Any, Optional, Set, Tuple, Union
 
-from procure.db.models import Contract, Organization, User, UserActivity
-from procure.server.utils import get_base_domain
+from procure.db.models import Contract, Organization, User, UserActivity, UserActivityDay, UserActivityMonth
+from procure.db.upsert import dialect_insert
+from procure.db.vendor_matcher import VendorMatcher, get_vendor_matcher
+from procure.utils.metrics import Counter
+from procure.utils.periods import current_month as get_current_month, current_period, get_timezone, month_bounds
+from procure.utils.url_visit_batch import UrlVisitBatch
+from procure.configs.app_configs import ENGAGEMENT_TRACKING_ENABLED
+
+# URL visit ingest counters
+url_visit_entries_received = Counter(
+    "procure_url_visit_entries_received",
+    "URL visit entries received from the browser extension"
+)
+url_visit_entries_matched = Counter(
+    "procure_url_visit_entries_matched",
+    "URL visit entries whose hostname matched a contract of the user's organization"
+)
+url_visit_activities_inserted = Counter(
+    "procure_url_visit_activities_inserted",
+    "User activities inserted from URL visits"
+)
 
 # Database operations for core functionality
 
@@ -13,6 +32,11 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
     stmt = select(User).where(User.email == email)
     return db.scalars(stmt).one_or_none()
 
+def get_user_with_organization_by_email(db: Session, email: str) -> Optional[User]:
+    """Get a user by email with their organization loaded in the same query."""
+    stmt = select(User).options(joinedload(User.organization)).where(User.email == email)
+    return db.scalars(stmt).one_or_none()
+
 def get_organization_by_id(db: Session, organization_id: str) -> Optional[Organization]:
     """Get an organization by ID."""
     stmt = select(Organization).where(Organization.organization_id == organization_id)
@@ -23,22 +47,187 @@ def get_contract_by_url(db: Session, url: str) -> Optional[Contract]:
     stmt = select(Contract).where(Contract.product_url == url)
     return db.scalars(stmt).one_or_none()
 
+def match_entry_contracts(batch: UrlVisitBatch, matcher: VendorMatcher) -> List[Tuple[int, ...]]:
+    """
+    Get the contracts each URL visit entry is attributed to.
+
+    Each distinct hostname is matched once, however many entries share it.
+
+    Args:
+        batch: URL visit entries as columns
+        matcher: The organization's vendor matcher
+
+    Returns:
+        The matched contract IDs per entry, empty for entries without a match
+    """
+    matched = {hostname: matcher.match(hostname) if hostname else () for hostname in set(batch.hostnames)}
+    return [matched[hostname] for hostname in batch.hostnames]
+
+def build_contract_metadata(batch: UrlVisitBatch, entry_contracts: List[Tuple[int, ...]]) -> Dict[int, int]:
+    """
+    Map each matched contract to the entry of its most recent visit.
+
+    Args:
+        batch: URL visit entries as columns
+        entry_contracts: Contract IDs per entry, as returned by match_entry_contracts
+
+    Returns:
+        Dict of contract ID to the index of its most recent entry in the batch
+    """
+    timestamps = batch.timestamps
+    contract_to_index = {}
+    for index, contract_ids in enumerate(entry_contracts):
+        for contract_id in contract_ids:
+            # If we have multiple entries for the same contract, use the most recent one
+            latest = contract_to_index.get(contract_id)
+            if latest is None or timestamps[index] > timestamps[latest]:
+                contract_to_index[contract_id] = index
+    return contract_to_index
+
+def select_new_activity_entries(
+    contract_to_index: Dict[int, int],
+    existing_contract_ids: Set[int]
+) -> List[Tuple[int, int]]:
+    """
+    Pick the matched contracts that have no activity this month yet.
+
+    Args:
+        contract_to_index: Matched contract ID to the batch index of its most recent visit
+        existing_contract_ids: Contract IDs the user already has an activity for this month
+
+    Returns:
+        (contract_id, entry index) per activity to create
+    """
+    return [
+        (contract_id, index)
+        for contract_id, index in contract_to_index.items()
+        if contract_id not in existing_contract_ids
+    ]
+
+def build_activity_rows(
+    user_id: str,
+    batch: UrlVisitBatch,
+    matched_entries: List[Tuple[int, int]]
+) -> List[Dict[str, Any]]:
+    """
+    Build user_activities rows for matched entries.
+
+    Args:
+        user_id: ID of the user who visited the URLs
+        batch: URL visit entries as columns, timestamps in milliseconds
+        matched_entries: (contract_id, entry index) tuples
+
+    Returns:
+        Column values per activity, for a bulk INSERT
+    """
+    return [
+        {
+            "user_id": user_id,
+            "contract_id": contract_id,
+            "browser": batch.browser(index),
+            "date": datetime.fromtimestamp(batch.timestamps[index] / 1000, tz=timezone.utc)
+        }
+        for contract_id, index in matched_entries
+    ]
+
+_MS_PER_DAY = 86_400_000
+# UTC offsets are whole quarter hours, so a local day never starts inside one
+_MS_PER_QUARTER_HOUR = 900_000
+
+def build_engagement_rows(
+    user_id: str,
+    batch: UrlVisitBatch,
+    entry_contracts: List[Tuple[int, ...]],
+    tz: tzinfo = timezone.utc
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Build the engagement aggregate rows for matched entries.
+
+    Args:
+        user_id: ID of the user who visited the URLs
+        batch: URL visit entries as columns, timestamps in milliseconds
+        entry_contracts: Contract IDs per entry, as returned by match_entry_contracts
+        tz: Time zone of the organization, whose local days are counted
+
+    Returns:
+        (user_activity_days rows with the visits per contract and day,
+         user_activity_months rows with the active-days bitmask per contract and month)
+    """
+    timestamps = batch.timestamps
+    # Local day per time bucket, converted once per bucket rather than per entry
+    bucket_ms = _MS_PER_DAY if tz is timezone.utc else _MS_PER_QUARTER_HOUR
+    bucket_days: Dict[int, date] = {}
+    day_visits: Dict[Tuple[int, date], int] = {}
+    for index, contract_ids in enumerate(entry_contracts):
+        if not contract_ids:
+            continue
+        bucket = timestamps[index] // bucket_ms
+        day = bucket_days.get(bucket)
+        if day is None:
+            day = bucket_days[bucket] = datetime.fromtimestamp(bucket * bucket_ms / 1000, tz).date()
+        for contract_id in contract_ids:
+            key = (contract_id, day)
+            day_visits[key] = day_visits.get(key, 0) + 1
+
+    day_rows = []
+    month_masks: Dict[Tuple[int, str], int] = {}
+    for (contract_id, day), visits in day_visits.items():
+        day_rows.append({"user_id": user_id, "contract_id": contract_id, "day": day, "visits": visits})
+        key = (contract_id, f"{day.year:04d}-{day.month:02d}")
+        month_masks[key] = month_masks.get(key, 0) | (1 << (day.day - 1))
+
+    month_rows = [
+        {"user_id": user_id, "contract_id": contract_id, "period": period, "active_days": active_days}
+        for (contract_id, period), active_days in month_masks.items()
+    ]
+    return day_rows, month_rows
+
+def upsert_engagement(db: Session, day_rows: List[Dict[str, Any]], month_rows: List[Dict[str, Any]]):
+    """Add visits to the daily aggregates and set active days in the monthly bitmasks."""
+    if day_rows:
+        days_stmt = dialect_insert(db, UserActivityDay)
+        days_stmt = days_stmt.on_conflict_do_update(
+            index_elements=[UserActivityDay.user_id, UserActivityDay.contract_id, UserActivityDay.day],
+            set_={"visits": UserActivityDay.visits + days_stmt.excluded.visits}
+        )
+        db.execute(days_stmt, day_rows)
+    if month_rows:
+        months_stmt = dialect_insert(db, UserActivityMonth)
+        months_stmt = months_stmt.on_conflict_do_update(
+            index_elements=[UserActivityMonth.user_id, UserActivityMonth.contract_id, UserActivityMonth.period],
+            set_={"active_days": UserActivityMonth.active_days.op("|")(months_stmt.excluded.active_days)}
+        )
+        db.execute(months_stmt, month_rows)
+
 def process_url_visits(
     db: Session,
     email: str,
-    entries: List[Dict[str, Any]]
+    entries: Union[UrlVisitBatch, List[Dict[str, Any]]]
 ) -> Dict[str, Any]:
     """Process URL visits and record activities.
 
     This function performs most operations at the database level for efficiency:
     1. Finds the user by email
-    2. Extracts base domains from entry URLs using tldextract
-    3. Uses SQLAlchemy to match entry domains with vendor domains in contracts
-    4. Filters out URLs that already have activities for the current month
-    5. Creates new activities for those URLs
+    2. Matches entry hostnames against the organization's cached vendor matcher
+       (longest contract host suffix, see procure.db.vendor_matcher)
+    3. Filters out contracts that already have activities for the current month
+    4. Creates new activities for those contracts
+
+    Entries are a columnar UrlVisitBatch (as decoded by the ingest route) or
+    a list of url/browser/timestamp dicts.
+
+    Besides the counts, successful results describe the ingest for the
+    caller's follow-up work (see procure.server.url_visits.ingest):
+    ``organization_id``, ``period`` ("YYYY-MM") with its ``month_begin`` and
+    ``month_end``, ``unmatched_hostnames`` (visits without a contract, for
+    shadow IT discovery) and ``activated_contract_ids`` (contracts that
+    gained activities).
     """
-    # Get user
-    user = get_user_by_email(db, email)
+    batch = entries if isinstance(entries, UrlVisitBatch) else UrlVisitBatch.from_entries(entries)
+    url_visit_entries_received.inc(len(batch))
+
+    # Get user, with the organization for its time zone
+    user = get_user_with_organization_by_email(db, email)
     if not user:
         return {
             "success": False,
@@ -46,119 +235,112 @@ def process_url_visits(
             "status_code": 404
         }
 
-    # Extract URLs from entries with their metadata and get their base domains
-    entry_domains = []
-    for entry in entries:
-        url = entry["url"]
-        browser = entry["browser"]
-        timestamp = entry["timestamp"]
-        try:
-            # Extract the base domain from the URL
-            base_domain = get_base_domain(url)
-            entry_domains.append((base_domain, browser, timestamp))
-        except Exception as e:
-            # Skip invalid URLs
-            continue
-
-    if not entry_domains:
+    if not any(batch.hostnames):
         return {
             "success": True,
-            "processed": len(entries),
+            "processed": len(batch),
             "matched": 0,
             "message": "No valid URLs provided"
         }
 
-    # Get current month and year for activity filtering
-    now = datetime.now(timezone.utc)
-    current_month = now.month
-    current_year = now.year
+    # Read before committing, which expires the user and would cost a reload
+    organization_id = user.organization_id
+    tz = get_timezone(user.organization.timezone if user.organization else None)
 
-    # Extract just the domains for the SQL IN clause
-    domains = [domain for domain, _, _ in entry_domains]
+    # Get the current month in the organization's time zone for activity filtering
+    current_year, current_month = get_current_month(tz)
+    month_begin, month_end = month_bounds(current_year, current_month, tz)
 
-    # Use SQLAlchemy 2.0 style with Core expressions
-    # First, get all contracts that match the domains
-    contracts_query = (
-        select(Contract.contract_id, Contract.vendor_domain)
-        .where(Contract.organization_id == user.organization_id)
-        .where(Contract.vendor_domain.in_(domains))
-    )
+    # Attribute each entry to the contracts of its longest matching host
+    matcher = get_vendor_matcher(db, organization_id)
+    entry_contracts = match_entry_contracts(batch, matcher)
+
+    ingest = {
+        "organization_id": organization_id,
+        "period": current_period(tz),
+        "month_begin": month_begin,
+        "month_end": month_end,
+        "unmatched_hostnames": [
+            hostname for hostname, contract_ids in zip(batch.hostnames, entry_contracts) if hostname and not contract_ids
+        ],
+        "activated_contract_ids": []
+    }
 
-    # Execute the query to get matching contracts
-    matching_contracts = db.execute(contracts_query).fetchall()
+    # Create a mapping of contract to its most recent entry
+    contract_to_index = build_contract_metadata(batch, entry_contracts)
 
-    if not matching_contracts:
+    if not contract_to_index:
         return {
             "success": True,
-            "processed": len(entries),
+            "processed": len(batch),
             "matched": 0,
-            "message": "No matching URLs found"
+            "message": "No matching URLs found",
+            **ingest
         }
 
-    # Get contract IDs that already have activities for the current month
-    contract_ids = [contract[0] for contract in matching_contracts]
+    url_visit_entries_matched.inc(sum(1 for contract_ids in entry_contracts if contract_ids))
 
-    if not contract_ids:  # Handle empty list to avoid SQL error with empty IN clause
-        existing_contract_ids = set()
-    else:
-        # Use SQLAlchemy 2.0 style for the activities query
-        existing_activities_query = (
-            select(UserActivity.contract_id)
-            .where(UserActivity.user_id == user.id)
-            .where(UserActivity.contract_id.in_(contract_ids))
-            .where(extract('month', UserActivity.date) == current_month)
-            .where(extract('year', UserActivity.date) == current_year)
-        )
-
-        existing_contract_ids = {
-            row[0] for row in db.execute(existing_activities_query).fetchall()
-        }
+    # Use SQLAlchemy 2.0 style for the activities query
+    existing_activities_query = (
+        select(UserActivity.contract_id)
+        .where(UserActivity.user_id == user.id)
+        .where(UserActivity.contract_id.in_(sorted(contract_to_index)))
+        .where(UserActivity.date >= month_begin)
+        .where(UserActivity.date < month_end)
+    )
 
-    # Create a mapping of domain to (browser, timestamp)
-    domain_to_metadata = {}
-    for domain, browser, timestamp in entry_domains:
-        # If we have multiple entries for the same domain, use the most recent one
-        if domain not in domain_to_metadata or timestamp > domain_to_metadata[domain][1]:
-            domain_to_metadata[domain] = (browser, timestamp)
+    existing_contract_ids = {
+        row[0] for row in db.execute(existing_activities_query).fetchall()
+    }
 
     # Create new activities for contracts that don't have activities this month
-    matched_entries = []
-    for contract_id, vendor_domain in matching_contracts:
-        if contract_id not in existing_contract_ids and vendor_domain in domain_to_metadata:
-            browser, timestamp = domain_to_metadata[vendor_domain]
-            matched_entries.append((contract_id, browser, timestamp))
+    matched_entries = select_new_activity_entries(contract_to_index, existing_contract_ids)
+
+    # Count visits per day for engagement analytics, including contracts already active this month
+    if ENGAGEMENT_TRACKING_ENABLED:
+        day_rows, month_rows = build_engagement_rows(user.id, batch, entry_contracts, tz)
+    else:
+        day_rows, month_rows = [], []
 
-    if not matched_entries:
+    if not matched_entries and not day_rows:
         return {
             "success": True,
-            "processed": len(entries),
+            "processed": len(batch),
             "matched": 0,
-            "message": "No matching URLs found or all matches already have activities this month"
+            "message": "No matching URLs found or all matches already have activities this month",
+            **ingest
         }
 
     # Create new activities for the matched entries
-    new_activities = [
-        UserActivity(
-            user_id=user.id,
-            contract_id=contract_id,
-            browser=browser,
-            date=datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc)
-        )
-        for contract_id, browser, timestamp in matched_entries
-    ]
+    new_activities = build_activity_rows(user.id, batch, matched_entries)
+
+    # Bulk insert new activities and upsert the engagement aggregates in one transaction
+    try:
+        if new_activities:
+            db.execute(insert(UserActivity), new_activities)
+        if day_rows:
+            upsert_engagement(db, day_rows, month_rows)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+
+    if not new_activities:
+        return {
+            "success": True,
+            "processed": len(batch),
+            "matched": 0,
+            "message": "No matching URLs found or all matches already have activities this month",
+            **ingest
+        }
 
-    # Bulk insert new activities if any
-    if new_activities:
-        try:
-            db.bulk_save_objects(new_activities, return_defaults=False)
-            db.commit()
-        except Exception as e:
-            db.rollback()
-            raise e
+    url_visit_activities_inserted.inc(len(new_activities))
+    ingest["activated_contract_ids"] = [contract_id for contract_id, _ in matched_entries]
 
     return {
         "success": True,
-        "processed": len(entries),
+        "processed": len(batch),
         "matched": len(new_activities),
-        "message": "URL visit logs processed successfully"
+        "message": "URL visit logs processed successfully",
+        **ingest
     }
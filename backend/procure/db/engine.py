@@ -1,9 +1,14 @@
 """
 Database engine and connection configuration module for proCure.
 Supports both local Docker-based PostgreSQL and AWS RDS with master password authentication.
+
+The engine is created on first use by get_engine() rather than at import
+time, so importing the application (workers, tests, alembic) does not touch
+database configuration. ``engine`` is still importable from this module and
+resolves to get_engine().
 """
 
-import boto3
+import threading
 from urllib.parse import urlparse
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
@@ -12,8 +17,19 @@ from procure.configs.app_configs import (
     USE_RDS,
     LOCAL_DATABASE_URL,
     AWS_DATABASE_URL,
-    AWS_REGION
+    LOCAL_DATABASE_READ_URL,
+    AWS_DATABASE_READ_URL,
+    DB_POOL_MODE,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_CONNECT_TIMEOUT
 )
+from procure.db.instrumentation import instrument_engine
+from procure.db.pool import InstrumentedQueuePool, InstrumentedNullPool, POOL_STATES, bind_pool_gauges, get_pool_metrics
+from procure.db.routing import RoutingSession, replica_router, track_primary_writes
 
 def get_db_connection_string():
     """
@@ -51,23 +67,171 @@ def get_db_connection_string():
     return AWS_DATABASE_URL
 
 
-DATABASE_URL = get_db_connection_string()
-
-connect_args = {
-    "connect_timeout": 10  # Connection timeout in seconds
-}
+def get_pool_options(pool_mode=DB_POOL_MODE):
+    """
+    Get the connection pool keyword arguments for create_engine.
 
-if USE_RDS:
-    connect_args["sslmode"] = "require"  # Require SSL for AWS RDS connections
+    In "queue" mode connections are pooled in-process and sized from the
+    DB_POOL_* settings. In "pgbouncer" mode in-process pooling is disabled
+    (NullPool) so the bouncer owns all pooling; this is safe for PgBouncer's
+    transaction pooling mode since no connection outlives a checkout.
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=10,         # Maximum number of connections in the pool
-    max_overflow=5,       # Extra connections beyond pool_size
-    pool_timeout=30,      # Timeout for getting a connection from the pool
-    pool_recycle=1800,    # Recycle connections after 30 minutes
-    connect_args=connect_args
-)
+    Args:
+        pool_mode: "queue" or "pgbouncer"
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Returns:
+        dict: Keyword arguments for create_engine
+    """
+    if pool_mode == "pgbouncer":
+        return {
+            "poolclass": InstrumentedNullPool,
+            "pool_pre_ping": DB_POOL_PRE_PING
+        }
+
+    if pool_mode != "queue":
+        raise ValueError(f"Invalid DB_POOL_MODE: {pool_mode}. Expected 'queue' or 'pgbouncer'.")
+
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,          # Maximum number of connections in the pool
+        "max_overflow": DB_MAX_OVERFLOW,    # Extra connections beyond pool_size
+        "pool_timeout": DB_POOL_TIMEOUT,    # Timeout for getting a connection from the pool
+        "pool_recycle": DB_POOL_RECYCLE,    # Recycle connections after this many seconds
+        "pool_pre_ping": DB_POOL_PRE_PING
+    }
+
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
 Base = declarative_base()
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_db_read_connection_string():
+    """
+    Get the read replica connection string, if a replica is configured.
+
+    Returns:
+        Optional[str]: DATABASE_READ_URL locally, AWS_DATABASE_READ_URL on RDS, or None
+    """
+    return AWS_DATABASE_READ_URL if USE_RDS else LOCAL_DATABASE_READ_URL
+
+
+def get_connect_args():
+    connect_args = {
+        "connect_timeout": DB_CONNECT_TIMEOUT  # Connection timeout in seconds
+    }
+
+    if USE_RDS:
+        connect_args["sslmode"] = "require"  # Require SSL for AWS RDS connections
+
+    return connect_args
+
+
+def create_db_engine():
+    """
+    Create the instrumented application (primary) engine from configuration.
+
+    Returns:
+        Engine: A new SQLAlchemy engine
+    """
+    engine = create_engine(
+        get_db_connection_string(),
+        connect_args=get_connect_args(),
+        **get_pool_options()
+    )
+    bind_pool_gauges(engine)
+    instrument_engine(engine)
+    track_primary_writes(engine)
+    return engine
+
+
+def create_read_engine():
+    """
+    Create the instrumented read replica engine, if a replica is configured.
+
+    Returns:
+        Optional[Engine]: A new SQLAlchemy engine, or None
+    """
+    read_url = get_db_read_connection_string()
+    if not read_url:
+        return None
+
+    engine = create_engine(read_url, connect_args=get_connect_args(), **get_pool_options())
+    instrument_engine(engine)
+    return engine
+
+
+def get_engine():
+    """
+    Get the application engine, creating it on first use.
+
+    Also binds SessionLocal to the engine and sets up the read replica, if any.
+
+    Returns:
+        Engine: The shared SQLAlchemy engine
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_db_engine()
+                SessionLocal.configure(bind=engine)
+                replica_router.set_replica(create_read_engine())
+                if replica_router.replica_engine is not None:
+                    replica_router.start_health_checks()
+                _engine = engine
+    return _engine
+
+
+def get_session_factory():
+    """
+    Get the session factory, bound to the application engine.
+
+    Returns:
+        sessionmaker: SessionLocal
+    """
+    get_engine()
+    return SessionLocal
+
+
+def dispose_engine():
+    """Close all pooled connections and drop the engines; the next use creates new ones."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+        replica_router.stop_health_checks()
+        if replica_router.replica_engine is not None:
+            replica_router.replica_engine.dispose()
+            replica_router.set_replica(None)
+
+
+def __getattr__(name):
+    # Backwards compatibility for `from procure.db.engine import engine`
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_pool_status():
+    """
+    Get a snapshot of the connection pool's checkout state.
+
+    Pool implementations without a fixed size (e.g. NullPool) only report
+    the pool class and checkout metrics.
+
+    Returns:
+        dict: Pool size, checked-in, checked-out and overflow connection counts,
+        plus checkout wait time and timeout metrics
+    """
+    pool = get_engine().pool
+    status = {"pool_class": type(pool).__name__, "mode": DB_POOL_MODE}
+    for name in POOL_STATES:
+        getter = getattr(pool, name, None)
+        if callable(getter):
+            status[name] = getter()
+    status.update(get_pool_metrics())
+    return status
@@ -0,0 +1,100 @@
+"""
+SQLAlchemy query instrumentation for proCure.
+
+Hooks ``before_cursor_execute``/``after_cursor_execute`` on the engine to time
+every statement. Timings are labelled by a statement fingerprint: the SQL with
+literals and bind parameters replaced by ``?`` and IN-lists collapsed, so that
+label cardinality is bounded by the number of distinct queries in the code.
+Statements over the slow query threshold are also handed to the slow query
+log (``procure.db.slow_queries``).
+"""
+
+import hashlib
+import re
+import time
+from functools import lru_cache
+from sqlalchemy import event
+
+from procure.db.slow_queries import record_slow_query
+from procure.utils.metrics import Histogram
+
+# Statement duration buckets (seconds)
+QUERY_DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+db_query_duration_seconds = Histogram(
+    "procure_db_query_duration_seconds",
+    "Database statement execution time by statement fingerprint",
+    ["operation", "fingerprint"],
+    buckets=QUERY_DURATION_BUCKETS
+)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_BIND_PARAMETER = re.compile(r"%\(\w+\)s|%s|\?|:\w+|\$\d+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+\"?(\w+)\"?", re.IGNORECASE)
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    """
+    Normalize a SQL statement so that executions of the same query compare equal.
+
+    Literals and bind parameters become ``?`` and parenthesised placeholder
+    lists (expanded IN clauses, multi-row VALUES) collapse to ``(?+)``.
+    """
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _BIND_PARAMETER.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(?+)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+@lru_cache(maxsize=2048)
+def fingerprint_statement(statement: str) -> tuple:
+    """
+    Get the (operation, fingerprint) labels for a SQL statement.
+
+    The fingerprint reads like ``select_contracts_1a2b3c4d``: the operation,
+    the first table referenced and a short hash of the normalized statement.
+    """
+    normalized = normalize_statement(statement)
+    operation = normalized.split(" ", 1)[0].lower() if normalized else "unknown"
+    table_match = _TABLE.search(normalized)
+    table = table_match.group(1).lower() if table_match else "none"
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:8]
+    return operation, f"{operation}_{table}_{digest}"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    duration = time.perf_counter() - start_times.pop()
+    operation, fingerprint = fingerprint_statement(statement)
+    db_query_duration_seconds.labels(operation, fingerprint).observe(duration)
+    record_slow_query(
+        conn, statement, parameters, executemany, duration,
+        normalize_statement(statement), fingerprint
+    )
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute is not called for failed statements
+    connection = exception_context.connection
+    if connection is not None and exception_context.cursor is not None:
+        start_times = connection.info.get("query_start_time")
+        if start_times:
+            start_times.pop()
+
+
+def instrument_engine(engine):
+    """Register the query timing listeners on an engine."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
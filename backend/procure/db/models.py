@@ -7,13 +7,17 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     UniqueConstraint,
+    Index,
     Boolean,
     Numeric,
-    func
+    BigInteger,
+    Date,
+    func,
+    text
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.asyncio import AsyncSession
-from .engine import Base, SessionLocal
+from .engine import Base, get_session_factory
 
 # Core Entity: Organization
 class Organization(Base):
@@ -24,22 +28,28 @@ class Organization(Base):
     company_name    = Column(String(255), nullable=True)   # Full company name (e.g., Example Corporation)
     admins_remaining = Column(Integer, nullable=False, default=1)
     members_remaining = Column(Integer, nullable=False, default=1000)
+    timezone        = Column(String(64), nullable=False, default="UTC", server_default="UTC", comment="IANA time zone of activity months and days")
 
     users = relationship(
         "User",
         back_populates="organization",
-        cascade="all, delete"
+        cascade="all, delete",
+        passive_deletes=True
     )
     contracts = relationship(
         "Contract",
         back_populates="organization",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
 
 
 # FastAPI-Users model
 class User(SQLAlchemyBaseUserTable[str], Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_organization_id", "organization_id"),
+    )
 
     id = Column(String(36), primary_key=True)
     email = Column(String(255), unique=True, nullable=False)
@@ -49,7 +59,7 @@ class User(SQLAlchemyBaseUserTable[str], Base):
     is_verified = Column(Boolean, default=False, nullable=False)
 
     # Additional fields
-    organization_id = Column(String(36), ForeignKey("organizations.organization_id"), nullable=True)
+    organization_id = Column(String(36), ForeignKey("organizations.organization_id", ondelete="CASCADE"), nullable=True)
     role = Column(String(50), nullable=False, default="member")
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
@@ -61,17 +71,20 @@ class User(SQLAlchemyBaseUserTable[str], Base):
     activities = relationship(
         "UserActivity",
         back_populates="user",
-        cascade="all, delete"
+        cascade="all, delete",
+        passive_deletes=True
     )
     owned_contracts = relationship(
         "Contract",
         back_populates="owner",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     device_tokens = relationship(
         "UserDeviceToken",
         back_populates="user",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
 
 
@@ -80,6 +93,17 @@ class Contract(Base):
     __tablename__ = "contracts"
     __table_args__ = (
         UniqueConstraint("organization_id", "product_url", name="uq_org_product_url"),
+        # Vendor matcher load: index-only scan of an organization's contract hosts
+        Index(
+            "ix_contracts_organization_id_vendor_domain", "organization_id", "vendor_domain",
+            postgresql_include=["contract_id", "product_url"]
+        ),
+        Index("ix_contracts_owner_id", "owner_id"),
+        # Renewal scan: contracts expiring in a window across organizations, in keyset order
+        Index(
+            "ix_contracts_expire_at_contract_id", "expire_at", "contract_id",
+            postgresql_where=text("expire_at IS NOT NULL")
+        ),
     )
 
     contract_id     = Column(Integer, primary_key=True)
@@ -88,8 +112,8 @@ class Contract(Base):
     vendor_domain   = Column(String(255), nullable=False, comment="Base domain of the product URL (e.g., example.com)")
     created_at      = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     expire_at       = Column(DateTime(timezone=True), nullable=True)
-    owner_id        = Column(String(36), ForeignKey("users.id"), nullable=True)
-    organization_id = Column(String(36), ForeignKey("organizations.organization_id"), nullable=True)
+    owner_id        = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    organization_id = Column(String(36), ForeignKey("organizations.organization_id", ondelete="CASCADE"), nullable=True)
     annual_spend    = Column(Numeric(precision=10, scale=2), nullable=False, default=0, comment="Annual spend in dollars")
     contract_type   = Column(String(255), nullable=True)
     contract_status = Column(String(255), nullable=True)
@@ -111,10 +135,18 @@ class Contract(Base):
 # User Activity
 class UserActivity(Base):
     __tablename__ = "user_activities"
+    __table_args__ = (
+        # Ingest: a user's activities on matched contracts this month (index-only)
+        Index("ix_user_activities_user_id_contract_id_date", "user_id", "contract_id", "date"),
+        # Contract usage: distinct users of a contract this month (index-only)
+        Index("ix_user_activities_contract_id_date", "contract_id", "date", postgresql_include=["user_id"]),
+        # Compaction: activities by month
+        Index("ix_user_activities_date", "date"),
+    )
 
     activity_id       = Column(Integer, primary_key=True)
-    user_id           = Column(String(36), ForeignKey("users.id"), nullable=False)
-    contract_id = Column(Integer, ForeignKey("contracts.contract_id"), nullable=False)
+    user_id           = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    contract_id = Column(Integer, ForeignKey("contracts.contract_id", ondelete="CASCADE"), nullable=False)
     browser           = Column(String(100), nullable=False)
     date              = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
@@ -122,12 +154,81 @@ class UserActivity(Base):
     contract = relationship("Contract")
 
 
+# Engagement aggregates (optional, see ENGAGEMENT_TRACKING_ENABLED)
+class UserActivityDay(Base):
+    __tablename__ = "user_activity_days"
+    __table_args__ = (
+        Index("ix_user_activity_days_contract_id_day", "contract_id", "day", postgresql_include=["visits"]),
+    )
+
+    user_id     = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    contract_id = Column(Integer, ForeignKey("contracts.contract_id", ondelete="CASCADE"), primary_key=True)
+    day         = Column(Date, primary_key=True)
+    visits      = Column(Integer, nullable=False, default=0, comment="URL visit entries matched to the contract that day")
+
+
+class UserActivityMonth(Base):
+    __tablename__ = "user_activity_months"
+    __table_args__ = (
+        Index("ix_user_activity_months_contract_id_period", "contract_id", "period", postgresql_include=["active_days"]),
+    )
+
+    user_id     = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    contract_id = Column(Integer, ForeignKey("contracts.contract_id", ondelete="CASCADE"), primary_key=True)
+    period      = Column(String(7), primary_key=True, comment="Month (YYYY-MM)")
+    active_days = Column(Integer, nullable=False, default=0, comment="Bitmask of active days, bit 0 is the 1st")
+
+
+# Compacted activity: user_activities rolled up per contract and month once past retention
+class ActivityMonthlyAggregate(Base):
+    __tablename__ = "activity_monthly_aggregates"
+
+    contract_id     = Column(Integer, ForeignKey("contracts.contract_id", ondelete="CASCADE"), primary_key=True)
+    period          = Column(String(7), primary_key=True, comment="Month (YYYY-MM)")
+    organization_id = Column(String(36), ForeignKey("organizations.organization_id", ondelete="CASCADE"), nullable=True, index=True)
+    active_users    = Column(Integer, nullable=False, default=0, comment="Distinct users with activity that month")
+    activities      = Column(Integer, nullable=False, default=0, comment="Raw user_activities rows rolled up")
+
+
+# Progress of the compaction job per month, so an interrupted run resumes where it stopped
+class ActivityCompactionCheckpoint(Base):
+    __tablename__ = "activity_compaction_checkpoints"
+
+    period          = Column(String(7), primary_key=True, comment="Month (YYYY-MM)")
+    status          = Column(String(20), nullable=False, comment="deleting or done")
+    max_activity_id = Column(Integer, nullable=False, comment="Last activity_id of the current pass")
+    aggregated_rows = Column(Integer, nullable=False, default=0, comment="Rows rolled up by the current pass")
+    deleted_rows    = Column(Integer, nullable=False, default=0, comment="Rows deleted by the current pass")
+    updated_at      = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+# Renewal alerts raised by the renewal scanner, one per contract, expiry and window
+class ContractRenewalAlert(Base):
+    __tablename__ = "contract_renewal_alerts"
+    __table_args__ = (
+        UniqueConstraint("contract_id", "expire_at", "window_days", name="uq_contract_renewal_alert"),
+        Index("ix_contract_renewal_alerts_organization_id_expire_at", "organization_id", "expire_at"),
+    )
+
+    alert_id        = Column(Integer, primary_key=True)
+    contract_id     = Column(Integer, ForeignKey("contracts.contract_id", ondelete="CASCADE"), nullable=False)
+    organization_id = Column(String(36), ForeignKey("organizations.organization_id", ondelete="CASCADE"), nullable=True)
+    expire_at       = Column(DateTime(timezone=True), nullable=False, comment="Contract expiry the alert is about")
+    window_days     = Column(Integer, nullable=False, comment="Days-before-expiry window the contract entered")
+    active_users    = Column(Integer, nullable=False, default=0, comment="Distinct users in the utilization window at the scan")
+    num_seats       = Column(Integer, nullable=False, default=1, comment="Seats at the scan")
+    created_at      = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
 # User Device Token
 class UserDeviceToken(Base):
     __tablename__ = "user_device_tokens"
+    __table_args__ = (
+        Index("ix_user_device_tokens_user_id_device_id", "user_id", "device_id"),
+    )
 
     token_id    = Column(Integer, primary_key=True)
-    user_id     = Column(String(36), ForeignKey("users.id"), nullable=False)
+    user_id     = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     device_id   = Column(String(255), nullable=False)
     token       = Column(String(255), unique=True, nullable=False)
     created_at  = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -135,9 +236,20 @@ class UserDeviceToken(Base):
     user        = relationship("User", back_populates="device_tokens")
 
 
+# Shadow IT: visited base domains without a contract, per organization and month
+class ShadowITDomain(Base):
+    __tablename__ = "shadow_it_domains"
+
+    organization_id = Column(String(36), ForeignKey("organizations.organization_id", ondelete="CASCADE"), primary_key=True)
+    period          = Column(String(7), primary_key=True, comment="Month of the visits (YYYY-MM)")
+    domain          = Column(String(255), primary_key=True, comment="Base domain (e.g., example.com)")
+    visits          = Column(BigInteger, nullable=False, default=0, comment="Estimated visits (heavy-hitter sketch)")
+    updated_at      = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
 # Dependency to get the database session
 def get_db_session():
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
@@ -0,0 +1,180 @@
+"""
+Instrumented SQLAlchemy connection pools for proCure.
+
+The pool classes below time every connection checkout and count checkout
+timeouts so pool saturation can be observed in production. Metrics are
+recorded through ``procure.utils.metrics``, and the
+recent average wait is kept for admission control.
+"""
+
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import NullPool, QueuePool
+
+from procure.configs.app_configs import ADMISSION_POOL_WAIT_HALF_LIFE_SECONDS
+from procure.utils.metrics import Counter, Gauge, Histogram, get_sample_value
+
+# Checkout wait buckets (seconds): from an idle pool up to the pool timeout
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+pool_checkout_wait_seconds = Histogram(
+    "procure_db_pool_checkout_wait_seconds",
+    "Time spent waiting to check out a database connection from the pool",
+    buckets=POOL_WAIT_BUCKETS
+)
+pool_checkout_timeouts = Counter(
+    "procure_db_pool_checkout_timeouts",
+    "Connection checkouts that failed because the pool timeout expired"
+)
+pool_connections = Gauge(
+    "procure_db_pool_connections",
+    "Connections in the pool by state (size, checkedin, checkedout, overflow)",
+    ["state"],
+    multiprocess_mode="livesum"
+)
+
+POOL_STATES = ("size", "checkedin", "checkedout", "overflow")
+
+
+class DecayingAverage:
+    """
+    Moving average of recent observations that decays towards zero over time.
+
+    Each observation moves the average by ``weight`` of the difference, and
+    the average halves every ``half_life_seconds`` without observations, so
+    it recovers once checkouts stop waiting or stop happening at all.
+    """
+
+    def __init__(self, half_life_seconds: float, weight: float = 0.2):
+        self.half_life_seconds = half_life_seconds
+        self.weight = weight
+        self._value = 0.0
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decayed(self, now: float) -> float:
+        return self._value * 0.5 ** ((now - self._updated_at) / self.half_life_seconds)
+
+    def observe(self, value: float):
+        now = time.monotonic()
+        with self._lock:
+            current = self._decayed(now)
+            self._value = current + self.weight * (value - current)
+            self._updated_at = now
+
+    def value(self) -> float:
+        return self._decayed(time.monotonic())
+
+    def reset(self):
+        with self._lock:
+            self._value = 0.0
+            self._updated_at = time.monotonic()
+
+
+# Recent checkout wait across the process's pools, read by admission control
+recent_checkout_wait = DecayingAverage(ADMISSION_POOL_WAIT_HALF_LIFE_SECONDS)
+pool_checkout_wait_recent_seconds = Gauge(
+    "procure_db_pool_checkout_wait_recent_seconds",
+    "Recent average connection checkout wait of the most waiting worker, as of its last checkout or scrape",
+    multiprocess_mode="livemax"
+)
+
+# Engine whose pool state is reported through pool_connections (the primary)
+_gauge_engine = None
+
+
+class _CheckoutTimingMixin:
+    """
+    Times ``_do_get`` (the blocking part of a checkout) and counts timeouts.
+
+    Also reports the pool state after every checkout and return, as gauges
+    are not read at collection time from other workers' processes.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_checkout_timeouts.inc()
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            pool_checkout_wait_seconds.observe(wait)
+            recent_checkout_wait.observe(wait)
+            pool_checkout_wait_recent_seconds.set(recent_checkout_wait.value())
+            _report_pool_state(self)
+
+    def _do_return_conn(self, record):
+        try:
+            super()._do_return_conn(record)
+        finally:
+            _report_pool_state(self)
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    """QueuePool that records checkout wait time and timeouts."""
+
+
+class InstrumentedNullPool(_CheckoutTimingMixin, NullPool):
+    """
+    NullPool that records connect time and failures.
+
+    Used in PgBouncer mode, where every checkout opens a fresh connection to
+    the bouncer and pooling happens outside the process.
+    """
+
+
+def _report_pool_state(pool):
+    """Set the pool_connections gauge from a pool, if it is the bound engine's pool."""
+    engine = _gauge_engine
+    if engine is None or engine.pool is not pool:
+        return
+    for state in POOL_STATES:
+        # States a pool class does not track (e.g. NullPool has no size) read as 0
+        getter = getattr(pool, state, None)
+        pool_connections.labels(state).set(getter() if callable(getter) else 0)
+
+
+def bind_pool_gauges(engine):
+    """
+    Report the engine's pool state through the pool_connections gauge.
+
+    The gauge follows ``engine.pool``, so it stays correct after the pool is
+    disposed and recreated.
+    """
+    global _gauge_engine
+    _gauge_engine = engine
+    _report_pool_state(engine.pool)
+
+
+def refresh_pool_gauges():
+    """Bring this worker's pool gauges up to date (before a scrape)."""
+    pool_checkout_wait_recent_seconds.set(recent_checkout_wait.value())
+    if _gauge_engine is not None:
+        _report_pool_state(_gauge_engine.pool)
+
+
+def get_pool_metrics():
+    """
+    Get checkout wait time and timeout metrics for the connection pool.
+
+    Returns:
+        dict: Wait time histogram (cumulative buckets, sum, count) and timeout count
+    """
+    buckets = {}
+    wait = {}
+    for sample in pool_checkout_wait_seconds.collect()[0].samples:
+        if sample.name.endswith("_bucket"):
+            buckets[sample.labels["le"]] = sample.value
+        else:
+            wait[sample.name.rsplit("_", 1)[-1]] = sample.value
+    return {
+        "checkout_wait_seconds": {
+            "buckets": buckets,
+            "sum": wait["sum"],
+            "count": wait["count"]
+        },
+        "checkout_timeouts": get_sample_value("procure_db_pool_checkout_timeouts_total")
+    }
@@ -0,0 +1,274 @@
+"""
+Read replica routing for proCure.
+
+Sessions created for read-only routes (``get_read_db``) are marked with
+``info["prefer_replica"]``. Their queries go to the read replica when:
+
+1. a replica is configured (DATABASE_READ_URL / AWS_DATABASE_READ_URL),
+2. the replica is up and its replication lag is under REPLICA_MAX_LAG_SECONDS
+   (checked every REPLICA_HEALTH_CHECK_INTERVAL_SECONDS by a background
+   thread, never on a request), and
+3. the code is not refilling a cache entry invalidated by a recent write
+   (``procure.utils.request_context.primary_reads``), and
+4. the requesting user has not written in the last REPLICA_STICKY_SECONDS,
+   so users read their own writes. Writers are marked in the shared cache
+   backend (REDIS_URL), so this holds whichever worker or pod serves the
+   next request.
+
+Everything else, including flushes from a read session, uses the primary.
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from procure.configs.app_configs import (
+    REPLICA_STICKY_SECONDS,
+    REPLICA_MAX_LAG_SECONDS,
+    REPLICA_HEALTH_CHECK_INTERVAL_SECONDS
+)
+from procure.utils.cache import KEY_PREFIX, get_backend, hash_key
+from procure.utils.metrics import Counter, Gauge
+from procure.utils.request_context import get_current_principal, primary_reads_required
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+replica_queries_routed = Counter(
+    "procure_db_replica_routed",
+    "Read-only session binds resolved, by target and reason",
+    ["target", "reason"]
+)
+replica_lag_seconds = Gauge(
+    "procure_db_replica_lag_seconds",
+    "Replication lag of the read replica at the last health check",
+    multiprocess_mode="livemostrecent"
+)
+
+# Replication lag on PostgreSQL; 0 when the replica has replayed everything it
+# received, so an idle primary does not look like lag
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class StickyPrimaryTracker:
+    """
+    Remembers which users wrote recently and must read from the primary.
+
+    Marks are kept in this process and, when the shared cache backend is
+    configured, in the backend with an expiry, so every worker sees them.
+    Backend errors fall back to this process's marks.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        max_entries: int = 100000,
+        backend_getter: Callable[[], Any] = get_backend
+    ):
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self.backend_getter = backend_getter
+        self._until: Dict[str, float] = {}
+        # When the backend mark of each principal expires, as last written
+        self._shared_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _shared_key(self, principal: str) -> str:
+        return f"{KEY_PREFIX}:sticky_primary:{hash_key(principal)}"
+
+    def mark(self, principal: str):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._until) >= self.max_entries:
+                self._until = {key: until for key, until in self._until.items() if until > now}
+                self._shared_until = {key: until for key, until in self._shared_until.items() if until > now}
+            self._until[principal] = now + self.window_seconds
+            # Writes come in bursts (one mark per statement): the backend mark
+            # is written for 1.5 windows and only refreshed once less than a
+            # window is left, so it outlives the last write by a window
+            if self._shared_until.get(principal, 0.0) >= now + self.window_seconds:
+                return
+            self._shared_until[principal] = now + 1.5 * self.window_seconds
+
+        backend = self.backend_getter()
+        if backend is None or self.window_seconds <= 0:
+            return
+        try:
+            backend.set(self._shared_key(principal), "1", ex=math.ceil(1.5 * self.window_seconds))
+        except Exception as e:
+            logger.warning(f"Cache backend error marking a writer sticky to the primary: {str(e)}")
+
+    def is_sticky(self, principal: Optional[str]) -> bool:
+        if principal is None:
+            return False
+        until = self._until.get(principal)
+        if until is not None and until > time.monotonic():
+            return True
+        backend = self.backend_getter()
+        if backend is None:
+            return False
+        try:
+            return backend.get(self._shared_key(principal)) is not None
+        except Exception as e:
+            logger.warning(f"Cache backend error reading a sticky writer: {str(e)}")
+            return False
+
+    def clear(self):
+        with self._lock:
+            self._until.clear()
+            self._shared_until.clear()
+
+
+class ReplicaRouter:
+    """Holds the replica engine and decides, per bind, whether it may be used."""
+
+    def __init__(self, max_lag_seconds: float, check_interval_seconds: float, sticky: StickyPrimaryTracker):
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.sticky = sticky
+        self.replica_engine = None
+        self._lock = threading.Lock()
+        self._checked_at: Optional[float] = None
+        self._healthy = False
+        self._lag: Optional[float] = None
+        self._error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_replica(self, engine):
+        """Use a replica engine (or None); it is unhealthy until its first health check."""
+        with self._lock:
+            self.replica_engine = engine
+            self._checked_at = None
+            self._healthy = False
+            self._lag = None
+            self._error = None
+
+    def refresh(self):
+        """Measure replica availability and lag now."""
+        engine = self.replica_engine
+        if engine is None:
+            return
+        with self._lock:
+            self._check(engine)
+            self._checked_at = time.monotonic()
+
+    def _check(self, engine):
+        """Measure replica availability and lag."""
+        try:
+            with engine.connect() as connection:
+                if connection.dialect.name == "postgresql":
+                    lag = float(connection.execute(REPLICA_LAG_QUERY).scalar() or 0)
+                else:
+                    connection.execute(text("SELECT 1"))
+                    lag = 0.0
+            self._lag = lag
+            self._healthy = lag <= self.max_lag_seconds
+            self._error = None if self._healthy else f"Replication lag {lag:.1f}s exceeds {self.max_lag_seconds}s"
+            replica_lag_seconds.set(lag)
+        except SQLAlchemyError as e:
+            logger.error(f"Read replica health check failed: {str(e)}")
+            self._healthy = False
+            self._lag = None
+            self._error = str(e)
+
+        if not self._healthy:
+            logger.warning(f"Read replica unavailable, reading from primary: {self._error}")
+
+    # Background health checks
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.check_interval_seconds)
+
+    def start_health_checks(self):
+        """Check the replica every check_interval_seconds in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="procure-replica-health", daemon=True)
+        self._thread.start()
+
+    def stop_health_checks(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def is_healthy(self) -> bool:
+        """Get the replica health as of the last check; never blocks on the replica."""
+        return self._healthy
+
+    def choose(self, sticky: Optional[bool] = None) -> Optional[Any]:
+        """
+        Get the replica engine for a read-only query, or None to use the primary.
+
+        Args:
+            sticky: Whether the requesting user wrote recently (default: look it up)
+        """
+        if self.replica_engine is None:
+            return None
+        if sticky is None:
+            sticky = self.sticky.is_sticky(get_current_principal())
+        if sticky:
+            replica_queries_routed.labels("primary", "sticky").inc()
+            return None
+        if not self.is_healthy():
+            replica_queries_routed.labels("primary", "unhealthy").inc()
+            return None
+        replica_queries_routed.labels("replica", "healthy").inc()
+        return self.replica_engine
+
+    def status(self) -> Dict[str, Any]:
+        """Get the replica status for health endpoints."""
+        if self.replica_engine is None:
+            return {"configured": False}
+        return {
+            "configured": True,
+            "checked": self._checked_at is not None,
+            "healthy": self._healthy,
+            "lag_seconds": self._lag,
+            "error": self._error
+        }
+
+
+sticky_primary = StickyPrimaryTracker(REPLICA_STICKY_SECONDS)
+replica_router = ReplicaRouter(REPLICA_MAX_LAG_SECONDS, REPLICA_HEALTH_CHECK_INTERVAL_SECONDS, sticky_primary)
+
+
+class RoutingSession(Session):
+    """Session that sends read-only sessions' queries to the replica when possible."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get("prefer_replica") and not self._flushing and not primary_reads_required.get():
+            # Looked up once per session: it may take a round trip to the cache backend
+            if "sticky" not in self.info:
+                self.info["sticky"] = sticky_primary.is_sticky(get_current_principal())
+            replica = replica_router.choose(self.info["sticky"])
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+def _mark_writer_sticky(conn, cursor, statement, parameters, context, executemany):
+    # Any statement other than a SELECT on the primary counts as a write
+    if statement.lstrip()[:6].upper() != "SELECT":
+        principal = get_current_principal()
+        if principal is not None:
+            sticky_primary.mark(principal)
+
+
+def track_primary_writes(engine):
+    """Register the listener that makes users who write on the primary sticky to it."""
+    event.listen(engine, "before_cursor_execute", _mark_writer_sticky)
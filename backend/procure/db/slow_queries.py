@@ -0,0 +1,247 @@
+"""
+Slow query log for proCure.
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS are logged with their
+normalized SQL, parameter shapes (never values), duration and calling route,
+and kept in a bounded in-memory ring buffer that the admin API reads back.
+
+When SLOW_QUERY_EXPLAIN_ENABLED is set, a sample of slow SELECT statements is
+explained on PostgreSQL and the plan is stored with the entry once ready.
+The EXPLAIN runs in a background thread on a connection of its own, in a
+transaction that is rolled back, so it never touches the request's
+transaction nor delays the request. ``EXPLAIN (ANALYZE, BUFFERS)`` executes
+the statement again, so statements with locking clauses (``FOR UPDATE``...)
+or volatile functions (``nextval()``, ``random()``...) only get a plain
+EXPLAIN. Each fingerprint is explained at most once per
+SLOW_QUERY_EXPLAIN_COOLDOWN_SECONDS, and at most one EXPLAIN runs at a time.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from procure.configs.app_configs import (
+    SLOW_QUERY_THRESHOLD_MS,
+    SLOW_QUERY_BUFFER_SIZE,
+    SLOW_QUERY_EXPLAIN_ENABLED,
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    SLOW_QUERY_EXPLAIN_COOLDOWN_SECONDS,
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS
+)
+from procure.utils.request_context import get_current_route
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class SlowQueryLog:
+    """Thread-safe ring buffer of the most recent slow queries."""
+
+    def __init__(self, maxlen: int):
+        self._entries = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._last_explained: Dict[str, float] = {}
+
+    def record(self, entry: Dict[str, Any]):
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get the recorded slow queries, most recent first."""
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return entries[:limit] if limit is not None else entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._last_explained.clear()
+
+    def should_explain(self, fingerprint: str, cooldown_seconds: float) -> bool:
+        """Check and claim the EXPLAIN slot for a fingerprint."""
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_explained.get(fingerprint)
+            if last is not None and now - last < cooldown_seconds:
+                return False
+            # Bound the cooldown map by the ring buffer size
+            if len(self._last_explained) >= self._entries.maxlen * 10:
+                self._last_explained.clear()
+            self._last_explained[fingerprint] = now
+            return True
+
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_BUFFER_SIZE)
+
+
+def describe_parameters(parameters: Any, executemany: bool = False) -> Any:
+    """
+    Describe the shape of statement parameters without their values.
+
+    Strings and sequences report their length so oversized IN-lists and
+    payloads stand out, e.g. ``{"vendor_domain_1": "str[11]"}``.
+    """
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameters[0] if parameters else None
+        return {"executemany": len(parameters), "row": describe_parameters(first)}
+    if isinstance(parameters, dict):
+        return {name: _describe_value(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_describe_value(value) for value in parameters]
+    return _describe_value(parameters)
+
+
+def _describe_value(value: Any) -> str:
+    if value is None:
+        return "None"
+    if isinstance(value, (str, bytes, list, tuple, set, frozenset)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+# Clauses that make re-executing a SELECT take row locks
+LOCKING_CLAUSE = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b", re.IGNORECASE)
+
+# Functions with side effects or a new result per call
+VOLATILE_FUNCTION = re.compile(
+    r"\b(?:nextval|setval|currval|random|gen_random_uuid|uuid_generate_v\d|clock_timestamp|timeofday"
+    r"|txid_current|pg_sleep\w*|pg_(?:try_)?advisory\w*|pg_notify|set_config|dblink\w*|lo_\w+)\s*\(",
+    re.IGNORECASE
+)
+
+# One EXPLAIN at a time per process, off the request threads
+_explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="procure-explain")
+_explain_slot = threading.Semaphore(1)
+
+
+def can_analyze(statement: str) -> bool:
+    """Check whether a SELECT can safely be executed again by EXPLAIN ANALYZE."""
+    return not LOCKING_CLAUSE.search(statement) and not VOLATILE_FUNCTION.search(statement)
+
+
+def explain_statement(engine, statement: str, parameters: Any, analyze: bool) -> str:
+    """
+    EXPLAIN a statement on a new connection, in a transaction that is rolled back.
+
+    Uses a raw DBAPI cursor so the EXPLAIN does not re-enter the
+    SQLAlchemy cursor events (and the slow query log).
+
+    Args:
+        engine: The engine the statement ran on (primary or replica)
+        statement: The SQL sent to the database
+        parameters: The statement parameters
+        analyze: Run ``EXPLAIN (ANALYZE, BUFFERS)`` rather than a plain EXPLAIN
+
+    Returns:
+        The text plan
+
+    Raises:
+        Exception: Any database error, e.g. the statement timeout
+    """
+    options = "ANALYZE, BUFFERS, FORMAT TEXT" if analyze else "FORMAT TEXT"
+    with engine.connect() as connection:
+        cursor = connection.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute("SET LOCAL statement_timeout = %s", (int(SLOW_QUERY_EXPLAIN_TIMEOUT_MS),))
+            cursor.execute(f"EXPLAIN ({options}) {statement}", parameters)
+            return "\n".join(row[0] for row in cursor.fetchall())
+        finally:
+            cursor.close()
+            connection.rollback()
+
+
+def _explain_into(entry: Dict[str, Any], engine, statement: str, parameters: Any):
+    """Fill an entry's plan in the background thread."""
+    try:
+        entry["plan"] = explain_statement(engine, statement, parameters, entry["explain"] == "analyze")
+    except Exception as e:
+        entry["plan_error"] = str(e)
+        logger.warning(f"Could not EXPLAIN slow query {entry['fingerprint']}: {str(e)}")
+    finally:
+        _explain_slot.release()
+
+
+def schedule_explain(entry: Dict[str, Any], engine, statement: str, parameters: Any) -> bool:
+    """
+    Explain a slow statement in the background unless an EXPLAIN is already running.
+
+    Returns:
+        Whether the EXPLAIN was scheduled
+    """
+    if not _explain_slot.acquire(blocking=False):
+        return False
+    entry["explain"] = "analyze" if can_analyze(statement) else "plain"
+    try:
+        _explain_executor.submit(_explain_into, entry, engine, statement, parameters)
+    except RuntimeError:
+        # Interpreter shutting down
+        _explain_slot.release()
+        entry["explain"] = None
+        return False
+    return True
+
+
+def record_slow_query(
+    connection,
+    statement: str,
+    parameters: Any,
+    executemany: bool,
+    duration: float,
+    normalized_statement: str,
+    fingerprint: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Log and buffer a statement if it exceeded the slow query threshold.
+
+    Args:
+        connection: The SQLAlchemy connection the statement ran on
+        statement: The SQL sent to the database
+        parameters: The statement parameters (only their shape is kept)
+        executemany: Whether the statement was an executemany
+        duration: Execution time in seconds
+        normalized_statement: The normalized SQL
+        fingerprint: The statement fingerprint
+
+    Returns:
+        The recorded entry, or None if the statement was not slow
+    """
+    duration_ms = duration * 1000
+    if duration_ms < SLOW_QUERY_THRESHOLD_MS:
+        return None
+
+    entry = {
+        "fingerprint": fingerprint,
+        "statement": normalized_statement,
+        "parameter_shapes": describe_parameters(parameters, executemany),
+        "duration_ms": round(duration_ms, 3),
+        "route": get_current_route(),
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "explain": None,
+        "plan": None,
+        "plan_error": None
+    }
+
+    logger.warning(
+        f"Slow query ({entry['duration_ms']} ms) on route {entry['route']}: "
+        f"{normalized_statement} params={entry['parameter_shapes']}"
+    )
+
+    # Only SELECTs are explained, since ANALYZE executes the statement again
+    if (
+        SLOW_QUERY_EXPLAIN_ENABLED
+        and not executemany
+        and connection.dialect.name == "postgresql"
+        and normalized_statement[:6].upper() == "SELECT"
+        and random.random() < SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+        and slow_query_log.should_explain(fingerprint, SLOW_QUERY_EXPLAIN_COOLDOWN_SECONDS)
+    ):
+        schedule_explain(entry, connection.engine, statement, parameters)
+
+    slow_query_log.record(entry)
+    return entry
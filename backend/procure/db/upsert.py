@@ -0,0 +1,29 @@
+"""
+Dialect-specific INSERT ... ON CONFLICT for proCure.
+
+PostgreSQL and SQLite both support ``ON CONFLICT DO UPDATE`` with the same
+SQLAlchemy API, but through their own ``insert`` constructs.
+"""
+
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(db: Session, table):
+    """
+    Get an INSERT for table that supports on_conflict_do_update.
+
+    Args:
+        db: Session whose database decides the dialect
+        table: Mapped class or Table to insert into
+
+    Raises:
+        NotImplementedError: If the database is neither PostgreSQL nor SQLite
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    return insert(table)
@@ -0,0 +1,134 @@
+"""
+Vendor matching for url visits.
+
+Each contract is keyed by the host of its normalized product URL (without a
+leading "www."). A VendorMatcher holds an organization's contract hosts in a
+trie over reversed domain labels, so a visited hostname is attributed to the
+contracts of its longest matching suffix in O(labels):
+
+- a ``mail.google.com`` contract matches ``mail.google.com`` and its
+  subdomains, but not ``drive.google.com``
+- a ``google.com`` contract matches every google.com host that no more
+  specific contract claims
+
+Matchers are built once per organization and contract version: the contract
+hosts are cached (shared across workers with Redis), the trie itself is kept
+per process, and invalidate_vendor_matcher drops both when an organization's
+contracts change.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from procure.db.models import Contract
+from procure.utils.url_visit_batch import extract_hostname
+from procure.utils.cache import get_cache
+from procure.configs.app_configs import VENDOR_MATCHER_CACHE_TTL_SECONDS
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Contract hosts per organization, invalidated when its contracts change
+vendor_matcher_cache = get_cache("vendor_matcher", VENDOR_MATCHER_CACHE_TTL_SECONDS)
+
+# Trie key holding the contract IDs of a node (labels are always strings)
+_CONTRACTS = None
+
+
+class VendorMatcher:
+    """Longest-suffix matcher from hostnames to contract IDs."""
+
+    __slots__ = ("_root",)
+
+    def __init__(self, contract_hosts: Iterable[Tuple[int, str]]):
+        """
+        Args:
+            contract_hosts: (contract_id, host) per contract, as returned by contract_host
+        """
+        self._root: Dict = {}
+        for contract_id, host in contract_hosts:
+            if not host:
+                continue
+            node = self._root
+            for label in reversed(host.split(".")):
+                node = node.setdefault(label, {})
+            node[_CONTRACTS] = node.get(_CONTRACTS, ()) + (contract_id,)
+
+    def __bool__(self) -> bool:
+        return bool(self._root)
+
+    def match(self, hostname: str) -> Tuple[int, ...]:
+        """
+        Get the contracts of the longest contract host that hostname ends with.
+
+        Args:
+            hostname: Lowercased hostname, e.g. as extracted by extract_hostname
+
+        Returns:
+            The matched contract IDs, empty if no contract host matches
+        """
+        node = self._root
+        matched = ()
+        for label in reversed(hostname.rstrip(".").split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            matched = node.get(_CONTRACTS, matched)
+        return matched
+
+
+def contract_host(product_url: str, vendor_domain: Optional[str] = None) -> str:
+    """
+    Get the host a contract is matched on.
+
+    Args:
+        product_url: The contract's normalized product URL
+        vendor_domain: Fallback when the product URL has no host
+
+    Returns:
+        The lowercased host without a leading "www."
+    """
+    host = extract_hostname(product_url or "")
+    if host.startswith("www."):
+        host = host[4:]
+    return host or (vendor_domain or "").lower()
+
+
+def load_contract_hosts(db: Session, organization_id: str) -> List[List]:
+    """
+    Get the matching host of every contract of an organization.
+
+    Returns:
+        [contract_id, host] per contract
+    """
+    rows = db.execute(
+        select(Contract.contract_id, Contract.product_url, Contract.vendor_domain)
+        .where(Contract.organization_id == organization_id)
+    ).fetchall()
+    return [[contract_id, contract_host(product_url, vendor_domain)] for contract_id, product_url, vendor_domain in rows]
+
+
+def get_vendor_matcher(db: Session, organization_id: str) -> VendorMatcher:
+    """
+    Get the (cached) vendor matcher of an organization.
+
+    The contracts are only queried when neither this worker nor the shared
+    cache has the organization's current contract hosts.
+    """
+    def build() -> VendorMatcher:
+        contract_hosts = vendor_matcher_cache.get_or_load(
+            "contract_hosts",
+            lambda: load_contract_hosts(db, organization_id),
+            scope=organization_id
+        )
+        return VendorMatcher((contract_id, host) for contract_id, host in contract_hosts)
+
+    return vendor_matcher_cache.get_or_build_local("matcher", build, scope=organization_id)
+
+
+def invalidate_vendor_matcher(organization_id: str):
+    """Invalidate the cached matcher after an organization's contracts change."""
+    vendor_matcher_cache.invalidate(organization_id)
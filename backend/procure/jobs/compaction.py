@@ -0,0 +1,427 @@
+"""
+Retention and compaction job for user_activities.
+
+Raw activity rows older than ACTIVITY_RETENTION_MONTHS whole months are
+rolled into ``activity_monthly_aggregates`` (distinct users and rows per
+contract and month) and then deleted, so the table and its indexes stay
+proportional to the retention window.
+
+Months are those of each organization's time zone (Organization.timezone),
+like everywhere else activities are bucketed: a pass over "2026-08" takes
+every organization's rows from its own local August 1st to September 1st.
+The current month is kept in every time zone.
+
+Each month is compacted in passes recorded in ``activity_compaction_checkpoints``:
+
+1. Aggregate: the month's rows up to its current last ``activity_id`` are
+   counted, then rolled up and added to the aggregates with the checkpoint
+   in one transaction. The rollup is checked against the count taken
+   beforehand, so rows dropped by the rollup (or deleted in between) stop
+   the run before anything is written.
+2. Delete: the pass's rows are deleted in batches of
+   ACTIVITY_COMPACTION_BATCH_SIZE, one short transaction each, pausing
+   ACTIVITY_COMPACTION_PAUSE_SECONDS between batches. The checkpoint is
+   updated in the same transaction as every batch.
+
+A run that is interrupted resumes the delete phase of its checkpoint, so
+rows are never aggregated twice. Rows that arrive later for a compacted
+month (late timestamps) are picked up by a new pass; their users are added
+to ``active_users``, which may then count a user twice. So are the rows
+around a month boundary of an organization whose time zone changes between
+the two phases of a pass.
+
+Usage (from the backend directory):
+    python -m procure.jobs.compaction
+    python -m procure.jobs.compaction --retention-months 6 --dry-run
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime, timezone, tzinfo
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, or_, select, func, delete
+from sqlalchemy.orm import Session
+
+from procure.db.engine import get_session_factory
+from procure.db.models import (
+    ActivityCompactionCheckpoint,
+    ActivityMonthlyAggregate,
+    Contract,
+    Organization,
+    UserActivity
+)
+from procure.db.upsert import dialect_insert
+from procure.utils.metrics import Counter
+from procure.utils.periods import add_months, current_month, get_timezone, month_start, period_bounds
+from procure.configs.app_configs import (
+    ACTIVITY_RETENTION_MONTHS,
+    ACTIVITY_COMPACTION_BATCH_SIZE,
+    ACTIVITY_COMPACTION_PAUSE_SECONDS
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+activity_compaction_rows = Counter(
+    "procure_activity_compaction_rows",
+    "user_activities rows handled by the compaction job by action (aggregated, deleted)",
+    ["action"]
+)
+
+
+class CompactionError(Exception):
+    """Raised when the rolled up counts do not match the raw rows."""
+
+
+def retention_horizon(retention_months: int, now: Optional[datetime] = None, tz: tzinfo = timezone.utc) -> datetime:
+    """
+    Get the start of the oldest month whose raw activities are kept, in a time zone.
+
+    Args:
+        retention_months: Whole months kept, the current month included (at least 1)
+        now: The current time (default: now)
+        tz: The time zone months are taken in (default: UTC)
+
+    Returns:
+        The horizon, as a UTC datetime; activities dated before it are compacted
+
+    Raises:
+        ValueError: If retention_months is below 1; the current month is always kept
+                    since ingest deduplicates against it
+    """
+    if retention_months < 1:
+        raise ValueError("retention_months must be at least 1")
+    return month_start(*add_months(*current_month(tz, now), 1 - retention_months), tz)
+
+
+def organization_zones(db: Session) -> List[Optional[str]]:
+    """
+    Get the time zones activities are bucketed in.
+
+    Returns:
+        Every distinct Organization.timezone, then None for contracts without an organization (UTC)
+    """
+    return sorted(db.scalars(select(Organization.timezone).distinct()).all()) + [None]
+
+
+def _zone_contracts(zone: Optional[str]):
+    """Select the IDs of the contracts whose activities are bucketed in a time zone."""
+    if zone is None:
+        return select(Contract.contract_id).where(Contract.organization_id.is_(None))
+    return (
+        select(Contract.contract_id)
+        .join(Organization, Contract.organization_id == Organization.organization_id)
+        .where(Organization.timezone == zone)
+    )
+
+
+def horizon_period(zones: List[Optional[str]], retention_months: int, now: Optional[datetime] = None) -> str:
+    """
+    Get the oldest month kept in every time zone; earlier months are compacted.
+
+    Returns:
+        The month (YYYY-MM)
+
+    Raises:
+        ValueError: If retention_months is below 1
+    """
+    return min(
+        retention_horizon(retention_months, now, get_timezone(zone)).astimezone(get_timezone(zone)).strftime("%Y-%m")
+        for zone in zones
+    )
+
+
+def periods_to_compact(db: Session, horizon: str, zones: List[Optional[str]]) -> List[str]:
+    """Get the months (YYYY-MM) before the horizon month with raw activities or an unfinished pass, oldest first."""
+    periods = set(db.scalars(
+        select(ActivityCompactionCheckpoint.period).where(ActivityCompactionCheckpoint.status == "deleting")
+    ).all())
+    for zone in zones:
+        oldest = db.scalar(
+            select(func.min(UserActivity.date)).where(UserActivity.contract_id.in_(_zone_contracts(zone)))
+        )
+        if oldest is None:
+            continue
+        if oldest.tzinfo is None:
+            oldest = oldest.replace(tzinfo=timezone.utc)
+        local = oldest.astimezone(get_timezone(zone))
+        year, month = local.year, local.month
+        while f"{year:04d}-{month:02d}" < horizon:
+            periods.add(f"{year:04d}-{month:02d}")
+            year, month = add_months(year, month, 1)
+    return sorted(periods)
+
+
+def period_filter(period: str, zones: List[Optional[str]]):
+    """Filter the rows of a month, taken in each organization's time zone."""
+    months = []
+    for zone in zones:
+        start, end = period_bounds(period, get_timezone(zone))
+        months.append(and_(
+            UserActivity.contract_id.in_(_zone_contracts(zone)),
+            UserActivity.date >= start,
+            UserActivity.date < end
+        ))
+    return or_(*months)
+
+
+def pass_filter(period: str, max_activity_id: int, zones: List[Optional[str]]):
+    return (period_filter(period, zones), UserActivity.activity_id <= max_activity_id)
+
+
+def aggregate_period(
+    db: Session,
+    period: str,
+    zones: Optional[List[Optional[str]]] = None
+) -> Optional[ActivityCompactionCheckpoint]:
+    """
+    Start a pass: roll up a month's raw rows into the aggregates and write its checkpoint.
+
+    The pass's rows are counted first, in their own transaction, then rolled
+    up and written in one transaction. Nothing is written if the rollup does
+    not add up to the count.
+
+    Args:
+        db: Database session (primary)
+        period: Month (YYYY-MM)
+        zones: Time zones of the organizations (default: organization_zones)
+
+    Returns:
+        The checkpoint of the new pass, or None if the month has no raw rows
+
+    Raises:
+        CompactionError: If the rolled up rows differ from the rows counted beforehand
+    """
+    zones = zones if zones is not None else organization_zones(db)
+    max_activity_id = db.scalar(select(func.max(UserActivity.activity_id)).where(period_filter(period, zones)))
+    if max_activity_id is None:
+        db.commit()
+        return None
+    raw_rows = db.scalar(
+        select(func.count()).select_from(UserActivity).where(*pass_filter(period, max_activity_id, zones))
+    )
+    db.commit()
+
+    rows = [
+        {
+            "contract_id": contract_id,
+            "period": period,
+            "organization_id": organization_id,
+            "active_users": active_users,
+            "activities": activities
+        }
+        for contract_id, organization_id, active_users, activities in db.execute(
+            select(
+                UserActivity.contract_id,
+                Contract.organization_id,
+                func.count(func.distinct(UserActivity.user_id)),
+                func.count()
+            )
+            .join(Contract, UserActivity.contract_id == Contract.contract_id)
+            .where(*pass_filter(period, max_activity_id, zones))
+            .group_by(UserActivity.contract_id, Contract.organization_id)
+        ).fetchall()
+    ]
+    aggregated_rows = sum(row["activities"] for row in rows)
+
+    if raw_rows != aggregated_rows:
+        db.rollback()
+        raise CompactionError(f"{period}: rolled up {aggregated_rows} activities but counted {raw_rows} beforehand")
+
+    try:
+        stmt = dialect_insert(db, ActivityMonthlyAggregate)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ActivityMonthlyAggregate.contract_id, ActivityMonthlyAggregate.period],
+            set_={
+                "active_users": ActivityMonthlyAggregate.active_users + stmt.excluded.active_users,
+                "activities": ActivityMonthlyAggregate.activities + stmt.excluded.activities
+            }
+        )
+        db.execute(stmt, rows)
+
+        checkpoint = db.get(ActivityCompactionCheckpoint, period)
+        if checkpoint is None:
+            checkpoint = ActivityCompactionCheckpoint(period=period)
+            db.add(checkpoint)
+        checkpoint.status = "deleting"
+        checkpoint.max_activity_id = max_activity_id
+        checkpoint.aggregated_rows = aggregated_rows
+        checkpoint.deleted_rows = 0
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    activity_compaction_rows.labels("aggregated").inc(aggregated_rows)
+    return checkpoint
+
+
+def delete_batch(
+    db: Session,
+    checkpoint: ActivityCompactionCheckpoint,
+    batch_size: int,
+    zones: Optional[List[Optional[str]]] = None
+) -> int:
+    """
+    Delete the next batch of a pass's raw rows and record it in the checkpoint.
+
+    Args:
+        db: Database session (primary)
+        checkpoint: The pass
+        batch_size: Raw rows deleted
+        zones: Time zones of the organizations (default: organization_zones)
+
+    Returns:
+        The number of rows deleted, 0 once the pass is done
+    """
+    zones = zones if zones is not None else organization_zones(db)
+    ids = db.scalars(
+        select(UserActivity.activity_id)
+        .where(*pass_filter(checkpoint.period, checkpoint.max_activity_id, zones))
+        .order_by(UserActivity.activity_id)
+        .limit(batch_size)
+    ).all()
+    try:
+        if ids:
+            deleted = db.execute(delete(UserActivity).where(UserActivity.activity_id.in_(ids))).rowcount
+            checkpoint.deleted_rows += deleted
+        else:
+            deleted = 0
+            checkpoint.status = "done"
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    if deleted:
+        activity_compaction_rows.labels("deleted").inc(deleted)
+    elif checkpoint.deleted_rows != checkpoint.aggregated_rows:
+        # Rows removed by something else during the pass (e.g. a deleted user)
+        logger.warning(
+            f"{checkpoint.period}: deleted {checkpoint.deleted_rows} of "
+            f"{checkpoint.aggregated_rows} compacted activities"
+        )
+    return deleted
+
+
+def compact_period(
+    db: Session,
+    period: str,
+    batch_size: int = ACTIVITY_COMPACTION_BATCH_SIZE,
+    pause_seconds: float = ACTIVITY_COMPACTION_PAUSE_SECONDS,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    zones: Optional[List[Optional[str]]] = None
+) -> Dict[str, Any]:
+    """
+    Compact one month, resuming its unfinished pass if there is one.
+
+    Args:
+        db: Database session (primary)
+        period: Month (YYYY-MM)
+        batch_size: Raw rows deleted per transaction
+        pause_seconds: Pause between delete batches
+        progress: Called with the period summary after every batch
+        zones: Time zones of the organizations (default: organization_zones)
+
+    Returns:
+        The period summary: aggregated and deleted rows of the pass, and whether it resumed
+    """
+    zones = zones if zones is not None else organization_zones(db)
+    checkpoint = db.get(ActivityCompactionCheckpoint, period)
+    resumed = checkpoint is not None and checkpoint.status == "deleting"
+    if not resumed:
+        checkpoint = aggregate_period(db, period, zones)
+        if checkpoint is None:
+            return {"period": period, "aggregated": 0, "deleted": 0, "resumed": False}
+
+    while True:
+        deleted = delete_batch(db, checkpoint, batch_size, zones)
+        summary = {
+            "period": period,
+            "aggregated": checkpoint.aggregated_rows,
+            "deleted": checkpoint.deleted_rows,
+            "resumed": resumed
+        }
+        if progress:
+            progress(summary)
+        if not deleted:
+            return summary
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+
+def run_compaction(
+    db: Session,
+    retention_months: int = ACTIVITY_RETENTION_MONTHS,
+    batch_size: int = ACTIVITY_COMPACTION_BATCH_SIZE,
+    pause_seconds: float = ACTIVITY_COMPACTION_PAUSE_SECONDS,
+    now: Optional[datetime] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Compact every month older than the retention window, oldest first.
+
+    Args:
+        db: Database session (primary)
+        retention_months: Whole months of raw activities kept, the current month included
+        batch_size: Raw rows deleted per transaction
+        pause_seconds: Pause between delete batches
+        now: The current time (default: now, UTC)
+        progress: Called with the period summary after every batch
+
+    Returns:
+        A summary per compacted month
+    """
+    zones = organization_zones(db)
+    horizon = horizon_period(zones, retention_months, now)
+    return [
+        compact_period(db, period, batch_size, pause_seconds, progress, zones)
+        for period in periods_to_compact(db, horizon, zones)
+    ]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Roll up and delete user_activities older than the retention window")
+    parser.add_argument("--retention-months", type=int, default=ACTIVITY_RETENTION_MONTHS,
+                        help="Whole months of raw activities to keep, the current month included")
+    parser.add_argument("--batch-size", type=int, default=ACTIVITY_COMPACTION_BATCH_SIZE,
+                        help="Rows deleted per transaction")
+    parser.add_argument("--pause", type=float, default=ACTIVITY_COMPACTION_PAUSE_SECONDS,
+                        help="Seconds to pause between delete batches")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only list the months that would be compacted")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    db = get_session_factory()()
+    try:
+        if args.dry_run:
+            zones = organization_zones(db)
+            horizon = horizon_period(zones, args.retention_months)
+            periods = periods_to_compact(db, horizon, zones)
+            logger.info(f"Months before {horizon} to compact: {', '.join(periods) or 'none'}")
+            return 0
+
+        def report(summary):
+            logger.info(
+                f"{summary['period']}: deleted {summary['deleted']}/{summary['aggregated']} activities"
+                + (" (resumed)" if summary["resumed"] else "")
+            )
+
+        summaries = run_compaction(db, args.retention_months, args.batch_size, args.pause, progress=report)
+        logger.info(f"Compacted {len(summaries)} months, {sum(s['deleted'] for s in summaries)} activities deleted")
+        return 0
+    except CompactionError as e:
+        logger.error(f"Compaction stopped: {str(e)}")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,275 @@
+"""
+Offboarding job: delete an organization or a user with everything they own.
+
+Foreign keys cascade on delete, so deleting the organization or user row
+alone would also work, but for a large tenant that is one statement holding
+locks on millions of rows. Instead, dependent rows are deleted table by
+table, children first, in batches of OFFBOARDING_BATCH_SIZE rows with one
+short transaction each, pausing OFFBOARDING_PAUSE_SECONDS between batches.
+The organization or user row is deleted last, once nothing references it.
+
+Every batch commits on its own, so an interrupted run can simply be started
+again: it continues with whatever rows are left.
+
+Deleting a user also deletes the contracts they own, as the ORM cascade
+always has; the contracts' activities of other users go with them.
+
+The device tokens of the deleted users are evicted from the token identity
+cache once the run is done, so they stop authenticating right away rather
+than when their cached identity expires.
+
+Usage (from the backend directory):
+    python -m procure.jobs.offboarding --organization <organization_id>
+    python -m procure.jobs.offboarding --user <user_id> --dry-run
+"""
+
+import argparse
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, func, delete, or_, tuple_
+from sqlalchemy.orm import Session
+
+from procure.db.engine import get_session_factory
+from procure.db.models import (
+    ActivityMonthlyAggregate,
+    Contract,
+    ContractRenewalAlert,
+    Organization,
+    ShadowITDomain,
+    User,
+    UserActivity,
+    UserActivityDay,
+    UserActivityMonth,
+    UserDeviceToken
+)
+from procure.db.auth import token_identity_cache
+from procure.db.vendor_matcher import invalidate_vendor_matcher
+from procure.server.analytics.analytics import invalidate_contract_usage
+from procure.server.manage.orgs import organization_cache
+from procure.utils.cache import hash_key
+from procure.utils.metrics import Counter
+from procure.configs.app_configs import OFFBOARDING_BATCH_SIZE, OFFBOARDING_PAUSE_SECONDS
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+offboarding_deleted_rows = Counter(
+    "procure_offboarding_deleted_rows",
+    "Rows deleted by the offboarding job by table",
+    ["table"]
+)
+
+
+def organization_steps(organization_id: str) -> List[Tuple[Any, Any]]:
+    """Get (model, condition) pairs for deleting an organization, children first."""
+    users = select(User.id).where(User.organization_id == organization_id)
+    contracts = select(Contract.contract_id).where(
+        or_(Contract.organization_id == organization_id, Contract.owner_id.in_(users))
+    )
+    return [
+        *user_data_steps(users, contracts),
+        (ActivityMonthlyAggregate, or_(
+            ActivityMonthlyAggregate.organization_id == organization_id,
+            ActivityMonthlyAggregate.contract_id.in_(contracts)
+        )),
+        (ShadowITDomain, ShadowITDomain.organization_id == organization_id),
+        (ContractRenewalAlert, or_(
+            ContractRenewalAlert.organization_id == organization_id,
+            ContractRenewalAlert.contract_id.in_(contracts)
+        )),
+        (Contract, Contract.contract_id.in_(contracts)),
+        (User, User.organization_id == organization_id),
+        (Organization, Organization.organization_id == organization_id)
+    ]
+
+
+def user_steps(user_id: str) -> List[Tuple[Any, Any]]:
+    """Get (model, condition) pairs for deleting a user, children first."""
+    users = select(User.id).where(User.id == user_id)
+    contracts = select(Contract.contract_id).where(Contract.owner_id == user_id)
+    return [
+        *user_data_steps(users, contracts),
+        (ActivityMonthlyAggregate, ActivityMonthlyAggregate.contract_id.in_(contracts)),
+        (ContractRenewalAlert, ContractRenewalAlert.contract_id.in_(contracts)),
+        (Contract, Contract.contract_id.in_(contracts)),
+        (User, User.id == user_id)
+    ]
+
+
+def user_data_steps(users, contracts) -> List[Tuple[Any, Any]]:
+    return [
+        (model, or_(model.user_id.in_(users), model.contract_id.in_(contracts)))
+        for model in (UserActivity, UserActivityDay, UserActivityMonth)
+    ] + [(UserDeviceToken, UserDeviceToken.user_id.in_(users))]
+
+
+def count_rows(db: Session, steps: List[Tuple[Any, Any]]) -> Dict[str, int]:
+    """Count the rows each step would delete."""
+    return {
+        model.__tablename__: db.scalar(select(func.count()).select_from(model).where(condition))
+        for model, condition in steps
+    }
+
+
+def delete_in_batches(
+    db: Session,
+    model,
+    condition,
+    batch_size: int = OFFBOARDING_BATCH_SIZE,
+    pause_seconds: float = OFFBOARDING_PAUSE_SECONDS,
+    progress: Optional[Callable[[str, int], None]] = None
+) -> int:
+    """
+    Delete a table's rows matching condition, batch_size rows per transaction.
+
+    Args:
+        db: Database session (primary)
+        model: The model of the table
+        condition: Rows to delete
+        batch_size: Rows deleted per transaction
+        pause_seconds: Pause between batches
+        progress: Called with the table name and rows deleted so far after every batch
+
+    Returns:
+        The number of rows deleted
+    """
+    primary_key = list(model.__table__.primary_key.columns)
+    total = 0
+    while True:
+        keys = db.execute(select(*primary_key).where(condition).limit(batch_size)).fetchall()
+        if not keys:
+            return total
+        if len(primary_key) == 1:
+            batch = primary_key[0].in_([key[0] for key in keys])
+        else:
+            batch = tuple_(*primary_key).in_([tuple(key) for key in keys])
+        try:
+            deleted = db.execute(delete(model).where(batch)).rowcount
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        total += deleted
+        offboarding_deleted_rows.labels(model.__tablename__).inc(deleted)
+        if progress:
+            progress(model.__tablename__, total)
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+
+def offboard(
+    db: Session,
+    steps: List[Tuple[Any, Any]],
+    batch_size: int = OFFBOARDING_BATCH_SIZE,
+    pause_seconds: float = OFFBOARDING_PAUSE_SECONDS,
+    progress: Optional[Callable[[str, int], None]] = None
+) -> Dict[str, int]:
+    """
+    Run offboarding steps in order.
+
+    Returns:
+        Rows deleted per table
+    """
+    return {
+        model.__tablename__: delete_in_batches(db, model, condition, batch_size, pause_seconds, progress)
+        for model, condition in steps
+    }
+
+
+def device_token_hashes(db: Session, users) -> List[str]:
+    """Get the token identity cache keys of the device tokens of users (a select of user IDs)."""
+    return [hash_key(token) for token in db.scalars(select(UserDeviceToken.token).where(UserDeviceToken.user_id.in_(users)))]
+
+
+def evict_token_identities(token_hashes: List[str]):
+    for token_hash in token_hashes:
+        token_identity_cache.delete(token_hash)
+
+
+def offboard_organization(db: Session, organization_id: str, **kwargs) -> Dict[str, int]:
+    """
+    Delete an organization, its users, contracts and all their data in bounded batches.
+
+    Args:
+        db: Database session (primary)
+        organization_id: The organization ID
+        **kwargs: batch_size, pause_seconds and progress, see offboard
+
+    Returns:
+        Rows deleted per table
+    """
+    # Collected first: the tokens are deleted with the users' data
+    token_hashes = device_token_hashes(db, select(User.id).where(User.organization_id == organization_id))
+    deleted = offboard(db, organization_steps(organization_id), **kwargs)
+    evict_token_identities(token_hashes)
+    invalidate_vendor_matcher(organization_id)
+    invalidate_contract_usage(organization_id)
+    organization_cache.invalidate(organization_id)
+    return deleted
+
+
+def offboard_user(db: Session, user_id: str, **kwargs) -> Dict[str, int]:
+    """
+    Delete a user, the contracts they own and all their data in bounded batches.
+
+    Args:
+        db: Database session (primary)
+        user_id: The user ID
+        **kwargs: batch_size, pause_seconds and progress, see offboard
+
+    Returns:
+        Rows deleted per table
+    """
+    organization_id = db.scalar(select(User.organization_id).where(User.id == user_id))
+    token_hashes = device_token_hashes(db, select(User.id).where(User.id == user_id))
+    deleted = offboard(db, user_steps(user_id), **kwargs)
+    evict_token_identities(token_hashes)
+    if organization_id:
+        invalidate_vendor_matcher(organization_id)
+        invalidate_contract_usage(organization_id)
+    return deleted
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Delete an organization or a user in bounded batches")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--organization", help="Organization ID to delete with its users and contracts")
+    target.add_argument("--user", help="User ID to delete with the contracts they own")
+    parser.add_argument("--batch-size", type=int, default=OFFBOARDING_BATCH_SIZE,
+                        help="Rows deleted per transaction")
+    parser.add_argument("--pause", type=float, default=OFFBOARDING_PAUSE_SECONDS,
+                        help="Seconds to pause between batches")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only count the rows that would be deleted")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    db = get_session_factory()()
+    try:
+        if args.dry_run:
+            steps = organization_steps(args.organization) if args.organization else user_steps(args.user)
+            for table, rows in count_rows(db, steps).items():
+                logger.info(f"{table}: {rows} rows to delete")
+            return 0
+
+        def report(table, deleted):
+            logger.info(f"{table}: deleted {deleted} rows")
+
+        options = {"batch_size": args.batch_size, "pause_seconds": args.pause, "progress": report}
+        if args.organization:
+            deleted = offboard_organization(db, args.organization, **options)
+        else:
+            deleted = offboard_user(db, args.user, **options)
+        logger.info(f"Offboarding done, {sum(deleted.values())} rows deleted")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
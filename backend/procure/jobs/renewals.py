@@ -0,0 +1,228 @@
+"""
+Contract renewal alert scanner.
+
+Finds the contracts of every organization that expire within the largest of
+RENEWAL_ALERT_WINDOWS_DAYS and raises an alert when a contract enters a
+window, so admins can review seats and spend before the renewal date.
+
+The scan is one range over ``ix_contracts_expire_at_contract_id``, read in
+keyset order in batches of RENEWAL_SCAN_BATCH_SIZE, so its cost depends on
+the contracts about to expire rather than on all contracts. Each batch is:
+
+1. One SELECT of the batch's contracts with, per contract, the window it is
+   in and its distinct users over the last RENEWAL_UTILIZATION_DAYS (read
+   from ``ix_user_activities_contract_id_date``).
+2. One INSERT ... ON CONFLICT DO NOTHING of their alerts into
+   ``contract_renewal_alerts``, committed with the batch.
+
+Alerts are unique per contract, expiry and window, so running the scan
+again (or after an interruption) only adds the alerts of contracts that
+entered a new window; a renewed contract (new ``expire_at``) is alerted
+again.
+
+Usage (from the backend directory):
+    python -m procure.jobs.renewals
+    python -m procure.jobs.renewals --windows 60,14 --dry-run
+"""
+
+import argparse
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, func, case, literal, tuple_
+from sqlalchemy.orm import Session
+
+from procure.db.engine import get_session_factory
+from procure.db.models import Contract, ContractRenewalAlert, UserActivity
+from procure.db.upsert import dialect_insert
+from procure.utils.metrics import Counter
+from procure.configs.app_configs import (
+    RENEWAL_ALERT_WINDOWS_DAYS,
+    RENEWAL_UTILIZATION_DAYS,
+    RENEWAL_SCAN_BATCH_SIZE
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+renewal_alerts_created = Counter(
+    "procure_renewal_alerts_created",
+    "Contract renewal alerts raised by the renewal scanner by window (days)",
+    ["window"]
+)
+
+
+def scan_batch(
+    db: Session,
+    windows: List[int],
+    now: datetime,
+    since: datetime,
+    after: Optional[Tuple[datetime, int]],
+    batch_size: int
+) -> List[Dict[str, Any]]:
+    """
+    Get the next batch of contracts expiring within the windows, soonest first.
+
+    Args:
+        db: Database session
+        windows: Alert windows in days, ascending
+        now: Start of the scanned range
+        since: Start of the utilization window
+        after: (expire_at, contract_id) of the last contract of the previous batch
+        batch_size: Contracts per batch
+
+    Returns:
+        Alert rows: contract, organization, expiry, window, active users and seats
+    """
+    # Smallest window the contract is in; the range below keeps it within the largest
+    if len(windows) > 1:
+        window_days = case(
+            *[(Contract.expire_at < now + timedelta(days=days), days) for days in windows[:-1]],
+            else_=windows[-1]
+        )
+    else:
+        window_days = literal(windows[0])
+    active_users = (
+        select(func.count(func.distinct(UserActivity.user_id)))
+        .where(UserActivity.contract_id == Contract.contract_id)
+        .where(UserActivity.date >= since)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(
+            Contract.contract_id,
+            Contract.organization_id,
+            Contract.expire_at,
+            window_days.label("window_days"),
+            active_users.label("active_users"),
+            Contract.num_seats
+        )
+        .where(Contract.expire_at >= now)
+        .where(Contract.expire_at < now + timedelta(days=windows[-1]))
+        .order_by(Contract.expire_at, Contract.contract_id)
+        .limit(batch_size)
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(Contract.expire_at, Contract.contract_id) > tuple_(*after))
+    return [dict(row._mapping) for row in db.execute(stmt)]
+
+
+def insert_alerts(db: Session, rows: List[Dict[str, Any]]) -> List[int]:
+    """
+    Insert alerts, skipping those already raised.
+
+    Returns:
+        The window of every alert inserted
+    """
+    if not rows:
+        return []
+    stmt = dialect_insert(db, ContractRenewalAlert).on_conflict_do_nothing(
+        index_elements=[ContractRenewalAlert.contract_id, ContractRenewalAlert.expire_at, ContractRenewalAlert.window_days]
+    )
+    return list(db.scalars(stmt.returning(ContractRenewalAlert.window_days), rows))
+
+
+def run_renewal_scan(
+    db: Session,
+    windows: List[int] = RENEWAL_ALERT_WINDOWS_DAYS,
+    utilization_days: int = RENEWAL_UTILIZATION_DAYS,
+    batch_size: int = RENEWAL_SCAN_BATCH_SIZE,
+    now: Optional[datetime] = None,
+    dry_run: bool = False,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Raise renewal alerts for every contract expiring within the windows.
+
+    Args:
+        db: Database session (primary)
+        windows: Alert windows in days before expiry
+        utilization_days: Days of activity counted as current utilization
+        batch_size: Contracts per batch and transaction
+        now: The current time (default: now, UTC)
+        dry_run: Count the contracts and alerts without inserting
+        progress: Called with the running summary after every batch
+
+    Returns:
+        The summary: contracts scanned and alerts raised per window
+
+    Raises:
+        ValueError: If there is no window or a window is not positive
+    """
+    windows = sorted(set(windows))
+    if not windows or windows[0] < 1:
+        raise ValueError("Renewal alert windows must be positive numbers of days")
+    now = now or datetime.now(timezone.utc)
+    since = now - timedelta(days=utilization_days)
+
+    summary = {"scanned": 0, "alerts": {days: 0 for days in windows}}
+    after = None
+    while True:
+        rows = scan_batch(db, windows, now, since, after, batch_size)
+        if not rows:
+            return summary
+        after = (rows[-1]["expire_at"], rows[-1]["contract_id"])
+
+        if dry_run:
+            inserted = [row["window_days"] for row in rows]
+        else:
+            try:
+                inserted = insert_alerts(db, rows)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+        summary["scanned"] += len(rows)
+        for days in inserted:
+            summary["alerts"][days] += 1
+            if not dry_run:
+                renewal_alerts_created.labels(str(days)).inc()
+        if progress:
+            progress(summary)
+        if len(rows) < batch_size:
+            return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Raise renewal alerts for contracts about to expire")
+    parser.add_argument("--windows", default=",".join(str(days) for days in RENEWAL_ALERT_WINDOWS_DAYS),
+                        help="Comma-separated alert windows in days before expiry")
+    parser.add_argument("--utilization-days", type=int, default=RENEWAL_UTILIZATION_DAYS,
+                        help="Days of activity counted as current utilization")
+    parser.add_argument("--batch-size", type=int, default=RENEWAL_SCAN_BATCH_SIZE,
+                        help="Contracts per batch")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only count the contracts in each window (already raised alerts included)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    db = get_session_factory()()
+    try:
+        windows = [int(days) for days in args.windows.split(",") if days.strip()]
+
+        def report(summary):
+            logger.info(f"Scanned {summary['scanned']} expiring contracts")
+
+        summary = run_renewal_scan(
+            db, windows, args.utilization_days, args.batch_size, dry_run=args.dry_run, progress=report
+        )
+        alerts = ", ".join(f"{days} days: {count}" for days, count in summary["alerts"].items())
+        logger.info(
+            f"{'Would raise' if args.dry_run else 'Raised'} renewal alerts for "
+            f"{summary['scanned']} expiring contracts ({alerts})"
+        )
+        return 0
+    except ValueError as e:
+        logger.error(f"Renewal scan stopped: {str(e)}")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,78 @@
+"""
+Admin diagnostics routes for the proCure application.
+
+The slow query log and request profiles hold the statements, routes and
+stacks of every organization served by the worker, so they are for
+operators (OPS_API_TOKEN), not tenant admins.
+"""
+
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from procure.auth.users import authenticate_operator
+from procure.server.admin.schemas import SlowQueryListResponse, ProfileListResponse
+from procure.server.profiling.middleware import profile_store
+from procure.db.slow_queries import slow_query_log
+from procure.configs.app_configs import API_PREFIX, SLOW_QUERY_THRESHOLD_MS
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Create router
+router = APIRouter(prefix=f"{API_PREFIX}/admin", tags=["admin"])
+
+@router.get("/slow-queries", response_model=SlowQueryListResponse, dependencies=[Depends(authenticate_operator)])
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000)
+):
+    """
+    Get the most recent slow queries recorded by this worker.
+
+    Args:
+        limit: Maximum number of entries to return
+
+    Returns:
+        Slow queries, most recent first
+    """
+    return SlowQueryListResponse(
+        threshold_ms=SLOW_QUERY_THRESHOLD_MS,
+        queries=slow_query_log.entries(limit)
+    )
+
+@router.get("/profiles", response_model=ProfileListResponse, dependencies=[Depends(authenticate_operator)])
+async def get_profiles():
+    """
+    Get summaries of the request profiles recorded by this worker.
+
+    Returns:
+        Profile summaries with per-category time shares, most recent first
+    """
+    return ProfileListResponse(profiles=profile_store.summaries())
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse, dependencies=[Depends(authenticate_operator)])
+async def get_profile(
+    profile_id: str
+):
+    """
+    Get a request profile in the collapsed stack format.
+
+    The output can be fed to flamegraph.pl or loaded into speedscope.
+
+    Args:
+        profile_id: The id returned in the X-Profile-Id response header
+
+    Returns:
+        One ``frame;frame;frame count`` line per distinct stack
+    """
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile {profile_id} not found"
+        )
+    return PlainTextResponse(profile["collapsed"])
+
+def register_admin_routes(app):
+    """Register admin diagnostics routes with the main FastAPI app"""
+    app.include_router(router)
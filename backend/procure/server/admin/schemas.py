@@ -0,0 +1,37 @@
+"""
+Pydantic schemas for admin diagnostics in the proCure application.
+"""
+
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+class SlowQueryEntry(BaseModel):
+    """A statement recorded by the slow query log."""
+    fingerprint: str = Field(..., description="Statement fingerprint (operation, table and hash)")
+    statement: str = Field(..., description="Normalized SQL with literals and parameters replaced by ?")
+    parameter_shapes: Any = Field(None, description="Parameter types and lengths, without values")
+    duration_ms: float = Field(..., description="Execution time in milliseconds")
+    route: Optional[str] = Field(None, description="Method and path of the request that issued the statement")
+    recorded_at: str = Field(..., description="When the statement was recorded (ISO 8601)")
+    explain: Optional[str] = Field(None, description="EXPLAIN run for this entry, if sampled: analyze or plain")
+    plan: Optional[str] = Field(None, description="EXPLAIN output, once captured")
+    plan_error: Optional[str] = Field(None, description="Why the EXPLAIN failed, if it did")
+
+class SlowQueryListResponse(BaseModel):
+    """Response model for the slow query log endpoint."""
+    threshold_ms: float = Field(..., description="Slow query threshold in milliseconds")
+    queries: List[SlowQueryEntry] = Field(default_factory=list, description="Slow queries, most recent first")
+
+class ProfileSummary(BaseModel):
+    """Summary of a profiled request."""
+    profile_id: str = Field(..., description="Profile id, as returned in the X-Profile-Id header")
+    route: str = Field(..., description="Method and path of the profiled request")
+    status_code: int = Field(..., description="Response status code")
+    recorded_at: str = Field(..., description="When the profile was recorded (ISO 8601)")
+    duration_ms: float = Field(..., description="Request duration in milliseconds")
+    samples: int = Field(..., description="Number of stack samples taken")
+    categories: Dict[str, float] = Field(default_factory=dict, description="Share of samples per category")
+
+class ProfileListResponse(BaseModel):
+    """Response model for the profile list endpoint."""
+    profiles: List[ProfileSummary] = Field(default_factory=list, description="Profiles, most recent first")
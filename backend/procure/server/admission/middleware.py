@@ -0,0 +1,183 @@
+"""
+Admission control middleware for the proCure application.
+
+When the database connection pool is saturated, queued requests wait up
+to DB_POOL_TIMEOUT for a connection and then fail, long after clients have
+given up. This middleware rejects them up front with 503 and
+``Retry-After`` instead, shedding by priority:
+
+- critical (health, metrics, auth): always admitted
+- low (bulk ingest, analytics): shed first, when the recent pool checkout
+  wait exceeds ADMISSION_SHED_LOW_POOL_WAIT_MS or the worker has
+  ADMISSION_LOW_PRIORITY_MAX_IN_FLIGHT requests in flight
+- normal (everything else): shed when the wait exceeds
+  ADMISSION_SHED_NORMAL_POOL_WAIT_MS or ADMISSION_MAX_IN_FLIGHT requests
+  are in flight
+
+Streams (ADMISSION_STREAMING_PATHS) are shed on connect by their priority
+but do not count as in flight while open, so long-lived dashboards cannot
+take up the slots of short requests.
+
+Decisions are exported as ``procure_admission_decisions``.
+"""
+
+import fnmatch
+import json
+import logging
+import re
+from typing import Optional
+
+from procure.configs.app_configs import (
+    ADMISSION_CONTROL_ENABLED,
+    ADMISSION_CRITICAL_PATHS,
+    ADMISSION_LOW_PRIORITY_PATHS,
+    ADMISSION_STREAMING_PATHS,
+    ADMISSION_SHED_LOW_POOL_WAIT_MS,
+    ADMISSION_SHED_NORMAL_POOL_WAIT_MS,
+    ADMISSION_LOW_PRIORITY_MAX_IN_FLIGHT,
+    ADMISSION_MAX_IN_FLIGHT,
+    ADMISSION_RETRY_AFTER_SECONDS
+)
+from procure.db.pool import recent_checkout_wait
+from procure.utils.metrics import Counter, Gauge
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CRITICAL = "critical"
+NORMAL = "normal"
+LOW = "low"
+
+admission_decisions = Counter(
+    "procure_admission_decisions",
+    "Admission control decisions by priority, decision (admitted, shed) and reason",
+    ["priority", "decision", "reason"]
+)
+admission_in_flight = Gauge(
+    "procure_admission_in_flight",
+    "Admitted non-critical requests currently being processed",
+    multiprocess_mode="livesum"
+)
+
+
+def compile_path_patterns(patterns: str) -> Optional[re.Pattern]:
+    """
+    Compile comma-separated path globs (``*`` matches any characters) into one regex.
+
+    Returns:
+        The compiled pattern, or None if there are no patterns
+    """
+    globs = [pattern.strip() for pattern in patterns.split(",") if pattern.strip()]
+    if not globs:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(glob)})" for glob in globs))
+
+
+class AdmissionController:
+    """Classifies requests by priority and decides whether to admit them."""
+
+    def __init__(
+        self,
+        critical_paths: str = ADMISSION_CRITICAL_PATHS,
+        low_priority_paths: str = ADMISSION_LOW_PRIORITY_PATHS,
+        streaming_paths: str = ADMISSION_STREAMING_PATHS,
+        shed_low_wait_seconds: float = ADMISSION_SHED_LOW_POOL_WAIT_MS / 1000,
+        shed_normal_wait_seconds: float = ADMISSION_SHED_NORMAL_POOL_WAIT_MS / 1000,
+        low_priority_max_in_flight: int = ADMISSION_LOW_PRIORITY_MAX_IN_FLIGHT,
+        max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+        pool_wait=recent_checkout_wait
+    ):
+        self.critical_paths = compile_path_patterns(critical_paths)
+        self.low_priority_paths = compile_path_patterns(low_priority_paths)
+        self.streaming_paths = compile_path_patterns(streaming_paths)
+        self.shed_wait_seconds = {LOW: shed_low_wait_seconds, NORMAL: shed_normal_wait_seconds}
+        self.max_in_flight = {LOW: low_priority_max_in_flight, NORMAL: max_in_flight}
+        self.pool_wait = pool_wait
+        # Only touched from the event loop, so no lock is needed
+        self.in_flight = 0
+
+    def classify(self, path: str) -> str:
+        if self.critical_paths is not None and self.critical_paths.match(path):
+            return CRITICAL
+        if self.low_priority_paths is not None and self.low_priority_paths.match(path):
+            return LOW
+        return NORMAL
+
+    def is_streaming(self, path: str) -> bool:
+        return self.streaming_paths is not None and self.streaming_paths.match(path) is not None
+
+    def shed_reason(self, priority: str) -> Optional[str]:
+        """
+        Decide whether to shed a request of the given priority.
+
+        Returns:
+            "pool_wait" or "in_flight" if the request should be shed, else None
+        """
+        if priority == CRITICAL:
+            return None
+        if self.pool_wait.value() >= self.shed_wait_seconds[priority]:
+            return "pool_wait"
+        if self.in_flight >= self.max_in_flight[priority]:
+            return "in_flight"
+        return None
+
+
+class AdmissionControlMiddleware:
+    """Pure ASGI middleware that sheds requests with 503 under database pressure."""
+
+    def __init__(
+        self,
+        app,
+        controller: Optional[AdmissionController] = None,
+        retry_after_seconds: int = ADMISSION_RETRY_AFTER_SECONDS,
+        enabled: bool = ADMISSION_CONTROL_ENABLED
+    ):
+        self.app = app
+        self.controller = controller if controller is not None else AdmissionController()
+        self.retry_after = str(retry_after_seconds).encode()
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        priority = self.controller.classify(scope["path"])
+        if priority == CRITICAL:
+            await self.app(scope, receive, send)
+            return
+
+        reason = self.controller.shed_reason(priority)
+        if reason is not None:
+            admission_decisions.labels(priority, "shed", reason).inc()
+            logger.warning(f"Shed {priority} priority request {scope['method']} {scope['path']}: {reason}")
+            await self._reject(send, reason)
+            return
+
+        admission_decisions.labels(priority, "admitted", "").inc()
+        if self.controller.is_streaming(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        self.controller.in_flight += 1
+        admission_in_flight.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.in_flight -= 1
+            admission_in_flight.dec()
+
+    async def _reject(self, send, reason: str):
+        body = json.dumps({
+            "detail": f"Server is overloaded ({reason}), retry later"
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", self.retry_after)
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
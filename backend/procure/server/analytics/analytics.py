@@ -3,28 +3,40 @@ Analytics functions for the proCure application.
 """
 
 import logging
-from sqlalchemy import select, func, and_, extract, case
+from sqlalchemy import select, func, and_
 from sqlalchemy.orm import Session
-from datetime import datetime
-from typing import Dict, Any, List
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
 
 from procure.db.models import Organization, Contract, UserActivity, User
+from procure.utils.cache import get_cache
+from procure.utils.periods import current_month, get_timezone, month_bounds
+from procure.configs.app_configs import CONTRACT_USAGE_CACHE_TTL_SECONDS
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-def get_contract_usage_by_org_id(db: Session, organization_id: str) -> Dict[str, Any]:
+# Contract usage per organization and month, invalidated per organization
+contract_usage_cache = get_cache("contract_usage", CONTRACT_USAGE_CACHE_TTL_SECONDS)
+
+def get_contract_usage_by_org_id(
+    db: Session,
+    organization_id: str,
+    now: Optional[datetime] = None
+) -> Dict[str, Any]:
     """
     Get contract usage statistics for an organization.
 
     This function:
-    1. Aggregates user activities by contract for the current month
+    1. Aggregates user activities by contract for the current month in the
+       organization's time zone
     2. Joins with the contracts table to get vendor names and seat counts
     3. Calculates usage ratios
 
     Args:
         db: Database session
         organization_id: The organization ID to analyze
+        now: The current time (default: now)
 
     Returns:
         A dictionary with success status and contract usage data or error message
@@ -41,10 +53,9 @@ def get_contract_usage_by_org_id(db: Session, organization_id: str) -> Dict[str,
             "status_code": 404
         }
 
-    # Get current month and year
-    now = datetime.now()
-    current_month = now.month
-    current_year = now.year
+    # Get the current month in the organization's time zone
+    tz = get_timezone(organization.timezone)
+    month_begin, month_end = month_bounds(*current_month(tz, now), tz)
 
     # Query to get the count of unique users per contract for the current month
     # First, get all contracts for the organization
@@ -61,31 +72,21 @@ def get_contract_usage_by_org_id(db: Session, organization_id: str) -> Dict[str,
             "contracts": []
         }
 
-    # For each contract, count unique users with activity this month
+    # Count unique users with activity this month for all contracts in one query
+    active_users_by_contract = count_active_users(
+        db, organization_id, [contract.contract_id for contract in contracts], month_begin, month_end
+    )
+
     contract_usage_data = []
 
     for contract in contracts:
-        # Count unique users who have activity with this contract this month
-        # Join with User table to filter by organization_id
-        active_users_count = db.scalar(
-            select(func.count(func.distinct(UserActivity.user_id)))
-            .join(User, UserActivity.user_id == User.id)
-            .where(
-                and_(
-                    UserActivity.contract_id == contract.contract_id,
-                    User.organization_id == organization_id,  # Filter by organization
-                    extract('month', UserActivity.date) == current_month,
-                    extract('year', UserActivity.date) == current_year
-                )
-            )
-        ) or 0
-
         # Get total seats (default to 1 if null to avoid issues)
         total_seats = contract.num_seats or 1
 
         contract_usage_data.append({
+            "contract_id": contract.contract_id,
             "vendor_name": contract.vendor_name,
-            "active_users": active_users_count,
+            "active_users": active_users_by_contract.get(contract.contract_id, 0),
             "total_seats": total_seats,
             "annual_spend": float(contract.annual_spend or 0)
             # No usage_ratio - frontend will handle formatting
@@ -103,3 +104,63 @@ def get_contract_usage_by_org_id(db: Session, organization_id: str) -> Dict[str,
         "contracts": contract_usage_data
     }
 
+def count_active_users(
+    db: Session,
+    organization_id: str,
+    contract_ids: List[int],
+    month_begin: datetime,
+    month_end: datetime
+) -> Dict[int, int]:
+    """
+    Count the distinct users of the organization with activity on each contract in a month.
+
+    Args:
+        db: Database session
+        organization_id: The organization ID
+        contract_ids: Contracts to count
+        month_begin: Start of the month (inclusive)
+        month_end: Start of the next month (exclusive)
+
+    Returns:
+        Dict of contract ID to active users, without contracts that have none
+    """
+    # Join with User table to filter by organization_id
+    return dict(db.execute(
+        select(UserActivity.contract_id, func.count(func.distinct(UserActivity.user_id)))
+        .join(User, UserActivity.user_id == User.id)
+        .where(
+            and_(
+                UserActivity.contract_id.in_(contract_ids),
+                User.organization_id == organization_id,  # Filter by organization
+                UserActivity.date >= month_begin,
+                UserActivity.date < month_end
+            )
+        )
+        .group_by(UserActivity.contract_id)
+    ).fetchall())
+
+def get_cached_contract_usage_by_org_id(db: Session, organization_id: str) -> Dict[str, Any]:
+    """
+    Get contract usage statistics for an organization through the shared cache.
+
+    Successful results are cached per organization and UTC month until the
+    organization's usage is invalidated or the TTL expires, so an organization
+    ahead of UTC sees its new month at most one TTL late.
+
+    Args:
+        db: Database session
+        organization_id: The organization ID to analyze
+
+    Returns:
+        The result of get_contract_usage_by_org_id
+    """
+    return contract_usage_cache.get_or_load(
+        datetime.now(timezone.utc).strftime("%Y-%m"),
+        lambda: get_contract_usage_by_org_id(db, organization_id),
+        scope=organization_id,
+        should_cache=lambda result: result.get("success", False)
+    )
+
+def invalidate_contract_usage(organization_id: str):
+    """Invalidate cached contract usage after an organization's activities or contracts change."""
+    contract_usage_cache.invalidate(organization_id)
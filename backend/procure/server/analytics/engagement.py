@@ -0,0 +1,159 @@
+"""
+Engagement analytics for the proCure application.
+
+Reads the daily aggregates maintained by ingest when
+ENGAGEMENT_TRACKING_ENABLED is set: ``user_activity_days`` holds a visit
+count per user, contract and day, and ``user_activity_months`` a bitmask of
+active days per user, contract and month. Engagement depth (DAU/MAU and how
+many days a month users come back) is computed from these rows alone, without
+raw visit events.
+"""
+
+import calendar
+import logging
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from procure.db.models import Contract, Organization, UserActivityDay, UserActivityMonth
+from procure.utils.periods import current_period, get_timezone
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def elapsed_days(period: str, today: Optional[date] = None) -> int:
+    """
+    Get the number of days of a month that have started.
+
+    Args:
+        period: Month (YYYY-MM)
+        today: The current date in the organization's time zone (default: today in UTC)
+
+    Returns:
+        All days of a past month, days up to today for the current month, 0 for a future month
+    """
+    year, month = (int(part) for part in period.split("-"))
+    days_in_month = calendar.monthrange(year, month)[1]
+    today = today or datetime.now(timezone.utc).date()
+    if (year, month) < (today.year, today.month):
+        return days_in_month
+    if (year, month) == (today.year, today.month):
+        return today.day
+    return 0
+
+
+def active_days_distribution(active_days_masks: List[int], days_in_month: int) -> List[int]:
+    """
+    Count users by number of active days.
+
+    Args:
+        active_days_masks: Active-days bitmask per user
+        days_in_month: Length of the month
+
+    Returns:
+        A list where item n is the number of users active on exactly n + 1 days
+    """
+    distribution = [0] * days_in_month
+    for mask in active_days_masks:
+        if mask:
+            distribution[mask.bit_count() - 1] += 1
+    return distribution
+
+
+def get_engagement_by_org_id(
+    db: Session,
+    organization_id: str,
+    period: Optional[str] = None,
+    today: Optional[date] = None
+) -> Dict[str, Any]:
+    """
+    Get engagement depth per contract for an organization and month.
+
+    Args:
+        db: Database session
+        organization_id: The organization ID
+        period: Month (YYYY-MM), None for the current month in the organization's
+                time zone (the month ingest records visits under)
+        today: The current date, used to average DAU over elapsed days
+               (default: today in the organization's time zone)
+
+    Returns:
+        A dictionary with success status and the engagement per contract, or error message
+    """
+    organization = db.scalars(
+        select(Organization).where(Organization.organization_id == organization_id)
+    ).one_or_none()
+
+    if not organization:
+        return {
+            "success": False,
+            "error": f"Organization with ID {organization_id} not found",
+            "status_code": 404
+        }
+
+    tz = get_timezone(organization.timezone)
+    period = period or current_period(tz)
+    year, month = (int(part) for part in period.split("-"))
+    days_in_month = calendar.monthrange(year, month)[1]
+
+    contracts = db.execute(
+        select(Contract.contract_id, Contract.vendor_name)
+        .where(Contract.organization_id == organization_id)
+        .order_by(Contract.contract_id)
+    ).fetchall()
+
+    # Active-days bitmask per user and contract
+    masks: Dict[int, List[int]] = {}
+    for contract_id, active_days in db.execute(
+        select(UserActivityMonth.contract_id, UserActivityMonth.active_days)
+        .join(Contract, UserActivityMonth.contract_id == Contract.contract_id)
+        .where(Contract.organization_id == organization_id)
+        .where(UserActivityMonth.period == period)
+    ).fetchall():
+        masks.setdefault(contract_id, []).append(active_days)
+
+    # Daily active users and visits per contract, summed over the month
+    user_days: Dict[int, int] = {}
+    visits: Dict[int, int] = {}
+    for contract_id, daily_users, total_visits in db.execute(
+        select(
+            UserActivityDay.contract_id,
+            func.count(),
+            func.coalesce(func.sum(UserActivityDay.visits), 0)
+        )
+        .join(Contract, UserActivityDay.contract_id == Contract.contract_id)
+        .where(Contract.organization_id == organization_id)
+        .where(UserActivityDay.day >= date(year, month, 1))
+        .where(UserActivityDay.day <= date(year, month, days_in_month))
+        .group_by(UserActivityDay.contract_id)
+    ).fetchall():
+        user_days[contract_id] = daily_users
+        visits[contract_id] = int(total_visits)
+
+    if today is None:
+        today = datetime.now(tz).date()
+    days = elapsed_days(period, today)
+    engagement = []
+    for contract_id, vendor_name in contracts:
+        contract_masks = masks.get(contract_id, [])
+        monthly_active_users = sum(1 for mask in contract_masks if mask)
+        average_daily_active_users = user_days.get(contract_id, 0) / days if days else 0.0
+        engagement.append({
+            "contract_id": contract_id,
+            "vendor_name": vendor_name,
+            "monthly_active_users": monthly_active_users,
+            "average_daily_active_users": round(average_daily_active_users, 2),
+            "dau_mau": round(average_daily_active_users / monthly_active_users, 4) if monthly_active_users else 0.0,
+            "total_visits": visits.get(contract_id, 0),
+            "active_days_distribution": active_days_distribution(contract_masks, days_in_month)
+        })
+
+    return {
+        "success": True,
+        "organization_id": organization_id,
+        "period": period,
+        "contracts": engagement
+    }
@@ -0,0 +1,255 @@
+"""
+Live contract usage updates for the proCure application.
+
+Dashboards subscribe to an organization's contract usage over Server-Sent
+Events instead of polling the whole aggregate:
+
+- On connect, the subscriber gets a ``snapshot`` event with the current
+  contract usage (the cached contract-usage result).
+- Whenever ingest inserts new activities for the organization, every
+  subscriber gets a ``usage`` event with the new active users of the
+  affected contracts. The counts are recomputed once per ingest, and only
+  while the organization has subscribers, however many tabs are open.
+
+Events go through an in-process fan-out hub. Each subscriber has a buffer of
+LIVE_UPDATES_BUFFER_SIZE events; a subscriber that falls further behind is
+evicted and its stream ends, and the client reconnects to a fresh snapshot.
+Events carry absolute counts, so a missed event is corrected by the next one.
+
+Updates are published by the worker that handled the ingest, so with
+several workers a subscriber only sees the ingest of its own worker between
+snapshots.
+"""
+
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+import orjson
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from procure.server.analytics.analytics import count_active_users
+from procure.utils.metrics import Counter, Gauge
+from procure.configs.app_configs import (
+    LIVE_UPDATES_MAX_SUBSCRIBERS,
+    LIVE_UPDATES_BUFFER_SIZE,
+    LIVE_UPDATES_HEARTBEAT_SECONDS
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+live_events_published = Counter(
+    "procure_live_events_published",
+    "Live usage events published, counted once per subscriber"
+)
+live_subscribers_evicted = Counter(
+    "procure_live_subscribers_evicted",
+    "Live update subscribers disconnected for falling behind"
+)
+live_subscribers = Gauge(
+    "procure_live_subscribers",
+    "Open live update streams",
+    multiprocess_mode="livesum"
+)
+
+# Comment line that keeps idle connections open through proxies
+HEARTBEAT = b": keepalive\n\n"
+
+
+def format_event(event: str, data: Any) -> bytes:
+    """Encode a Server-Sent Event with a JSON payload."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+class LiveSubscription:
+    """One subscriber's bounded event buffer, filled on its event loop."""
+
+    def __init__(
+        self,
+        organization_id: str,
+        buffer_size: int,
+        loop: asyncio.AbstractEventLoop,
+        on_close: Callable[["LiveSubscription"], None]
+    ):
+        self.organization_id = organization_id
+        self.loop = loop
+        self.evicted = False
+        self.closed = False
+        # One slot more than the buffer for the end-of-stream marker
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size + 1)
+        self._buffer_size = buffer_size
+        self._on_close = on_close
+
+    def put(self, event: bytes):
+        """Buffer an event, evicting the subscriber if its buffer is full. Call on the loop."""
+        if self.closed:
+            return
+        if self._queue.qsize() >= self._buffer_size:
+            self.evicted = True
+            live_subscribers_evicted.inc()
+            logger.info(f"Evicted a live update subscriber of organization {self.organization_id}")
+            self.close()
+            return
+        self._queue.put_nowait(event)
+
+    def close(self):
+        """End the stream after the buffered events. Call on the loop."""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.put_nowait(None)
+        self._on_close(self)
+
+    async def get(self) -> Optional[bytes]:
+        """Wait for the next event, or None once the stream is closed."""
+        return await self._queue.get()
+
+
+class LiveHub:
+    """Fans out events to the subscribers of each organization."""
+
+    def __init__(
+        self,
+        max_subscribers: int = LIVE_UPDATES_MAX_SUBSCRIBERS,
+        buffer_size: int = LIVE_UPDATES_BUFFER_SIZE
+    ):
+        self.max_subscribers = max_subscribers
+        self.buffer_size = buffer_size
+        self._subscribers: Dict[str, Set[LiveSubscription]] = {}
+        self._count = 0
+        # publish runs in threadpool threads, subscribe and unsubscribe on the event loop
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        return self._count
+
+    def has_subscribers(self, organization_id: str) -> bool:
+        return organization_id in self._subscribers
+
+    def subscribe(self, organization_id: str) -> Optional[LiveSubscription]:
+        """
+        Subscribe to an organization's events. Call from the event loop.
+
+        Returns:
+            The subscription, or None if the worker has max_subscribers already
+        """
+        subscription = LiveSubscription(
+            organization_id, self.buffer_size, asyncio.get_running_loop(), self.unsubscribe
+        )
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                return None
+            self._subscribers.setdefault(organization_id, set()).add(subscription)
+            self._count += 1
+        live_subscribers.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: LiveSubscription):
+        """Stop delivering events to a subscription (idempotent)."""
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.organization_id)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.remove(subscription)
+            self._count -= 1
+            if not subscriptions:
+                del self._subscribers[subscription.organization_id]
+        live_subscribers.dec()
+
+    def publish(self, organization_id: str, event: bytes) -> int:
+        """
+        Deliver an encoded event to every subscriber of an organization. Safe from any thread.
+
+        Returns:
+            The number of subscribers the event was handed to
+        """
+        with self._lock:
+            subscriptions = list(self._subscribers.get(organization_id, ()))
+        delivered = 0
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+                delivered += 1
+            except RuntimeError:
+                # The subscriber's event loop is closed
+                self.unsubscribe(subscription)
+        live_events_published.inc(delivered)
+        return delivered
+
+    def close_all(self):
+        """End every open stream (e.g. on shutdown)."""
+        with self._lock:
+            subscriptions = [subscription for group in self._subscribers.values() for subscription in group]
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.close)
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+
+def publish_active_users(
+    db: Session,
+    organization_id: str,
+    contract_ids: List[int],
+    month_begin: datetime,
+    month_end: datetime
+):
+    """
+    Publish the active users of contracts that gained activities, if anyone is subscribed.
+
+    Errors are logged rather than raised: the activities are already committed.
+
+    Args:
+        db: Database session
+        organization_id: The organization whose activities were inserted
+        contract_ids: Contracts with new activities
+        month_begin: Start of the organization's current month
+        month_end: Start of the next month
+    """
+    if not contract_ids or not live_hub.has_subscribers(organization_id):
+        return
+    try:
+        active_users = count_active_users(db, organization_id, contract_ids, month_begin, month_end)
+    except SQLAlchemyError as e:
+        logger.error(f"Error counting active users for live updates: {str(e)}")
+        return
+    live_hub.publish(organization_id, format_event("usage", {
+        "contracts": [
+            {"contract_id": contract_id, "active_users": active_users.get(contract_id, 0)}
+            for contract_id in sorted(contract_ids)
+        ]
+    }))
+
+
+async def stream_events(
+    subscription: LiveSubscription,
+    snapshot: bytes,
+    heartbeat_seconds: float = LIVE_UPDATES_HEARTBEAT_SECONDS
+) -> AsyncIterator[bytes]:
+    """
+    Yield a subscription's Server-Sent Events, starting with a snapshot.
+
+    A heartbeat comment is sent when no event arrived for heartbeat_seconds.
+    The subscription is released when the stream ends or the client goes away.
+    """
+    try:
+        yield snapshot
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+                continue
+            if event is None:
+                return
+            yield event
+    finally:
+        live_hub.unsubscribe(subscription)
+
+
+live_hub = LiveHub()
@@ -0,0 +1,89 @@
+"""
+Upcoming contract renewals for the proCure application.
+
+Reads the alerts raised by the renewal scanner (``python -m
+procure.jobs.renewals``): contracts expiring within the alert windows, with
+their utilization at the last scan that raised an alert.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, and_
+from sqlalchemy.orm import Session
+
+from procure.db.models import Contract, ContractRenewalAlert, Organization
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def get_renewals_by_org_id(db: Session, organization_id: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Get an organization's contracts with a renewal alert that have not expired yet.
+
+    Alerts about an earlier expire_at (the contract was renewed since) are
+    left out. A contract with alerts for several windows is reported once,
+    with its smallest window.
+
+    Args:
+        db: Database session
+        organization_id: The organization ID
+        now: The current time (default: now)
+
+    Returns:
+        A dictionary with success status and the renewals, soonest first, or error message
+    """
+    organization = db.scalars(
+        select(Organization).where(Organization.organization_id == organization_id)
+    ).one_or_none()
+
+    if not organization:
+        return {
+            "success": False,
+            "error": f"Organization with ID {organization_id} not found",
+            "status_code": 404
+        }
+
+    now = now or datetime.now(timezone.utc)
+    rows = db.execute(
+        select(
+            Contract.contract_id,
+            Contract.vendor_name,
+            Contract.annual_spend,
+            ContractRenewalAlert.expire_at,
+            ContractRenewalAlert.window_days,
+            ContractRenewalAlert.active_users,
+            ContractRenewalAlert.num_seats,
+            ContractRenewalAlert.created_at
+        )
+        .join(Contract, and_(
+            Contract.contract_id == ContractRenewalAlert.contract_id,
+            Contract.expire_at == ContractRenewalAlert.expire_at
+        ))
+        .where(ContractRenewalAlert.organization_id == organization_id)
+        .where(ContractRenewalAlert.expire_at >= now)
+        .order_by(ContractRenewalAlert.expire_at, Contract.contract_id, ContractRenewalAlert.window_days)
+    ).fetchall()
+
+    renewals = {}
+    for row in rows:
+        # Smallest window first within a contract, so keep the first row
+        if row.contract_id not in renewals:
+            renewals[row.contract_id] = {
+                "contract_id": row.contract_id,
+                "vendor_name": row.vendor_name,
+                "expire_at": row.expire_at,
+                "window_days": row.window_days,
+                "active_users": row.active_users,
+                "total_seats": row.num_seats,
+                "annual_spend": float(row.annual_spend or 0),
+                "alerted_at": row.created_at
+            }
+
+    return {
+        "success": True,
+        "organization_id": organization_id,
+        "renewals": list(renewals.values())
+    }
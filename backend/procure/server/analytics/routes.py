@@ -3,27 +3,31 @@ Analytics routes for the proCure application.
 """
 
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.exc import SQLAlchemyError
 
-from procure.auth.users import authenticate_user_by_token
-from procure.server.analytics.schemas import ContractUsageResponse
-from procure.server.analytics import analytics
-from procure.utils.db_utils import get_db
-from procure.configs.app_configs import API_PREFIX
+from procure.auth.users import authenticate_organization_member
+from procure.server.analytics.schemas import ContractUsageResponse, EngagementResponse, RenewalsResponse, ShadowITResponse
+from procure.server.analytics import analytics, engagement, live, renewals, shadow_it
+from procure.utils.db_utils import get_read_db
+from procure.server.responses import FastResponseRoute
+from procure.configs.app_configs import API_PREFIX, SHADOW_IT_MAX_STORED_DOMAINS
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 # Create router
-router = APIRouter(prefix=API_PREFIX, tags=["analytics"])
+router = APIRouter(prefix=API_PREFIX, tags=["analytics"], route_class=FastResponseRoute)
 
 @router.get("/organizations/{organization_id}/contract-usage", response_model=ContractUsageResponse)
 async def get_contract_usage(
     organization_id: str,
-    db: Session = Depends(get_db),
-    email: str = Depends(authenticate_user_by_token)
+    db: Session = Depends(get_read_db),
+    email: str = Depends(authenticate_organization_member)
 ):
     """
     Get contract usage statistics for an organization.
@@ -35,15 +39,15 @@ async def get_contract_usage(
 
     Args:
         organization_id: The organization ID to analyze
-        db: Database session dependency
-        email: Authenticated user email from token
+        db: Read-only database session dependency
+        email: Authenticated email of a member of the organization
 
     Returns:
         Contract usage statistics
     """
     try:
         # Get contract usage statistics from database
-        result = analytics.get_contract_usage_by_org_id(db, organization_id)
+        result = await run_in_threadpool(analytics.get_cached_contract_usage_by_org_id, db, organization_id)
 
         # Handle error case
         if not result.get("success", True):
@@ -66,6 +70,211 @@ async def get_contract_usage(
             detail=f"Database error: {str(e)}"
         )
 
+@router.get("/organizations/{organization_id}/contract-usage/stream", response_class=StreamingResponse)
+async def stream_contract_usage(
+    organization_id: str,
+    db: Session = Depends(get_read_db),
+    email: str = Depends(authenticate_organization_member)
+):
+    """
+    Stream contract usage updates for an organization as Server-Sent Events.
+
+    The stream starts with a ``snapshot`` event holding the contract usage
+    response, followed by a ``usage`` event with the new active users of
+    the affected contracts whenever activities are recorded. See
+    procure.server.analytics.live.
+
+    Args:
+        organization_id: The organization ID to follow
+        db: Read-only database session dependency, used for the snapshot only
+        email: Authenticated email of a member of the organization
+
+    Returns:
+        A text/event-stream response
+    """
+    # Subscribe before reading the snapshot, so no update falls in between
+    subscription = live.live_hub.subscribe(organization_id)
+    if subscription is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many live update streams, retry later",
+            headers={"Retry-After": "30"}
+        )
+
+    try:
+        result = await run_in_threadpool(analytics.get_cached_contract_usage_by_org_id, db, organization_id)
+
+        # Handle error case
+        if not result.get("success", True):
+            raise HTTPException(
+                status_code=result.get("status_code", status.HTTP_500_INTERNAL_SERVER_ERROR),
+                detail=result.get("error", "Unknown error retrieving contract usage")
+            )
+
+        snapshot = ContractUsageResponse(
+            organization_id=result["organization"]["organization_id"],
+            company_name=result["organization"]["company_name"],
+            contracts=result["contracts"]
+        )
+
+    except SQLAlchemyError as e:
+        live.live_hub.unsubscribe(subscription)
+        logger.error(f"Database error retrieving contract usage: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+    except HTTPException:
+        live.live_hub.unsubscribe(subscription)
+        raise
+    finally:
+        # The stream can stay open for hours; do not hold a connection for it
+        await run_in_threadpool(db.close)
+
+    return StreamingResponse(
+        live.stream_events(subscription, live.format_event("snapshot", snapshot.model_dump())),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/organizations/{organization_id}/shadow-it", response_model=ShadowITResponse)
+async def get_shadow_it(
+    organization_id: str,
+    period: Optional[str] = Query(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="Month (YYYY-MM), default current"),
+    limit: int = Query(20, ge=1, le=SHADOW_IT_MAX_STORED_DOMAINS),
+    db: Session = Depends(get_read_db),
+    email: str = Depends(authenticate_organization_member)
+):
+    """
+    Get the most visited domains without a contract (shadow IT) for an organization.
+
+    Visit counts are estimates from heavy-hitter sketches and lag behind by
+    up to SHADOW_IT_FLUSH_INTERVAL_SECONDS.
+
+    Args:
+        organization_id: The organization ID to analyze
+        period: The month to report, by default the current month in the organization's time zone
+        limit: Number of domains to return
+        db: Read-only database session dependency
+        email: Authenticated email of a member of the organization
+
+    Returns:
+        The top domains, most visited first
+    """
+    try:
+        result = await run_in_threadpool(shadow_it.get_shadow_it_domains, db, organization_id, period, limit)
+
+        # Handle error case
+        if not result.get("success", True):
+            raise HTTPException(
+                status_code=result.get("status_code", status.HTTP_500_INTERNAL_SERVER_ERROR),
+                detail=result.get("error", "Unknown error retrieving shadow IT domains")
+            )
+
+        return ShadowITResponse(
+            organization_id=result["organization_id"],
+            period=result["period"],
+            domains=result["domains"]
+        )
+
+    except SQLAlchemyError as e:
+        logger.error(f"Database error retrieving shadow IT domains: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+
+@router.get("/organizations/{organization_id}/renewals", response_model=RenewalsResponse)
+async def get_renewals(
+    organization_id: str,
+    db: Session = Depends(get_read_db),
+    email: str = Depends(authenticate_organization_member)
+):
+    """
+    Get an organization's contracts expiring soon, with their utilization.
+
+    Renewals come from the alerts raised by the renewal scanner job, so a
+    contract shows up once the job has seen it enter an alert window.
+
+    Args:
+        organization_id: The organization ID to analyze
+        db: Read-only database session dependency
+        email: Authenticated email of a member of the organization
+
+    Returns:
+        Upcoming renewals, soonest first
+    """
+    try:
+        result = await run_in_threadpool(renewals.get_renewals_by_org_id, db, organization_id)
+
+        # Handle error case
+        if not result.get("success", True):
+            raise HTTPException(
+                status_code=result.get("status_code", status.HTTP_500_INTERNAL_SERVER_ERROR),
+                detail=result.get("error", "Unknown error retrieving renewals")
+            )
+
+        return RenewalsResponse(
+            organization_id=result["organization_id"],
+            renewals=result["renewals"]
+        )
+
+    except SQLAlchemyError as e:
+        logger.error(f"Database error retrieving renewals: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+
+@router.get("/organizations/{organization_id}/engagement", response_model=EngagementResponse)
+async def get_engagement(
+    organization_id: str,
+    period: Optional[str] = Query(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="Month (YYYY-MM), default current"),
+    db: Session = Depends(get_read_db),
+    email: str = Depends(authenticate_organization_member)
+):
+    """
+    Get engagement depth per contract for an organization.
+
+    This endpoint returns, per contract and month:
+    - Monthly and average daily active users, and their ratio (DAU/MAU)
+    - The number of visits
+    - How many users were active on 1, 2, ... days of the month
+
+    Requires ENGAGEMENT_TRACKING_ENABLED; without it every contract reports no activity.
+
+    Args:
+        organization_id: The organization ID to analyze
+        period: The month to report, by default the current month in the organization's time zone
+        db: Read-only database session dependency
+        email: Authenticated email of a member of the organization
+
+    Returns:
+        Engagement statistics per contract
+    """
+    try:
+        result = await run_in_threadpool(engagement.get_engagement_by_org_id, db, organization_id, period)
+
+        # Handle error case
+        if not result.get("success", True):
+            raise HTTPException(
+                status_code=result.get("status_code", status.HTTP_500_INTERNAL_SERVER_ERROR),
+                detail=result.get("error", "Unknown error retrieving engagement")
+            )
+
+        return EngagementResponse(
+            organization_id=result["organization_id"],
+            period=result["period"],
+            contracts=result["contracts"]
+        )
+
+    except SQLAlchemyError as e:
+        logger.error(f"Database error retrieving engagement: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+
 def register_analytics_routes(app):
     """Register analytics routes with the main FastAPI app"""
     app.include_router(router)
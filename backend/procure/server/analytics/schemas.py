@@ -2,11 +2,13 @@
 Pydantic schemas for analytics in the proCure application.
 """
 
+from datetime import datetime
 from typing import List
 from pydantic import BaseModel, Field
 
 class ContractUsageData(BaseModel):
     """Data model for contract usage statistics."""
+    contract_id: int = Field(..., description="The contract ID, as sent in live updates")
     vendor_name: str = Field(..., description="The name of the SaaS vendor")
     active_users: int = Field(..., description="Number of active users this month")
     total_seats: int = Field(..., description="Total number of seats purchased")
@@ -18,3 +20,51 @@ class ContractUsageResponse(BaseModel):
     company_name: str | None = Field(None, description="The company name")
     contracts: List[ContractUsageData] = Field(default_factory=list, description="List of contract usage data")
 
+
+class ShadowITDomainUsage(BaseModel):
+    """Data model for a visited domain without a contract."""
+    domain: str = Field(..., description="Base domain (e.g., example.com)")
+    visits: int = Field(..., description="Estimated number of visits this period")
+
+class ShadowITResponse(BaseModel):
+    """Response model for shadow IT endpoint."""
+    organization_id: str = Field(..., description="The organization ID")
+    period: str = Field(..., description="The month (YYYY-MM)")
+    domains: List[ShadowITDomainUsage] = Field(default_factory=list, description="Most visited domains without a contract")
+
+
+class ContractEngagementData(BaseModel):
+    """Data model for engagement depth of a contract."""
+    contract_id: int = Field(..., description="The contract ID")
+    vendor_name: str = Field(..., description="The name of the SaaS vendor")
+    monthly_active_users: int = Field(..., description="Users active on at least one day of the month")
+    average_daily_active_users: float = Field(..., description="Daily active users averaged over the elapsed days of the month")
+    dau_mau: float = Field(..., description="Average daily active users / monthly active users")
+    total_visits: int = Field(..., description="Visits matched to the contract this month")
+    active_days_distribution: List[int] = Field(
+        default_factory=list,
+        description="Number of users active on exactly n + 1 days of the month, at index n"
+    )
+
+class EngagementResponse(BaseModel):
+    """Response model for engagement endpoint."""
+    organization_id: str = Field(..., description="The organization ID")
+    period: str = Field(..., description="The month (YYYY-MM)")
+    contracts: List[ContractEngagementData] = Field(default_factory=list, description="Engagement per contract")
+
+
+class ContractRenewalData(BaseModel):
+    """Data model for a contract with an upcoming renewal."""
+    contract_id: int = Field(..., description="The contract ID")
+    vendor_name: str = Field(..., description="The name of the SaaS vendor")
+    expire_at: datetime = Field(..., description="When the contract expires")
+    window_days: int = Field(..., description="Smallest alert window (days before expiry) the contract entered")
+    active_users: int = Field(..., description="Distinct users over the utilization window at the last alert")
+    total_seats: int = Field(..., description="Seats at the last alert")
+    annual_spend: float = Field(0.0, description="Annual spend on this contract in USD")
+    alerted_at: datetime = Field(..., description="When the alert was raised")
+
+class RenewalsResponse(BaseModel):
+    """Response model for renewals endpoint."""
+    organization_id: str = Field(..., description="The organization ID")
+    renewals: List[ContractRenewalData] = Field(default_factory=list, description="Upcoming renewals, soonest first")
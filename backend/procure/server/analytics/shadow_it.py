@@ -0,0 +1,323 @@
+"""
+Shadow IT discovery for the proCure application.
+
+URL visits that match none of an organization's contracts are counted by
+base domain, per organization and month, so admins can see which SaaS their
+users rely on without a contract.
+
+Memory and storage stay bounded however many distinct domains are visited:
+
+- Each worker counts into one HeavyHitters sketch (count-min plus top-k) per
+  organization and month, at most SHADOW_IT_MAX_PENDING_SKETCHES at a time.
+- A background thread flushes every SHADOW_IT_FLUSH_INTERVAL_SECONDS: the
+  top-k domains of each sketch are added to ``shadow_it_domains`` and the
+  sketches start over. Sketches filling up trigger an early flush.
+- Each organization keeps at most SHADOW_IT_MAX_STORED_DOMAINS rows per
+  month; the lightest rows are dropped after every flush.
+
+Counts are estimates: a domain can be overcounted by the sketch, and a
+domain that never reaches a worker's top-k between two flushes is not
+stored.
+"""
+
+import logging
+import threading
+from collections import Counter as _Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session
+
+from procure.db.engine import get_session_factory
+from procure.db.models import Organization, ShadowITDomain
+from procure.db.upsert import dialect_insert
+from procure.server.utils import get_base_domain
+from procure.utils.metrics import Counter, Gauge
+from procure.utils.periods import current_period, get_timezone
+from procure.utils.sketches import HeavyHitters
+from procure.configs.app_configs import (
+    SHADOW_IT_ENABLED,
+    SHADOW_IT_FLUSH_INTERVAL_SECONDS,
+    SHADOW_IT_TOP_K,
+    SHADOW_IT_SKETCH_WIDTH,
+    SHADOW_IT_SKETCH_DEPTH,
+    SHADOW_IT_MAX_PENDING_SKETCHES,
+    SHADOW_IT_MAX_STORED_DOMAINS
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+shadow_it_flushes = Counter(
+    "procure_shadow_it_flushes",
+    "Shadow IT sketch flushes by result (ok, error)",
+    ["result"]
+)
+shadow_it_dropped_entries = Counter(
+    "procure_shadow_it_dropped_entries",
+    "Unmatched URL visit entries not counted because every sketch slot was taken"
+)
+shadow_it_pending_sketches = Gauge(
+    "procure_shadow_it_pending_sketches",
+    "Shadow IT sketches waiting to be flushed",
+    multiprocess_mode="livesum"
+)
+
+
+@lru_cache(maxsize=65536)
+def unmatched_base_domain(hostname: str) -> Optional[str]:
+    """
+    Get the base domain a hostname is reported under.
+
+    Returns:
+        The base domain, or None for hosts without a public suffix (IPs, localhost)
+    """
+    try:
+        domain = get_base_domain(hostname)
+    except Exception:
+        return None
+    if domain.startswith(".") or domain.endswith("."):
+        return None
+    return domain
+
+
+class ShadowITTracker:
+    """Per-worker heavy-hitter sketches of unmatched domains, flushed to the database."""
+
+    def __init__(
+        self,
+        k: int = SHADOW_IT_TOP_K,
+        width: int = SHADOW_IT_SKETCH_WIDTH,
+        depth: int = SHADOW_IT_SKETCH_DEPTH,
+        max_pending: int = SHADOW_IT_MAX_PENDING_SKETCHES,
+        max_stored: int = SHADOW_IT_MAX_STORED_DOMAINS,
+        flush_interval: float = SHADOW_IT_FLUSH_INTERVAL_SECONDS,
+        enabled: bool = SHADOW_IT_ENABLED
+    ):
+        self.k = k
+        self.width = width
+        self.depth = depth
+        self.max_pending = max_pending
+        self.max_stored = max_stored
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self._pending: Dict[Tuple[str, str], HeavyHitters] = {}
+        self._lock = threading.Lock()
+        # Serializes flushes from the background thread and explicit calls
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def record(self, organization_id: str, period: str, hostnames: Iterable[str]):
+        """
+        Count visits to hostnames that matched no contract.
+
+        Args:
+            organization_id: The visiting user's organization
+            period: Month of the visits (YYYY-MM)
+            hostnames: Hostname per unmatched entry
+        """
+        if not self.enabled:
+            return
+        domain_counts: Dict[str, int] = {}
+        for hostname, count in _Counter(hostnames).items():
+            domain = unmatched_base_domain(hostname)
+            if domain is not None:
+                domain_counts[domain] = domain_counts.get(domain, 0) + count
+        if not domain_counts:
+            return
+
+        key = (organization_id, period)
+        with self._lock:
+            sketch = self._pending.get(key)
+            if sketch is None:
+                if len(self._pending) >= self.max_pending:
+                    shadow_it_dropped_entries.inc(sum(domain_counts.values()))
+                    self._wake.set()
+                    return
+                sketch = self._pending[key] = HeavyHitters(self.k, self.width, self.depth)
+                shadow_it_pending_sketches.inc()
+                if len(self._pending) >= self.max_pending:
+                    # Flush early rather than drop the next organization's visits
+                    self._wake.set()
+            for domain, count in domain_counts.items():
+                sketch.add(domain, count)
+
+    def flush(self, db: Session) -> int:
+        """
+        Add the top domains of every pending sketch to shadow_it_domains.
+
+        Sketches are taken out of the tracker first, so visits recorded while
+        the flush runs go to new sketches. If the write fails they are put
+        back, and their counts are written by the next flush.
+
+        Returns:
+            The number of domain rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                shadow_it_pending_sketches.dec(len(pending))
+            if not pending:
+                return 0
+
+            rows = [
+                {"organization_id": organization_id, "period": period, "domain": domain, "visits": visits}
+                for (organization_id, period), sketch in pending.items()
+                for domain, visits in sketch.top()
+            ]
+            try:
+                upsert_domain_visits(db, rows)
+                for organization_id, period in pending:
+                    trim_stored_domains(db, organization_id, period, self.max_stored)
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._restore(pending)
+                shadow_it_flushes.labels("error").inc()
+                raise
+            shadow_it_flushes.labels("ok").inc()
+            return len(rows)
+
+    def _restore(self, pending: Dict[Tuple[str, str], HeavyHitters]):
+        """Put back sketches whose flush failed, merging visits recorded since."""
+        with self._lock:
+            for key, sketch in pending.items():
+                recorded = self._pending.get(key)
+                if recorded is None:
+                    shadow_it_pending_sketches.inc()
+                else:
+                    for domain, count in recorded.top():
+                        sketch.add(domain, count)
+                self._pending[key] = sketch
+
+    # Background flushing
+
+    def _flush_with_new_session(self):
+        db = get_session_factory()()
+        try:
+            written = self.flush(db)
+            if written:
+                logger.debug(f"Flushed {written} shadow IT domain counts")
+        except Exception as e:
+            logger.error(f"Error flushing shadow IT domains: {str(e)}")
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._flush_with_new_session()
+
+    def start(self):
+        """Start flushing in a background thread."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="procure-shadow-it", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after a final flush."""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+
+    def clear(self):
+        """Drop pending sketches (e.g. between tests)."""
+        with self._lock:
+            shadow_it_pending_sketches.dec(len(self._pending))
+            self._pending.clear()
+
+
+def upsert_domain_visits(db: Session, rows: List[Dict[str, Any]]):
+    """
+    Add visit counts to shadow_it_domains, inserting new domains.
+
+    Uses INSERT ... ON CONFLICT DO UPDATE on PostgreSQL and SQLite.
+    """
+    if not rows:
+        return
+    stmt = dialect_insert(db, ShadowITDomain)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ShadowITDomain.organization_id, ShadowITDomain.period, ShadowITDomain.domain],
+        set_={"visits": ShadowITDomain.visits + stmt.excluded.visits}
+    )
+    db.execute(stmt, rows)
+
+
+def trim_stored_domains(db: Session, organization_id: str, period: str, max_stored: int):
+    """Delete an organization's lightest domains beyond max_stored for a period."""
+    keep = (
+        select(ShadowITDomain.domain)
+        .where(ShadowITDomain.organization_id == organization_id)
+        .where(ShadowITDomain.period == period)
+        .order_by(ShadowITDomain.visits.desc(), ShadowITDomain.domain)
+        .limit(max_stored)
+    )
+    db.execute(
+        delete(ShadowITDomain)
+        .where(ShadowITDomain.organization_id == organization_id)
+        .where(ShadowITDomain.period == period)
+        .where(ShadowITDomain.domain.not_in(keep))
+    )
+
+
+def get_shadow_it_domains(
+    db: Session,
+    organization_id: str,
+    period: Optional[str],
+    limit: int
+) -> Dict[str, Any]:
+    """
+    Get an organization's most visited domains without a contract.
+
+    Args:
+        db: Database session
+        organization_id: The organization ID
+        period: Month (YYYY-MM), None for the current month in the organization's
+                time zone (the month ingest records visits under)
+        limit: Number of domains to return
+
+    Returns:
+        A dictionary with success status and the domains, most visited first, or error message
+    """
+    organization = db.scalars(
+        select(Organization).where(Organization.organization_id == organization_id)
+    ).one_or_none()
+
+    if not organization:
+        return {
+            "success": False,
+            "error": f"Organization with ID {organization_id} not found",
+            "status_code": 404
+        }
+
+    period = period or current_period(get_timezone(organization.timezone))
+    rows = db.execute(
+        select(ShadowITDomain.domain, ShadowITDomain.visits)
+        .where(ShadowITDomain.organization_id == organization_id)
+        .where(ShadowITDomain.period == period)
+        .order_by(ShadowITDomain.visits.desc(), ShadowITDomain.domain)
+        .limit(limit)
+    ).fetchall()
+
+    return {
+        "success": True,
+        "organization_id": organization_id,
+        "period": period,
+        "domains": [{"domain": domain, "visits": visits} for domain, visits in rows]
+    }
+
+
+shadow_it_tracker = ShadowITTracker()
@@ -6,7 +6,6 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-from datetime import datetime
 
 from procure.server.utils import normalize_url, get_base_domain
 
@@ -15,13 +14,16 @@ from procure.server.contract.schemas import ContractRequest, ContractResponse
 from procure.utils.db_utils import get_db
 from procure.db.models import Contract
 from procure.db import core as db_core
+from procure.server.analytics.analytics import invalidate_contract_usage
+from procure.db.vendor_matcher import invalidate_vendor_matcher
+from procure.server.responses import FastResponseRoute
 from procure.configs.app_configs import API_PREFIX
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 # Create router
-router = APIRouter(prefix=API_PREFIX, tags=["contract"])
+router = APIRouter(prefix=API_PREFIX, tags=["contract"], route_class=FastResponseRoute)
 
 @router.post("/contract", response_model=ContractResponse)
 async def add_contract(
@@ -89,13 +91,17 @@ async def add_contract(
         # Try to add the new contract
         db.add(new_contract)
         db.flush()
+        # Read the generated ID before committing, which would expire it and cost a reload
+        contract_id = new_contract.contract_id
         db.commit()
+        invalidate_contract_usage(contract_data.organization_id)
+        invalidate_vendor_matcher(contract_data.organization_id)
 
         # Return success response for new contract
         return ContractResponse(
             success=True,
-            contract_id=new_contract.contract_id,
-            vendor_name=new_contract.vendor_name,
+            contract_id=contract_id,
+            vendor_name=contract_data.vendor_name,
             product_url=normalized_url,
             vendor_domain=vendor_domain,
             message="Contract created successfully",
@@ -139,6 +145,8 @@ async def add_contract(
 
                     # Commit the changes
                     db.commit()
+                    invalidate_contract_usage(contract_data.organization_id)
+                    invalidate_vendor_matcher(contract_data.organization_id)
 
                     # Return success response for updated contract
                     return ContractResponse(
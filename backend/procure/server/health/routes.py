@@ -1,74 +1,176 @@
 """
 Health check routes for the proCure application.
+
+- /livez: liveness probe, never touches the database
+- /readyz: readiness probe, runs ``SELECT 1`` at most once per
+  READINESS_CHECK_INTERVAL_SECONDS and serves the cached result in between
+- /ping: legacy health check; the destructive write test only runs when
+  HEALTH_WRITE_CHECK_ENABLED is set
 """
 
-from fastapi import Depends, HTTPException
+import logging
+import threading
+import time
+from fastapi import Depends, HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, text
 from datetime import datetime, timezone
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import uuid
 
 from procure.db.models import User, Contract
+from procure.db.engine import get_engine, get_pool_status
+from procure.db.routing import replica_router
 from procure.utils.db_utils import get_db
+from procure.configs.app_configs import READINESS_CHECK_INTERVAL_SECONDS, HEALTH_WRITE_CHECK_ENABLED
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class ReadinessCache:
+    """Caches the result of the database readiness check for a fixed interval."""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._checked_at: Optional[float] = None
+        self._result: Dict[str, Any] = {}
+
+    def _check_database(self) -> Dict[str, Any]:
+        """Run ``SELECT 1`` against the database."""
+        try:
+            with get_engine().connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return {"status": "success", "error": None}
+        except SQLAlchemyError as e:
+            logger.error(f"Readiness check failed: {str(e)}")
+            return {"status": "failed", "error": str(e)}
+
+    def get(self) -> Dict[str, Any]:
+        """
+        Get the cached readiness result, refreshing it if the interval has elapsed.
+
+        Only one caller refreshes at a time; concurrent callers wait for it and
+        reuse the fresh result instead of issuing their own query.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._checked_at is None or now - self._checked_at >= self.interval_seconds:
+                self._result = self._check_database()
+                self._result["checked_at"] = datetime.now(timezone.utc).isoformat()
+                self._checked_at = now
+            return dict(self._result)
+
+    def reset(self):
+        """Forget the cached result so the next call re-checks the database."""
+        with self._lock:
+            self._checked_at = None
+            self._result = {}
+
+
+readiness_cache = ReadinessCache(READINESS_CHECK_INTERVAL_SECONDS)
+
+
+def run_write_check(db: Session) -> Dict[str, Any]:
+    """
+    Insert, read back and delete a throwaway user and contract.
+
+    This generates real write load, so it is only used by /ping when
+    HEALTH_WRITE_CHECK_ENABLED is set.
+    """
+    test_email = f"health_check_user_{uuid.uuid4().hex[:8]}@example.com"
+    test_url = f"https://test-{uuid.uuid4().hex[:6]}.example.com"
+
+    # Write test
+    test_user = User(
+        id=str(uuid.uuid4()),
+        email=test_email,
+        hashed_password="$2b$12$test_password_hash",
+        is_active=True,
+        is_verified=False,
+        is_superuser=False,
+        role="member"
+    )
+    db.add(test_user)
+    db.flush()
+    test_contract = Contract(
+        vendor_name="Health Check Test",
+        product_url=test_url,
+        owner_id=test_user.id
+    )
+    db.add(test_contract)
+
+    # Read test using modern select
+    user_stmt = select(User).where(User.email == test_email)
+    db.scalars(user_stmt).one_or_none()
+
+    contract_stmt = select(Contract).where(Contract.product_url == test_url)
+    db.scalars(contract_stmt).one_or_none()
+
+    # Cleanup using modern delete statements
+    contract_delete_stmt = delete(Contract).where(Contract.product_url == test_url)
+    db.execute(contract_delete_stmt)
+
+    user_delete_stmt = delete(User).where(User.email == test_email)
+    db.execute(user_delete_stmt)
+
+    # Commit the transaction
+    db.commit()
+
+    return {"status": "success", "error": None}
+
 
 def register_health_routes(app):
+    @app.get("/livez")
+    async def livez() -> Dict[str, Any]:
+        """Liveness probe: the process is up and serving requests. No I/O."""
+        return {"status": "alive"}
+
+    @app.get("/readyz")
+    async def readyz():
+        """Readiness probe: cached database check plus connection pool and replica status."""
+        database = await run_in_threadpool(readiness_cache.get)
+        ready = database["status"] == "success"
+        body = {
+            "status": "ready" if ready else "not_ready",
+            "database": database,
+            "pool": get_pool_status(),
+            "replica": replica_router.status()
+        }
+        return JSONResponse(
+            status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=body
+        )
+
     @app.get("/ping")
     async def ping(db: Session = Depends(get_db)) -> Dict[str, Any]:
-        test_email = f"health_check_user_{uuid.uuid4().hex[:8]}@example.com"
-        test_url = f"https://test-{uuid.uuid4().hex[:6]}.example.com"
+        database = await run_in_threadpool(readiness_cache.get)
+        database.pop("checked_at", None)
 
         response = {
             "message": "Backend is up and running!",
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "database": {
-                "read": {"status": "success", "error": None},
-                "write": {"status": "success", "error": None}
+                "read": database,
+                "write": {"status": "skipped", "error": None}
             }
         }
 
-        # Test write and read
-        try:
-            # Write test
-            test_user = User(
-                id=str(uuid.uuid4()),
-                email=test_email,
-                hashed_password="$2b$12$test_password_hash",
-                is_active=True,
-                is_verified=False,
-                is_superuser=False,
-                role="member"
-            )
-            db.add(test_user)
-            db.flush()
-            test_contract = Contract(
-                vendor_name="Health Check Test",
-                product_url=test_url,
-                owner_id=test_user.id
-            )
-            db.add(test_contract)
-
-            # Read test using modern select
-            user_stmt = select(User).where(User.email == test_email)
-            db.scalars(user_stmt).one_or_none()
-
-            contract_stmt = select(Contract).where(Contract.product_url == test_url)
-            db.scalars(contract_stmt).one_or_none()
-
-            # Cleanup using modern delete statements
-            contract_delete_stmt = delete(Contract).where(Contract.product_url == test_url)
-            db.execute(contract_delete_stmt)
-
-            user_delete_stmt = delete(User).where(User.email == test_email)
-            db.execute(user_delete_stmt)
-
-            # Commit the transaction
-            db.commit()
-
-        except SQLAlchemyError as e:
-            response["database"]["write"]["status"] = "failed"
-            response["database"]["write"]["error"] = str(e)
+        if database["status"] != "success":
             raise HTTPException(status_code=500, detail=response)
 
+        # The write test is opt-in: it inserts and deletes rows on every call
+        if HEALTH_WRITE_CHECK_ENABLED:
+            try:
+                response["database"]["write"] = run_write_check(db)
+            except SQLAlchemyError as e:
+                db.rollback()
+                response["database"]["write"]["status"] = "failed"
+                response["database"]["write"]["error"] = str(e)
+                raise HTTPException(status_code=500, detail=response)
+
         return response
@@ -1,58 +1,128 @@
 """
 Main FastAPI application for the proCure backend.
+
+Run with ``uvicorn procure.server.main:app``, or build a fresh application
+with create_app() (``uvicorn --factory procure.server.main:create_app``).
+Creating the app does not connect to the database: the engine is created
+on first use and disposed on shutdown.
 """
 
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from procure.server.admission.middleware import AdmissionControlMiddleware
 from procure.server.health.routes import register_health_routes
+from procure.server.metrics.routes import register_metrics_routes
+from procure.server.metrics.middleware import RequestMetricsMiddleware
+from procure.server.profiling.middleware import RequestProfilingMiddleware
+from procure.server.responses import FastJSONResponse
 from procure.server.url_visits.routes import register_url_visits_routes
 from procure.server.manage.routes import register_manage_routes
 from procure.server.analytics.routes import register_analytics_routes
+from procure.server.analytics.live import live_hub
+from procure.server.analytics.shadow_it import shadow_it_tracker
 from procure.server.contract.routes import register_contract_routes
+from procure.server.admin.routes import register_admin_routes
 from procure.auth.routes import register_auth_routes
+from procure.configs.app_configs import PROFILING_SECRET
+from procure.db.engine import dispose_engine
+from procure.utils.metrics import mark_worker_dead
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Flush shadow IT sketches in the background
+    shadow_it_tracker.start()
+    yield
+    # End live update streams that are still open
+    live_hub.close_all()
+    shadow_it_tracker.stop()
+    # Close pooled database connections on shutdown
+    dispose_engine()
+    # Stop reporting this worker's live gauges (multiprocess metrics)
+    mark_worker_dead(os.getpid())
+
+
+def create_app() -> FastAPI:
+    """
+    Create the proCure FastAPI application with its middleware and routes.
+
+    Returns:
+        FastAPI: The configured application
+    """
+    app = FastAPI(
+        title="proCure Backend",
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse
+    )
+
+    # Shed low priority requests with 503 when the database pool is saturated;
+    # added first so it runs inside CORS and the metrics middleware
+    app.add_middleware(AdmissionControlMiddleware)
+
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "http://localhost:3000",  # For web app development
+            "http://127.0.0.1:3000",  # Alternative local address
+            "http://localhost:8000",  # For backend API access
+            "http://127.0.0.1:8000",   # Alternative backend address
+            "https://procure-phi.vercel.app"
+        ],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["*"]
+    )
+
+    # Record request latency and in-flight requests for /metrics
+    app.add_middleware(RequestMetricsMiddleware)
+
+    # Profile individual requests on demand; only installed when a secret is set
+    if PROFILING_SECRET:
+        app.add_middleware(RequestProfilingMiddleware)
+
+    @app.get("/")
+    async def root():
+        return {
+            "service": "proCure Backend",
+            "version": app.version,
+            "docs_url": "/docs",
+            "health_check": "/ping",
+            "liveness_check": "/livez",
+            "readiness_check": "/readyz"
+        }
+
+    # Register health check routes
+    register_health_routes(app)
+
+    # Register metrics routes
+    register_metrics_routes(app)
+
+    # Register authentication routes
+    register_auth_routes(app)
+
+    # Register URL visits routes
+    register_url_visits_routes(app)
+
+    # Register organization management routes
+    register_manage_routes(app)
+
+    # Register analytics routes
+    register_analytics_routes(app)
+
+    # Register contract routes
+    register_contract_routes(app)
+
+    # Register admin diagnostics routes
+    register_admin_routes(app)
+
+    return app
+
 
-app = FastAPI(title="proCure Backend", version="1.0.0")
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",  # For web app development
-        "http://127.0.0.1:3000",  # Alternative local address
-        "http://localhost:8000",  # For backend API access
-        "http://127.0.0.1:8000",   # Alternative backend address
-        "https://procure-phi.vercel.app"
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-    expose_headers=["*"]
-)
-
-@app.get("/")
-async def root():
-    return {
-        "service": "proCure Backend",
-        "version": app.version,
-        "docs_url": "/docs",
-        "health_check": "/ping"
-    }
-
-# Register health check routes
-register_health_routes(app)
-
-# Register authentication routes
-register_auth_routes(app)
-
-# Register URL visits routes
-register_url_visits_routes(app)
-
-# Register organization management routes
-register_manage_routes(app)
-
-# Register analytics routes
-register_analytics_routes(app)
-
-# Register contract routes
-register_contract_routes(app)
+app = create_app()
@@ -6,11 +6,20 @@ from sqlalchemy.orm import Session
 from typing import Dict, Any
 
 from procure.db import core as db_core
+from procure.server.analytics.analytics import invalidate_contract_usage
+from procure.utils.cache import get_cache
+from procure.utils.periods import is_valid_timezone
+from procure.configs.app_configs import ORGANIZATION_CACHE_TTL_SECONDS
+
+# Organization lookups by ID, invalidated per organization
+organization_cache = get_cache("organization", ORGANIZATION_CACHE_TTL_SECONDS)
 
 def get_organization_name_by_id(db: Session, organization_id: str) -> Dict[str, Any]:
     """
     Get an organization name by its ID.
 
+    Found organizations are cached; see organization_cache.
+
     Args:
         db: Database session
         organization_id: The organization ID to look up
@@ -18,6 +27,14 @@ def get_organization_name_by_id(db: Session, organization_id: str) -> Dict[str,
     Returns:
         A dictionary with success status and organization data or error message
     """
+    return organization_cache.get_or_load(
+        "name",
+        lambda: _load_organization_name(db, organization_id),
+        scope=organization_id,
+        should_cache=lambda result: result.get("success", False)
+    )
+
+def _load_organization_name(db: Session, organization_id: str) -> Dict[str, Any]:
     # Get organization from database
     organization = db_core.get_organization_by_id(db, organization_id)
 
@@ -33,6 +50,66 @@ def get_organization_name_by_id(db: Session, organization_id: str) -> Dict[str,
         "organization": {
             "organization_id": organization.organization_id,
             "domain_name": organization.domain_name,
-            "company_name": organization.company_name
+            "company_name": organization.company_name,
+            "timezone": organization.timezone
+        }
+    }
+
+def set_organization_timezone(db: Session, email: str, organization_id: str, timezone: str) -> Dict[str, Any]:
+    """
+    Set the time zone an organization's activity months and days are counted in.
+
+    Only affects activities recorded from now on; stored engagement days keep
+    the time zone they were counted in.
+
+    Args:
+        db: Database session
+        email: Email of the admin making the change, who must belong to the organization
+        organization_id: The organization ID
+        timezone: IANA time zone name (e.g. Europe/Paris)
+
+    Returns:
+        A dictionary with success status and organization data or error message
+    """
+    if not is_valid_timezone(timezone):
+        return {
+            "success": False,
+            "error": f"Unknown time zone {timezone}",
+            "status_code": 400
         }
-    }
\ No newline at end of file
+
+    organization = db_core.get_organization_by_id(db, organization_id)
+    if not organization:
+        return {
+            "success": False,
+            "error": f"Organization with ID {organization_id} not found",
+            "status_code": 404
+        }
+
+    user = db_core.get_user_by_email(db, email)
+    if not user or user.organization_id != organization_id:
+        return {
+            "success": False,
+            "error": "Not an admin of this organization",
+            "status_code": 403
+        }
+
+    organization.timezone = timezone
+    result = {
+        "success": True,
+        "organization": {
+            "organization_id": organization.organization_id,
+            "domain_name": organization.domain_name,
+            "company_name": organization.company_name,
+            "timezone": timezone
+        }
+    }
+    try:
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+
+    organization_cache.invalidate(organization_id)
+    invalidate_contract_usage(organization_id)
+    return result
\ No newline at end of file
@@ -5,24 +5,26 @@ Organization management routes for the proCure application.
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.exc import SQLAlchemyError
 
-from procure.auth.users import authenticate_user_by_token
-from procure.server.manage.schemas import OrganizationNameResponse
+from procure.auth.users import authenticate_admin_by_token, authenticate_user_by_token
+from procure.server.manage.schemas import OrganizationNameResponse, OrganizationTimezoneRequest
 from procure.server.manage import orgs
-from procure.utils.db_utils import get_db
+from procure.utils.db_utils import get_db, get_read_db
+from procure.server.responses import FastResponseRoute
 from procure.configs.app_configs import API_PREFIX
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 # Create router
-router = APIRouter(prefix=API_PREFIX, tags=["manage"])
+router = APIRouter(prefix=API_PREFIX, tags=["manage"], route_class=FastResponseRoute)
 
 @router.get("/organizations/{organization_id}/name", response_model=OrganizationNameResponse)
 async def get_organization_name(
     organization_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     email: str = Depends(authenticate_user_by_token)
 ):
     """
@@ -30,7 +32,7 @@ async def get_organization_name(
 
     Args:
         organization_id: The organization ID to look up
-        db: Database session dependency
+        db: Read-only database session dependency
         email: Authenticated user email from token
 
     Returns:
@@ -38,7 +40,7 @@ async def get_organization_name(
     """
     try:
         # Get organization name from database
-        result = orgs.get_organization_name_by_id(db, organization_id)
+        result = await run_in_threadpool(orgs.get_organization_name_by_id, db, organization_id)
 
         # Handle error case
         if not result.get("success", True):
@@ -57,6 +59,46 @@ async def get_organization_name(
             detail=f"Database error: {str(e)}"
         )
 
+@router.put("/organizations/{organization_id}/timezone", response_model=OrganizationNameResponse)
+async def set_organization_timezone(
+    organization_id: str,
+    request: OrganizationTimezoneRequest,
+    db: Session = Depends(get_db),
+    email: str = Depends(authenticate_admin_by_token)
+):
+    """
+    Set the time zone an organization's activity months and days are counted in.
+
+    Args:
+        organization_id: The organization ID
+        request: The IANA time zone name
+        db: Database session dependency
+        email: Authenticated admin email from token
+
+    Returns:
+        The updated organization
+    """
+    try:
+        result = await run_in_threadpool(
+            orgs.set_organization_timezone, db, email, organization_id, request.timezone
+        )
+
+        # Handle error case
+        if not result.get("success", True):
+            raise HTTPException(
+                status_code=result.get("status_code", status.HTTP_500_INTERNAL_SERVER_ERROR),
+                detail=result.get("error", "Unknown error updating organization")
+            )
+
+        return result["organization"]
+
+    except SQLAlchemyError as e:
+        logger.error(f"Database error updating organization time zone: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+
 
 def register_manage_routes(app):
     """Register organization management routes with the main FastAPI app"""
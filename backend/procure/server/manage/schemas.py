@@ -9,3 +9,8 @@ class OrganizationNameResponse(BaseModel):
     organization_id: str = Field(..., description="The organization ID")
     domain_name: str = Field(..., description="The organization domain name")
     company_name: str | None = Field(None, description="The full company name")
+    timezone: str = Field("UTC", description="IANA time zone of the organization's activity months and days")
+
+class OrganizationTimezoneRequest(BaseModel):
+    """Request model for setting an organization's time zone."""
+    timezone: str = Field(..., max_length=64, description="IANA time zone name (e.g. Europe/Paris)")
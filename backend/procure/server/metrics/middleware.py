@@ -0,0 +1,66 @@
+"""
+Request metrics middleware for the proCure application.
+"""
+
+import time
+
+from procure.utils.metrics import Gauge, Histogram
+from procure.utils.request_context import current_request_route
+
+http_request_duration_seconds = Histogram(
+    "procure_http_request_duration_seconds",
+    "HTTP request latency by method, route template and status code",
+    ["method", "route", "status"]
+)
+http_requests_in_flight = Gauge(
+    "procure_http_requests_in_flight",
+    "HTTP requests currently being processed",
+    multiprocess_mode="livesum"
+)
+
+# Route label for requests that did not match any route, so that arbitrary
+# paths (scanners, typos) cannot blow up label cardinality
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware that records request latency and in-flight requests.
+
+    Requests are labelled by route template (e.g.
+    ``/api/v1/organizations/{organization_id}/name``), not by raw path. The
+    template is read from ``scope["route"]``, which FastAPI sets once routing
+    has matched.
+
+    Also publishes the request's method and path in the request context so
+    that the slow-query log can attribute statements to the calling route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        route_token = current_request_route.set(f"{scope['method']} {scope['path']}")
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            current_request_route.reset(route_token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            http_request_duration_seconds.labels(scope["method"], route_path, status_code).observe(duration)
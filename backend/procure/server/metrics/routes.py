@@ -0,0 +1,22 @@
+"""
+Metrics routes for the proCure application.
+"""
+
+from fastapi import Response
+
+from procure.db.pool import refresh_pool_gauges
+from procure.utils.metrics import CONTENT_TYPE_LATEST, generate_latest
+
+
+def register_metrics_routes(app):
+    """Register the Prometheus metrics endpoint with the main FastAPI app"""
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics() -> Response:
+        """Expose all metrics in the Prometheus text format.
+
+        With PROMETHEUS_MULTIPROC_DIR set, the metrics of every worker are
+        aggregated, whichever worker serves the scrape.
+        """
+        refresh_pool_gauges()
+        return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
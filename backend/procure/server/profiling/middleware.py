@@ -0,0 +1,145 @@
+"""
+On-demand request profiling middleware for the proCure application.
+
+A request is profiled when it carries PROFILING_SECRET in the
+``X-Procure-Profile`` header (never in the URL, which ends up in access
+logs). Only the request's own task and threadpool work are sampled. The
+profile is stored in a bounded in-memory buffer and its id is returned in
+the ``X-Profile-Id`` response header; operators fetch it from
+``/api/v1/admin/profiles/{profile_id}``.
+
+Requests without the flag pay a header scan and nothing else, and the
+middleware is not installed at all unless PROFILING_SECRET is set.
+"""
+
+import hmac
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from procure.configs.app_configs import (
+    PROFILING_SECRET,
+    PROFILING_SAMPLE_INTERVAL_MS,
+    PROFILING_BUFFER_SIZE
+)
+from procure.utils.profiler import SamplingProfiler, current_profiler
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-procure-profile"
+
+
+class ProfileStore:
+    """Thread-safe, bounded store of recent request profiles keyed by id."""
+
+    def __init__(self, maxlen: int):
+        self.maxlen = maxlen
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: Dict[str, Any]):
+        with self._lock:
+            self._profiles[profile["profile_id"]] = profile
+            while len(self._profiles) > self.maxlen:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Get every stored profile without its stacks, most recent first."""
+        with self._lock:
+            profiles = list(reversed(self._profiles.values()))
+        return [{key: value for key, value in profile.items() if key != "collapsed"} for profile in profiles]
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+profile_store = ProfileStore(PROFILING_BUFFER_SIZE)
+
+
+def _requested_secret(scope) -> Optional[str]:
+    """Get the profiling secret sent with the request, if any."""
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return value.decode("latin-1")
+    return None
+
+
+class RequestProfilingMiddleware:
+    """Pure ASGI middleware that profiles flagged requests."""
+
+    def __init__(self, app, secret: Optional[str] = None, interval_ms: Optional[float] = None):
+        self.app = app
+        self.secret = secret if secret is not None else PROFILING_SECRET
+        self.interval = (interval_ms if interval_ms is not None else PROFILING_SAMPLE_INTERVAL_MS) / 1000
+        # One profile at a time per worker, to bound the sampling overhead
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.secret:
+            await self.app(scope, receive, send)
+            return
+
+        requested = _requested_secret(scope)
+        if requested is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not hmac.compare_digest(requested.encode(), self.secret.encode()):
+            logger.warning(f"Rejected profiling request with invalid secret for {scope['path']}")
+            await self.app(scope, receive, send)
+            return
+
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, self._with_headers(send, [(b"x-profile-status", b"busy")]))
+            return
+
+        profile_id = uuid.uuid4().hex
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        profiler = SamplingProfiler(interval=self.interval)
+        profiler_token = profiler.bind_to_current_task()
+        try:
+            with profiler:
+                await self.app(
+                    scope,
+                    receive,
+                    self._with_headers(send_wrapper, [(b"x-profile-id", profile_id.encode())])
+                )
+        finally:
+            current_profiler.reset(profiler_token)
+            self._busy.release()
+
+        profile_store.add({
+            "profile_id": profile_id,
+            "route": f"{scope['method']} {scope['path']}",
+            "status_code": status_code,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(profiler.duration * 1000, 3),
+            "samples": profiler.samples,
+            "categories": profiler.category_summary(),
+            "collapsed": profiler.collapsed()
+        })
+
+    @staticmethod
+    def _with_headers(send, headers):
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+        return send_with_headers
@@ -0,0 +1,79 @@
+"""
+Fast JSON responses for the proCure application.
+
+By default FastAPI handles a route's return value in three passes: it
+validates it against ``response_model`` (even when it already is an
+instance of that model), dumps it to a dict, and encodes the dict with the
+standard library ``json`` module. For large payloads such as contract usage
+the last two passes dominate the response time.
+
+- FastJSONResponse renders Pydantic models straight to JSON bytes with
+  pydantic-core and everything else with orjson. It is the application's
+  default response class.
+- FastResponseRoute skips the ``response_model`` pass for routes that
+  return an instance of their response model, which was validated when it
+  was constructed. Other return values take FastAPI's normal path.
+"""
+
+import functools
+import inspect
+from typing import Any, Callable
+
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by pydantic-core (models) or orjson (plain data)."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastResponseRoute(APIRoute):
+    """
+    Route that returns instances of its response model without re-validating them.
+
+    The model is rendered directly by FastJSONResponse with the route's status
+    code. Headers and cookies set on an injected ``Response`` parameter are
+    not copied on this path, so only use it for routes that do not set them.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        response_model = kwargs.get("response_model")
+        uses_model_options = any(
+            kwargs.get(option) for option in (
+                "response_model_include",
+                "response_model_exclude",
+                "response_model_exclude_unset",
+                "response_model_exclude_defaults",
+                "response_model_exclude_none"
+            )
+        )
+        if inspect.isclass(response_model) and issubclass(response_model, BaseModel) and not uses_model_options:
+            endpoint = _return_models_directly(endpoint, response_model, kwargs.get("status_code") or 200)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _return_models_directly(endpoint: Callable[..., Any], response_model: type, status_code: int) -> Callable[..., Any]:
+    """Wrap an endpoint so that returned response models become FastJSONResponses."""
+
+    def to_response(result: Any) -> Any:
+        if type(result) is response_model:
+            return FastJSONResponse(result, status_code=status_code)
+        return result
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_endpoint(*args, **kwargs):
+            return to_response(await endpoint(*args, **kwargs))
+        return async_endpoint
+
+    @functools.wraps(endpoint)
+    def sync_endpoint(*args, **kwargs):
+        return to_response(endpoint(*args, **kwargs))
+    return sync_endpoint
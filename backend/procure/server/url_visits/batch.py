@@ -0,0 +1,130 @@
+"""
+Decoding of url-visits request bodies for the proCure ingest path.
+
+The request body is decoded with orjson and validated in a single pass
+straight into a columnar UrlVisitBatch (see procure.utils.url_visit_batch),
+without building a Pydantic model or a dict per entry. Validation follows
+the UrlVisitEntry schema, including its lax integer parsing of timestamps
+(e.g. ``"1700000000000"``).
+
+Oversized batches are rejected with 413 before they are decoded: the body
+is capped at URL_VISITS_MAX_BODY_BYTES while it is read, and the entry
+count is bounded by counting ``"url"`` keys in the raw bytes before
+URL_VISITS_MAX_ENTRIES is checked again on the decoded list.
+"""
+
+from typing import Any, Dict, Optional, Union
+
+import orjson
+from fastapi import HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+
+from procure.configs.app_configs import URL_VISITS_MAX_BODY_BYTES, URL_VISITS_MAX_ENTRIES
+from procure.utils.url_visit_batch import DEFAULT_BROWSER, UrlVisitBatch
+
+# Parses timestamps that are not plain ints (numeric strings, integral
+# floats) as the UrlVisitEntry schema does
+_timestamp_adapter = TypeAdapter(int)
+
+
+def _error(loc: tuple, error_type: str, msg: str, value: Any) -> Dict[str, Any]:
+    return {"type": error_type, "loc": ("body",) + loc, "msg": msg, "input": value}
+
+
+def decode_url_visit_batch(body: Union[bytes, bytearray], max_entries: int = URL_VISITS_MAX_ENTRIES) -> UrlVisitBatch:
+    """
+    Decode and validate a url-visits request body into a UrlVisitBatch.
+
+    Args:
+        body: Raw JSON body, ``{"entries": [{"url", "timestamp", "browser"?}, ...]}``
+        max_entries: Maximum number of entries accepted
+
+    Returns:
+        The decoded batch
+
+    Raises:
+        HTTPException: 413 if the batch has more than max_entries entries
+        RequestValidationError: If the body is not valid JSON or an entry is invalid
+    """
+    # Every entry carries a "url" key, so this bounds the entry count without decoding
+    if body.count(b'"url"') > max_entries:
+        raise _too_many_entries(max_entries)
+
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise RequestValidationError([
+            {"type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error", "input": {}, "ctx": {"error": e.msg}}
+        ])
+
+    if not isinstance(payload, dict):
+        raise RequestValidationError([_error((), "model_attributes_type", "Input should be an object", payload)])
+    entries = payload.get("entries")
+    if not isinstance(entries, list):
+        error_type, msg = ("missing", "Field required") if entries is None else ("list_type", "Input should be a valid list")
+        raise RequestValidationError([_error(("entries",), error_type, msg, entries)])
+    if len(entries) > max_entries:
+        raise _too_many_entries(max_entries)
+
+    batch = UrlVisitBatch()
+    errors = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            errors.append(_error(("entries", index), "model_attributes_type", "Input should be an object", entry))
+            continue
+        url = entry.get("url")
+        timestamp = entry.get("timestamp")
+        browser = entry.get("browser", DEFAULT_BROWSER)
+        if not isinstance(url, str):
+            errors.append(_error(("entries", index, "url"), "string_type", "Input should be a valid string", url))
+            continue
+        if type(timestamp) is not int:
+            try:
+                timestamp = _timestamp_adapter.validate_python(timestamp)
+            except ValidationError as e:
+                error = e.errors()[0]
+                errors.append(_error(("entries", index, "timestamp"), error["type"], error["msg"], timestamp))
+                continue
+        if not -2**63 <= timestamp < 2**63:
+            errors.append(_error(("entries", index, "timestamp"), "int_type", "Input should be a valid integer", timestamp))
+            continue
+        if not isinstance(browser, str):
+            errors.append(_error(("entries", index, "browser"), "string_type", "Input should be a valid string", browser))
+            continue
+        batch.append(url, timestamp, browser)
+
+    if errors:
+        raise RequestValidationError(errors)
+    return batch
+
+
+def _too_many_entries(max_entries: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Too many URL visit entries, at most {max_entries} are accepted per request"
+    )
+
+
+async def read_url_visit_batch(request: Request) -> UrlVisitBatch:
+    """
+    Read the request body into a UrlVisitBatch, enforcing the body size limit.
+
+    Raises:
+        HTTPException: 413 if the body exceeds URL_VISITS_MAX_BODY_BYTES
+    """
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Request body too large, at most {URL_VISITS_MAX_BODY_BYTES} bytes are accepted"
+    )
+    content_length: Optional[str] = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > URL_VISITS_MAX_BODY_BYTES:
+        raise too_large
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > URL_VISITS_MAX_BODY_BYTES:
+            raise too_large
+
+    return decode_url_visit_batch(body)
@@ -0,0 +1,51 @@
+"""
+URL visit ingest for the proCure application.
+
+Records a batch of url visits (procure.db.core.process_url_visits), then
+updates what depends on them:
+
+- the unmatched hostnames are counted for shadow IT discovery
+- the organization's cached contract usage is invalidated when contracts
+  gained activities
+- the new active users of those contracts are pushed to live dashboards
+"""
+
+from typing import Any, Dict
+
+from sqlalchemy.orm import Session
+
+from procure.db import core as db_core
+from procure.server.analytics.analytics import invalidate_contract_usage
+from procure.server.analytics.live import publish_active_users
+from procure.server.analytics.shadow_it import shadow_it_tracker
+from procure.utils.url_visit_batch import UrlVisitBatch
+
+
+def ingest_url_visits(db: Session, email: str, batch: UrlVisitBatch) -> Dict[str, Any]:
+    """
+    Record a user's url visits and run the post-ingest updates.
+
+    Args:
+        db: Database session
+        email: Email of the user who visited the URLs
+        batch: The visits, as decoded by the ingest route
+
+    Returns:
+        The result of process_url_visits
+    """
+    result = db_core.process_url_visits(db, email, batch)
+    if not result.get("success", False) or "organization_id" not in result:
+        return result
+
+    organization_id = result["organization_id"]
+    if organization_id and result["unmatched_hostnames"]:
+        shadow_it_tracker.record(organization_id, result["period"], result["unmatched_hostnames"])
+
+    contract_ids = result["activated_contract_ids"]
+    if contract_ids:
+        invalidate_contract_usage(organization_id)
+        # Push the new active users of these contracts to open dashboards
+        if organization_id:
+            publish_active_users(db, organization_id, contract_ids, result["month_begin"], result["month_end"])
+
+    return result
@@ -4,39 +4,64 @@ URL visits routes for the proCure application.
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 
 from procure.auth.users import authenticate_user_by_token
-from procure.server.url_visits.schemas import UrlVisitLog, UrlVisitResponse
+from procure.server.url_visits.batch import read_url_visit_batch
+from procure.server.url_visits.ingest import ingest_url_visits
+from procure.server.url_visits.schemas import UrlVisitEntry, UrlVisitResponse
 from procure.utils.db_utils import get_db
-from procure.db import core as db_core
-from procure.configs.app_configs import API_PREFIX
+from procure.utils.rate_limit import rate_limit
+from procure.utils.url_visit_batch import UrlVisitBatch
+from procure.server.responses import FastResponseRoute
+from procure.configs.app_configs import API_PREFIX, URL_VISITS_MAX_ENTRIES
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 # Create router
-router = APIRouter(prefix=API_PREFIX, tags=["url_visits"])
+router = APIRouter(prefix=API_PREFIX, tags=["url_visits"], route_class=FastResponseRoute)
 
-@router.post("/url-visits", response_model=UrlVisitResponse)
+# The body is decoded by read_url_visit_batch rather than FastAPI, so its
+# schema (UrlVisitLog) is documented here
+URL_VISITS_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "application/json": {
+            "schema": {
+                "title": "UrlVisitLog",
+                "type": "object",
+                "required": ["entries"],
+                "properties": {
+                    "entries": {
+                        "type": "array",
+                        "maxItems": URL_VISITS_MAX_ENTRIES,
+                        "items": UrlVisitEntry.model_json_schema()
+                    }
+                }
+            }
+        }
+    }
+}
+
+# Rate limits are checked before authentication so over-limit devices never reach the database
+@router.post(
+    "/url-visits",
+    response_model=UrlVisitResponse,
+    dependencies=[Depends(rate_limit("url_visits"))],
+    openapi_extra={"requestBody": URL_VISITS_REQUEST_BODY}
+)
 async def log_url_visits(
-    log_data: UrlVisitLog,
+    log_data: UrlVisitBatch = Depends(read_url_visit_batch),
     db: Session = Depends(get_db),
     email: str = Depends(authenticate_user_by_token)
 ):
     try:
-        # Convert Pydantic model to dict for processing
-        entries = [
-            {
-                "url": entry.url,
-                "browser": entry.browser,
-                "timestamp": entry.timestamp
-            } for entry in log_data.entries
-        ]
-
-        # Process URL visits using the database module
-        result = db_core.process_url_visits(db, email, entries)
+        # Process URL visits in the threadpool so waiting for a pool
+        # connection does not block the event loop
+        result = await run_in_threadpool(ingest_url_visits, db, email, log_data)
 
         # Handle error case
         if not result.get("success", True):
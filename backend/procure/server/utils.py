@@ -3,7 +3,6 @@ Utility functions for the proCure server.
 """
 
 from urllib.parse import urlparse
-import tldextract
 
 def normalize_url(raw_url: str) -> str:
     """
@@ -43,5 +42,9 @@ def get_base_domain(url: str) -> str:
     Returns:
         The base domain (e.g., example.com)
     """
+    # Imported on first use: tldextract is slow to import and only the
+    # url-visits and contract paths need it
+    import tldextract
+
     ext = tldextract.extract(url)
     return f"{ext.domain}.{ext.suffix}"
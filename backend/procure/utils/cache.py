@@ -0,0 +1,561 @@
+"""
+Two-tier cache for the proCure application.
+
+Values are cached in a per-process LRU (L1) and, when REDIS_URL is set, in a
+shared Redis-compatible store (L2) so that all workers and pods reuse each
+other's results.
+
+- Keys are namespaced: ``procure:<namespace>:<scope>:v<version>:<key>``.
+- Each namespace/scope pair has a version stored in L2. ``invalidate(scope)``
+  bumps it, which orphans every key of the scope on every worker at once.
+  Workers re-read versions at most every CACHE_L1_TTL_SECONDS, so a remote
+  invalidation is seen within that window; local invalidations are immediate.
+- ``get_or_load`` protects loaders against stampedes: one thread per process
+  loads a key at a time, and with L2 one worker across the fleet holds a
+  short lock while the others wait for its result. Waiting for one key
+  never blocks loads of other keys.
+- For REPLICA_MAX_LAG_SECONDS (plus a health check interval) after
+  ``invalidate(scope)``, keys of the scope are loaded with reads on the
+  primary: a lagging replica would otherwise cache the data from before the
+  write under the new version for the whole TTL.
+
+Values must be JSON serializable. L2 errors are logged and treated as misses,
+so a Redis outage degrades to per-process caching instead of failing requests.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from procure.configs.app_configs import (
+    REDIS_URL,
+    CACHE_ENABLED,
+    CACHE_L1_MAXSIZE,
+    CACHE_L1_TTL_SECONDS,
+    CACHE_LOCK_TIMEOUT_SECONDS,
+    REPLICA_MAX_LAG_SECONDS,
+    REPLICA_HEALTH_CHECK_INTERVAL_SECONDS
+)
+from procure.utils.metrics import Counter
+from procure.utils.request_context import primary_reads
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "procure"
+
+cache_requests = Counter(
+    "procure_cache_requests",
+    "Cache lookups by namespace and result (l1_hit, l2_hit, miss)",
+    ["namespace", "result"]
+)
+
+_MISSING = object()
+
+# How long after an invalidation loads read from the primary: the replica
+# may lag up to the max lag, undetected until the next health check
+PRIMARY_LOAD_SECONDS = REPLICA_MAX_LAG_SECONDS + REPLICA_HEALTH_CHECK_INTERVAL_SECONDS
+
+# Deletes a load lock only if it still holds our token (it may have expired
+# and been taken by another worker)
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class _InflightLoad:
+    """A load of one key by one thread, which other threads of the process wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = _MISSING
+
+
+class LocalLRUCache:
+    """Thread-safe, size-bounded LRU cache with per-entry expiry."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Get a value, or _MISSING if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class InMemoryBackend:
+    """
+    Local stand-in for Redis implementing the commands the cache uses.
+
+    Used in tests, and shareable between caches in one process to simulate
+    several workers talking to the same Redis.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[Optional[float], str]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str) -> Optional[str]:
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._values[key]
+            return None
+        return value
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._live(key)
+
+    def set(self, key: str, value: str, ex: Optional[float] = None, nx: bool = False) -> bool:
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return False
+            self._values[key] = (time.monotonic() + ex if ex else None, str(value))
+            return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(1 for key in keys if self._values.pop(key, None) is not None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._live(key) or 0) + 1
+            expires_at = self._values.get(key, (None, None))[0]
+            self._values[key] = (expires_at, str(value))
+            return value
+
+    def eval(self, script: str, numkeys: int, *keys_and_args: str) -> int:
+        """Run a Lua script; only RELEASE_LOCK_SCRIPT is supported."""
+        if script != RELEASE_LOCK_SCRIPT:
+            raise NotImplementedError("InMemoryBackend only runs RELEASE_LOCK_SCRIPT")
+        key, token = keys_and_args
+        with self._lock:
+            if self._live(key) != token:
+                return 0
+            del self._values[key]
+            return 1
+
+    def flushall(self):
+        with self._lock:
+            self._values.clear()
+
+
+class TwoTierCache:
+    """A namespaced cache over a process-local L1 and an optional shared L2."""
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        backend: Any = None,
+        l1: Optional[LocalLRUCache] = None,
+        l1_ttl: float = CACHE_L1_TTL_SECONDS,
+        lock_timeout: float = CACHE_LOCK_TIMEOUT_SECONDS,
+        enabled: bool = True,
+        primary_load_seconds: float = PRIMARY_LOAD_SECONDS
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.backend = backend
+        self.l1 = l1 if l1 is not None else LocalLRUCache(CACHE_L1_MAXSIZE)
+        self.l1_ttl = min(l1_ttl, ttl)
+        self.lock_timeout = lock_timeout
+        self.enabled = enabled
+        self.primary_load_seconds = primary_load_seconds
+        self._local_versions: Dict[str, int] = {}
+        # Scopes invalidated by this process, until when they load from the primary
+        self._primary_load_until: Dict[str, float] = {}
+        # Loads in progress in this process by key, so one thread loads a key
+        # while the others wait for it, without blocking loads of other keys
+        self._inflight: Dict[str, _InflightLoad] = {}
+        self._inflight_lock = threading.Lock()
+        # Striped locks so one thread per process builds a given local value
+        self._build_locks = [threading.Lock() for _ in range(64)]
+
+    # Keys and versions
+
+    def _version_key(self, scope: str) -> str:
+        return f"{KEY_PREFIX}:{self.namespace}:{scope}:version"
+
+    def _invalidated_key(self, scope: str) -> str:
+        return f"{KEY_PREFIX}:{self.namespace}:{scope}:invalidated"
+
+    def _version(self, scope: str) -> int:
+        """Get the current version of a scope, re-reading L2 at most every l1_ttl."""
+        l1_key = self._version_key(scope)
+        version = self.l1.get(l1_key)
+        if version is not _MISSING:
+            return version
+        version = self._local_versions.get(scope, 0)
+        if self.backend is not None:
+            try:
+                version = max(version, int(self.backend.get(l1_key) or 0))
+            except Exception as e:
+                logger.warning(f"Cache backend error reading version for {self.namespace}:{scope}: {str(e)}")
+        self.l1.set(l1_key, version, self.l1_ttl)
+        return version
+
+    def make_key(self, key: str, scope: str = "global") -> str:
+        return f"{KEY_PREFIX}:{self.namespace}:{scope}:v{self._version(scope)}:{key}"
+
+    # Reads and writes
+
+    def get(self, key: str, scope: str = "global") -> Any:
+        """Get a cached value, or None on a miss."""
+        value = self._get(self.make_key(key, scope))
+        return None if value is _MISSING else value
+
+    def _get(self, full_key: str) -> Any:
+        if not self.enabled:
+            return _MISSING
+        value = self.l1.get(full_key)
+        if value is not _MISSING:
+            cache_requests.labels(self.namespace, "l1_hit").inc()
+            return value
+        if self.backend is not None:
+            try:
+                raw = self.backend.get(full_key)
+            except Exception as e:
+                logger.warning(f"Cache backend error reading {full_key}: {str(e)}")
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self.l1.set(full_key, value, self.l1_ttl)
+                cache_requests.labels(self.namespace, "l2_hit").inc()
+                return value
+        cache_requests.labels(self.namespace, "miss").inc()
+        return _MISSING
+
+    def set(self, key: str, value: Any, scope: str = "global", ttl: Optional[float] = None):
+        """Cache a value in both tiers."""
+        self._set(self.make_key(key, scope), value, ttl or self.ttl)
+
+    def _set(self, full_key: str, value: Any, ttl: float):
+        if not self.enabled:
+            return
+        self.l1.set(full_key, value, min(self.l1_ttl, ttl))
+        if self.backend is not None:
+            try:
+                self.backend.set(full_key, json.dumps(value), ex=ttl)
+            except Exception as e:
+                logger.warning(f"Cache backend error writing {full_key}: {str(e)}")
+
+    def delete(self, key: str, scope: str = "global"):
+        full_key = self.make_key(key, scope)
+        self.l1.delete(full_key)
+        if self.backend is not None:
+            try:
+                self.backend.delete(full_key)
+            except Exception as e:
+                logger.warning(f"Cache backend error deleting {full_key}: {str(e)}")
+
+    def invalidate(self, scope: str = "global"):
+        """Invalidate every key of a scope by bumping its version."""
+        version = self._version(scope) + 1
+        if self.primary_load_seconds > 0:
+            self._primary_load_until[scope] = time.monotonic() + self.primary_load_seconds
+        if self.backend is not None:
+            try:
+                if self.primary_load_seconds > 0:
+                    self.backend.set(self._invalidated_key(scope), "1", ex=math.ceil(self.primary_load_seconds))
+                version = max(version, int(self.backend.incr(self._version_key(scope))))
+            except Exception as e:
+                logger.warning(f"Cache backend error invalidating {self.namespace}:{scope}: {str(e)}")
+        self._local_versions[scope] = version
+        self.l1.set(self._version_key(scope), version, self.l1_ttl)
+
+    def _recently_invalidated(self, scope: str) -> bool:
+        """Check whether any worker invalidated a scope in the last primary_load_seconds."""
+        until = self._primary_load_until.get(scope)
+        if until is not None:
+            if until > time.monotonic():
+                return True
+            self._primary_load_until.pop(scope, None)
+        if self.backend is None or self.primary_load_seconds <= 0:
+            return False
+        try:
+            return self.backend.get(self._invalidated_key(scope)) is not None
+        except Exception as e:
+            logger.warning(f"Cache backend error reading invalidation of {self.namespace}:{scope}: {str(e)}")
+            return False
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        scope: str = "global",
+        ttl: Optional[float] = None,
+        should_cache: Callable[[Any], bool] = lambda value: value is not None
+    ) -> Any:
+        """
+        Get a cached value, loading and caching it on a miss.
+
+        Args:
+            key: Key within the namespace and scope
+            loader: Called without arguments to produce the value on a miss
+            scope: Invalidation scope of the key (e.g. an organization ID)
+            ttl: Expiry in seconds (default: the cache's ttl)
+            should_cache: Whether a loaded value may be cached (default: not None)
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        if not self.enabled:
+            return loader()
+
+        full_key = self.make_key(key, scope)
+        value = self._get(full_key)
+        if value is not _MISSING:
+            return value
+
+        with self._inflight_lock:
+            load = self._inflight.get(full_key)
+            owner = load is None
+            if owner:
+                load = self._inflight[full_key] = _InflightLoad()
+
+        if not owner:
+            # Another thread is loading it; load it ourselves only if that failed or stalled
+            if load.done.wait(self.lock_timeout) and load.value is not _MISSING:
+                return load.value
+            return self._load(full_key, scope, loader, ttl, should_cache)
+
+        try:
+            load.value = self._load(full_key, scope, loader, ttl, should_cache)
+            return load.value
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(full_key, None)
+            load.done.set()
+
+    def _load(
+        self,
+        full_key: str,
+        scope: str,
+        loader: Callable[[], Any],
+        ttl: Optional[float],
+        should_cache: Callable[[Any], bool]
+    ) -> Any:
+        """Load and cache a key, holding the L2 load lock when it is free."""
+        lock_key = f"{full_key}:lock"
+        token = None
+        if self.backend is not None:
+            token = self._acquire_lock(lock_key)
+            if token is None:
+                # Another worker is loading it; wait for its result
+                value = self._wait_for(full_key)
+                if value is not _MISSING:
+                    return value
+
+        try:
+            with primary_reads() if self._recently_invalidated(scope) else nullcontext():
+                value = loader()
+            if should_cache(value):
+                self._set(full_key, value, ttl or self.ttl)
+            return value
+        finally:
+            if token is not None:
+                self._release_lock(lock_key, token)
+
+    def get_or_build_local(
+        self,
+        key: str,
+        build: Callable[[], Any],
+        scope: str = "global",
+        ttl: Optional[float] = None
+    ) -> Any:
+        """
+        Get a process-local value, building it on a miss.
+
+        For values derived from cached data that are not JSON serializable
+        (e.g. an index). They are kept in L1 only, under the scope's version,
+        so invalidate(scope) drops them on every worker.
+
+        Args:
+            key: Key within the namespace and scope
+            build: Called without arguments to produce the value on a miss
+            scope: Invalidation scope of the key
+            ttl: Expiry in seconds (default: the cache's ttl)
+
+        Returns:
+            The cached or freshly built value
+        """
+        if not self.enabled:
+            return build()
+
+        full_key = f"{self.make_key(key, scope)}:local"
+        value = self.l1.get(full_key)
+        if value is not _MISSING:
+            cache_requests.labels(self.namespace, "l1_hit").inc()
+            return value
+
+        with self._build_locks[hash(full_key) % len(self._build_locks)]:
+            value = self.l1.get(full_key)
+            if value is _MISSING:
+                value = build()
+                self.l1.set(full_key, value, ttl or self.ttl)
+            return value
+
+    def _acquire_lock(self, lock_key: str) -> Optional[str]:
+        """
+        Take the L2 load lock of a key.
+
+        Returns:
+            The lock's token, or None if another worker holds it or L2 is unavailable
+        """
+        token = secrets.token_hex(8)
+        try:
+            if self.backend.set(lock_key, token, ex=math.ceil(self.lock_timeout), nx=True):
+                return token
+        except Exception as e:
+            logger.warning(f"Cache backend error acquiring {lock_key}: {str(e)}")
+        return None
+
+    def _release_lock(self, lock_key: str, token: str):
+        try:
+            self.backend.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            logger.warning(f"Cache backend error releasing {lock_key}: {str(e)}")
+
+    def _wait_for(self, full_key: str) -> Any:
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.01
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            try:
+                raw = self.backend.get(full_key)
+            except Exception:
+                return _MISSING
+            if raw is not None:
+                value = json.loads(raw)
+                self.l1.set(full_key, value, self.l1_ttl)
+                return value
+            delay = min(delay * 2, 0.1)
+        return _MISSING
+
+    def clear_local(self):
+        """Drop this process's L1 entries and versions (e.g. between tests)."""
+        self.l1.clear()
+        self._local_versions.clear()
+        self._primary_load_until.clear()
+
+
+def hash_key(value: str) -> str:
+    """Hash a sensitive value (e.g. a token) for use as a cache key."""
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+_caches: Dict[str, TwoTierCache] = {}
+
+
+def get_backend():
+    """
+    Get the shared L2 backend, connecting to REDIS_URL on first use.
+
+    Returns:
+        A Redis client, or None when REDIS_URL is not set
+    """
+    global _backend
+    if _backend is None and REDIS_URL:
+        with _backend_lock:
+            if _backend is None:
+                # Imported on first use so workers without Redis never load it
+                import redis
+
+                _backend = redis.Redis.from_url(
+                    REDIS_URL,
+                    socket_timeout=0.25,
+                    socket_connect_timeout=0.25,
+                    decode_responses=True
+                )
+    return _backend
+
+
+def set_backend(backend):
+    """Replace the shared L2 backend (e.g. with an InMemoryBackend in tests)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+        for cache in _caches.values():
+            cache.backend = backend
+            cache.clear_local()
+
+
+def get_cache(namespace: str, ttl: float) -> TwoTierCache:
+    """
+    Get the cache for a namespace, creating it on first use.
+
+    The L2 backend is attached lazily, so creating caches at import time
+    does not connect to Redis.
+    """
+    cache = _caches.get(namespace)
+    if cache is None:
+        cache = _caches.setdefault(namespace, _LazyBackendCache(namespace, ttl, enabled=CACHE_ENABLED))
+    return cache
+
+
+def clear_local_caches():
+    """Drop every cache's L1 entries (e.g. between tests)."""
+    for cache in _caches.values():
+        cache.clear_local()
+
+
+class _LazyBackendCache(TwoTierCache):
+    """TwoTierCache that picks up the shared backend on first use."""
+
+    _backend_resolved = False
+
+    @property
+    def backend(self):
+        if not self._backend_resolved:
+            self._backend = get_backend()
+            self._backend_resolved = True
+        return self._backend
+
+    @backend.setter
+    def backend(self, value):
+        self._backend = value
+        self._backend_resolved = value is not None
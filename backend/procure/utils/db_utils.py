@@ -2,8 +2,7 @@
 Database utility functions for the proCure application.
 """
 
-from sqlalchemy.orm import Session
-from procure.db.engine import SessionLocal
+from procure.db.engine import get_session_factory
 
 # Database session dependency
 def get_db():
@@ -11,7 +10,21 @@ def get_db():
     FastAPI dependency that provides a database session.
     Yields a SQLAlchemy session and ensures it's closed after use.
     """
-    db = SessionLocal()
+    db = get_session_factory()()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Read-only database session dependency
+def get_read_db():
+    """
+    FastAPI dependency that provides a database session for read-only routes.
+    Its queries go to the read replica when one is configured and healthy,
+    otherwise to the primary.
+    """
+    db = get_session_factory()(info={"prefer_replica": True})
     try:
         yield db
     finally:
@@ -0,0 +1,76 @@
+"""
+Prometheus metrics for the proCure application.
+
+Counters, gauges and histograms are prometheus_client metrics registered in
+its default registry, so every module declares its metrics at import time
+and /metrics renders them all.
+
+With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory shared by the workers (emptied before the server starts, see the
+deployment README). Each worker then keeps its values in memory-mapped files
+there and /metrics aggregates the files of every worker, whichever worker
+serves the scrape: counters and histograms are summed, gauges are combined
+as declared by their ``multiprocess_mode``. prometheus_client reads the
+variable when it is first imported, so it must be set in the environment of
+the server process.
+"""
+
+from typing import Dict, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest as render_registry,
+    multiprocess
+)
+
+from procure.configs.app_configs import PROMETHEUS_MULTIPROC_DIR
+
+__all__ = [
+    "CONTENT_TYPE_LATEST",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "generate_latest",
+    "get_sample_value",
+    "mark_worker_dead"
+]
+
+
+def generate_latest() -> bytes:
+    """
+    Render the metrics in the Prometheus text exposition format.
+
+    Returns:
+        bytes: The metrics of every worker in multiprocess mode, else of this process
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=PROMETHEUS_MULTIPROC_DIR)
+        return render_registry(registry)
+    return render_registry(REGISTRY)
+
+
+def get_sample_value(name: str, labels: Optional[Dict[str, str]] = None) -> float:
+    """
+    Get the current value of a sample of this process (e.g. for health reports).
+
+    Args:
+        name: Sample name, with its suffix (``_total``, ``_count``, ``_bucket``...)
+        labels: Label values of the sample
+
+    Returns:
+        float: The value, or 0.0 if nothing was recorded yet
+    """
+    value = REGISTRY.get_sample_value(name, labels or {})
+    return value if value is not None else 0.0
+
+
+def mark_worker_dead(pid: int):
+    """Drop the live gauges of a worker that exited (multiprocess mode only)."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid, PROMETHEUS_MULTIPROC_DIR)
@@ -0,0 +1,77 @@
+"""
+Calendar month helpers.
+
+Activities are stamped as UTC instants and bucketed by month in their
+organization's time zone (Organization.timezone, UTC by default). Queries
+filter a month as a half-open ``[start, end)`` range on the timestamp rather
+than with ``extract(month ...)``, so the date indexes can be used and every
+query agrees on where a month starts.
+"""
+
+import logging
+from datetime import datetime, timezone, tzinfo
+from functools import lru_cache
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1024)
+def get_timezone(name: Optional[str]) -> tzinfo:
+    """
+    Get a time zone by IANA name (e.g. Europe/Paris).
+
+    Returns:
+        The time zone, or UTC for a missing or unknown name
+    """
+    if not name or name == "UTC":
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Unknown time zone {name!r}, using UTC")
+        return timezone.utc
+
+
+def is_valid_timezone(name: str) -> bool:
+    """Check that a name is a known IANA time zone."""
+    try:
+        ZoneInfo(name)
+        return True
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+
+
+def current_month(tz: tzinfo = timezone.utc, now: Optional[datetime] = None) -> Tuple[int, int]:
+    """Get the (year, month) it is in a time zone (now by default)."""
+    local = (now or datetime.now(timezone.utc)).astimezone(tz)
+    return local.year, local.month
+
+
+def current_period(tz: tzinfo = timezone.utc, now: Optional[datetime] = None) -> str:
+    """Get the month (YYYY-MM) it is in a time zone (now by default), as activities are bucketed."""
+    return "%04d-%02d" % current_month(tz, now)
+
+
+def add_months(year: int, month: int, months: int) -> Tuple[int, int]:
+    """Get the (year, month) a number of months after (or before, if negative) a month."""
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+def month_start(year: int, month: int, tz: tzinfo = timezone.utc) -> datetime:
+    """Get the first instant of a month in a time zone, as a UTC datetime."""
+    return datetime(year, month, 1, tzinfo=tz).astimezone(timezone.utc)
+
+
+def month_bounds(year: int, month: int, tz: tzinfo = timezone.utc) -> Tuple[datetime, datetime]:
+    """Get the start of a month and the start of the next one in a time zone, as UTC datetimes."""
+    return month_start(year, month, tz), month_start(*add_months(year, month, 1), tz)
+
+
+def period_bounds(period: str, tz: tzinfo = timezone.utc) -> Tuple[datetime, datetime]:
+    """Get the bounds of a month written as YYYY-MM."""
+    year, month = (int(part) for part in period.split("-"))
+    return month_bounds(year, month, tz)
@@ -0,0 +1,233 @@
+"""
+Low-overhead sampling profiler for individual requests.
+
+A background thread periodically snapshots the Python stacks of other
+threads with ``sys._current_frames()``. Stacks are aggregated in the
+"collapsed" format (``frame;frame;frame count``) understood by flamegraph.pl,
+speedscope and most flame graph viewers, and every sample is attributed to a
+category (auth, db, serialization, domain extraction) by its outermost
+matching frame.
+
+A profiler bound to a request (``bind_to_current_task``) only samples the
+event loop while it runs the request's task, and the threadpool threads
+while they run work the request started: such work runs in a copy of the
+request's context (``context.run`` in the worker's outermost frames), which
+carries the profiler in ``current_profiler``. Concurrent requests are left
+out of the profile.
+"""
+
+import asyncio
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Dict, List, Optional, Tuple
+
+# Categories checked from the root of the stack to the leaf: the outermost
+# matching frame decides, so e.g. the token lookup inside auth counts as auth
+CATEGORY_MARKERS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("auth", (
+        "procure/auth/",
+        "procure/db/auth.py",
+        "fastapi_users/",
+        "pwdlib/",
+        "argon2/",
+        "bcrypt/",
+        "jwt/",
+    )),
+    ("domain_extraction", (
+        "tldextract/",
+        "procure/server/utils.py",
+    )),
+    ("serialization", (
+        "pydantic/",
+        "pydantic_core/",
+        "fastapi/encoders.py",
+        "json/",
+        "orjson",
+    )),
+    ("db", (
+        "sqlalchemy/",
+        "psycopg2/",
+    )),
+]
+
+# Leaf frames of threads that are idle (event loop waiting for I/O, thread
+# pool workers waiting for work); these samples are dropped
+IDLE_LEAF_MARKERS = (
+    "selectors.py",
+    "threading.py",
+    "queue.py",
+    "concurrent/futures/thread.py",
+)
+
+
+# Profiler of the request being handled, inherited by its threadpool work
+current_profiler: contextvars.ContextVar[Optional["SamplingProfiler"]] = contextvars.ContextVar(
+    "current_profiler", default=None
+)
+
+# Outermost frames searched for the context a worker thread runs work in
+CONTEXT_FRAME_DEPTH = 8
+
+
+def _short_filename(filename: str) -> str:
+    """Trim a path to the part after site-packages or the project root."""
+    normalized = filename.replace(os.sep, "/")
+    for marker in ("site-packages/", "/procure/"):
+        index = normalized.rfind(marker)
+        if index != -1:
+            start = index + len(marker)
+            return ("procure/" if marker == "/procure/" else "") + normalized[start:]
+    return "/".join(normalized.rsplit("/", 2)[-2:])
+
+
+def categorize_stack(filenames: List[str]) -> str:
+    """
+    Get the category of a stack, given its filenames ordered root to leaf.
+
+    Returns:
+        "auth", "domain_extraction", "serialization", "db" or "other"
+    """
+    for filename in filenames:
+        for category, markers in CATEGORY_MARKERS:
+            if any(marker in filename for marker in markers):
+                return category
+    return "other"
+
+
+def _task_profiler(task: Optional[asyncio.Task]) -> Optional["SamplingProfiler"]:
+    """Get the profiler in a task's context, where tasks expose it (Python 3.12+)."""
+    get_context = getattr(task, "get_context", None)
+    return get_context().get(current_profiler) if get_context is not None else None
+
+
+def _thread_profiler(stack: List[FrameType]) -> Optional["SamplingProfiler"]:
+    """Get the profiler in the context a thread runs its current work in, given its frames root first."""
+    for frame in stack[:CONTEXT_FRAME_DEPTH]:
+        for value in frame.f_locals.values():
+            if isinstance(value, contextvars.Context):
+                return value.get(current_profiler)
+    return None
+
+
+class SamplingProfiler:
+    """
+    Samples other threads' stacks at a fixed interval while running.
+
+    Use as a context manager around the code to profile::
+
+        with SamplingProfiler(interval=0.001) as profiler:
+            ...
+        profiler.collapsed()
+
+    Every other thread is sampled unless the profiler is bound to a request
+    with ``bind_to_current_task`` first.
+    """
+
+    def __init__(self, interval: float = 0.001, max_depth: int = 128):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.categories: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop_thread_id: Optional[int] = None
+
+    def bind_to_current_task(self) -> contextvars.Token:
+        """
+        Only sample the current asyncio task and the threadpool work it starts.
+
+        Call from the request's task before starting the profiler.
+
+        Returns:
+            The token to reset current_profiler with once the request is done
+        """
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        self._loop_thread_id = threading.get_ident()
+        return current_profiler.set(self)
+
+    def _in_scope(self, thread_id: int, stack: List[FrameType]) -> bool:
+        """Check whether a thread is working for the profiled request, given its frames root first."""
+        if self._task is None:
+            return True
+        if thread_id == self._loop_thread_id:
+            task = asyncio.current_task(self._loop)
+            return task is self._task or _task_profiler(task) is self
+        return _thread_profiler(stack) is self
+
+    def _sample(self):
+        sampler_id = threading.get_ident()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == sampler_id:
+                continue
+            if any(marker in frame.f_code.co_filename.replace(os.sep, "/") for marker in IDLE_LEAF_MARKERS):
+                continue
+
+            stack = []
+            while frame is not None:
+                stack.append(frame)
+                frame = frame.f_back
+            stack.reverse()
+            if not self._in_scope(thread_id, stack):
+                continue
+
+            frames = []
+            filenames = []
+            # Keep the innermost frames of deep stacks
+            for frame in stack[-self.max_depth:]:
+                code = frame.f_code
+                filename = _short_filename(code.co_filename)
+                frames.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+                filenames.append(filename)
+
+            thread_name = thread_names.get(thread_id, str(thread_id))
+            self.stacks[";".join([thread_name] + frames)] += 1
+            self.categories[categorize_stack(filenames)] += 1
+            self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="procure-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started_at
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def collapsed(self) -> str:
+        """Get the profile in the collapsed stack format, one stack per line."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def category_summary(self) -> Dict[str, float]:
+        """Get the share of samples per category (0.0 - 1.0)."""
+        if not self.samples:
+            return {}
+        return {
+            category: round(count / self.samples, 4)
+            for category, count in self.categories.most_common()
+        }
@@ -0,0 +1,259 @@
+"""
+Token-bucket rate limiting for the proCure application.
+
+Each limited route has a bucket per device token and per organization
+(see RATE_LIMITS). A bucket holds up to ``capacity`` requests and refills
+evenly over ``period_seconds``; a request that finds it empty gets a 429
+with a ``Retry-After`` header.
+
+The check runs as a route dependency before authentication and never
+touches the database: the device is identified by a hash of its token and
+the organization is taken from the token identity cache, so a device whose
+identity is not cached yet is only limited per device until its first
+request has been authenticated.
+
+With REDIS_URL set, buckets live in Redis and are shared by every worker;
+if Redis fails, each worker falls back to its own in-memory buckets.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from procure.auth.utils import get_token_from_request
+from procure.configs.app_configs import RATE_LIMIT_ENABLED, RATE_LIMITS
+from procure.db.auth import token_identity_cache
+from procure.utils.cache import KEY_PREFIX, get_backend, hash_key
+from procure.utils.metrics import Counter
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+rate_limit_decisions = Counter(
+    "procure_rate_limit_decisions",
+    "Rate limit checks by route, bucket kind and result (allowed, limited)",
+    ["route", "kind", "result"]
+)
+
+# Refill and take one token atomically. Redis' clock is used so all workers
+# agree on elapsed time; the retry delay is returned as a string because Lua
+# numbers are truncated to integers on return.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+class RateLimit:
+    """A token bucket size: ``capacity`` requests refilled over ``period_seconds``."""
+
+    def __init__(self, capacity: int, period_seconds: float):
+        if capacity < 1 or period_seconds <= 0:
+            raise ValueError(f"Invalid rate limit: {capacity}/{period_seconds}")
+        self.capacity = capacity
+        self.period_seconds = period_seconds
+
+    @property
+    def rate(self) -> float:
+        """Tokens added per second."""
+        return self.capacity / self.period_seconds
+
+    @classmethod
+    def parse(cls, value: Optional[str]) -> Optional["RateLimit"]:
+        """
+        Parse a "<requests>/<seconds>" limit.
+
+        Returns:
+            The limit, or None if the value is empty (limit disabled)
+        """
+        if not value or not value.strip():
+            return None
+        try:
+            capacity, period = value.split("/")
+            return cls(int(capacity), float(period))
+        except ValueError:
+            raise ValueError(f"Invalid rate limit {value!r}, expected <requests>/<seconds>")
+
+    def __repr__(self):
+        return f"RateLimit({self.capacity}/{self.period_seconds:g}s)"
+
+
+class LocalTokenBuckets:
+    """
+    In-memory token buckets for one process, bounded to max_entries keys.
+
+    When full, the least recently used bucket is evicted, so a flood of new
+    keys (e.g. random tokens) only pushes out idle buckets, never the ones
+    in active use.
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        # key -> (tokens, updated_at, limit), least recently used first
+        self._buckets: "OrderedDict[str, Tuple[float, float, RateLimit]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, limit: RateLimit) -> float:
+        """
+        Take one token from a bucket.
+
+        Returns:
+            0 if the request is allowed, otherwise seconds until a token is available
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at, _ = self._buckets.get(key, (limit.capacity, now, limit))
+            tokens = min(limit.capacity, tokens + (now - updated_at) * limit.rate)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / limit.rate
+            if key in self._buckets:
+                self._buckets.move_to_end(key)
+            elif len(self._buckets) >= self.max_entries:
+                self._evict(now)
+            self._buckets[key] = (tokens, now, limit)
+            return retry_after
+
+    def _evict(self, now: float):
+        self._buckets.popitem(last=False)
+        # Buckets that have refilled completely carry no state worth keeping;
+        # each is judged by its own limit
+        while self._buckets:
+            key, (tokens, updated_at, limit) = next(iter(self._buckets.items()))
+            if tokens + (now - updated_at) * limit.rate < limit.capacity:
+                break
+            del self._buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisTokenBuckets:
+    """Token buckets stored in Redis and shared by every worker."""
+
+    def __init__(self, client):
+        self.client = client
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def acquire(self, key: str, limit: RateLimit) -> float:
+        return float(self._script(keys=[key], args=[limit.capacity, limit.rate]))
+
+
+class RateLimiter:
+    """Checks token buckets in the shared store, falling back to local buckets."""
+
+    def __init__(self, shared: Optional[RedisTokenBuckets] = None, enabled: bool = True):
+        self.shared = shared
+        self.local = LocalTokenBuckets()
+        self.enabled = enabled
+
+    def acquire(self, key: str, limit: RateLimit) -> float:
+        """
+        Take one token from the bucket for a key.
+
+        Returns:
+            0 if the request is allowed, otherwise seconds until it may be retried
+        """
+        if not self.enabled:
+            return 0.0
+        if self.shared is not None:
+            try:
+                return self.shared.acquire(key, limit)
+            except Exception as e:
+                logger.warning(f"Rate limit backend error for {key}, using local buckets: {str(e)}")
+        return self.local.acquire(key, limit)
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide rate limiter, sharing buckets through Redis when configured."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                backend = get_backend()
+                shared = None
+                if backend is not None and hasattr(backend, "register_script"):
+                    shared = RedisTokenBuckets(backend)
+                _rate_limiter = RateLimiter(shared, enabled=RATE_LIMIT_ENABLED)
+    return _rate_limiter
+
+
+def set_rate_limiter(limiter: Optional[RateLimiter]):
+    """Replace the process-wide rate limiter (None recreates it on next use)."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        _rate_limiter = limiter
+
+
+def rate_limit(route: str):
+    """
+    Create a dependency enforcing the device and organization limits of a route.
+
+    Args:
+        route: Name of the route's entry in RATE_LIMITS
+
+    Returns:
+        An async dependency raising a 429 HTTPException when a limit is exceeded
+    """
+    limits = {kind: RateLimit.parse(value) for kind, value in RATE_LIMITS.get(route, {}).items()}
+    limits = {kind: limit for kind, limit in limits.items() if limit is not None}
+
+    async def enforce_rate_limit(request: Request):
+        token = get_token_from_request(request)
+        if not token or not limits:
+            # Unauthenticated requests are rejected by authentication
+            return
+
+        token_hash = hash_key(token)
+        keys = {"device": token_hash}
+        if "organization" in limits:
+            identity = token_identity_cache.get(token_hash)
+            if identity and identity.get("organization_id"):
+                keys["organization"] = identity["organization_id"]
+
+        limiter = get_rate_limiter()
+        for kind, subject in keys.items():
+            limit = limits.get(kind)
+            if limit is None:
+                continue
+            retry_after = limiter.acquire(f"{KEY_PREFIX}:ratelimit:{route}:{kind}:{subject}", limit)
+            if retry_after > 0:
+                rate_limit_decisions.labels(route, kind, "limited").inc()
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=f"Rate limit exceeded for this {kind}, retry after {math.ceil(retry_after)} seconds",
+                    headers={"Retry-After": str(math.ceil(retry_after))}
+                )
+            rate_limit_decisions.labels(route, kind, "allowed").inc()
+
+    return enforce_rate_limit
@@ -0,0 +1,41 @@
+"""
+Request-scoped context for the proCure application.
+
+Context variables set by middleware and authentication so that code far
+from the request (e.g. SQLAlchemy event listeners) can tell which request
+and user it is serving.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# "METHOD /path" of the request being served, or None outside a request
+current_request_route: ContextVar[Optional[str]] = ContextVar("current_request_route", default=None)
+
+# Email of the authenticated user of the request, set by authentication
+current_principal: ContextVar[Optional[str]] = ContextVar("current_principal", default=None)
+
+# Whether read-only sessions must read from the primary (e.g. to refill a
+# cache entry that was just invalidated), set with primary_reads()
+primary_reads_required: ContextVar[bool] = ContextVar("primary_reads_required", default=False)
+
+
+def get_current_route() -> Optional[str]:
+    """Get the "METHOD /path" of the request being served, if any."""
+    return current_request_route.get()
+
+
+def get_current_principal() -> Optional[str]:
+    """Get the email of the authenticated user of the request being served, if any."""
+    return current_principal.get()
+
+
+@contextmanager
+def primary_reads() -> Iterator[None]:
+    """Send the reads of read-only sessions to the primary within the block."""
+    token = primary_reads_required.set(True)
+    try:
+        yield
+    finally:
+        primary_reads_required.reset(token)
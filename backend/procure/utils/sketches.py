@@ -0,0 +1,111 @@
+"""
+Bounded-memory streaming sketches.
+
+- CountMinSketch estimates the count of any key in a stream within a fixed
+  ``width * depth`` table. Estimates never undercount; they overcount by at
+  most ``e / width`` of the stream total with probability ``1 - e^-depth``.
+- HeavyHitters keeps the ``k`` keys with the highest estimated counts on
+  top of a CountMinSketch, so the heaviest keys of a stream of any number
+  of distinct keys can be read back from ``O(k + width * depth)`` memory.
+
+Keys are hashed with Python's ``hash``, which is salted per process, so
+sketches are only meaningful within the process that built them.
+"""
+
+from array import array
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class CountMinSketch:
+    """Count-min sketch over ``depth`` rows of ``width`` counters."""
+
+    __slots__ = ("width", "depth", "total", "_rows")
+
+    def __init__(self, width: int = 1024, depth: int = 4):
+        if width < 1 or depth < 1:
+            raise ValueError("CountMinSketch width and depth must be positive")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self._rows = [array("Q", bytes(8 * width)) for _ in range(depth)]
+
+    def _indexes(self, key: Hashable):
+        # Double hashing: row i uses h1 + i * h2
+        h1 = hash(key)
+        h2 = (h1 >> 17) | 1
+        width = self.width
+        return [(h1 + row * h2) % width for row in range(self.depth)]
+
+    def add(self, key: Hashable, count: int = 1) -> int:
+        """
+        Add count occurrences of key.
+
+        Returns:
+            The new estimated count of key
+        """
+        self.total += count
+        # Same indexes as _indexes, inlined: this is the hot path
+        position = hash(key)
+        step = (position >> 17) | 1
+        width = self.width
+        estimate = None
+        for row in self._rows:
+            index = position % width
+            value = row[index] + count
+            row[index] = value
+            if estimate is None or value < estimate:
+                estimate = value
+            position += step
+        return estimate
+
+    def estimate(self, key: Hashable) -> int:
+        """Get the estimated count of key (never lower than the true count)."""
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+
+class HeavyHitters:
+    """Top-k keys of a stream by count-min estimate."""
+
+    __slots__ = ("k", "sketch", "_top", "_threshold")
+
+    def __init__(self, k: int = 100, width: int = 1024, depth: int = 4):
+        if k < 1:
+            raise ValueError("HeavyHitters k must be positive")
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self._top: Dict[Hashable, int] = {}
+        # Lower bound of the smallest tracked count; recomputed lazily
+        self._threshold = 0
+
+    def add(self, key: Hashable, count: int = 1):
+        """Add count occurrences of key."""
+        estimate = self.sketch.add(key, count)
+        top = self._top
+        if key in top or len(top) < self.k:
+            top[key] = estimate
+            return
+        if estimate <= self._threshold:
+            return
+        smallest = min(top, key=top.__getitem__)
+        self._threshold = top[smallest]
+        if estimate > self._threshold:
+            del top[smallest]
+            top[key] = estimate
+            self._threshold = min(top.values())
+
+    def __len__(self) -> int:
+        return len(self._top)
+
+    @property
+    def total(self) -> int:
+        return self.sketch.total
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        """
+        Get the heaviest keys with their estimated counts, heaviest first.
+
+        Args:
+            n: Number of keys to return (default: all tracked keys)
+        """
+        ranked = sorted(self._top.items(), key=lambda item: (-item[1], str(item[0])))
+        return ranked if n is None else ranked[:n]
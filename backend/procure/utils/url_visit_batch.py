@@ -0,0 +1,72 @@
+"""
+Columnar url-visit batches for the proCure ingest path.
+
+A UrlVisitBatch stores a batch of url visits as three parallel columns,
+without a model or a dict per entry:
+
+- ``hostnames``: lowercased hostname of each entry's URL ("" if it has none)
+- ``timestamps``: visit time in epoch milliseconds, as an ``array("q")``
+- ``browser_ids``: index into ``browsers`` (distinct browser names), as an
+  ``array("H")``
+
+The ingest route decodes request bodies straight into a batch (see
+procure.server.url_visits.batch), and process_url_visits matches and
+inserts from these columns directly.
+"""
+
+import re
+from array import array
+from typing import Any, Dict, Iterable, List
+
+DEFAULT_BROWSER = "Chrome"
+
+# Optional scheme and credentials, then the host up to a port, path, query or fragment
+# (IPv6 literals keep their brackets)
+_HOSTNAME = re.compile(r"(?:[^:/?#]*://)?(?:[^@/?#]*@)?(\[[^\]/?#]*\]|[^:/?#]*)")
+
+
+class UrlVisitBatch:
+    """A batch of url visits stored as parallel columns."""
+
+    __slots__ = ("hostnames", "timestamps", "browser_ids", "browsers", "_browser_index")
+
+    def __init__(self):
+        self.hostnames: List[str] = []
+        self.timestamps = array("q")
+        self.browser_ids = array("H")
+        self.browsers: List[str] = []
+        self._browser_index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.hostnames)
+
+    def append(self, url: str, timestamp: int, browser: str = DEFAULT_BROWSER):
+        browser_id = self._browser_index.get(browser)
+        if browser_id is None:
+            browser_id = self._browser_index[browser] = len(self.browsers)
+            self.browsers.append(browser)
+        self.hostnames.append(extract_hostname(url))
+        self.timestamps.append(timestamp)
+        self.browser_ids.append(browser_id)
+
+    def browser(self, index: int) -> str:
+        """Get the browser name of the entry at index."""
+        return self.browsers[self.browser_ids[index]]
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Dict[str, Any]]) -> "UrlVisitBatch":
+        """Build a batch from already validated entry dicts (url, timestamp, browser)."""
+        batch = cls()
+        for entry in entries:
+            batch.append(entry["url"], entry["timestamp"], entry.get("browser") or DEFAULT_BROWSER)
+        return batch
+
+
+def extract_hostname(url: str) -> str:
+    """
+    Get the lowercased hostname of a URL, with or without a scheme.
+
+    Returns:
+        The hostname, or "" if the URL has none
+    """
+    return _HOSTNAME.match(url).group(1).strip().lower()
@@ -0,0 +1,65 @@
+"""
+Shared fixtures for the unit tests.
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from procure.server.analytics.shadow_it import shadow_it_tracker
+from procure.utils.cache import clear_local_caches
+
+
+# Caches and sketches are process-wide, so results must not leak between tests
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Clear every in-process cache and pending sketch around each test."""
+    clear_local_caches()
+    shadow_it_tracker.clear()
+    yield
+    clear_local_caches()
+    shadow_it_tracker.clear()
+
+
+class QueryCounter:
+    """SQL statements sent to the database through an engine, as (statement, parameters)."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def assert_at_most(self, budget: int, label: str = "request"):
+        """Fail with the statements issued if there are more than budget."""
+        assert self.count <= budget, (
+            f"{label} issued {self.count} SQL statements, budget is {budget}:\n"
+            + "\n".join(f"  {statement}" for statement, _ in self.statements)
+        )
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Count the statements executed on an engine inside a with block.
+
+    Usage:
+        with count_queries(engine) as queries:
+            client.get(...)
+        queries.assert_at_most(3)
+    """
+    @contextmanager
+    def counting(engine):
+        counter = QueryCounter()
+        event.listen(engine, "before_cursor_execute", counter.before_cursor_execute)
+        try:
+            yield counter
+        finally:
+            event.remove(engine, "before_cursor_execute", counter.before_cursor_execute)
+
+    return counting
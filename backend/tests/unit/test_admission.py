@@ -0,0 +1,197 @@
+"""
+Unit tests for admission control.
+
+These tests verify that:
+1. Requests are classified as critical, normal or low priority by path
+2. Low priority requests are shed first when the pool is saturated
+3. Critical requests (health, auth) are never shed
+4. Shed requests get a 503 with Retry-After and are counted in metrics
+5. The recent pool wait decays back to zero so shedding stops
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from procure.db.pool import DecayingAverage
+from procure.server.admission.middleware import (
+    CRITICAL,
+    LOW,
+    NORMAL,
+    AdmissionControlMiddleware,
+    AdmissionController
+)
+from procure.utils.metrics import get_sample_value
+
+
+def shed_decisions():
+    return get_sample_value(
+        "procure_admission_decisions_total", {"priority": LOW, "decision": "shed", "reason": "pool_wait"}
+    )
+
+
+class FixedWait:
+    """Stand-in for the recent pool wait average."""
+
+    def __init__(self, seconds=0.0):
+        self.seconds = seconds
+
+    def value(self):
+        return self.seconds
+
+
+@pytest.fixture
+def pool_wait():
+    return FixedWait()
+
+
+@pytest.fixture
+def controller(pool_wait):
+    return AdmissionController(
+        critical_paths="/livez,/readyz,/api/v1/auth/*",
+        low_priority_paths="/api/v1/url-visits,/api/v1/organizations/*/contract-usage,/api/v1/organizations/*/contract-usage/stream",
+        streaming_paths="/api/v1/organizations/*/contract-usage/stream",
+        shed_low_wait_seconds=0.25,
+        shed_normal_wait_seconds=2.0,
+        low_priority_max_in_flight=2,
+        max_in_flight=4,
+        pool_wait=pool_wait
+    )
+
+
+@pytest.fixture
+def client(controller):
+    app = FastAPI()
+    app.add_middleware(AdmissionControlMiddleware, controller=controller, retry_after_seconds=30, enabled=True)
+
+    @app.get("/livez")
+    async def livez():
+        return {"status": "alive"}
+
+    @app.get("/api/v1/auth/me")
+    async def me():
+        return {"email": "user@example.com"}
+
+    @app.post("/api/v1/url-visits")
+    async def url_visits():
+        return {"processed": 0}
+
+    @app.get("/api/v1/contract")
+    async def contracts():
+        return []
+
+    return TestClient(app)
+
+
+def test_classify_paths(controller):
+    """Test path globs map requests to priorities."""
+    assert controller.classify("/livez") == CRITICAL
+    assert controller.classify("/api/v1/auth/sign-in") == CRITICAL
+    assert controller.classify("/api/v1/url-visits") == LOW
+    assert controller.classify("/api/v1/organizations/org_1/contract-usage") == LOW
+    assert controller.classify("/api/v1/organizations/org_1/name") == NORMAL
+    assert controller.classify("/api/v1/contract") == NORMAL
+
+
+def test_admits_everything_when_healthy(client):
+    """Test nothing is shed while the pool is not waiting."""
+    assert client.post("/api/v1/url-visits").status_code == 200
+    assert client.get("/api/v1/contract").status_code == 200
+
+
+def test_sheds_low_priority_first(client, pool_wait):
+    """Test moderate pool wait sheds ingest but keeps normal routes."""
+    pool_wait.seconds = 0.5
+    before = shed_decisions()
+
+    response = client.post("/api/v1/url-visits")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+    assert "overloaded" in response.json()["detail"]
+    assert shed_decisions() == before + 1
+    assert client.get("/api/v1/contract").status_code == 200
+
+
+def test_sheds_normal_priority_under_heavy_saturation(client, pool_wait):
+    """Test heavy pool wait sheds normal routes but keeps health and auth."""
+    pool_wait.seconds = 5.0
+
+    assert client.get("/api/v1/contract").status_code == 503
+    assert client.get("/livez").status_code == 200
+    assert client.get("/api/v1/auth/me").status_code == 200
+
+
+def test_sheds_on_in_flight_limit(controller):
+    """Test requests beyond the in-flight limit of their priority are shed."""
+    controller.in_flight = 2
+
+    assert controller.shed_reason(LOW) == "in_flight"
+    assert controller.shed_reason(NORMAL) is None
+    assert controller.shed_reason(CRITICAL) is None
+
+
+def test_in_flight_is_released(controller):
+    """Test admitted requests are counted while running and released after, even on errors."""
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(controller.in_flight)
+        raise RuntimeError("boom")
+
+    middleware = AdmissionControlMiddleware(app, controller=controller, enabled=True)
+    scope = {"type": "http", "method": "POST", "path": "/api/v1/url-visits"}
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(middleware(scope, None, None))
+
+    assert seen == [1]
+    assert controller.in_flight == 0
+
+
+def test_streams_are_not_counted_in_flight(controller, pool_wait):
+    """Test open streams leave in-flight slots free but are still shed on connect."""
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(controller.in_flight)
+
+    middleware = AdmissionControlMiddleware(app, controller=controller, enabled=True)
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/organizations/org_1/contract-usage/stream"}
+
+    asyncio.run(middleware(scope, None, None))
+    assert seen == [0]
+
+    pool_wait.seconds = 0.5
+    assert controller.classify(scope["path"]) == LOW
+    assert controller.shed_reason(LOW) == "pool_wait"
+
+
+def test_disabled_admits_everything(pool_wait, controller):
+    """Test ADMISSION_CONTROL_ENABLED=false turns shedding off."""
+    pool_wait.seconds = 60.0
+    app = FastAPI()
+    app.add_middleware(AdmissionControlMiddleware, controller=controller, enabled=False)
+
+    @app.post("/api/v1/url-visits")
+    async def url_visits():
+        return {"processed": 0}
+
+    assert TestClient(app).post("/api/v1/url-visits").status_code == 200
+
+
+def test_recent_wait_decays_while_idle():
+    """Test the pool wait average halves every half-life without checkouts."""
+    with patch("procure.db.pool.time.monotonic", return_value=100.0):
+        average = DecayingAverage(half_life_seconds=5, weight=1.0)
+        average.observe(2.0)
+        assert average.value() == pytest.approx(2.0)
+
+    with patch("procure.db.pool.time.monotonic", return_value=105.0):
+        assert average.value() == pytest.approx(1.0)
+
+    with patch("procure.db.pool.time.monotonic", return_value=150.0):
+        assert average.value() < 0.01
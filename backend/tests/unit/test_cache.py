@@ -0,0 +1,289 @@
+"""
+Unit tests for the two-tier cache.
+
+These tests verify that:
+1. The local L1 tier is bounded and expires entries
+2. Workers sharing an L2 backend reuse each other's values
+3. Versioned invalidation orphans every key of a scope
+4. Loads are protected against stampedes, locally and across workers
+5. Backend errors degrade to local caching instead of failing
+6. Auth tokens, organizations and contract usage use the cache
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.orm import Session
+
+from procure.db import auth as db_auth
+from procure.server.analytics import analytics
+from procure.server.manage import orgs
+from procure.utils.cache import InMemoryBackend, LocalLRUCache, TwoTierCache, hash_key
+from procure.utils.request_context import primary_reads_required
+
+
+def make_cache(backend=None, **kwargs):
+    kwargs.setdefault("l1_ttl", 60)
+    return TwoTierCache("test", ttl=60, backend=backend, l1=LocalLRUCache(100), **kwargs)
+
+
+class TestLocalLRUCache:
+    """Tests for the L1 tier."""
+
+    def test_evicts_least_recently_used(self):
+        cache = LocalLRUCache(maxsize=2)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.get("a")
+        cache.set("c", 3, ttl=60)
+
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    def test_expires_entries(self):
+        cache = LocalLRUCache(maxsize=2)
+        cache.set("a", 1, ttl=0)
+        cache.set("b", 2, ttl=60)
+
+        cache.get("a")
+
+        # The expired entry was dropped on read
+        assert len(cache) == 1
+        assert cache.get("b") == 2
+
+
+class TestTwoTierCache:
+    """Tests for namespacing, sharing and invalidation."""
+
+    def test_values_are_shared_through_backend(self):
+        """Test a value cached by one worker is read by another from L2."""
+        backend = InMemoryBackend()
+        worker_a, worker_b = make_cache(backend), make_cache(backend)
+
+        worker_a.set("key", {"value": 1}, scope="org-1")
+
+        assert worker_b.get("key", scope="org-1") == {"value": 1}
+        assert worker_b.get("key", scope="org-2") is None
+
+    def test_keys_are_namespaced_and_versioned(self):
+        cache = make_cache()
+
+        assert cache.make_key("key", scope="org-1") == "procure:test:org-1:v0:key"
+
+    def test_invalidate_scope(self):
+        """Test invalidating a scope orphans its keys and leaves other scopes alone."""
+        cache = make_cache(InMemoryBackend())
+        cache.set("a", 1, scope="org-1")
+        cache.set("a", 2, scope="org-2")
+
+        cache.invalidate("org-1")
+
+        assert cache.get("a", scope="org-1") is None
+        assert cache.get("a", scope="org-2") == 2
+
+    def test_invalidation_reaches_other_workers(self):
+        """Test another worker sees the new version once its L1 version expires."""
+        backend = InMemoryBackend()
+        worker_a, worker_b = make_cache(backend, l1_ttl=0), make_cache(backend, l1_ttl=0)
+        worker_a.set("a", 1, scope="org-1")
+        assert worker_b.get("a", scope="org-1") == 1
+
+        worker_a.invalidate("org-1")
+
+        assert worker_b.get("a", scope="org-1") is None
+
+    def test_disabled_cache_always_loads(self):
+        cache = make_cache(enabled=False)
+        loader = MagicMock(return_value=1)
+
+        cache.get_or_load("a", loader)
+        cache.get_or_load("a", loader)
+
+        assert loader.call_count == 2
+
+
+class TestGetOrLoad:
+    """Tests for loading and stampede protection."""
+
+    def test_loads_once_then_hits(self):
+        cache = make_cache()
+        loader = MagicMock(return_value={"value": 1})
+
+        assert cache.get_or_load("a", loader) == {"value": 1}
+        assert cache.get_or_load("a", loader) == {"value": 1}
+        loader.assert_called_once()
+
+    def test_none_is_not_cached(self):
+        cache = make_cache()
+        loader = MagicMock(return_value=None)
+
+        cache.get_or_load("a", loader)
+        cache.get_or_load("a", loader)
+
+        assert loader.call_count == 2
+
+    def test_concurrent_loads_in_one_process(self):
+        """Test concurrent misses for one key run the loader once."""
+        cache = make_cache()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.05)
+            return "value"
+
+        threads = [threading.Thread(target=cache.get_or_load, args=("a", loader)) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+
+    def test_waits_for_other_worker_holding_the_lock(self):
+        """Test a worker waits for the result of another worker's load instead of loading."""
+        backend = InMemoryBackend()
+        worker_a, worker_b = make_cache(backend), make_cache(backend)
+        full_key = worker_a.make_key("a")
+        backend.set(f"{full_key}:lock", "1", ex=5, nx=True)
+        threading.Timer(0.05, lambda: worker_a.set("a", "from worker a")).start()
+        loader = MagicMock(return_value="from worker b")
+
+        assert worker_b.get_or_load("a", loader) == "from worker a"
+        loader.assert_not_called()
+
+    def test_backend_errors_fall_back_to_loader(self):
+        """Test an unavailable backend does not fail the request."""
+        backend = MagicMock()
+        backend.get.side_effect = ConnectionError("redis down")
+        backend.set.side_effect = ConnectionError("redis down")
+        backend.delete.side_effect = ConnectionError("redis down")
+        cache = make_cache(backend)
+
+        assert cache.get_or_load("a", lambda: "value") == "value"
+        # Still cached locally
+        assert cache.get("a") == "value"
+
+    def test_local_build_can_load_from_same_stripe(self):
+        """Test a local build loading another key does not deadlock on a shared lock stripe."""
+        cache = make_cache()
+        # One stripe, so the built key and any other build always collide
+        cache._build_locks = [threading.Lock()]
+
+        value = cache.get_or_build_local("matcher", lambda: cache.get_or_load("hosts", lambda: ["a"]) + ["b"])
+
+        assert value == ["a", "b"]
+
+    def test_slow_load_does_not_block_other_keys(self):
+        """Test a load in progress only holds up loads of the same key."""
+        cache = make_cache()
+        started, release = threading.Event(), threading.Event()
+
+        def slow_loader():
+            started.set()
+            release.wait(5)
+            return "slow"
+
+        thread = threading.Thread(target=cache.get_or_load, args=("slow", slow_loader))
+        thread.start()
+        started.wait(5)
+        try:
+            assert cache.get_or_load("other", lambda: "fast") == "fast"
+        finally:
+            release.set()
+            thread.join()
+
+    def test_wait_timeout_keeps_other_workers_lock(self):
+        """Test a worker that gave up waiting loads without deleting the lock it does not own."""
+        backend = InMemoryBackend()
+        cache = make_cache(backend, lock_timeout=0.05)
+        lock_key = f"{cache.make_key('a')}:lock"
+        backend.set(lock_key, "other-worker", ex=5, nx=True)
+
+        assert cache.get_or_load("a", lambda: "value") == "value"
+        assert backend.get(lock_key) == "other-worker"
+
+    def test_lock_is_released_after_load(self):
+        """Test the worker holding the lock releases it once loaded."""
+        backend = InMemoryBackend()
+        cache = make_cache(backend)
+
+        cache.get_or_load("a", lambda: "value")
+
+        assert backend.get(f"{cache.make_key('a')}:lock") is None
+
+    def test_load_after_invalidation_reads_primary(self):
+        """Test the first loads after an invalidation, by any worker, read from the primary."""
+        backend = InMemoryBackend()
+        worker_a, worker_b = make_cache(backend), make_cache(backend)
+        seen = []
+
+        def loader():
+            seen.append(primary_reads_required.get())
+            return "value"
+
+        worker_a.get_or_load("a", loader, scope="org-1")
+        worker_a.invalidate("org-1")
+        worker_b.get_or_load("a", loader, scope="org-1")
+        worker_b.get_or_load("b", loader, scope="org-2")
+
+        assert seen == [False, True, False]
+        assert primary_reads_required.get() is False
+
+
+class TestCachedLookups:
+    """Tests for the cached auth, organization and analytics lookups."""
+
+    def test_token_identity_is_cached(self):
+        user = MagicMock(id="user-1", email="user@example.com", role="member", organization_id="org-1")
+        with patch.object(db_auth, "authenticate_with_token", return_value=(True, user)) as authenticate:
+            first = db_auth.get_identity_by_token(MagicMock(), "token-1")
+            second = db_auth.get_identity_by_token(MagicMock(), "token-1")
+
+        assert first == second == {
+            "user_id": "user-1",
+            "email": "user@example.com",
+            "role": "member",
+            "organization_id": "org-1"
+        }
+        authenticate.assert_called_once()
+
+    def test_invalid_token_is_not_cached(self):
+        with patch.object(db_auth, "authenticate_with_token", return_value=(False, None)) as authenticate:
+            assert db_auth.get_identity_by_token(MagicMock(), "bad") is None
+            assert db_auth.get_identity_by_token(MagicMock(), "bad") is None
+
+        assert authenticate.call_count == 2
+
+    def test_rotated_token_is_evicted(self):
+        db_auth.token_identity_cache.set(hash_key("old-token"), {"email": "user@example.com"})
+        token_record = MagicMock(token="old-token")
+        db = Session()
+
+        db_auth.update_device_token(db, token_record, "new-token")
+        # A request before the commit still sees the old token
+        assert db_auth.token_identity_cache.get(hash_key("old-token")) is not None
+        db.commit()
+
+        assert db_auth.token_identity_cache.get(hash_key("old-token")) is None
+
+    def test_organization_name_is_cached(self):
+        organization = MagicMock(organization_id="org-1", domain_name="example.com", company_name="Example")
+        with patch.object(orgs.db_core, "get_organization_by_id", return_value=organization) as lookup:
+            orgs.get_organization_name_by_id(MagicMock(), "org-1")
+            result = orgs.get_organization_name_by_id(MagicMock(), "org-1")
+
+        assert result["organization"]["company_name"] == "Example"
+        lookup.assert_called_once()
+
+    def test_contract_usage_invalidation(self):
+        result = {"success": True, "organization": {}, "contracts": []}
+        with patch.object(analytics, "get_contract_usage_by_org_id", return_value=result) as load:
+            analytics.get_cached_contract_usage_by_org_id(MagicMock(), "org-1")
+            analytics.get_cached_contract_usage_by_org_id(MagicMock(), "org-1")
+            analytics.invalidate_contract_usage("org-1")
+            analytics.get_cached_contract_usage_by_org_id(MagicMock(), "org-1")
+
+        assert load.call_count == 2
@@ -0,0 +1,180 @@
+"""
+Unit tests for the user_activities compaction job.
+
+These tests verify that:
+1. Only months before the retention horizon are compacted
+2. Raw rows are rolled up per contract and month, then deleted in batches
+3. An interrupted run resumes without counting rows twice
+4. Late rows for a compacted month are picked up by a new pass
+5. Months are taken in each organization's time zone
+6. The rollup is checked against a count taken before it
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, delete, event, select, func
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from procure.db.engine import Base
+from procure.db.models import (
+    ActivityCompactionCheckpoint,
+    ActivityMonthlyAggregate,
+    Contract,
+    Organization,
+    User,
+    UserActivity
+)
+from procure.jobs.compaction import (
+    CompactionError,
+    aggregate_period,
+    delete_batch,
+    horizon_period,
+    main,
+    retention_horizon,
+    run_compaction
+)
+from procure.utils.periods import get_timezone
+
+NOW = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db():
+    """An in-memory SQLite session with activities from August to October 2026."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Organization(organization_id="org_1", domain_name="firebaystudios.com", company_name="FireBay Studios"))
+    session.add_all([
+        User(id="user1", email="user1@firebaystudios.com", organization_id="org_1"),
+        User(id="user2", email="user2@firebaystudios.com", organization_id="org_1"),
+        Contract(contract_id=1, vendor_name="Slack", product_url="https://slack.com", vendor_domain="slack.com", organization_id="org_1"),
+        Contract(contract_id=2, vendor_name="Notion", product_url="https://notion.so", vendor_domain="notion.so", organization_id="org_1")
+    ])
+    session.add_all([
+        activity("user1", 1, 8, 3), activity("user2", 1, 8, 4), activity("user1", 2, 8, 31),
+        activity("user1", 1, 9, 1), activity("user1", 1, 9, 30),
+        activity("user1", 1, 10, 2)
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def activity(user_id, contract_id, month, day, hour=12):
+    return UserActivity(user_id=user_id, contract_id=contract_id, browser="Chrome",
+                        date=datetime(2026, month, day, hour, tzinfo=timezone.utc))
+
+
+def add_new_york_organization(db):
+    """Add an organization in New York, whose months start 4 hours after UTC ones in summer."""
+    db.add(Organization(organization_id="org_2", domain_name="nyc.example.com", timezone="America/New_York"))
+    db.add_all([
+        User(id="user3", email="user3@nyc.example.com", organization_id="org_2"),
+        Contract(contract_id=3, vendor_name="Zoom", product_url="https://zoom.us", vendor_domain="zoom.us", organization_id="org_2")
+    ])
+
+
+def aggregates(db):
+    return {
+        (row.period, row.contract_id): (row.active_users, row.activities)
+        for row in db.scalars(select(ActivityMonthlyAggregate))
+    }
+
+
+def raw_count(db):
+    return db.scalar(select(func.count()).select_from(UserActivity))
+
+
+def test_retention_horizon():
+    """Test the horizon keeps whole months, the current month included."""
+    assert retention_horizon(1, NOW) == datetime(2026, 10, 1, tzinfo=timezone.utc)
+    assert retention_horizon(13, NOW) == datetime(2025, 10, 1, tzinfo=timezone.utc)
+    with pytest.raises(ValueError):
+        retention_horizon(0, NOW)
+
+
+def test_retention_horizon_in_time_zone():
+    """Test the horizon and the horizon month follow the organizations' time zones."""
+    paris = get_timezone("Europe/Paris")
+    now = datetime(2026, 9, 30, 23, tzinfo=timezone.utc)
+
+    assert retention_horizon(1, now, paris) == datetime(2026, 9, 30, 22, tzinfo=timezone.utc)
+    # Already October in Paris, still September in UTC: September is kept everywhere
+    assert horizon_period(["Europe/Paris", None], 1, now) == "2026-09"
+
+
+def test_run_compaction(db):
+    """Test old months are rolled up per contract and their raw rows deleted."""
+    summaries = run_compaction(db, retention_months=2, batch_size=2, pause_seconds=0, now=NOW)
+
+    assert [(s["period"], s["aggregated"], s["deleted"]) for s in summaries] == [("2026-08", 3, 3)]
+    assert aggregates(db) == {("2026-08", 1): (2, 2), ("2026-08", 2): (1, 1)}
+    assert raw_count(db) == 3
+    assert db.get(ActivityCompactionCheckpoint, "2026-08").status == "done"
+
+
+def test_resume_interrupted_pass(db):
+    """Test a pass interrupted after one batch finishes deleting without aggregating again."""
+    checkpoint = aggregate_period(db, "2026-08")
+    assert delete_batch(db, checkpoint, batch_size=1) == 1
+
+    progress = []
+    summaries = run_compaction(db, retention_months=2, batch_size=1, pause_seconds=0, now=NOW, progress=progress.append)
+
+    assert summaries == [{"period": "2026-08", "aggregated": 3, "deleted": 3, "resumed": True}]
+    assert [s["deleted"] for s in progress] == [2, 3, 3]
+    assert aggregates(db) == {("2026-08", 1): (2, 2), ("2026-08", 2): (1, 1)}
+
+
+def test_late_rows_start_new_pass(db):
+    """Test rows arriving for a compacted month are added by a new pass."""
+    run_compaction(db, retention_months=2, batch_size=10, pause_seconds=0, now=NOW)
+    db.add(activity("user2", 2, 8, 15))
+    db.commit()
+
+    run_compaction(db, retention_months=2, batch_size=10, pause_seconds=0, now=NOW)
+
+    assert aggregates(db)[("2026-08", 2)] == (2, 2)
+    assert raw_count(db) == 3
+
+
+def test_main_dry_run(db, monkeypatch):
+    """Test a dry run lists months without compacting them."""
+    monkeypatch.setattr("procure.jobs.compaction.get_session_factory", lambda: lambda: db)
+
+    assert main(["--retention-months", "1", "--dry-run"]) == 0
+    assert raw_count(db) == 6
+
+
+def test_months_follow_organization_time_zone(db):
+    """Test an organization's rows are compacted by its local month."""
+    add_new_york_organization(db)
+    db.add_all([
+        # August 31st, 22:00 in New York
+        activity("user3", 3, 9, 1, hour=2),
+        # September 1st, 02:00 in New York
+        activity("user3", 3, 9, 1, hour=6)
+    ])
+    db.commit()
+
+    run_compaction(db, retention_months=2, batch_size=10, pause_seconds=0, now=NOW)
+
+    assert aggregates(db) == {("2026-08", 1): (2, 2), ("2026-08", 2): (1, 1), ("2026-08", 3): (1, 1)}
+    assert raw_count(db) == 4
+
+
+def test_rollup_checked_against_earlier_count(db):
+    """Test rows deleted between the count and the rollup stop the pass before anything is written."""
+    @event.listens_for(db, "after_commit", once=True)
+    def delete_row(session):
+        with session.get_bind().begin() as connection:
+            connection.execute(delete(UserActivity).where(UserActivity.contract_id == 2))
+
+    with pytest.raises(CompactionError):
+        aggregate_period(db, "2026-08")
+
+    assert aggregates(db) == {}
+    assert db.get(ActivityCompactionCheckpoint, "2026-08") is None
@@ -0,0 +1,112 @@
+"""
+Unit tests for the configurable, instrumented connection pool.
+
+These tests verify that:
+1. Pool options are built from configuration for each pool mode
+2. Checkout wait time is recorded for every checkout
+3. Checkout timeouts are counted
+4. The engine is created on first use, not at import
+"""
+
+import sqlite3
+import pytest
+from unittest.mock import MagicMock, patch
+from sqlalchemy import exc
+
+from procure.db import engine as db_engine
+from procure.db.pool import InstrumentedQueuePool, InstrumentedNullPool
+from procure.utils.metrics import get_sample_value
+
+
+def make_queue_pool(**kwargs):
+    """Create an instrumented QueuePool backed by in-memory SQLite connections."""
+    return InstrumentedQueuePool(lambda: sqlite3.connect(":memory:"), **kwargs)
+
+
+class TestPoolOptions:
+    """Tests for get_pool_options."""
+
+    def test_queue_mode_uses_configured_sizes(self):
+        """Test queue mode sizes the pool from the DB_POOL_* settings."""
+        with patch.object(db_engine, "DB_POOL_SIZE", 3), patch.object(db_engine, "DB_MAX_OVERFLOW", 2):
+            options = db_engine.get_pool_options("queue")
+
+        assert options["poolclass"] is InstrumentedQueuePool
+        assert options["pool_size"] == 3
+        assert options["max_overflow"] == 2
+
+    def test_pgbouncer_mode_disables_pooling(self):
+        """Test pgbouncer mode uses a NullPool without sizing options."""
+        options = db_engine.get_pool_options("pgbouncer")
+
+        assert options["poolclass"] is InstrumentedNullPool
+        assert "pool_size" not in options
+        assert "max_overflow" not in options
+
+    def test_invalid_mode(self):
+        """Test an unknown pool mode is rejected."""
+        with pytest.raises(ValueError):
+            db_engine.get_pool_options("unknown")
+
+
+class TestInstrumentedPool:
+    """Tests for checkout instrumentation."""
+
+    def test_checkout_wait_is_recorded(self):
+        """Test every checkout is observed in the wait histogram."""
+        pool = make_queue_pool(pool_size=1, max_overflow=0)
+        before = get_sample_value("procure_db_pool_checkout_wait_seconds_count")
+
+        connection = pool.connect()
+        connection.close()
+
+        assert get_sample_value("procure_db_pool_checkout_wait_seconds_count") == before + 1
+
+    def test_checkout_timeout_is_counted(self):
+        """Test a checkout that times out increments the timeout counter."""
+        pool = make_queue_pool(pool_size=1, max_overflow=0, timeout=0.01)
+        before = get_sample_value("procure_db_pool_checkout_timeouts_total")
+
+        held = pool.connect()
+        with pytest.raises(exc.TimeoutError):
+            pool.connect()
+        held.close()
+
+        assert get_sample_value("procure_db_pool_checkout_timeouts_total") == before + 1
+
+    def test_recreate_keeps_instrumentation(self):
+        """Test a recreated pool (e.g. after dispose) is still instrumented."""
+        pool = make_queue_pool(pool_size=1, max_overflow=0)
+
+        assert isinstance(pool.recreate(), InstrumentedQueuePool)
+
+
+class TestLazyEngine:
+    """Tests for lazy engine creation."""
+
+    @pytest.fixture(autouse=True)
+    def reset_engine(self):
+        with patch.object(db_engine, "_engine", None):
+            yield
+        db_engine.SessionLocal.configure(bind=None)
+
+    def test_engine_created_once_on_first_use(self):
+        """Test get_engine creates the engine once and binds SessionLocal to it."""
+        mock_engine = MagicMock()
+        with patch.object(db_engine, "create_db_engine", return_value=mock_engine) as create:
+            assert db_engine.get_engine() is mock_engine
+            assert db_engine.get_engine() is mock_engine
+            assert db_engine.engine is mock_engine
+
+        create.assert_called_once()
+        assert db_engine.SessionLocal.kw["bind"] is mock_engine
+
+    def test_dispose_engine(self):
+        """Test dispose_engine closes the pool and the next use creates a new engine."""
+        first, second = MagicMock(), MagicMock()
+        with patch.object(db_engine, "create_db_engine", side_effect=[first, second]):
+            db_engine.get_engine()
+            db_engine.dispose_engine()
+            assert db_engine.get_engine() is second
+
+        first.dispose.assert_called_once()
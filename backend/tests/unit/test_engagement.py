@@ -0,0 +1,174 @@
+"""
+Unit tests for engagement aggregates.
+
+These tests verify that:
+1. Matched visits are counted per user, contract and day in the organization's time zone
+2. Active days are OR-ed into a per-month bitmask
+3. Ingest maintains the aggregates with upserts only when enabled
+4. DAU/MAU and active-days distributions are read back per contract
+"""
+
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from procure.db import core as db_core
+from procure.db.engine import Base
+from procure.db.models import Contract, Organization, User, UserActivityDay, UserActivityMonth
+from procure.server.analytics.engagement import (
+    active_days_distribution,
+    elapsed_days,
+    get_engagement_by_org_id
+)
+from procure.utils.url_visit_batch import UrlVisitBatch
+
+
+@pytest.fixture
+def db():
+    """An in-memory SQLite session with one organization, two users and two contracts."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Organization(organization_id="org_1", domain_name="firebaystudios.com", company_name="FireBay Studios"))
+    session.add_all([
+        User(id="user1", email="user1@firebaystudios.com", organization_id="org_1"),
+        User(id="user2", email="user2@firebaystudios.com", organization_id="org_1"),
+        Contract(contract_id=1, vendor_name="Slack", product_url="https://slack.com", vendor_domain="slack.com", organization_id="org_1"),
+        Contract(contract_id=2, vendor_name="Notion", product_url="https://notion.so", vendor_domain="notion.so", organization_id="org_1")
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+class MonthEndDatetime(datetime):
+    """A datetime whose now() is 2026-10-31 20:00 UTC, already November 1st in Tokyo."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2026, 10, 31, 20, tzinfo=timezone.utc).astimezone(tz)
+
+
+def ms(year, month, day, hour=12):
+    return int(datetime(year, month, day, hour, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def visits(*timestamps, url="https://app.slack.com"):
+    return [{"url": url, "browser": "Chrome", "timestamp": timestamp} for timestamp in timestamps]
+
+
+def test_build_engagement_rows():
+    """Test visits are counted per UTC day and days are set in the month bitmask."""
+    entries = visits(ms(2026, 10, 1, 0), ms(2026, 10, 1, 23), ms(2026, 10, 3), ms(2026, 9, 30))
+    batch = UrlVisitBatch.from_entries(entries)
+
+    day_rows, month_rows = db_core.build_engagement_rows("user1", batch, [(1,), (1,), (1, 2), ()])
+
+    assert sorted((row["contract_id"], row["day"], row["visits"]) for row in day_rows) == [
+        (1, date(2026, 10, 1), 2),
+        (1, date(2026, 10, 3), 1),
+        (2, date(2026, 10, 3), 1)
+    ]
+    assert sorted((row["contract_id"], row["period"], row["active_days"]) for row in month_rows) == [
+        (1, "2026-10", 0b101),
+        (2, "2026-10", 0b100)
+    ]
+
+
+def test_build_engagement_rows_local_days():
+    """Test visits are counted on the organization's local day, across a month boundary."""
+    # 2026-09-30 22:30 UTC is already October 1st in Tokyo and still September 30th in New York
+    entries = visits(ms(2026, 9, 30, 22) + 30 * 60 * 1000, ms(2026, 10, 1, 3))
+    batch = UrlVisitBatch.from_entries(entries)
+
+    tokyo_days, tokyo_months = db_core.build_engagement_rows("user1", batch, [(1,), (1,)], ZoneInfo("Asia/Tokyo"))
+    new_york_days, new_york_months = db_core.build_engagement_rows("user1", batch, [(1,), (1,)], ZoneInfo("America/New_York"))
+
+    assert [(row["day"], row["visits"]) for row in tokyo_days] == [(date(2026, 10, 1), 2)]
+    assert [(row["period"], row["active_days"]) for row in tokyo_months] == [("2026-10", 0b1)]
+    assert sorted((row["day"], row["visits"]) for row in new_york_days) == [(date(2026, 9, 30), 2)]
+    assert [(row["period"], row["active_days"]) for row in new_york_months] == [("2026-09", 1 << 29)]
+
+
+def test_ingest_upserts_aggregates(db):
+    """Test repeated batches add visits and OR active days instead of inserting duplicates."""
+    now = datetime.now(timezone.utc)
+    today = ms(now.year, now.month, now.day)
+    with patch.object(db_core, "ENGAGEMENT_TRACKING_ENABLED", True):
+        first = db_core.process_url_visits(db, "user1@firebaystudios.com", visits(today, today))
+        second = db_core.process_url_visits(db, "user1@firebaystudios.com", visits(today))
+
+    assert first["matched"] == 1
+    assert second["matched"] == 0
+    assert [(row.contract_id, row.visits) for row in db.scalars(select(UserActivityDay))] == [(1, 3)]
+    months = db.scalars(select(UserActivityMonth)).all()
+    assert [(row.period, row.active_days) for row in months] == [(now.strftime("%Y-%m"), 1 << (now.day - 1))]
+
+
+def test_ingest_skips_aggregates_when_disabled(db):
+    """Test no aggregate rows are written with engagement tracking off."""
+    now = datetime.now(timezone.utc)
+    with patch.object(db_core, "ENGAGEMENT_TRACKING_ENABLED", False):
+        db_core.process_url_visits(db, "user1@firebaystudios.com", visits(ms(now.year, now.month, now.day)))
+
+    assert db.scalars(select(UserActivityDay)).all() == []
+
+
+def test_elapsed_days():
+    """Test DAU is averaged over the days of the month that have started."""
+    today = date(2026, 10, 19)
+    assert elapsed_days("2026-09", today) == 30
+    assert elapsed_days("2026-10", today) == 19
+    assert elapsed_days("2026-11", today) == 0
+
+
+def test_active_days_distribution():
+    """Test users are counted by number of active days."""
+    assert active_days_distribution([0b1, 0b11, 0b101, 0], 4) == [1, 2, 0, 0]
+
+
+def test_get_engagement_by_org_id(db):
+    """Test DAU/MAU, visits and distributions are reported per contract."""
+    db.add_all([
+        UserActivityDay(user_id="user1", contract_id=1, day=date(2026, 9, 1), visits=5),
+        UserActivityDay(user_id="user1", contract_id=1, day=date(2026, 9, 2), visits=1),
+        UserActivityDay(user_id="user2", contract_id=1, day=date(2026, 9, 2), visits=4),
+        UserActivityDay(user_id="user2", contract_id=1, day=date(2026, 10, 1), visits=9),
+        UserActivityMonth(user_id="user1", contract_id=1, period="2026-09", active_days=0b11),
+        UserActivityMonth(user_id="user2", contract_id=1, period="2026-09", active_days=0b10),
+        UserActivityMonth(user_id="user2", contract_id=1, period="2026-10", active_days=0b1)
+    ])
+    db.commit()
+
+    result = get_engagement_by_org_id(db, "org_1", "2026-09", today=date(2026, 10, 19))
+
+    assert result["success"] is True
+    slack, notion = result["contracts"]
+    assert slack["monthly_active_users"] == 2
+    assert slack["average_daily_active_users"] == 0.1  # 3 user-days over 30 days
+    assert slack["dau_mau"] == 0.05
+    assert slack["total_visits"] == 10
+    assert slack["active_days_distribution"][:3] == [1, 1, 0]
+    assert len(slack["active_days_distribution"]) == 30
+    assert notion["monthly_active_users"] == 0
+    assert notion["dau_mau"] == 0.0
+    assert get_engagement_by_org_id(db, "org_missing", "2026-09")["status_code"] == 404
+
+
+def test_get_engagement_defaults_to_local_month(db):
+    """Test the default period is the organization's current month, as ingest buckets it."""
+    db.get(Organization, "org_1").timezone = "Asia/Tokyo"
+    db.commit()
+    with patch("procure.utils.periods.datetime", MonthEndDatetime), \
+            patch("procure.server.analytics.engagement.datetime", MonthEndDatetime), \
+            patch.object(db_core, "ENGAGEMENT_TRACKING_ENABLED", True):
+        db_core.process_url_visits(db, "user1@firebaystudios.com", visits(ms(2026, 10, 31, 19)))
+        result = get_engagement_by_org_id(db, "org_1")
+
+    assert result["period"] == "2026-11"
+    assert result["contracts"][0]["monthly_active_users"] == 1
@@ -0,0 +1,114 @@
+"""
+Unit tests for the health check routes.
+
+These tests verify that:
+1. /livez answers without touching the database
+2. /readyz caches the database check for the configured interval
+3. /readyz reports 503 when the database is unavailable
+4. /ping only runs the destructive write test when it is enabled
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import OperationalError
+
+from procure.server.health import routes as health_routes
+from procure.utils.db_utils import get_db
+
+
+# Mock database session
+@pytest.fixture
+def mock_db():
+    """Create a mock database session."""
+    db = MagicMock(spec=Session)
+    return db
+
+
+# Test client with only the health routes registered
+@pytest.fixture
+def client(mock_db):
+    """Create a test client for the health routes."""
+    app = FastAPI()
+    health_routes.register_health_routes(app)
+    app.dependency_overrides[get_db] = lambda: mock_db
+    health_routes.readiness_cache.reset()
+    yield TestClient(app)
+    health_routes.readiness_cache.reset()
+
+
+# Mock engine used by the readiness check
+@pytest.fixture
+def mock_engine():
+    """Patch the engine used by the readiness check."""
+    with patch("procure.server.health.routes.get_engine") as get_engine:
+        mock = get_engine.return_value
+        yield mock
+
+
+def test_livez_does_not_touch_database(client, mock_engine, mock_db):
+    """Test /livez answers without any database access."""
+    response = client.get("/livez")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+    mock_engine.connect.assert_not_called()
+    mock_db.execute.assert_not_called()
+
+
+def test_readyz_caches_database_check(client, mock_engine):
+    """Test /readyz runs SELECT 1 once per interval and reports pool stats."""
+    with patch.object(health_routes.readiness_cache, "interval_seconds", 60):
+        first = client.get("/readyz")
+        second = client.get("/readyz")
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert first.json()["status"] == "ready"
+    assert "pool" in first.json()
+    assert "checkedout" in first.json()["pool"]
+    assert mock_engine.connect.call_count == 1
+
+
+def test_readyz_rechecks_after_interval(client, mock_engine):
+    """Test /readyz re-runs the check once the interval has elapsed."""
+    with patch.object(health_routes.readiness_cache, "interval_seconds", 0):
+        client.get("/readyz")
+        client.get("/readyz")
+
+    assert mock_engine.connect.call_count == 2
+
+
+def test_readyz_database_unavailable(client, mock_engine):
+    """Test /readyz returns 503 when the database check fails."""
+    mock_engine.connect.side_effect = OperationalError("SELECT 1", {}, Exception("connection refused"))
+
+    response = client.get("/readyz")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "not_ready"
+    assert response.json()["database"]["status"] == "failed"
+
+
+def test_ping_skips_write_check_by_default(client, mock_engine, mock_db):
+    """Test /ping does not write to the database unless enabled."""
+    with patch("procure.server.health.routes.HEALTH_WRITE_CHECK_ENABLED", False):
+        response = client.get("/ping")
+
+    assert response.status_code == 200
+    assert response.json()["database"]["write"]["status"] == "skipped"
+    mock_db.add.assert_not_called()
+    mock_db.commit.assert_not_called()
+
+
+def test_ping_runs_write_check_when_enabled(client, mock_engine, mock_db):
+    """Test /ping runs the write test when HEALTH_WRITE_CHECK_ENABLED is set."""
+    with patch("procure.server.health.routes.HEALTH_WRITE_CHECK_ENABLED", True):
+        response = client.get("/ping")
+
+    assert response.status_code == 200
+    assert response.json()["database"]["write"]["status"] == "success"
+    assert mock_db.add.call_count == 2
+    mock_db.commit.assert_called_once()
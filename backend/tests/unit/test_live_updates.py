@@ -0,0 +1,169 @@
+"""
+Unit tests for live contract usage updates.
+
+These tests verify that:
+1. Events fan out to every subscriber of an organization, from any thread
+2. Subscribers that fall behind are evicted and their stream ends
+3. Streams start with the snapshot and send heartbeats while idle
+4. Ingest publishes the new active users of contracts only while someone is subscribed
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from procure.db.engine import Base
+from procure.db.models import Contract, Organization, User
+from procure.server.analytics import live
+from procure.server.analytics.live import HEARTBEAT, LiveHub, format_event, stream_events
+from procure.server.url_visits.ingest import ingest_url_visits
+from procure.utils.url_visit_batch import UrlVisitBatch
+
+
+@pytest.fixture
+def db():
+    """An in-memory SQLite session with one organization, two users and two contracts."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Organization(organization_id="org_1", domain_name="firebaystudios.com", company_name="FireBay Studios"))
+    session.add_all([
+        User(id="user1", email="user1@firebaystudios.com", organization_id="org_1"),
+        User(id="user2", email="user2@firebaystudios.com", organization_id="org_1"),
+        Contract(contract_id=1, vendor_name="Slack", product_url="https://slack.com", vendor_domain="slack.com", organization_id="org_1"),
+        Contract(contract_id=2, vendor_name="Notion", product_url="https://notion.so", vendor_domain="notion.so", organization_id="org_1")
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def decode(event):
+    name, data = event.decode().strip().split("\n")
+    return name.removeprefix("event: "), orjson.loads(data.removeprefix("data: "))
+
+
+def visits(*urls):
+    timestamp = int(datetime.now(timezone.utc).timestamp() * 1000)
+    return UrlVisitBatch.from_entries({"url": url, "browser": "Chrome", "timestamp": timestamp} for url in urls)
+
+
+def test_publish_fans_out_per_organization():
+    """Test every subscriber of the organization gets the event, including from other threads."""
+    async def scenario():
+        hub = LiveHub(max_subscribers=10, buffer_size=4)
+        first, second = hub.subscribe("org_1"), hub.subscribe("org_1")
+        other = hub.subscribe("org_2")
+
+        publisher = threading.Thread(target=hub.publish, args=("org_1", format_event("usage", {"n": 1})))
+        publisher.start()
+        publisher.join()
+
+        events = [await asyncio.wait_for(subscription.get(), 1) for subscription in (first, second)]
+        await asyncio.sleep(0)
+        return hub, events, other
+
+    hub, events, other = asyncio.run(scenario())
+
+    assert [decode(event) for event in events] == [("usage", {"n": 1})] * 2
+    assert other._queue.empty()
+    assert hub.subscribers == 3
+
+
+def test_subscribers_are_bounded():
+    """Test subscriptions beyond max_subscribers are refused and released ones free a slot."""
+    async def scenario():
+        hub = LiveHub(max_subscribers=1, buffer_size=4)
+        subscription = hub.subscribe("org_1")
+        refused = hub.subscribe("org_1")
+        hub.unsubscribe(subscription)
+        hub.unsubscribe(subscription)
+        return refused, hub.subscribe("org_1")
+
+    refused, accepted = asyncio.run(scenario())
+
+    assert refused is None
+    assert accepted is not None
+
+
+def test_slow_subscriber_is_evicted():
+    """Test a full buffer evicts the subscriber, which still reads what was buffered."""
+    async def scenario():
+        hub = LiveHub(max_subscribers=10, buffer_size=2)
+        subscription = hub.subscribe("org_1")
+        for n in range(3):
+            hub.publish("org_1", format_event("usage", {"n": n}))
+        await asyncio.sleep(0)
+        received = []
+        while (event := await asyncio.wait_for(subscription.get(), 1)) is not None:
+            received.append(decode(event)[1]["n"])
+        return hub, subscription, received
+
+    hub, subscription, received = asyncio.run(scenario())
+
+    assert subscription.evicted is True
+    assert received == [0, 1]
+    assert hub.subscribers == 0
+    assert not hub.has_subscribers("org_1")
+
+
+def test_stream_events(monkeypatch):
+    """Test the stream sends the snapshot, heartbeats while idle, and events until closed."""
+    hub = LiveHub(max_subscribers=10, buffer_size=4)
+    monkeypatch.setattr(live, "live_hub", hub)
+
+    async def scenario():
+        subscription = hub.subscribe("org_1")
+        stream = stream_events(subscription, format_event("snapshot", {"contracts": []}), heartbeat_seconds=0.01)
+        received = [await stream.__anext__(), await stream.__anext__()]
+        hub.publish("org_1", format_event("usage", {"n": 1}))
+        received.append(await stream.__anext__())
+        hub.close_all()
+        received.extend([event async for event in stream])
+        return received
+
+    snapshot, heartbeat, usage = asyncio.run(scenario())
+
+    assert decode(snapshot) == ("snapshot", {"contracts": []})
+    assert heartbeat == HEARTBEAT
+    assert decode(usage) == ("usage", {"n": 1})
+    assert hub.subscribers == 0
+
+
+def test_ingest_publishes_active_users(db, monkeypatch):
+    """Test ingest pushes the new active users of the contracts that gained activities."""
+    hub = LiveHub(max_subscribers=10, buffer_size=4)
+    monkeypatch.setattr(live, "live_hub", hub)
+
+    async def scenario():
+        subscription = hub.subscribe("org_1")
+        ingest_url_visits(db, "user1@firebaystudios.com", visits("https://app.slack.com", "https://notion.so"))
+        ingest_url_visits(db, "user2@firebaystudios.com", visits("https://app.slack.com"))
+        # Already active this month: nothing new to publish
+        ingest_url_visits(db, "user2@firebaystudios.com", visits("https://app.slack.com"))
+        await asyncio.sleep(0)
+        return [decode(await asyncio.wait_for(subscription.get(), 1)) for _ in range(2)], subscription
+
+    events, subscription = asyncio.run(scenario())
+
+    assert events == [
+        ("usage", {"contracts": [{"contract_id": 1, "active_users": 1}, {"contract_id": 2, "active_users": 1}]}),
+        ("usage", {"contracts": [{"contract_id": 1, "active_users": 2}]})
+    ]
+    assert subscription._queue.empty()
+
+
+def test_ingest_skips_counting_without_subscribers(db, count_queries, monkeypatch):
+    """Test ingest sends no extra statement while nobody is subscribed."""
+    monkeypatch.setattr(live, "live_hub", LiveHub())
+
+    with count_queries(db.get_bind()) as queries:
+        ingest_url_visits(db, "user1@firebaystudios.com", visits("https://app.slack.com"))
+
+    assert not any("count(distinct" in statement.lower() for statement, _ in queries.statements)
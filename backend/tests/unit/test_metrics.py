@@ -0,0 +1,157 @@
+"""
+Unit tests for the metrics surface.
+
+These tests verify that:
+1. Metrics render in the Prometheus text exposition format, across workers in multiprocess mode
+2. Requests are recorded by route template and status code
+3. Database statements are timed and labelled by fingerprint
+4. URL visit ingest updates the domain counters
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+from unittest.mock import MagicMock
+from datetime import datetime, timezone
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from procure.db import core as db_core
+from procure.db.instrumentation import fingerprint_statement, instrument_engine, normalize_statement
+from procure.db.models import User
+from procure.server.metrics.middleware import RequestMetricsMiddleware
+from procure.server.metrics.routes import register_metrics_routes
+from procure.utils.metrics import get_sample_value
+
+
+# Test app with the metrics middleware and a templated route
+@pytest.fixture
+def client():
+    """Create a test client for an app with the metrics middleware."""
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+    register_metrics_routes(app)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404, detail="Not found")
+        return {"item_id": item_id}
+
+    return TestClient(app)
+
+
+# Records metrics in a fresh process, as one uvicorn worker would
+WORKER_SCRIPT = """
+from procure.server.metrics.middleware import http_requests_in_flight
+from procure.db.pool import pool_checkout_timeouts
+pool_checkout_timeouts.inc(2)
+http_requests_in_flight.inc()
+"""
+
+
+def test_multiprocess_metrics_aggregate_workers(tmp_path):
+    """Test /metrics reports the sum of every worker's counters and live gauges."""
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", WORKER_SCRIPT], env=env, check=True)
+    render = "from procure.utils.metrics import generate_latest; print(generate_latest().decode())"
+
+    output = subprocess.run(
+        [sys.executable, "-c", render], env=env, check=True, capture_output=True, text=True
+    ).stdout
+
+    assert "procure_db_pool_checkout_timeouts_total 4.0" in output
+    assert "procure_http_requests_in_flight 2.0" in output
+
+
+def test_requests_labelled_by_route_template(client):
+    """Test request latency is recorded per route template and status."""
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/items/0")
+
+    def count(status):
+        return get_sample_value(
+            "procure_http_request_duration_seconds_count",
+            {"method": "GET", "route": "/items/{item_id}", "status": status}
+        )
+
+    assert count("200") >= 2
+    assert count("404") >= 1
+
+
+def test_unmatched_paths_share_one_label(client):
+    """Test unknown paths do not create a label per raw path."""
+    client.get("/no-such-path-abc")
+
+    output = client.get("/metrics").text
+
+    assert "/no-such-path-abc" not in output
+    assert 'route="unmatched"' in output
+
+
+def test_metrics_endpoint(client):
+    """Test /metrics serves the Prometheus content type."""
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=")
+    assert "procure_http_requests_in_flight" in response.text
+
+
+def test_normalize_statement_collapses_literals_and_in_lists():
+    """Test executions of the same query normalize to the same text."""
+    first = normalize_statement(
+        "SELECT * FROM contracts WHERE vendor_domain IN (%(d_1)s, %(d_2)s) AND organization_id = 'org_a'"
+    )
+    second = normalize_statement(
+        "SELECT * FROM contracts WHERE vendor_domain IN (%(d_1)s, %(d_2)s, %(d_3)s) AND organization_id = 'org_b'"
+    )
+
+    assert first == second
+    assert fingerprint_statement(first)[1].startswith("select_contracts_")
+
+
+def test_query_timing_recorded_by_fingerprint():
+    """Test statements executed on an instrumented engine are timed."""
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    statement = "SELECT 1 FROM (SELECT 1) AS metrics_probe"
+    operation, fingerprint = fingerprint_statement(statement)
+    labels = {"operation": operation, "fingerprint": fingerprint}
+    before = get_sample_value("procure_db_query_duration_seconds_count", labels)
+
+    with engine.connect() as connection:
+        connection.execute(text(statement))
+
+    assert get_sample_value("procure_db_query_duration_seconds_count", labels) == before + 1
+
+
+def test_url_visit_counters():
+    """Test process_url_visits updates the ingest counters."""
+    db = MagicMock(spec=Session)
+    user = User(id="user1", email="user1@firebaystudios.com", organization_id="org_1")
+    db.scalars().one_or_none.return_value = user
+    db.execute().fetchall.side_effect = [
+        [(1, "https://mail.google.com", "google.com")],  # organization contracts
+        []  # existing_activities_query
+    ]
+    timestamp = int(datetime.now(timezone.utc).timestamp() * 1000)
+    entries = [
+        {"url": "https://mail.google.com", "browser": "Chrome", "timestamp": timestamp},
+        {"url": "https://unknown-site.com", "browser": "Chrome", "timestamp": timestamp}
+    ]
+    received = get_sample_value("procure_url_visit_entries_received_total")
+    matched = get_sample_value("procure_url_visit_entries_matched_total")
+    inserted = get_sample_value("procure_url_visit_activities_inserted_total")
+
+    db_core.process_url_visits(db, user.email, entries)
+
+    assert get_sample_value("procure_url_visit_entries_received_total") == received + 2
+    assert get_sample_value("procure_url_visit_entries_matched_total") == matched + 1
+    assert get_sample_value("procure_url_visit_activities_inserted_total") == inserted + 1
@@ -0,0 +1,146 @@
+"""
+Unit tests for organization and user offboarding.
+
+These tests verify that:
+1. Foreign keys cascade deletes in the database
+2. An organization is deleted with all its data in bounded batches
+3. A user is deleted with their data and the contracts they own
+4. Other organizations' data is left alone
+5. The deleted users' device tokens are evicted from the token identity cache
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, delete, event, select, func
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from procure.db.auth import token_identity_cache
+from procure.db.engine import Base
+from procure.db.models import (
+    Contract,
+    Organization,
+    ShadowITDomain,
+    User,
+    UserActivity,
+    UserDeviceToken
+)
+from procure.jobs.offboarding import (
+    count_rows,
+    offboard_organization,
+    offboard_user,
+    organization_steps
+)
+from procure.utils.cache import hash_key
+
+
+@pytest.fixture
+def db():
+    """An in-memory SQLite session enforcing foreign keys, with two organizations."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def enable_foreign_keys(connection, record):
+        connection.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for org in ("org_1", "org_2"):
+        session.add(Organization(organization_id=org, domain_name=f"{org}.com"))
+        session.flush()
+        session.add_all([
+            User(id=f"{org}_admin", email=f"admin@{org}.com", organization_id=org),
+            User(id=f"{org}_member", email=f"member@{org}.com", organization_id=org)
+        ])
+        session.flush()
+        session.add_all([
+            Contract(vendor_name="Slack", product_url=f"https://slack.com/{org}", vendor_domain="slack.com",
+                     organization_id=org, owner_id=f"{org}_admin"),
+            UserDeviceToken(user_id=f"{org}_member", device_id="device", token=f"token_{org}"),
+            ShadowITDomain(organization_id=org, period="2026-10", domain="notion.so", visits=3)
+        ])
+        session.flush()
+        contract_id = session.scalar(select(Contract.contract_id).where(Contract.organization_id == org))
+        session.add_all([
+            UserActivity(user_id=f"{org}_{role}", contract_id=contract_id, browser="Chrome",
+                         date=datetime(2026, month, 1, tzinfo=timezone.utc))
+            for role in ("admin", "member") for month in range(1, 11)
+        ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def count(db, model, **filters):
+    return db.scalar(select(func.count()).select_from(model).filter_by(**filters))
+
+
+def test_foreign_keys_cascade(db):
+    """Test deleting an organization row removes its users, contracts and activities."""
+    db.execute(delete(Organization).where(Organization.organization_id == "org_1"))
+    db.commit()
+
+    assert count(db, User) == 2
+    assert count(db, Contract) == 1
+    assert count(db, UserActivity) == 20
+
+
+def test_offboard_organization(db):
+    """Test an organization is deleted in batches without touching another one."""
+    progress = []
+
+    deleted = offboard_organization(db, "org_1", batch_size=3, pause_seconds=0,
+                                    progress=lambda table, rows: progress.append((table, rows)))
+
+    assert deleted["user_activities"] == 20
+    assert deleted["organizations"] == 1
+    assert [rows for table, rows in progress if table == "user_activities"] == [3, 6, 9, 12, 15, 18, 20]
+    assert count(db, Organization, organization_id="org_1") == 0
+    assert count(db, User, organization_id="org_2") == 2
+    assert count(db, UserActivity) == 20
+    assert count(db, UserDeviceToken) == 1
+    assert count(db, ShadowITDomain) == 1
+
+
+def test_offboard_user(db):
+    """Test a user is deleted with the contracts they own and their activities."""
+    deleted = offboard_user(db, "org_1_admin", batch_size=100, pause_seconds=0)
+
+    assert deleted["users"] == 1
+    assert deleted["contracts"] == 1
+    # The admin's own activities and the member's activities on the admin's contract
+    assert deleted["user_activities"] == 20
+    assert count(db, User, id="org_1_member") == 1
+    assert count(db, UserDeviceToken) == 2
+
+
+def test_offboarding_evicts_cached_token_identities(db):
+    """Test the deleted users' tokens stop authenticating from the cache, other tokens stay cached."""
+    for org in ("org_1", "org_2"):
+        token_identity_cache.set(hash_key(f"token_{org}"), {"email": f"member@{org}.com"})
+
+    offboard_user(db, "org_1_admin", batch_size=100, pause_seconds=0)
+    assert token_identity_cache.get(hash_key("token_org_1")) is not None
+
+    offboard_organization(db, "org_1", batch_size=100, pause_seconds=0)
+    assert token_identity_cache.get(hash_key("token_org_1")) is None
+    assert token_identity_cache.get(hash_key("token_org_2")) is not None
+
+
+def test_offboard_user_evicts_own_tokens(db):
+    """Test offboarding a user evicts their device tokens."""
+    token_identity_cache.set(hash_key("token_org_2"), {"email": "member@org_2.com"})
+
+    offboard_user(db, "org_2_member", batch_size=100, pause_seconds=0)
+
+    assert token_identity_cache.get(hash_key("token_org_2")) is None
+
+
+def test_count_rows(db):
+    """Test a dry run counts rows per table without deleting them."""
+    counts = count_rows(db, organization_steps("org_1"))
+
+    assert counts["user_activities"] == 20
+    assert counts["users"] == 2
+    assert count(db, UserActivity) == 40
@@ -0,0 +1,111 @@
+"""
+Unit tests for organization access on organization routes.
+
+These tests verify that:
+1. Members of an organization can read its analytics
+2. Users of another organization are refused with 403, before a live stream subscribes
+3. The check uses the cached token identity, without another statement
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from procure.db.engine import Base
+from procure.db.models import Organization, User, UserDeviceToken
+from procure.server.analytics.live import live_hub
+from procure.server.main import create_app
+from procure.utils.db_utils import get_db, get_read_db
+
+MEMBER_TOKEN = "member_device_token"
+OUTSIDER_TOKEN = "outsider_device_token"
+
+# Routes of one organization, read by its members only
+ORGANIZATION_ROUTES = [
+    "/api/v1/organizations/org_1/contract-usage",
+    "/api/v1/organizations/org_1/shadow-it",
+    "/api/v1/organizations/org_1/engagement",
+    "/api/v1/organizations/org_1/renewals"
+]
+
+
+@pytest.fixture
+def engine():
+    """An in-memory SQLite engine with two organizations and a user in each."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add_all([
+            Organization(organization_id="org_1", domain_name="firebaystudios.com", company_name="FireBay Studios"),
+            Organization(organization_id="org_2", domain_name="example.com", company_name="Example")
+        ])
+        session.add_all([
+            User(id="member", email="member@firebaystudios.com", organization_id="org_1", role="member"),
+            User(id="outsider", email="outsider@example.com", organization_id="org_2", role="admin")
+        ])
+        session.add_all([
+            UserDeviceToken(user_id="member", device_id="laptop", token=MEMBER_TOKEN),
+            UserDeviceToken(user_id="outsider", device_id="laptop", token=OUTSIDER_TOKEN)
+        ])
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(engine):
+    """A client for the full application using the SQLite engine."""
+    session_factory = sessionmaker(bind=engine)
+
+    def get_test_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = create_app()
+    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_read_db] = get_test_db
+    return TestClient(app)
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.parametrize("path", ORGANIZATION_ROUTES)
+def test_member_is_allowed(client, path):
+    """Test a member of the organization reads its analytics."""
+    response = client.get(path, headers=bearer(MEMBER_TOKEN))
+
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.parametrize("path", ORGANIZATION_ROUTES)
+def test_other_organization_is_forbidden(client, path):
+    """Test a user of another organization is refused, even an admin."""
+    response = client.get(path, headers=bearer(OUTSIDER_TOKEN))
+
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Not a member of this organization"
+
+
+def test_stream_is_forbidden_before_subscribing(client):
+    """Test a user of another organization cannot open a live stream, nor take a subscriber slot."""
+    response = client.get("/api/v1/organizations/org_1/contract-usage/stream", headers=bearer(OUTSIDER_TOKEN))
+
+    assert response.status_code == 403
+    assert live_hub.subscribers == 0
+    assert not live_hub.has_subscribers("org_1")
+
+
+def test_check_uses_cached_identity(engine, client, count_queries):
+    """Test a refused request sends only the token lookup."""
+    with count_queries(engine) as queries:
+        response = client.get(ORGANIZATION_ROUTES[0], headers=bearer(OUTSIDER_TOKEN))
+
+    assert response.status_code == 403
+    queries.assert_at_most(1, "organization access")
@@ -0,0 +1,109 @@
+"""
+Unit tests for organization time zones.
+
+These tests verify that:
+1. Months are bounded by midnight in the organization's time zone, as UTC instants
+2. Unknown time zone names fall back to UTC
+3. Contract usage counts the current month in the organization's time zone
+4. Admins of an organization can change its time zone
+"""
+
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from procure.db.engine import Base
+from procure.db.models import Contract, Organization, User, UserActivity
+from procure.server.analytics.analytics import get_contract_usage_by_org_id
+from procure.server.manage import orgs
+from procure.utils.periods import (
+    current_month,
+    get_timezone,
+    is_valid_timezone,
+    month_bounds,
+    period_bounds
+)
+
+
+@pytest.fixture
+def db():
+    """An in-memory SQLite session with a Tokyo organization, its admin and one contract."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Organization(organization_id="org_1", domain_name="firebaystudios.com", company_name="FireBay Studios",
+                             timezone="Asia/Tokyo"))
+    session.add(Organization(organization_id="org_2", domain_name="example.com"))
+    session.add_all([
+        User(id="admin", email="admin@firebaystudios.com", organization_id="org_1", role="admin"),
+        Contract(contract_id=1, vendor_name="Slack", product_url="https://slack.com", vendor_domain="slack.com",
+                 organization_id="org_1", num_seats=10)
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_month_bounds_in_time_zone():
+    """Test months start at local midnight, including across a DST change."""
+    new_york = ZoneInfo("America/New_York")
+
+    assert month_bounds(2026, 10, new_york) == (utc(2026, 10, 1, 4), utc(2026, 11, 1, 4))
+    # November starts in daylight time, December in standard time
+    assert month_bounds(2026, 11, new_york) == (utc(2026, 11, 1, 4), utc(2026, 12, 1, 5))
+    assert period_bounds("2026-12") == (utc(2026, 12, 1), utc(2027, 1, 1))
+
+
+def test_current_month_in_time_zone():
+    """Test the current month is read in the time zone."""
+    now = utc(2026, 9, 30, 16)
+
+    assert current_month(now=now) == (2026, 9)
+    assert current_month(ZoneInfo("Asia/Tokyo"), now) == (2026, 10)
+
+
+def test_unknown_time_zone_falls_back_to_utc():
+    """Test missing or unknown names are counted in UTC."""
+    assert get_timezone(None) is timezone.utc
+    assert get_timezone("Mars/Olympus_Mons") is timezone.utc
+    assert get_timezone("Europe/Paris") == ZoneInfo("Europe/Paris")
+    assert is_valid_timezone("Europe/Paris")
+    assert not is_valid_timezone("Mars/Olympus_Mons")
+
+
+def test_contract_usage_uses_organization_month(db):
+    """Test activities from before local midnight on the 1st belong to the previous month."""
+    db.add_all([
+        # September 30th 14:00 UTC is 23:00 in Tokyo
+        UserActivity(user_id="admin", contract_id=1, browser="Chrome", date=utc(2026, 9, 30, 14)),
+    ])
+    db.commit()
+
+    # October 1st 01:00 in Tokyo
+    october = get_contract_usage_by_org_id(db, "org_1", now=utc(2026, 9, 30, 16))
+    september = get_contract_usage_by_org_id(db, "org_1", now=utc(2026, 9, 30, 13))
+
+    assert october["contracts"][0]["active_users"] == 0
+    assert september["contracts"][0]["active_users"] == 1
+
+
+def test_set_organization_timezone(db):
+    """Test an admin can set their organization's time zone, and only to a known one."""
+    result = orgs.set_organization_timezone(db, "admin@firebaystudios.com", "org_1", "Europe/Paris")
+
+    assert result["success"] is True
+    assert result["organization"]["timezone"] == "Europe/Paris"
+    assert db.get(Organization, "org_1").timezone == "Europe/Paris"
+    assert orgs.get_organization_name_by_id(db, "org_1")["organization"]["timezone"] == "Europe/Paris"
+
+    assert orgs.set_organization_timezone(db, "admin@firebaystudios.com", "org_1", "Mars/Olympus_Mons")["status_code"] == 400
+    assert orgs.set_organization_timezone(db, "admin@firebaystudios.com", "org_2", "Europe/Paris")["status_code"] == 403
+    assert orgs.set_organization_timezone(db, "admin@firebaystudios.com", "org_missing", "Europe/Paris")["status_code"] == 404
@@ -10,13 +10,14 @@ These tests verify that the process_url_visits function correctly:
 """
 
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.dml import Insert
 
 from procure.db import core as db_core
-from procure.db.models import User, Organization, Contract, UserActivity
+from procure.db.models import User, Organization, Contract
 
 
 # Mock user data for different organizations
@@ -94,6 +95,18 @@ def mock_db():
     return db
 
 
+def inserted_activities(mock_db):
+    """Get the rows of the single user_activities INSERT executed on the mock session."""
+    inserts = [call for call in mock_db.execute.call_args_list if call.args and isinstance(call.args[0], Insert)]
+    assert len(inserts) == 1
+    return inserts[0].args[1]
+
+
+def assert_no_activities_inserted(mock_db):
+    """Assert no INSERT was executed on the mock session."""
+    assert not any(call.args and isinstance(call.args[0], Insert) for call in mock_db.execute.call_args_list)
+
+
 # Test cases for process_url_visits function
 class TestProcessUrlVisits:
     """Tests for the process_url_visits function."""
@@ -128,7 +141,7 @@ class TestProcessUrlVisits:
         email = user.email
         entries = [
             {
-                "url": "invalid-url",
+                "url": "https:///no-host",
                 "browser": "Chrome",
                 "timestamp": int(datetime.now(timezone.utc).timestamp() * 1000)
             }
@@ -137,13 +150,8 @@ class TestProcessUrlVisits:
         # Mock get_user_by_email to return the user
         mock_db.scalars().one_or_none.return_value = user
 
-        # We need to mock the entire function to ensure entry_domains is empty
-        with patch("procure.db.core.get_base_domain") as mock_get_base_domain:
-            # Make the function raise an exception to ensure entry_domains remains empty
-            mock_get_base_domain.side_effect = Exception("Invalid URL")
-
-            # Execute
-            result = db_core.process_url_visits(mock_db, email, entries)
+        # Execute
+        result = db_core.process_url_visits(mock_db, email, entries)
 
         # Verify
         assert result["success"] is True
@@ -167,13 +175,11 @@ class TestProcessUrlVisits:
         # Mock get_user_by_email to return the user
         mock_db.scalars().one_or_none.return_value = user
 
-        # Mock get_base_domain to return a domain
-        with patch("procure.server.utils.get_base_domain", return_value="unknown-site.com"):
-            # Mock execute().fetchall() to return empty list (no matching contracts)
-            mock_db.execute().fetchall.return_value = []
+        # Mock execute().fetchall() to return empty list (no matching contracts)
+        mock_db.execute().fetchall.return_value = []
 
-            # Execute
-            result = db_core.process_url_visits(mock_db, email, entries)
+        # Execute
+        result = db_core.process_url_visits(mock_db, email, entries)
 
         # Verify
         assert result["success"] is True
@@ -197,16 +203,14 @@ class TestProcessUrlVisits:
         # Mock get_user_by_email to return the user
         mock_db.scalars().one_or_none.return_value = user
 
-        # Mock get_base_domain to return a domain
-        with patch("procure.server.utils.get_base_domain", return_value="google.com"):
-            # Mock execute().fetchall() to return matching contracts and existing activities
-            mock_db.execute().fetchall.side_effect = [
-                [(1, "google.com")],  # matching_contracts
-                [(1,)]  # existing_activities_query (existing activity)
-            ]
+        # Mock execute().fetchall() to return matching contracts and existing activities
+        mock_db.execute().fetchall.side_effect = [
+            [(1, "https://mail.google.com", "google.com")],  # organization contracts
+            [(1,)]  # existing_activities_query (existing activity)
+        ]
 
-            # Execute
-            result = db_core.process_url_visits(mock_db, email, entries)
+        # Execute
+        result = db_core.process_url_visits(mock_db, email, entries)
 
         # Verify
         assert result["success"] is True
@@ -214,8 +218,8 @@ class TestProcessUrlVisits:
         assert result["matched"] == 0
         assert result["message"] == "No matching URLs found or all matches already have activities this month"
 
-        # Verify bulk_save_objects was not called
-        mock_db.bulk_save_objects.assert_not_called()
+        # Verify no activities were inserted
+        assert_no_activities_inserted(mock_db)
         mock_db.commit.assert_not_called()
 
     def test_new_activity_created(self, mock_db, mock_users):
@@ -235,16 +239,14 @@ class TestProcessUrlVisits:
         # Mock get_user_by_email to return the user
         mock_db.scalars().one_or_none.return_value = user
 
-        # Mock get_base_domain to return a domain
-        with patch("procure.server.utils.get_base_domain", return_value="google.com"):
-            # Mock execute().fetchall() to return matching contracts and no existing activities
-            mock_db.execute().fetchall.side_effect = [
-                [(1, "google.com")],  # matching_contracts
-                []  # existing_activities_query (no existing activities)
-            ]
+        # Mock execute().fetchall() to return matching contracts and no existing activities
+        mock_db.execute().fetchall.side_effect = [
+            [(1, "https://mail.google.com", "google.com")],  # organization contracts
+            []  # existing_activities_query (no existing activities)
+        ]
 
-            # Execute
-            result = db_core.process_url_visits(mock_db, email, entries)
+        # Execute
+        result = db_core.process_url_visits(mock_db, email, entries)
 
         # Verify
         assert result["success"] is True
@@ -252,16 +254,16 @@ class TestProcessUrlVisits:
         assert result["matched"] == 1
         assert result["message"] == "URL visit logs processed successfully"
 
-        # Verify bulk_save_objects was called to create new activity
-        mock_db.bulk_save_objects.assert_called_once()
+        # Verify one INSERT created the new activity
+        activities = inserted_activities(mock_db)
         mock_db.commit.assert_called_once()
 
         # Verify the created activity has the correct data
-        created_activity = mock_db.bulk_save_objects.call_args[0][0][0]
-        assert created_activity.user_id == user.id
-        assert created_activity.contract_id == 1
-        assert created_activity.browser == "Chrome"
-        assert isinstance(created_activity.date, datetime)
+        created_activity = activities[0]
+        assert created_activity["user_id"] == user.id
+        assert created_activity["contract_id"] == 1
+        assert created_activity["browser"] == "Chrome"
+        assert isinstance(created_activity["date"], datetime)
 
     def test_multiple_urls_some_matched(self, mock_db, mock_users):
         """Test process_url_visits with multiple URLs, some matched and some not."""
@@ -290,16 +292,14 @@ class TestProcessUrlVisits:
         # Mock get_user_by_email to return the user
         mock_db.scalars().one_or_none.return_value = user
 
-        # Mock get_base_domain to return different domains
-        with patch("procure.server.utils.get_base_domain", side_effect=["google.com", "microsoft.com", "unknown-site.com"]):
-            # Mock execute().fetchall() to return matching contracts and existing activities
-            mock_db.execute().fetchall.side_effect = [
-                [(1, "google.com"), (2, "microsoft.com")],  # matching_contracts (google and microsoft match)
-                [(1,)]  # existing_activities_query (google already has activity)
-            ]
+        # Mock execute().fetchall() to return matching contracts and existing activities
+        mock_db.execute().fetchall.side_effect = [
+            [(1, "https://mail.google.com", "google.com"), (2, "https://microsoft.com", "microsoft.com")],  # organization contracts (google and microsoft match)
+            [(1,)]  # existing_activities_query (google already has activity)
+        ]
 
-            # Execute
-            result = db_core.process_url_visits(mock_db, email, entries)
+        # Execute
+        result = db_core.process_url_visits(mock_db, email, entries)
 
         # Verify
         assert result["success"] is True
@@ -307,16 +307,16 @@ class TestProcessUrlVisits:
         assert result["matched"] == 1  # Only microsoft should be matched (google already visited, unknown not in contracts)
         assert result["message"] == "URL visit logs processed successfully"
 
-        # Verify bulk_save_objects was called to create new activity
-        mock_db.bulk_save_objects.assert_called_once()
+        # Verify one INSERT created the new activity
+        activities = inserted_activities(mock_db)
         mock_db.commit.assert_called_once()
 
         # Verify the created activity has the correct data
-        created_activity = mock_db.bulk_save_objects.call_args[0][0][0]
-        assert created_activity.user_id == user.id
-        assert created_activity.contract_id == 2  # Microsoft contract
-        assert created_activity.browser == "Chrome"
-        assert isinstance(created_activity.date, datetime)
+        created_activity = activities[0]
+        assert created_activity["user_id"] == user.id
+        assert created_activity["contract_id"] == 2  # Microsoft contract
+        assert created_activity["browser"] == "Chrome"
+        assert isinstance(created_activity["date"], datetime)
 
     def test_database_error(self, mock_db, mock_users):
         """Test process_url_visits handles database errors during activity creation."""
@@ -335,25 +335,30 @@ class TestProcessUrlVisits:
         # Mock get_user_by_email to return the user
         mock_db.scalars().one_or_none.return_value = user
 
-        # Mock get_base_domain to return a domain
-        with patch("procure.server.utils.get_base_domain", return_value="google.com"):
-            # Mock execute().fetchall() to return matching contracts and no existing activities
-            mock_db.execute().fetchall.side_effect = [
-                [(1, "google.com")],  # matching_contracts
-                []  # existing_activities_query (no existing activities)
-            ]
+        # Mock execute().fetchall() to return matching contracts and no existing activities
+        mock_db.execute().fetchall.side_effect = [
+            [(1, "https://mail.google.com", "google.com")],  # organization contracts
+            []  # existing_activities_query (no existing activities)
+        ]
+
+        # Make the activity INSERT raise a database error
+        results = mock_db.execute.return_value
+
+        def execute(statement, *args, **kwargs):
+            if isinstance(statement, Insert):
+                raise SQLAlchemyError("Database error")
+            return results
 
-            # Mock bulk_save_objects to raise a database error
-            mock_db.bulk_save_objects.side_effect = SQLAlchemyError("Database error")
+        mock_db.execute.side_effect = execute
 
-            # Execute and verify exception
-            with pytest.raises(SQLAlchemyError) as excinfo:
-                db_core.process_url_visits(mock_db, email, entries)
+        # Execute and verify exception
+        with pytest.raises(SQLAlchemyError) as excinfo:
+            db_core.process_url_visits(mock_db, email, entries)
 
-            assert "Database error" in str(excinfo.value)
+        assert "Database error" in str(excinfo.value)
 
-            # Verify rollback was called
-            mock_db.rollback.assert_called_once()
+        # Verify rollback was called
+        mock_db.rollback.assert_called_once()
 
     def test_different_organizations(self, mock_db, mock_users):
         """Test process_url_visits for users from different organizations."""
@@ -377,17 +382,15 @@ class TestProcessUrlVisits:
         # Mock get_user_by_email to return user1
         mock_db.scalars().one_or_none.return_value = user1
 
-        # Mock get_base_domain to return different domains
-        with patch("procure.server.utils.get_base_domain", side_effect=["google.com", "slack.com"]):
-            # Mock execute().fetchall() to return matching contracts and no existing activities
-            # Note: Only google.com should match for user1, not slack.com (different org)
-            mock_db.execute().fetchall.side_effect = [
-                [(1, "google.com")],  # matching_contracts (only google matches for user1)
-                []  # existing_activities_query (no existing activities)
-            ]
+        # Mock execute().fetchall() to return matching contracts and no existing activities
+        # Note: Only google.com should match for user1, not slack.com (different org)
+        mock_db.execute().fetchall.side_effect = [
+            [(1, "https://mail.google.com", "google.com")],  # organization contracts (only google matches for user1)
+            []  # existing_activities_query (no existing activities)
+        ]
 
-            # Execute for user1
-            result = db_core.process_url_visits(mock_db, email1, entries)
+        # Execute for user1
+        result = db_core.process_url_visits(mock_db, email1, entries)
 
         # Verify
         assert result["success"] is True
@@ -395,16 +398,16 @@ class TestProcessUrlVisits:
         assert result["matched"] == 1  # Only google should be matched for user1
         assert result["message"] == "URL visit logs processed successfully"
 
-        # Verify bulk_save_objects was called to create new activity
-        mock_db.bulk_save_objects.assert_called_once()
+        # Verify one INSERT created the new activity
+        activities = inserted_activities(mock_db)
         mock_db.commit.assert_called_once()
 
         # Verify the created activity has the correct data
-        created_activity = mock_db.bulk_save_objects.call_args[0][0][0]
-        assert created_activity.user_id == user1.id
-        assert created_activity.contract_id == 1  # Google contract
-        assert created_activity.browser == "Chrome"
-        assert isinstance(created_activity.date, datetime)
+        created_activity = activities[0]
+        assert created_activity["user_id"] == user1.id
+        assert created_activity["contract_id"] == 1  # Google contract
+        assert created_activity["browser"] == "Chrome"
+        assert isinstance(created_activity["date"], datetime)
 
         # Reset mocks for user2
         mock_db.reset_mock()
@@ -428,17 +431,15 @@ class TestProcessUrlVisits:
         # Mock get_user_by_email to return user2
         mock_db.scalars().one_or_none.return_value = user2
 
-        # Mock get_base_domain to return different domains
-        with patch("procure.server.utils.get_base_domain", side_effect=["google.com", "slack.com"]):
-            # Mock execute().fetchall() to return matching contracts and no existing activities
-            # Note: Only slack.com should match for user2, not google.com (different org)
-            mock_db.execute().fetchall.side_effect = [
-                [(3, "slack.com")],  # matching_contracts (only slack matches for user2)
-                []  # existing_activities_query (no existing activities)
-            ]
+        # Mock execute().fetchall() to return matching contracts and no existing activities
+        # Note: Only slack.com should match for user2, not google.com (different org)
+        mock_db.execute().fetchall.side_effect = [
+            [(3, "https://app.slack.com", "slack.com")],  # organization contracts (only slack matches for user2)
+            []  # existing_activities_query (no existing activities)
+        ]
 
-            # Execute for user2
-            result = db_core.process_url_visits(mock_db, email2, entries)
+        # Execute for user2
+        result = db_core.process_url_visits(mock_db, email2, entries)
 
         # Verify
         assert result["success"] is True
@@ -446,13 +447,13 @@ class TestProcessUrlVisits:
         assert result["matched"] == 1  # Only slack should be matched for user2
         assert result["message"] == "URL visit logs processed successfully"
 
-        # Verify bulk_save_objects was called to create new activity
-        mock_db.bulk_save_objects.assert_called_once()
+        # Verify one INSERT created the new activity
+        activities = inserted_activities(mock_db)
         mock_db.commit.assert_called_once()
 
         # Verify the created activity has the correct data
-        created_activity = mock_db.bulk_save_objects.call_args[0][0][0]
-        assert created_activity.user_id == user2.id
-        assert created_activity.contract_id == 3  # Slack contract
-        assert created_activity.browser == "Chrome"
-        assert isinstance(created_activity.date, datetime)
+        created_activity = activities[0]
+        assert created_activity["user_id"] == user2.id
+        assert created_activity["contract_id"] == 3  # Slack contract
+        assert created_activity["browser"] == "Chrome"
+        assert isinstance(created_activity["date"], datetime)
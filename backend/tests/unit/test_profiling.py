@@ -0,0 +1,141 @@
+"""
+Unit tests for on-demand request profiling.
+
+These tests verify that:
+1. Requests are only profiled with the correct secret
+2. Profiles are stored and returned in the collapsed stack format
+3. Only the profiled request's threads are sampled
+4. Samples are attributed to auth, db, serialization and domain extraction
+5. Profiles are only readable with the operator token
+"""
+
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from procure.auth import users
+from procure.server.admin.routes import register_admin_routes
+from procure.server.profiling.middleware import RequestProfilingMiddleware, profile_store
+from procure.utils.profiler import categorize_stack
+
+OPS_HEADERS = {"X-Ops-Token": "ops-secret"}
+
+
+def busy_work(seconds):
+    """Burn CPU so the sampler has something to see."""
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+def concurrent_work(stop):
+    """Burn CPU in another thread, as a concurrent request would."""
+    while not stop.is_set():
+        busy_work(0.001)
+
+
+# Test app with the profiling middleware and the admin routes
+@pytest.fixture
+def client():
+    """Create a test client for an app with profiling enabled."""
+    app = FastAPI()
+    register_admin_routes(app)
+    app.add_middleware(RequestProfilingMiddleware, secret="s3cret", interval_ms=0.5)
+
+    @app.get("/work")
+    def work():
+        return {"total": busy_work(0.05)}
+
+    profile_store.clear()
+    with patch.object(users, "OPS_API_TOKEN", "ops-secret"):
+        yield TestClient(app)
+    profile_store.clear()
+
+
+def test_requests_without_flag_are_not_profiled(client):
+    """Test requests without the flag pass through untouched."""
+    response = client.get("/work")
+
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert profile_store.summaries() == []
+
+
+def test_invalid_secret_is_not_profiled(client):
+    """Test a wrong secret does not enable profiling."""
+    response = client.get("/work", headers={"X-Procure-Profile": "wrong"})
+
+    assert "x-profile-id" not in response.headers
+    assert profile_store.summaries() == []
+
+
+def test_header_flag_profiles_request(client):
+    """Test the header flag profiles the request and stores the result."""
+    response = client.get("/work", headers={"X-Procure-Profile": "s3cret"})
+
+    profile_id = response.headers["x-profile-id"]
+    summary = profile_store.summaries()[0]
+    assert summary["profile_id"] == profile_id
+    assert summary["route"] == "GET /work"
+    assert summary["samples"] > 0
+
+    collapsed = client.get(f"/api/v1/admin/profiles/{profile_id}", headers=OPS_HEADERS).text
+    assert "busy_work" in collapsed
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.strip().splitlines())
+
+
+def test_other_threads_are_not_sampled(client):
+    """Test work running alongside the request is left out of its profile."""
+    stop = threading.Event()
+    other = threading.Thread(target=concurrent_work, args=(stop,))
+    other.start()
+    try:
+        response = client.get("/work", headers={"X-Procure-Profile": "s3cret"})
+    finally:
+        stop.set()
+        other.join()
+
+    collapsed = client.get(f"/api/v1/admin/profiles/{response.headers['x-profile-id']}", headers=OPS_HEADERS).text
+    assert "work (" in collapsed
+    assert "concurrent_work" not in collapsed
+
+
+def test_query_flag_is_ignored(client):
+    """Test the secret is only accepted in the header, never in the URL."""
+    response = client.get("/work", params={"__profile": "s3cret"})
+
+    assert "x-profile-id" not in response.headers
+
+
+def test_unknown_profile(client):
+    """Test fetching an unknown profile returns 404."""
+    response = client.get("/api/v1/admin/profiles/does-not-exist", headers=OPS_HEADERS)
+
+    assert response.status_code == 404
+
+
+def test_profiles_require_operator_token(client):
+    """Test profiles are not readable without the operator token, e.g. by a tenant admin."""
+    response = client.get("/work", headers={"X-Procure-Profile": "s3cret"})
+
+    assert client.get("/api/v1/admin/profiles").status_code == 403
+    assert client.get(f"/api/v1/admin/profiles/{response.headers['x-profile-id']}").status_code == 403
+
+
+def test_categorize_stack_uses_outermost_match():
+    """Test samples are attributed by their outermost categorized frame."""
+    auth_stack = ["uvicorn/main.py", "procure/auth/users.py", "procure/db/auth.py", "sqlalchemy/orm/session.py"]
+    db_stack = ["uvicorn/main.py", "procure/db/core.py", "sqlalchemy/engine/base.py", "psycopg2/extras.py"]
+    domain_stack = ["procure/db/core.py", "procure/server/utils.py", "tldextract/tldextract.py"]
+    serialization_stack = ["fastapi/routing.py", "pydantic/main.py"]
+
+    assert categorize_stack(auth_stack) == "auth"
+    assert categorize_stack(db_stack) == "db"
+    assert categorize_stack(domain_stack) == "domain_extraction"
+    assert categorize_stack(serialization_stack) == "serialization"
+    assert categorize_stack(["uvicorn/main.py"]) == "other"
@@ -0,0 +1,149 @@
+"""
+SQL statement budgets per route.
+
+Each route is called once through the full application against an
+in-memory SQLite database, with cold caches, and must not send more
+statements than its budget. A change that adds a round trip to one of these
+paths fails here; if the extra statement is intended, raise the budget in
+ROUTE_BUDGETS in the same change.
+"""
+
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from procure.auth.utils import hash_password
+from procure.db.engine import Base
+from procure.db.models import Contract, Organization, User, UserActivity, UserDeviceToken
+from procure.server.main import create_app
+from procure.utils.db_utils import get_db, get_read_db
+
+ORG_ID = "org_1"
+ADMIN_TOKEN = "admin_device_token"
+MEMBER_TOKEN = "member_device_token"
+
+# Statements per request with cold caches
+ROUTE_BUDGETS = {
+    "url_visits": 5,            # token, user, contract hosts, this month's activities, insert
+    "contract": 3,              # token, user, insert
+    "contract_usage": 4,        # token, organization, contracts, active users of all contracts
+    "organization_name": 2,     # token, organization
+    "sign_in_password": 3,      # user, device token, token update
+    "sign_in_device_token": 1,  # token joined to its user
+    "me": 2                     # token, user
+}
+
+
+@pytest.fixture(scope="module")
+def password_hash():
+    return hash_password("correct horse")
+
+
+@pytest.fixture
+def engine(password_hash):
+    """An in-memory SQLite engine with one organization, two users, three contracts and their activities."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add(Organization(organization_id=ORG_ID, domain_name="firebaystudios.com", company_name="FireBay Studios"))
+        session.add_all([
+            User(id="admin", email="admin@firebaystudios.com", organization_id=ORG_ID, role="admin",
+                 hashed_password=password_hash),
+            User(id="member", email="member@firebaystudios.com", organization_id=ORG_ID, role="member")
+        ])
+        session.add_all([
+            UserDeviceToken(user_id="admin", device_id="laptop", token=ADMIN_TOKEN),
+            UserDeviceToken(user_id="member", device_id="laptop", token=MEMBER_TOKEN)
+        ])
+        session.add_all([
+            Contract(contract_id=number, vendor_name=vendor, product_url=f"https://{domain}", vendor_domain=domain,
+                     organization_id=ORG_ID, owner_id="admin", num_seats=10)
+            for number, (vendor, domain) in enumerate([("Slack", "slack.com"), ("Notion", "notion.so"), ("Figma", "figma.com")], 1)
+        ])
+        session.add_all([
+            UserActivity(user_id=user_id, contract_id=contract_id, browser="Chrome", date=datetime.now(timezone.utc))
+            for user_id, contract_id in (("admin", 1), ("admin", 2), ("admin", 3), ("member", 1))
+        ])
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(engine):
+    """A client for the full application using the SQLite engine."""
+    session_factory = sessionmaker(bind=engine)
+
+    def get_test_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = create_app()
+    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_read_db] = get_test_db
+    return TestClient(app)
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def url_visits(client):
+    timestamp = int(datetime.now(timezone.utc).timestamp() * 1000)
+    body = [{"url": "https://app.slack.com/client", "browser": "Chrome", "timestamp": timestamp},
+            {"url": "https://www.notion.so", "browser": "Chrome", "timestamp": timestamp},
+            {"url": "https://news.ycombinator.com", "browser": "Chrome", "timestamp": timestamp}]
+    return client.post("/api/v1/url-visits", content=orjson.dumps({"entries": body}), headers=bearer(MEMBER_TOKEN))
+
+
+def contract(client):
+    return client.post("/api/v1/contract", headers=bearer(ADMIN_TOKEN), json={
+        "vendor_name": "Zoom", "product_url": "https://zoom.us", "organization_id": ORG_ID, "num_seats": 5
+    })
+
+
+ROUTES = {
+    "url_visits": url_visits,
+    "contract": contract,
+    "contract_usage": lambda client: client.get(f"/api/v1/organizations/{ORG_ID}/contract-usage", headers=bearer(ADMIN_TOKEN)),
+    "organization_name": lambda client: client.get(f"/api/v1/organizations/{ORG_ID}/name", headers=bearer(ADMIN_TOKEN)),
+    "sign_in_password": lambda client: client.post("/api/v1/auth/sign-in", json={
+        "email": "admin@firebaystudios.com", "password": "correct horse", "device_id": "laptop"
+    }),
+    "sign_in_device_token": lambda client: client.post("/api/v1/auth/sign-in", json={
+        "device_token": ADMIN_TOKEN, "device_id": "laptop"
+    }),
+    "me": lambda client: client.get("/api/v1/auth/me", headers=bearer(ADMIN_TOKEN))
+}
+
+
+@pytest.mark.parametrize("route", list(ROUTES))
+def test_route_query_budget(engine, client, count_queries, route):
+    """Test a route stays within its SQL statement budget."""
+    with count_queries(engine) as queries:
+        response = ROUTES[route](client)
+
+    assert response.status_code == 200, response.text
+    queries.assert_at_most(ROUTE_BUDGETS[route], route)
+
+
+def test_contract_usage_counts_active_users(client):
+    """Test active users are counted per contract by the single grouped query."""
+    response = ROUTES["contract_usage"](client)
+
+    assert {row["vendor_name"]: row["active_users"] for row in response.json()["contracts"]} == {
+        "Figma": 1, "Notion": 1, "Slack": 2
+    }
+
+
+def test_budgets_cover_every_route():
+    """Test every route exercised here has a budget."""
+    assert set(ROUTES) == set(ROUTE_BUDGETS)
@@ -0,0 +1,207 @@
+"""
+Unit tests for token-bucket rate limiting.
+
+These tests verify that:
+1. Buckets allow bursts up to their capacity and refill over time, and the
+   busiest buckets survive eviction
+2. Over-limit requests get a 429 with a Retry-After header
+3. Devices and organizations are limited independently
+4. Limited requests never reach authentication or the database
+5. Redis errors fall back to local buckets
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from procure.db.auth import token_identity_cache
+from procure.server.url_visits.routes import router as url_visits_router
+from procure.utils.cache import hash_key
+from procure.utils.db_utils import get_db
+from procure.utils.rate_limit import (
+    LocalTokenBuckets,
+    RateLimit,
+    RateLimiter,
+    rate_limit,
+    set_rate_limiter
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiter():
+    """Give each test empty in-memory buckets."""
+    set_rate_limiter(RateLimiter())
+    yield
+    set_rate_limiter(None)
+
+
+def make_client(limits):
+    """Build an app with one route limited by the given RATE_LIMITS entry."""
+    app = FastAPI()
+    with patch("procure.utils.rate_limit.RATE_LIMITS", {"test": limits}):
+        dependency = rate_limit("test")
+
+    @app.get("/limited", dependencies=[Depends(dependency)])
+    async def limited():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_parse_rate_limit():
+    """Test "<requests>/<seconds>" parsing."""
+    limit = RateLimit.parse("10/60")
+    assert limit.capacity == 10
+    assert limit.rate == pytest.approx(10 / 60)
+    assert RateLimit.parse("") is None
+
+    with pytest.raises(ValueError):
+        RateLimit.parse("ten per minute")
+
+
+def test_bucket_allows_burst_then_limits():
+    """Test a bucket allows `capacity` requests, then reports when to retry."""
+    buckets = LocalTokenBuckets()
+    limit = RateLimit(3, 30)
+
+    assert [buckets.acquire("device", limit) for _ in range(3)] == [0, 0, 0]
+    assert buckets.acquire("device", limit) == pytest.approx(10, abs=0.1)
+
+
+def test_bucket_refills_over_time():
+    """Test tokens come back at capacity/period per second."""
+    buckets = LocalTokenBuckets()
+    limit = RateLimit(2, 20)
+
+    with patch("procure.utils.rate_limit.time.monotonic", return_value=100.0):
+        buckets.acquire("device", limit)
+        buckets.acquire("device", limit)
+        assert buckets.acquire("device", limit) > 0
+
+    with patch("procure.utils.rate_limit.time.monotonic", return_value=111.0):
+        assert buckets.acquire("device", limit) == 0
+
+
+def test_flood_of_new_keys_keeps_active_buckets():
+    """Test filling the table evicts idle buckets, not the one in active use."""
+    buckets = LocalTokenBuckets(max_entries=10)
+    limit = RateLimit(1, 60)
+
+    with patch("procure.utils.rate_limit.time.monotonic", return_value=100.0):
+        assert buckets.acquire("device", limit) == 0
+        for index in range(50):
+            buckets.acquire(f"random-{index}", limit)
+            assert buckets.acquire("device", limit) > 0
+
+    assert len(buckets) == 10
+
+
+def test_eviction_uses_each_buckets_limit():
+    """Test a bucket is judged refilled by its own limit, not the current request's."""
+    buckets = LocalTokenBuckets(max_entries=3)
+    slow, fast = RateLimit(1, 3600), RateLimit(1, 1)
+
+    with patch("procure.utils.rate_limit.time.monotonic", return_value=100.0):
+        buckets.acquire("fast-1", fast)
+        buckets.acquire("fast-2", fast)
+        buckets.acquire("slow", slow)
+
+    # fast-1 is evicted as least recently used, fast-2 because it has refilled;
+    # slow has not refilled by its own limit, whatever the new bucket's limit
+    with patch("procure.utils.rate_limit.time.monotonic", return_value=110.0):
+        buckets.acquire("new", fast)
+        assert len(buckets) == 2
+        assert buckets.acquire("slow", slow) > 0
+
+
+def test_over_limit_returns_429_with_retry_after():
+    """Test the request after the burst gets a 429 and Retry-After."""
+    client = make_client({"device": "2/60"})
+
+    assert client.get("/limited", headers=auth("token-a")).status_code == 200
+    assert client.get("/limited", headers=auth("token-a")).status_code == 200
+    response = client.get("/limited", headers=auth("token-a"))
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+
+
+def test_devices_are_limited_independently():
+    """Test one device exhausting its bucket does not limit another."""
+    client = make_client({"device": "1/60"})
+
+    assert client.get("/limited", headers=auth("token-a")).status_code == 200
+    assert client.get("/limited", headers=auth("token-a")).status_code == 429
+    assert client.get("/limited", headers=auth("token-b")).status_code == 200
+
+
+def test_organization_limit_uses_cached_identity():
+    """Test devices of one organization share the organization bucket."""
+    client = make_client({"device": "10/60", "organization": "2/60"})
+    for token in ["token-a", "token-b", "token-c"]:
+        token_identity_cache.set(hash_key(token), {"email": f"{token}@example.com", "organization_id": "org_1"})
+
+    assert client.get("/limited", headers=auth("token-a")).status_code == 200
+    assert client.get("/limited", headers=auth("token-b")).status_code == 200
+    response = client.get("/limited", headers=auth("token-c"))
+
+    assert response.status_code == 429
+    assert "organization" in response.json()["detail"]
+
+
+def test_requests_without_token_are_not_limited():
+    """Test the limiter leaves unauthenticated requests to authentication."""
+    client = make_client({"device": "1/60"})
+
+    for _ in range(3):
+        assert client.get("/limited").status_code == 200
+
+
+def test_url_visits_limited_before_database():
+    """Test a limited url-visits request never authenticates or touches the database."""
+    app = FastAPI()
+    app.include_router(url_visits_router)
+    db = MagicMock()
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+    body = {"entries": [{"url": "https://mail.google.com", "browser": "chrome", "timestamp": 1700000000000}]}
+
+    # Default URL_VISITS_DEVICE_RATE_LIMIT: 10 requests per 60 seconds
+    with patch("procure.server.url_visits.routes.ingest_url_visits") as process, \
+         patch("procure.auth.users.db_auth.get_identity_by_token") as get_identity:
+        get_identity.return_value = {"email": "user@example.com", "organization_id": None}
+        process.return_value = {"success": True, "processed": 1, "matched": 0, "message": "ok"}
+
+        statuses = [
+            client.post("/api/v1/url-visits", json=body, headers=auth("token-a")).status_code
+            for _ in range(13)
+        ]
+
+    assert statuses == [200] * 10 + [429] * 3
+    assert get_identity.call_count == 10
+    assert process.call_count == 10
+    db.execute.assert_not_called()
+
+
+def test_backend_error_falls_back_to_local_buckets():
+    """Test a Redis failure still enforces limits with local buckets."""
+    shared = MagicMock()
+    shared.acquire.side_effect = ConnectionError("redis down")
+    limiter = RateLimiter(shared)
+    limit = RateLimit(1, 60)
+
+    assert limiter.acquire("device", limit) == 0
+    assert limiter.acquire("device", limit) > 0
+
+
+def test_disabled_limiter_allows_everything():
+    """Test RATE_LIMIT_ENABLED=false turns limiting off."""
+    limiter = RateLimiter(enabled=False)
+    limit = RateLimit(1, 60)
+
+    assert [limiter.acquire("device", limit) for _ in range(5)] == [0] * 5
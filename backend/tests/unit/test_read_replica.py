@@ -0,0 +1,234 @@
+"""
+Unit tests for read replica routing.
+
+These tests verify that:
+1. Read-only sessions use the replica when it is configured and healthy
+2. Regular sessions and flushes always use the primary
+3. Users who just wrote read from the primary (read-your-writes), on every worker,
+   and so do cache refills after an invalidation
+4. Reads fall back to the primary when the replica is down or lagging
+5. Replica health is checked in the background, never on a request
+"""
+
+import time
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from procure.db.routing import (
+    ReplicaRouter,
+    RoutingSession,
+    StickyPrimaryTracker,
+    replica_router,
+    sticky_primary,
+    track_primary_writes
+)
+from procure.utils.cache import InMemoryBackend
+from procure.utils.request_context import current_principal, primary_reads
+
+
+def make_database(name):
+    """Create an in-memory SQLite engine whose `source` table names the database."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE source (name VARCHAR)"))
+        connection.execute(text("INSERT INTO source (name) VALUES (:name)"), {"name": name})
+    return engine
+
+
+@pytest.fixture
+def primary():
+    engine = make_database("primary")
+    track_primary_writes(engine)
+    return engine
+
+
+@pytest.fixture
+def replica():
+    return make_database("replica")
+
+
+@pytest.fixture
+def session_factory(primary):
+    return sessionmaker(class_=RoutingSession, bind=primary)
+
+
+@pytest.fixture(autouse=True)
+def reset_routing():
+    """Reset the shared router, sticky users and principal around each test."""
+    token = current_principal.set(None)
+    sticky_primary.clear()
+    yield
+    replica_router.set_replica(None)
+    sticky_primary.clear()
+    current_principal.reset(token)
+
+
+def read_source(session):
+    return session.execute(text("SELECT name FROM source")).scalar()
+
+
+def test_read_session_uses_replica(session_factory, replica):
+    """Test read-only sessions query the healthy replica."""
+    replica_router.set_replica(replica)
+    replica_router.refresh()
+
+    with session_factory(info={"prefer_replica": True}) as session:
+        assert read_source(session) == "replica"
+
+
+def test_regular_session_uses_primary(session_factory, replica):
+    """Test sessions not marked read-only never use the replica."""
+    replica_router.set_replica(replica)
+    replica_router.refresh()
+
+    with session_factory() as session:
+        assert read_source(session) == "primary"
+
+
+def test_read_session_without_replica_uses_primary(session_factory):
+    """Test read-only sessions use the primary when no replica is configured."""
+    with session_factory(info={"prefer_replica": True}) as session:
+        assert read_source(session) == "primary"
+
+
+def test_writer_is_sticky_to_primary(session_factory, primary, replica):
+    """Test a user who just wrote reads from the primary, other users from the replica."""
+    replica_router.set_replica(replica)
+    replica_router.refresh()
+    current_principal.set("writer@example.com")
+
+    with session_factory() as session:
+        session.execute(text("INSERT INTO source (name) VALUES ('written')"))
+        session.commit()
+
+    with session_factory(info={"prefer_replica": True}) as session:
+        assert read_source(session) == "primary"
+
+    current_principal.set("reader@example.com")
+    with session_factory(info={"prefer_replica": True}) as session:
+        assert read_source(session) == "replica"
+
+
+def test_primary_reads_skip_replica(session_factory, replica):
+    """Test read-only sessions use the primary inside primary_reads()."""
+    replica_router.set_replica(replica)
+    replica_router.refresh()
+
+    with primary_reads():
+        with session_factory(info={"prefer_replica": True}) as session:
+            assert read_source(session) == "primary"
+    with session_factory(info={"prefer_replica": True}) as session:
+        assert read_source(session) == "replica"
+
+
+def test_reads_do_not_make_user_sticky(session_factory, replica):
+    """Test SELECTs on the primary do not mark the user as a writer."""
+    replica_router.set_replica(replica)
+    replica_router.refresh()
+    current_principal.set("reader@example.com")
+
+    with session_factory() as session:
+        read_source(session)
+
+    assert not sticky_primary.is_sticky("reader@example.com")
+
+
+def test_sticky_window_expires():
+    """Test users stop being sticky after the window."""
+    tracker = StickyPrimaryTracker(window_seconds=0)
+    tracker.mark("writer@example.com")
+
+    assert not tracker.is_sticky("writer@example.com")
+    assert not tracker.is_sticky(None)
+
+
+def test_replica_down_falls_back_to_primary(session_factory):
+    """Test reads go to the primary when the replica cannot be reached."""
+    broken_replica = MagicMock()
+    broken_replica.connect.side_effect = OperationalError("SELECT 1", {}, Exception("connection refused"))
+    replica_router.set_replica(broken_replica)
+    replica_router.refresh()
+
+    with session_factory(info={"prefer_replica": True}) as session:
+        assert read_source(session) == "primary"
+
+    status = replica_router.status()
+    assert status["configured"] is True
+    assert status["healthy"] is False
+    assert "connection refused" in status["error"]
+
+
+def test_lagging_replica_is_unhealthy():
+    """Test a replica lagging beyond the limit is not used."""
+    lagging_replica = MagicMock()
+    connection = lagging_replica.connect.return_value.__enter__.return_value
+    connection.dialect.name = "postgresql"
+    connection.execute.return_value.scalar.return_value = 30.0
+    router = ReplicaRouter(max_lag_seconds=10, check_interval_seconds=60, sticky=StickyPrimaryTracker(5))
+    router.set_replica(lagging_replica)
+    router.refresh()
+
+    assert router.choose() is None
+    assert router.status()["lag_seconds"] == 30.0
+
+
+def test_writer_is_sticky_on_other_workers():
+    """Test a write seen by one worker sends the user's reads to the primary on another."""
+    backend = InMemoryBackend()
+    worker_a = StickyPrimaryTracker(5, backend_getter=lambda: backend)
+    worker_b = StickyPrimaryTracker(5, backend_getter=lambda: backend)
+
+    worker_a.mark("writer@example.com")
+
+    assert worker_b.is_sticky("writer@example.com")
+    assert not worker_b.is_sticky("reader@example.com")
+
+
+def test_write_bursts_refresh_shared_mark_once():
+    """Test a burst of writes refreshes the shared mark once, not per statement."""
+    backend = MagicMock()
+    tracker = StickyPrimaryTracker(5, backend_getter=lambda: backend)
+
+    for _ in range(10):
+        tracker.mark("writer@example.com")
+
+    backend.set.assert_called_once()
+    assert backend.set.call_args.kwargs["ex"] == 8
+
+
+def test_health_is_not_checked_on_requests():
+    """Test choosing a bind never connects to the replica; it is unused until checked."""
+    healthy_replica = MagicMock()
+    healthy_replica.connect.return_value.__enter__.return_value.dialect.name = "sqlite"
+    router = ReplicaRouter(max_lag_seconds=10, check_interval_seconds=60, sticky=StickyPrimaryTracker(5))
+    router.set_replica(healthy_replica)
+
+    assert router.choose() is None
+    router.refresh()
+    for _ in range(5):
+        assert router.choose() is healthy_replica
+
+    assert healthy_replica.connect.call_count == 1
+
+
+def test_background_health_checks():
+    """Test the background thread checks the replica until stopped."""
+    healthy_replica = MagicMock()
+    healthy_replica.connect.return_value.__enter__.return_value.dialect.name = "sqlite"
+    router = ReplicaRouter(max_lag_seconds=10, check_interval_seconds=0.01, sticky=StickyPrimaryTracker(5))
+    router.set_replica(healthy_replica)
+
+    router.start_health_checks()
+    try:
+        deadline = time.monotonic() + 5
+        while healthy_replica.connect.call_count < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        router.stop_health_checks()
+
+    assert healthy_replica.connect.call_count >= 2
+    assert router.choose() is healthy_replica
@@ -0,0 +1,139 @@
+"""
+Unit tests for contract renewal alerts.
+
+These tests verify that:
+1. Contracts expiring within the windows are found across organizations, in batches
+2. Alerts carry the smallest window entered and the recent distinct users
+3. Alerts are raised once per contract, expiry and window
+4. Upcoming renewals are read back per organization, soonest first
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from procure.db.engine import Base
+from procure.db.models import Contract, ContractRenewalAlert, Organization, User, UserActivity
+from procure.jobs.renewals import main, run_renewal_scan
+from procure.server.analytics.renewals import get_renewals_by_org_id
+
+NOW = datetime(2026, 10, 19, tzinfo=timezone.utc)
+WINDOWS = [7, 30, 90]
+
+
+def contract(contract_id, organization_id, days, vendor_name="Vendor"):
+    return Contract(
+        contract_id=contract_id, vendor_name=vendor_name, product_url=f"https://vendor{contract_id}.com",
+        vendor_domain=f"vendor{contract_id}.com", organization_id=organization_id, num_seats=10,
+        annual_spend=1200, expire_at=None if days is None else NOW + timedelta(days=days)
+    )
+
+
+@pytest.fixture
+def db():
+    """An in-memory SQLite session with contracts of two organizations expiring at various dates."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        Organization(organization_id="org_1", domain_name="firebaystudios.com", company_name="FireBay Studios"),
+        Organization(organization_id="org_2", domain_name="example.com")
+    ])
+    session.add_all([
+        User(id="user1", email="user1@firebaystudios.com", organization_id="org_1"),
+        User(id="user2", email="user2@firebaystudios.com", organization_id="org_1")
+    ])
+    session.add_all([
+        contract(1, "org_1", 5, "Slack"),
+        contract(2, "org_1", 20, "Notion"),
+        contract(3, "org_1", 60, "Figma"),
+        contract(4, "org_1", 200),   # beyond every window
+        contract(5, "org_1", -1),    # already expired
+        contract(6, "org_1", None),  # no expiry
+        contract(7, "org_2", 20)     # same expiry as contract 2
+    ])
+    session.add_all([
+        UserActivity(user_id="user1", contract_id=1, browser="Chrome", date=NOW - timedelta(days=2)),
+        UserActivity(user_id="user2", contract_id=1, browser="Chrome", date=NOW - timedelta(days=10)),
+        UserActivity(user_id="user1", contract_id=1, browser="Chrome", date=NOW - timedelta(days=11)),
+        # Outside the utilization window
+        UserActivity(user_id="user2", contract_id=2, browser="Chrome", date=NOW - timedelta(days=45))
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def alerts(db):
+    return sorted(
+        (alert.contract_id, alert.window_days, alert.active_users)
+        for alert in db.scalars(select(ContractRenewalAlert))
+    )
+
+
+def test_scan_raises_alerts_in_windows(db):
+    """Test every organization's expiring contracts get an alert for the smallest window they are in."""
+    summary = run_renewal_scan(db, WINDOWS, utilization_days=30, batch_size=2, now=NOW)
+
+    assert summary == {"scanned": 4, "alerts": {7: 1, 30: 2, 90: 1}}
+    assert alerts(db) == [(1, 7, 2), (2, 30, 0), (3, 90, 0), (7, 30, 0)]
+    assert db.scalars(select(ContractRenewalAlert.organization_id).where(ContractRenewalAlert.contract_id == 7)).one() == "org_2"
+
+
+def test_scan_deduplicates_alerts(db):
+    """Test a rerun raises nothing new until a contract enters a smaller window."""
+    run_renewal_scan(db, WINDOWS, now=NOW)
+
+    assert run_renewal_scan(db, WINDOWS, now=NOW)["alerts"] == {7: 0, 30: 0, 90: 0}
+
+    later = run_renewal_scan(db, WINDOWS, now=NOW + timedelta(days=14))
+
+    assert later["alerts"] == {7: 2, 30: 0, 90: 0}
+    assert alerts(db) == [(1, 7, 2), (2, 7, 0), (2, 30, 0), (3, 90, 0), (7, 7, 0), (7, 30, 0)]
+
+
+def test_renewed_contract_is_alerted_again(db):
+    """Test a new expire_at gets its own alert and the old one is no longer reported."""
+    run_renewal_scan(db, WINDOWS, now=NOW)
+    db.get(Contract, 1).expire_at = NOW + timedelta(days=80)
+    db.commit()
+
+    run_renewal_scan(db, WINDOWS, now=NOW)
+    renewals = get_renewals_by_org_id(db, "org_1", now=NOW)["renewals"]
+
+    assert (1, 90, 2) in alerts(db)
+    assert [(renewal["contract_id"], renewal["window_days"]) for renewal in renewals] == [(2, 30), (3, 90), (1, 90)]
+
+
+def test_get_renewals_by_org_id(db):
+    """Test renewals are reported once per contract with the smallest window, soonest first."""
+    run_renewal_scan(db, WINDOWS, now=NOW - timedelta(days=30))
+    run_renewal_scan(db, WINDOWS, now=NOW)
+
+    result = get_renewals_by_org_id(db, "org_1", now=NOW)
+
+    assert result["success"] is True
+    assert [(renewal["vendor_name"], renewal["window_days"]) for renewal in result["renewals"]] == [
+        ("Slack", 7), ("Notion", 30), ("Figma", 90)
+    ]
+    assert result["renewals"][0]["active_users"] == 2
+    assert result["renewals"][0]["total_seats"] == 10
+    assert get_renewals_by_org_id(db, "org_missing")["status_code"] == 404
+
+
+def test_windows(db):
+    """Test windows must be positive numbers of days, and a single window is enough."""
+    with pytest.raises(ValueError):
+        run_renewal_scan(db, [0, 30], now=NOW)
+    assert run_renewal_scan(db, [30], now=NOW) == {"scanned": 3, "alerts": {30: 3}}
+
+
+def test_main_dry_run(db, monkeypatch):
+    """Test a dry run counts contracts without raising alerts."""
+    monkeypatch.setattr("procure.jobs.renewals.get_session_factory", lambda: lambda: db)
+
+    assert main(["--windows", "30,7", "--dry-run"]) == 0
+    assert alerts(db) == []
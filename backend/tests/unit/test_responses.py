@@ -0,0 +1,84 @@
+"""
+Unit tests for fast JSON responses.
+
+These tests verify that:
+1. FastJSONResponse renders models and plain data as JSON
+2. FastResponseRoute returns response models without a second validation pass
+3. Other return values still go through response_model validation
+"""
+
+import json
+
+from unittest.mock import patch
+from fastapi import APIRouter, FastAPI, status
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from procure.server.responses import FastJSONResponse, FastResponseRoute
+
+
+class Item(BaseModel):
+    name: str
+    count: int
+
+
+def make_client():
+    router = APIRouter(route_class=FastResponseRoute)
+
+    @router.get("/model", response_model=Item)
+    async def get_model():
+        return Item(name="seats", count=3)
+
+    @router.post("/created", response_model=Item, status_code=status.HTTP_201_CREATED)
+    def create_model():
+        return Item(name="created", count=1)
+
+    @router.get("/dict", response_model=Item)
+    async def get_dict():
+        return {"name": "seats", "count": "3", "extra": "filtered"}
+
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_renders_models_and_plain_data():
+    """Test both models and plain data render to the same JSON as the stdlib."""
+    assert json.loads(FastJSONResponse(Item(name="a", count=1)).body) == {"name": "a", "count": 1}
+    assert json.loads(FastJSONResponse({"a": [1, 2], 3: None}).body) == {"a": [1, 2], "3": None}
+
+
+def test_returned_model_skips_response_validation():
+    """Test a returned response model is rendered without serialize_response."""
+    client = make_client()
+
+    with patch("fastapi.routing.serialize_response") as serialize:
+        response = client.get("/model")
+
+    serialize.assert_not_called()
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {"name": "seats", "count": 3}
+
+
+def test_fast_path_keeps_route_status_code():
+    """Test sync endpoints are wrapped too and keep their status code."""
+    response = make_client().post("/created")
+
+    assert response.status_code == 201
+    assert response.json() == {"name": "created", "count": 1}
+
+
+def test_other_return_values_are_validated():
+    """Test dicts are still validated and filtered by response_model."""
+    response = make_client().get("/dict")
+
+    assert response.json() == {"name": "seats", "count": 3}
+
+
+def test_openapi_schema_uses_response_model():
+    """Test the wrapped endpoints still document their response model."""
+    schema = make_client().app.openapi()
+
+    response_schema = schema["paths"]["/model"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert response_schema == {"$ref": "#/components/schemas/Item"}
@@ -0,0 +1,196 @@
+"""
+Unit tests for shadow IT discovery.
+
+These tests verify that:
+1. Count-min estimates never undercount and heavy hitters keep the top keys
+2. Unmatched visits are counted per organization and month in bounded sketches
+3. Flushes add sketch counts to shadow_it_domains and trim each month's rows
+4. The top domains are read back most visited first
+"""
+
+import random
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from procure.db.models import Organization, ShadowITDomain, User
+from procure.server.analytics.shadow_it import (
+    ShadowITTracker,
+    get_shadow_it_domains,
+    shadow_it_tracker,
+    unmatched_base_domain
+)
+from procure.server.url_visits.ingest import ingest_url_visits
+from procure.utils.sketches import CountMinSketch, HeavyHitters
+from procure.utils.url_visit_batch import UrlVisitBatch
+
+
+@pytest.fixture
+def db():
+    """An in-memory SQLite session with the organizations and shadow IT tables."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Organization.__table__.create(engine)
+    ShadowITDomain.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Organization(organization_id="org_1", domain_name="firebaystudios.com", company_name="FireBay Studios"))
+    session.commit()
+    yield session
+    session.close()
+
+
+def stored_visits(db):
+    return {row.domain: row.visits for row in db.scalars(select(ShadowITDomain))}
+
+
+def test_count_min_never_undercounts():
+    """Test estimates are at least the true counts in a small sketch."""
+    rng = random.Random(7)
+    sketch = CountMinSketch(width=64, depth=4)
+    counts = {}
+    for _ in range(5000):
+        key = f"site{int(rng.paretovariate(1.2))}.com"
+        counts[key] = counts.get(key, 0) + 1
+        sketch.add(key)
+
+    assert sketch.total == 5000
+    assert all(sketch.estimate(key) >= count for key, count in counts.items())
+
+
+def test_heavy_hitters_keep_heaviest_keys():
+    """Test the heaviest keys of a long tail stream are kept in k slots."""
+    rng = random.Random(11)
+    hitters = HeavyHitters(k=5, width=512, depth=4)
+    stream = [f"heavy{i}.com" for i in range(5) for _ in range(200 - i * 20)]
+    stream += [f"tail{i}.com" for i in range(2000)]
+    rng.shuffle(stream)
+    for key in stream:
+        hitters.add(key)
+
+    assert len(hitters) == 5
+    assert [key for key, _ in hitters.top()] == [f"heavy{i}.com" for i in range(5)]
+
+
+@pytest.mark.parametrize("hostname,domain", [
+    ("eu.app.notion.so", "notion.so"),
+    ("www.bbc.co.uk", "bbc.co.uk"),
+    ("localhost", None),
+    ("192.168.0.1", None)
+])
+def test_unmatched_base_domain(hostname, domain):
+    """Test hosts are reported by base domain and hosts without a suffix are skipped."""
+    assert unmatched_base_domain(hostname) == domain
+
+
+def test_record_and_flush(db):
+    """Test recorded visits are added to stored counts on every flush."""
+    tracker = ShadowITTracker(k=10, width=256, depth=4)
+
+    tracker.record("org_1", "2026-10", ["app.notion.so", "www.notion.so", "miro.com", "localhost"])
+    assert tracker.pending == 1
+    assert tracker.flush(db) == 2
+    assert tracker.pending == 0
+
+    tracker.record("org_1", "2026-10", ["notion.so"])
+    tracker.flush(db)
+
+    assert stored_visits(db) == {"notion.so": 3, "miro.com": 1}
+
+
+def test_flush_trims_stored_domains(db):
+    """Test each organization keeps at most max_stored domains per month."""
+    tracker = ShadowITTracker(k=10, width=256, depth=4, max_stored=2)
+
+    tracker.record("org_1", "2026-10", ["a.com"] * 3 + ["b.com"] * 2 + ["c.com"])
+    tracker.flush(db)
+
+    assert stored_visits(db) == {"a.com": 3, "b.com": 2}
+
+
+def test_failed_flush_keeps_counts(db):
+    """Test counts of a failed flush are written by the next one, with visits recorded since."""
+    tracker = ShadowITTracker(k=10, width=256, depth=4)
+    tracker.record("org_1", "2026-10", ["notion.so", "notion.so", "miro.com"])
+
+    with patch("procure.server.analytics.shadow_it.upsert_domain_visits", side_effect=RuntimeError("database is down")):
+        with pytest.raises(RuntimeError):
+            tracker.flush(db)
+    assert tracker.pending == 1
+
+    tracker.record("org_1", "2026-10", ["notion.so"])
+    tracker.flush(db)
+
+    assert stored_visits(db) == {"notion.so": 3, "miro.com": 1}
+    assert tracker.pending == 0
+
+
+def test_pending_sketches_are_bounded():
+    """Test new organizations are dropped once every sketch slot is taken."""
+    tracker = ShadowITTracker(k=10, width=64, depth=2, max_pending=2)
+
+    for organization_id in ("org_1", "org_2", "org_3"):
+        tracker.record(organization_id, "2026-10", ["notion.so"])
+
+    assert tracker.pending == 2
+
+
+def test_get_shadow_it_domains(db):
+    """Test the top domains are returned most visited first."""
+    db.add_all([
+        ShadowITDomain(organization_id="org_1", period="2026-10", domain="miro.com", visits=4),
+        ShadowITDomain(organization_id="org_1", period="2026-10", domain="notion.so", visits=9),
+        ShadowITDomain(organization_id="org_1", period="2026-09", domain="airtable.com", visits=50)
+    ])
+    db.commit()
+
+    result = get_shadow_it_domains(db, "org_1", "2026-10", limit=1)
+
+    assert result["success"] is True
+    assert result["domains"] == [{"domain": "notion.so", "visits": 9}]
+    assert get_shadow_it_domains(db, "org_missing", "2026-10", limit=1)["status_code"] == 404
+
+
+def test_get_shadow_it_domains_defaults_to_local_month(db):
+    """Test the default period is the organization's current month, as ingest records it."""
+    class MonthEndDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            # Already November 1st in Tokyo
+            return datetime(2026, 10, 31, 20, tzinfo=timezone.utc).astimezone(tz)
+
+    db.get(Organization, "org_1").timezone = "Asia/Tokyo"
+    db.add_all([
+        ShadowITDomain(organization_id="org_1", period="2026-10", domain="miro.com", visits=4),
+        ShadowITDomain(organization_id="org_1", period="2026-11", domain="notion.so", visits=9)
+    ])
+    db.commit()
+
+    with patch("procure.utils.periods.datetime", MonthEndDatetime):
+        result = get_shadow_it_domains(db, "org_1", None, limit=10)
+
+    assert result["period"] == "2026-11"
+    assert result["domains"] == [{"domain": "notion.so", "visits": 9}]
+
+
+def test_ingest_records_unmatched_domains():
+    """Test only visits without a matching contract are counted."""
+    db = MagicMock(spec=Session)
+    user = User(id="user1", email="user1@firebaystudios.com", organization_id="org_1")
+    db.scalars().one_or_none.return_value = user
+    db.execute().fetchall.side_effect = [
+        [(1, "https://mail.google.com", "google.com")],  # organization contracts
+        []  # existing_activities_query
+    ]
+    timestamp = int(datetime.now(timezone.utc).timestamp() * 1000)
+    entries = [
+        {"url": "https://mail.google.com", "browser": "Chrome", "timestamp": timestamp},
+        {"url": "https://app.notion.so", "browser": "Chrome", "timestamp": timestamp}
+    ]
+
+    ingest_url_visits(db, user.email, UrlVisitBatch.from_entries(entries))
+
+    sketch = shadow_it_tracker._pending[("org_1", datetime.now(timezone.utc).strftime("%Y-%m"))]
+    assert sketch.top() == [("notion.so", 1)]
@@ -0,0 +1,199 @@
+"""
+Unit tests for the slow query log.
+
+These tests verify that:
+1. Only statements over the threshold are recorded
+2. Entries carry normalized SQL, parameter shapes and the calling route
+3. The ring buffer stays bounded
+4. Plans are captured in the background, on a connection of their own
+5. The endpoint requires the operator token
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from procure.auth import users
+from procure.db import slow_queries
+from procure.db.instrumentation import instrument_engine
+from procure.db.slow_queries import SlowQueryLog, can_analyze, describe_parameters, slow_query_log
+from procure.server.admin.routes import register_admin_routes
+from procure.utils.request_context import current_request_route
+
+
+# Empty slow query log for each test
+@pytest.fixture(autouse=True)
+def clear_slow_query_log():
+    """Clear the shared slow query log around each test."""
+    slow_query_log.clear()
+    yield
+    slow_query_log.clear()
+
+
+def test_fast_statements_are_not_recorded():
+    """Test statements under the threshold are ignored."""
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    with patch.object(slow_queries, "SLOW_QUERY_THRESHOLD_MS", 10_000):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    assert slow_query_log.entries() == []
+
+
+def test_slow_statement_is_recorded_with_route():
+    """Test slow statements record normalized SQL, parameter shapes and route."""
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    token = current_request_route.set("POST /api/v1/url-visits")
+
+    try:
+        with patch.object(slow_queries, "SLOW_QUERY_THRESHOLD_MS", 0):
+            with engine.connect() as connection:
+                connection.execute(text("SELECT :domain AS domain, 42"), {"domain": "google.com"})
+    finally:
+        current_request_route.reset(token)
+
+    entry = slow_query_log.entries()[0]
+    assert entry["statement"] == "SELECT ? AS domain, ?"
+    assert "google.com" not in str(entry)
+    assert entry["route"] == "POST /api/v1/url-visits"
+    assert entry["plan"] is None  # EXPLAIN only runs on PostgreSQL
+
+
+def test_describe_parameters():
+    """Test parameter shapes keep types and lengths but not values."""
+    assert describe_parameters({"ids": [1, 2, 3], "email": "a@b.co", "limit": 5}) == {
+        "ids": "list[3]", "email": "str[6]", "limit": "int"
+    }
+    assert describe_parameters([("a", 1), ("b", 2)], executemany=True) == {
+        "executemany": 2, "row": ["str[1]", "int"]
+    }
+
+
+def test_ring_buffer_is_bounded():
+    """Test the log keeps only the most recent entries."""
+    log = SlowQueryLog(maxlen=3)
+    for i in range(5):
+        log.record({"fingerprint": f"q{i}"})
+
+    assert [entry["fingerprint"] for entry in log.entries()] == ["q4", "q3", "q2"]
+
+
+def test_explain_cooldown_per_fingerprint():
+    """Test a fingerprint is explained at most once per cooldown."""
+    log = SlowQueryLog(maxlen=3)
+
+    assert log.should_explain("select_contracts_abc", 60) is True
+    assert log.should_explain("select_contracts_abc", 60) is False
+    assert log.should_explain("select_users_def", 60) is True
+
+
+def test_can_analyze():
+    """Test statements with locks or side effects are not executed again."""
+    assert can_analyze("SELECT * FROM contracts WHERE organization_id = %(organization_id_1)s")
+    assert not can_analyze("SELECT * FROM contracts WHERE contract_id = %(id)s FOR UPDATE")
+    assert not can_analyze("SELECT * FROM contracts FOR NO KEY UPDATE SKIP LOCKED")
+    assert not can_analyze("SELECT nextval('contracts_contract_id_seq')")
+
+
+class ImmediateExecutor:
+    """Runs submitted work right away instead of in the background thread."""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+def record_on_postgresql(statement):
+    """Record a slow statement as if it ran on PostgreSQL, returning the connection used."""
+    connection = MagicMock()
+    connection.dialect.name = "postgresql"
+    with patch.object(slow_queries, "SLOW_QUERY_EXPLAIN_ENABLED", True), \
+            patch.object(slow_queries, "SLOW_QUERY_EXPLAIN_SAMPLE_RATE", 1.0), \
+            patch.object(slow_queries, "_explain_executor", ImmediateExecutor()):
+        entry = slow_queries.record_slow_query(
+            connection, statement, {"id": 1}, False, 1.0, statement, "select_contracts_abc"
+        )
+    return connection, entry
+
+
+def test_explain_runs_on_separate_connection():
+    """Test the plan comes from a new connection of the engine, rolled back, not the request's."""
+    connection, entry = record_on_postgresql("SELECT * FROM contracts WHERE contract_id = %(id)s")
+    explain_connection = connection.engine.connect.return_value.__enter__.return_value
+    cursor = explain_connection.connection.dbapi_connection.cursor.return_value
+
+    assert entry["explain"] == "analyze"
+    assert cursor.execute.call_args.args[0].startswith("EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) SELECT")
+    explain_connection.rollback.assert_called_once()
+    connection.connection.dbapi_connection.cursor.assert_not_called()
+
+
+def test_locking_statement_gets_plain_explain():
+    """Test a SELECT ... FOR UPDATE is explained without ANALYZE."""
+    connection, entry = record_on_postgresql("SELECT * FROM contracts WHERE contract_id = %(id)s FOR UPDATE")
+    cursor = connection.engine.connect.return_value.__enter__.return_value.connection.dbapi_connection.cursor.return_value
+
+    assert entry["explain"] == "plain"
+    assert cursor.execute.call_args.args[0].startswith("EXPLAIN (FORMAT TEXT) SELECT")
+
+
+def test_explain_failure_is_recorded():
+    """Test a failed EXPLAIN keeps its cause and frees the slot for the next one."""
+    connection = MagicMock()
+    connection.engine.connect.side_effect = RuntimeError("connection refused")
+    entry = {"fingerprint": "select_contracts_abc"}
+
+    with patch.object(slow_queries, "_explain_executor", ImmediateExecutor()):
+        assert slow_queries.schedule_explain(entry, connection.engine, "SELECT 1", None) is True
+        assert slow_queries.schedule_explain(dict(entry), connection.engine, "SELECT 1", None) is True
+
+    assert entry["plan_error"] == "connection refused"
+
+
+class TestSlowQueryEndpoint:
+    """Tests for the admin slow query endpoint."""
+
+    @pytest.fixture
+    def client(self):
+        app = FastAPI()
+        register_admin_routes(app)
+        with patch.object(users, "OPS_API_TOKEN", "ops-secret"):
+            yield TestClient(app)
+
+    def test_operator_can_read_slow_queries(self, client):
+        """Test operators get the recorded slow queries."""
+        slow_query_log.record({
+            "fingerprint": "select_contracts_abc",
+            "statement": "SELECT * FROM contracts WHERE organization_id = ?",
+            "parameter_shapes": {"organization_id_1": "str[36]"},
+            "duration_ms": 512.0,
+            "route": "GET /api/v1/organizations/org_1/contract-usage",
+            "recorded_at": "2025-05-01T00:00:00+00:00",
+            "plan": None
+        })
+
+        response = client.get("/api/v1/admin/slow-queries", headers={"X-Ops-Token": "ops-secret"})
+
+        assert response.status_code == 200
+        assert response.json()["queries"][0]["fingerprint"] == "select_contracts_abc"
+
+    def test_tenant_admins_are_forbidden(self, client):
+        """Test the log is not readable without the operator token, e.g. by a tenant admin."""
+        assert client.get("/api/v1/admin/slow-queries").status_code == 403
+        assert client.get(
+            "/api/v1/admin/slow-queries", headers={"X-Ops-Token": "admin-jwt"}
+        ).status_code == 403
+
+    def test_disabled_without_operator_token(self):
+        """Test the endpoint is closed when OPS_API_TOKEN is not set."""
+        app = FastAPI()
+        register_admin_routes(app)
+
+        with patch.object(users, "OPS_API_TOKEN", None):
+            response = TestClient(app).get("/api/v1/admin/slow-queries", headers={"X-Ops-Token": ""})
+
+        assert response.status_code == 403
@@ -15,10 +15,12 @@ from datetime import datetime, timezone
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.dml import Insert
 
 from procure.server.url_visits.routes import log_url_visits
-from procure.server.url_visits.schemas import UrlVisitLog, UrlVisitEntry
-from procure.db.models import User, Organization, Contract, UserActivity
+from procure.utils.url_visit_batch import UrlVisitBatch
+from procure.server.url_visits.schemas import UrlVisitEntry
+from procure.db.models import User, Organization, Contract
 
 
 # Mock user data for different organizations
@@ -96,6 +98,18 @@ def mock_db():
     return db
 
 
+def inserted_activities(mock_db):
+    """Get the rows of the single user_activities INSERT executed on the mock session."""
+    inserts = [call for call in mock_db.execute.call_args_list if call.args and isinstance(call.args[0], Insert)]
+    assert len(inserts) == 1
+    return inserts[0].args[1]
+
+
+def assert_no_activities_inserted(mock_db):
+    """Assert no INSERT was executed on the mock session."""
+    assert not any(call.args and isinstance(call.args[0], Insert) for call in mock_db.execute.call_args_list)
+
+
 # Mock process_url_visits function
 @pytest.fixture
 def mock_process_url_visits():
@@ -104,13 +118,18 @@ def mock_process_url_visits():
         yield mock
 
 
+def url_visit_batch(entries):
+    """Build the columnar batch the endpoint receives from validated entries."""
+    return UrlVisitBatch.from_entries(entry.model_dump() for entry in entries)
+
+
 # Test cases for URL visits endpoint
 @pytest.mark.asyncio
 async def test_log_url_visits_success(mock_db, mock_process_url_visits):
     """Test successful URL visit logging."""
     # Setup
     email = "user1@firebaystudios.com"
-    log_data = UrlVisitLog(
+    log_data = url_visit_batch(
         entries=[
             UrlVisitEntry(
                 url="https://mail.google.com",
@@ -142,8 +161,8 @@ async def test_log_url_visits_success(mock_db, mock_process_url_visits):
     assert call_args[0] == mock_db
     assert call_args[1] == email
     assert len(call_args[2]) == 1
-    assert call_args[2][0]["url"] == "https://mail.google.com"
-    assert call_args[2][0]["browser"] == "Chrome"
+    assert call_args[2].hostnames[0] == "mail.google.com"
+    assert call_args[2].browser(0) == "Chrome"
 
 
 @pytest.mark.asyncio
@@ -151,7 +170,7 @@ async def test_log_url_visits_no_matches(mock_db, mock_process_url_visits):
     """Test URL visit logging with no matching contracts."""
     # Setup
     email = "user1@firebaystudios.com"
-    log_data = UrlVisitLog(
+    log_data = url_visit_batch(
         entries=[
             UrlVisitEntry(
                 url="https://unknown-site.com",
@@ -183,7 +202,7 @@ async def test_log_url_visits_already_visited(mock_db, mock_process_url_visits):
     """Test URL visit logging for a site already visited this month."""
     # Setup
     email = "user1@firebaystudios.com"
-    log_data = UrlVisitLog(
+    log_data = url_visit_batch(
         entries=[
             UrlVisitEntry(
                 url="https://mail.google.com",
@@ -215,7 +234,7 @@ async def test_log_url_visits_user_not_found(mock_db, mock_process_url_visits):
     """Test URL visit logging with a non-existent user."""
     # Setup
     email = "nonexistent@example.com"
-    log_data = UrlVisitLog(
+    log_data = url_visit_batch(
         entries=[
             UrlVisitEntry(
                 url="https://mail.google.com",
@@ -245,7 +264,7 @@ async def test_log_url_visits_database_error(mock_db, mock_process_url_visits):
     """Test URL visit logging with a database error."""
     # Setup
     email = "user1@firebaystudios.com"
-    log_data = UrlVisitLog(
+    log_data = url_visit_batch(
         entries=[
             UrlVisitEntry(
                 url="https://mail.google.com",
@@ -274,7 +293,6 @@ class TestUrlVisitsIntegration:
     async def test_process_url_visits_new_activity(self, mock_db, mock_users, mock_contracts):
         """Test processing URL visits creates new activity for first visit this month."""
         from procure.db import core as db_core
-        from procure.server.utils import get_base_domain
 
         # Setup
         user = mock_users["user1"]
@@ -294,13 +312,12 @@ class TestUrlVisitsIntegration:
             None   # No existing activity this month
         ]
         mock_db.execute().fetchall.side_effect = [
-            [(1, "google.com")],  # matching_contracts
+            [(1, "https://mail.google.com", "google.com")],  # organization contracts
             []  # existing_activities_query (no existing activities)
         ]
 
         # Execute with real function
-        with patch("procure.server.utils.get_base_domain", return_value="google.com"):
-            result = db_core.process_url_visits(mock_db, email, entries)
+        result = db_core.process_url_visits(mock_db, email, entries)
 
         # Verify
         assert result["success"] is True
@@ -308,15 +325,14 @@ class TestUrlVisitsIntegration:
         assert result["matched"] == 1
         assert result["message"] == "URL visit logs processed successfully"
 
-        # Verify bulk_save_objects was called to create new activity
-        mock_db.bulk_save_objects.assert_called_once()
+        # Verify one INSERT created the new activity
+        activities = inserted_activities(mock_db)
         mock_db.commit.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_process_url_visits_already_visited(self, mock_db, mock_users, mock_contracts):
         """Test processing URL visits doesn't create activity for already visited site."""
         from procure.db import core as db_core
-        from procure.server.utils import get_base_domain
 
         # Setup
         user = mock_users["user1"]
@@ -335,13 +351,12 @@ class TestUrlVisitsIntegration:
             user  # get_user_by_email
         ]
         mock_db.execute().fetchall.side_effect = [
-            [(1, "google.com")],  # matching_contracts
+            [(1, "https://mail.google.com", "google.com")],  # organization contracts
             [(1,)]  # existing_activities_query (existing activity)
         ]
 
         # Execute with real function
-        with patch("procure.server.utils.get_base_domain", return_value="google.com"):
-            result = db_core.process_url_visits(mock_db, email, entries)
+        result = db_core.process_url_visits(mock_db, email, entries)
 
         # Verify
         assert result["success"] is True
@@ -349,15 +364,14 @@ class TestUrlVisitsIntegration:
         assert result["matched"] == 0
         assert result["message"] == "No matching URLs found or all matches already have activities this month"
 
-        # Verify bulk_save_objects was not called
-        mock_db.bulk_save_objects.assert_not_called()
+        # Verify no activities were inserted
+        assert_no_activities_inserted(mock_db)
         mock_db.commit.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_process_url_visits_different_orgs(self, mock_db, mock_users, mock_contracts):
         """Test processing URL visits for users from different organizations."""
         from procure.db import core as db_core
-        from procure.server.utils import get_base_domain
 
         # Setup for user1 (org1)
         user1 = mock_users["user1"]
@@ -385,13 +399,12 @@ class TestUrlVisitsIntegration:
         # Mock database queries for user1
         mock_db.scalars().one_or_none.return_value = user1  # get_user_by_email for user1
         mock_db.execute().fetchall.side_effect = [
-            [(1, "google.com")],  # matching_contracts for user1
+            [(1, "https://mail.google.com", "google.com")],  # organization contracts for user1
             []                    # existing_activities_query for user1
         ]
 
         # Execute with real function for user1
-        with patch("procure.server.utils.get_base_domain", return_value="google.com"):
-            result1 = db_core.process_url_visits(mock_db, email1, entries1)
+        result1 = db_core.process_url_visits(mock_db, email1, entries1)
 
         # Reset mocks for user2
         mock_db.reset_mock()
@@ -399,13 +412,12 @@ class TestUrlVisitsIntegration:
         # Set up mocks again for user2
         mock_db.scalars().one_or_none.return_value = user2
         mock_db.execute().fetchall.side_effect = [
-            [(3, "slack.com")],  # matching_contracts for user2
+            [(3, "https://app.slack.com", "slack.com")],  # organization contracts for user2
             []                    # existing_activities_query for user2
         ]
 
         # Execute with real function for user2
-        with patch("procure.server.utils.get_base_domain", return_value="slack.com"):
-            result2 = db_core.process_url_visits(mock_db, email2, entries2)
+        result2 = db_core.process_url_visits(mock_db, email2, entries2)
 
         # Verify results for both users
         assert result1["success"] is True
@@ -0,0 +1,103 @@
+"""
+Unit tests for subdomain-aware vendor matching.
+
+These tests verify that:
+1. Hostnames match the contracts of their longest contract host suffix
+2. Matches only happen on whole domain labels
+3. Matchers are built once per organization and contract version
+4. process_url_visits attributes visits to the most specific contract
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.orm import Session
+
+from procure.db import core as db_core
+from procure.db.models import User
+from procure.db.vendor_matcher import (
+    VendorMatcher,
+    contract_host,
+    get_vendor_matcher,
+    invalidate_vendor_matcher
+)
+
+
+@pytest.fixture
+def matcher():
+    return VendorMatcher([
+        (1, "google.com"),
+        (2, "mail.google.com"),
+        (3, "drive.google.com"),
+        (4, "slack.com"),
+        (5, "slack.com")
+    ])
+
+
+@pytest.mark.parametrize("hostname,contract_ids", [
+    ("mail.google.com", (2,)),
+    ("eu.mail.google.com", (2,)),
+    ("drive.google.com", (3,)),
+    ("calendar.google.com", (1,)),
+    ("google.com", (1,)),
+    ("app.slack.com", (4, 5)),
+    ("notgoogle.com", ()),
+    ("com", ()),
+    ("", ())
+])
+def test_longest_suffix_match(matcher, hostname, contract_ids):
+    """Test hostnames match the most specific contract host on label boundaries."""
+    assert matcher.match(hostname) == contract_ids
+
+
+@pytest.mark.parametrize("product_url,vendor_domain,host", [
+    ("https://www.figma.com", "figma.com", "figma.com"),
+    ("https://Mail.Google.com:443", "google.com", "mail.google.com"),
+    ("", "zoom.us", "zoom.us")
+])
+def test_contract_host(product_url, vendor_domain, host):
+    """Test contracts are keyed by their product URL host without www."""
+    assert contract_host(product_url, vendor_domain) == host
+
+
+def test_matcher_built_once_per_version():
+    """Test contracts are only loaded again after the organization is invalidated."""
+    db = MagicMock(spec=Session)
+    db.execute().fetchall.return_value = [(1, "https://mail.google.com", "google.com")]
+    db.execute.reset_mock()
+
+    first = get_vendor_matcher(db, "org_1")
+    second = get_vendor_matcher(db, "org_1")
+
+    assert first is second
+    assert db.execute.call_count == 1
+
+    invalidate_vendor_matcher("org_1")
+    third = get_vendor_matcher(db, "org_1")
+
+    assert third is not first
+    assert third.match("mail.google.com") == (1,)
+    assert db.execute.call_count == 2
+
+
+def test_process_url_visits_attributes_subdomains():
+    """Test visits to different products of one vendor go to their own contracts."""
+    db = MagicMock(spec=Session)
+    user = User(id="user1", email="user1@firebaystudios.com", organization_id="org_1")
+    db.scalars().one_or_none.return_value = user
+    db.execute().fetchall.side_effect = [
+        [(1, "https://mail.google.com", "google.com"), (2, "https://drive.google.com", "google.com")],
+        []  # existing_activities_query
+    ]
+    timestamp = int(datetime.now(timezone.utc).timestamp() * 1000)
+    entries = [
+        {"url": "https://drive.google.com/file/1", "browser": "Chrome", "timestamp": timestamp},
+        {"url": "https://calendar.google.com", "browser": "Chrome", "timestamp": timestamp}
+    ]
+
+    result = db_core.process_url_visits(db, user.email, entries)
+
+    assert result["matched"] == 1
+    insert_call = db.execute.call_args_list[-1]
+    assert [row["contract_id"] for row in insert_call.args[1]] == [2]
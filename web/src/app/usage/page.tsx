@@ -5,7 +5,7 @@ import ProtectedRoute from "@/components/auth/protected-route";
 import { Button } from "@/components/ui/button";
 import { useRouter } from "next/navigation";
 import { useState, useEffect, useMemo } from "react";
-import { getOrganizationName, getContractUsage, ContractUsageData } from "@/lib/api/organization-api";
+import { getOrganizationName, getContractUsage, subscribeContractUsage, ContractUsageData } from "@/lib/api/organization-api";
 import { ChevronLeft, ChevronRight, Settings } from "lucide-react";
 import {
   Dialog,
@@ -114,6 +114,22 @@ export default function UsagePage() {
     fetchData();
   }, [user?.organization_id]);
 
+  // Keep active users up to date while the page is open
+  useEffect(() => {
+    if (!user?.organization_id) {
+      return;
+    }
+
+    return subscribeContractUsage(
+      user.organization_id,
+      (usage) => setContractUsage(usage.contracts),
+      (updates) => setContractUsage((contracts) => contracts.map((contract) => {
+        const update = updates.find((item) => item.contract_id === contract.contract_id);
+        return update ? { ...contract, active_users: update.active_users } : contract;
+      }))
+    );
+  }, [user?.organization_id]);
+
   return (
     <ProtectedRoute>
       <div className="container mx-auto py-10 max-w-4xl">
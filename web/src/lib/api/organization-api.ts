@@ -9,6 +9,7 @@ export interface Organization {
 }
 
 export interface ContractUsageData {
+  contract_id: number;
   vendor_name: string;
   active_users: number;
   total_seats: number;
@@ -21,6 +22,11 @@ export interface ContractUsageResponse {
   contracts: ContractUsageData[];
 }
 
+export interface ContractUsageUpdate {
+  contract_id: number;
+  active_users: number;
+}
+
 
 
 /**
@@ -67,4 +73,29 @@ export const getContractUsage = async (organizationId: string): Promise<Contract
   }
 };
 
+/**
+ * Follow live contract usage updates for an organization (Server-Sent Events)
+ * @param organizationId The organization ID to follow
+ * @param onSnapshot Called with the full contract usage on every (re)connect
+ * @param onUpdate Called with the new active users of contracts that gained activity
+ * @returns A function that closes the stream
+ */
+export const subscribeContractUsage = (
+  organizationId: string,
+  onSnapshot: (usage: ContractUsageResponse) => void,
+  onUpdate: (updates: ContractUsageUpdate[]) => void
+): (() => void) => {
+  // The browser reconnects on its own when the stream ends, starting with a new snapshot
+  const source = new EventSource(`${API_BASE_URL}/organizations/${organizationId}/contract-usage/stream`, {
+    withCredentials: true // Important for cookies
+  });
+
+  source.addEventListener('snapshot', (event) => {
+    onSnapshot(JSON.parse((event as MessageEvent).data));
+  });
+  source.addEventListener('usage', (event) => {
+    onUpdate(JSON.parse((event as MessageEvent).data).contracts);
+  });
 
+  return () => source.close();
+};